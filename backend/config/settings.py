@@ -1,5 +1,6 @@
 from pathlib import Path
 import os
+import tempfile
 from datetime import timedelta
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -26,6 +27,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "core.middleware.RequestMetricsMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -131,6 +133,61 @@ CSRF_COOKIE_SECURE = True
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / "media"
 
+# ── キャッシュ ────────────────────────────────────────────────────
+# マスタ系 API のレスポンスキャッシュ（core/services/master_cache.py）。
+# gunicorn の複数ワーカーで無効化を共有できるよう既定はファイル。
+# CACHE_BACKEND=locmem でプロセス内メモリに切り替えられる（単一プロセス用）。
+CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "file")
+
+if CACHE_BACKEND == "locmem":
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "app",
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            # ソースツリーの外（docker-compose では backend と report-worker で共有するボリューム）
+            "LOCATION": os.environ.get("CACHE_DIR", os.path.join(tempfile.gettempdir(), "app-cache")),
+        }
+    }
+
+# ── リクエスト計測 ────────────────────────────────────────────────
+# URL ごとの応答時間・SQL件数・重複SQL（core/middleware.py）。
+# プロセス内で集計し、REQUEST_METRICS_FLUSH_SECONDS ごとに request_metrics テーブルへ書き出す。
+REQUEST_METRICS_ENABLED = os.environ.get("REQUEST_METRICS_ENABLED", "1") == "1"
+REQUEST_METRICS_FLUSH_SECONDS = int(os.environ.get("REQUEST_METRICS_FLUSH_SECONDS", "60"))
+REQUEST_METRICS_RETENTION_DAYS = int(os.environ.get("REQUEST_METRICS_RETENTION_DAYS", "14"))
+
+# ── PDF ───────────────────────────────────────────────────────────
+# 見積書・注文書 PDF（core/services/pdf_service.py）。
+# 作成した PDF は内容とテンプレートのハッシュをファイル名にして保存し、同じ内容の再印刷では作り直さない。
+# 一括出力（ReportJob "pdf_batch"）はレポートワーカーが PDF_BATCH_WORKERS 個のプロセスで描画する（0 = CPU数）。
+# 顧客情報を含むのでソースツリーの外に置く（docker-compose では専用ボリューム pdf-cache）
+PDF_CACHE_DIR = os.environ.get("PDF_CACHE_DIR", os.path.join(tempfile.gettempdir(), "app-pdf"))
+PDF_CACHE_MAX_AGE_DAYS = int(os.environ.get("PDF_CACHE_MAX_AGE_DAYS", "90"))
+PDF_BATCH_WORKERS = int(os.environ.get("PDF_BATCH_WORKERS", "0"))
+# gunicorn の各ワーカー起動時にフォント・CSS を読み込んでおく（config/wsgi.py）
+PDF_WARM_UP = os.environ.get("PDF_WARM_UP", "1") == "1"
+
+# ── メディア配信・画像 ────────────────────────────────────────────
+# 本番は nginx が /media/ を直接配信する（docker/nginx/default.conf）。
+# 認証が必要なファイル（帳票ジョブの結果・PDF）は Django で権限を確認したあと
+# X-Accel-Redirect で nginx の内部 location に渡し、本文の送信は nginx に任せる。
+MEDIA_ACCEL_REDIRECT = os.environ.get("MEDIA_ACCEL_REDIRECT", "0") == "1"
+# ファイルシステム上のディレクトリ → nginx の internal location
+ACCEL_REDIRECT_LOCATIONS = {
+    str(MEDIA_ROOT / "report_jobs"): "/media/report_jobs/",
+    PDF_CACHE_DIR: "/internal/pdf/",
+}
+# アップロード画像の派生ファイル（core/services/image_derivatives.py。長辺の最大ピクセル）
+IMAGE_THUMBNAIL_SIZE = int(os.environ.get("IMAGE_THUMBNAIL_SIZE", "320"))
+IMAGE_PREVIEW_SIZE = int(os.environ.get("IMAGE_PREVIEW_SIZE", "1200"))
+IMAGE_DERIVATIVE_QUALITY = int(os.environ.get("IMAGE_DERIVATIVE_QUALITY", "80"))
+
 # ── ログ設定 ──────────────────────────────────────────────────────
 LOGS_DIR = BASE_DIR / "logs"
 LOGS_DIR.mkdir(exist_ok=True)
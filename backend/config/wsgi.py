@@ -14,3 +14,11 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_wsgi_application()
+
+# PDF のフォント・CSS をワーカーごとに1回読み込んでおく（最初の印刷を待たせない）
+from django.conf import settings  # noqa: E402
+
+if getattr(settings, "PDF_WARM_UP", False):
+    from core.services.pdf_service import warm_up  # noqa: E402
+
+    warm_up()
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from core.models import Vehicle, refresh_current_registrations
+
+
+class Command(BaseCommand):
+    help = "Backfill Vehicle.current_registration / inspection_expiration from registrations"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        ids = list(Vehicle.objects.order_by("id").values_list("id", flat=True))
+
+        updated = 0
+        for i in range(0, len(ids), batch_size):
+            updated += refresh_current_registrations(ids[i:i + batch_size])
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Current registrations backfilled. Vehicles: {updated}")
+        )
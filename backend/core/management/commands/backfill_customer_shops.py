@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from core.models import Customer, refresh_customer_shops
+
+
+class Command(BaseCommand):
+    help = "Backfill Customer.first_shop / last_shop from orders and estimates"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        ids = list(Customer.objects.order_by("id").values_list("id", flat=True))
+
+        updated = 0
+        for i in range(0, len(ids), batch_size):
+            updated += refresh_customer_shops(ids[i:i + batch_size])
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Customer shops backfilled. Customers: {len(ids)}  Updated: {updated}")
+        )
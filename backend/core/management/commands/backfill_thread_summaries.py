@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from core.models import BusinessCommunicationThread, refresh_thread_summaries
+
+
+class Command(BaseCommand):
+    help = "Backfill BusinessCommunicationThread summary columns and participants from messages"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        ids = list(BusinessCommunicationThread.objects.order_by("id").values_list("id", flat=True))
+
+        updated = 0
+        for i in range(0, len(ids), batch_size):
+            updated += refresh_thread_summaries(ids[i:i + batch_size])
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Thread summaries backfilled. Threads: {updated}")
+        )
@@ -0,0 +1,128 @@
+"""
+主要 API の応答時間と SQL 件数を測り、JSON のベースラインに保存・比較する。
+
+使い方:
+  python manage.py seed_demo_data --customers 20000           # 計測用データ（初回のみ）
+  python manage.py benchmark_endpoints --output benchmarks/baseline.json
+  python manage.py benchmark_endpoints --compare benchmarks/baseline.json
+  python manage.py benchmark_endpoints --only orders.list management.csv --repeat 10
+
+--compare を付けると、SQL件数が増えた・中央値が --max-slowdown 倍を超えて遅くなった・
+ステータスが変わったシナリオを劣化として表示し、1件でもあれば終了コード1で終わる（デプロイ前チェック用）。
+SQL件数はデータが同じなら毎回同じになる。ベースラインと件数が違うデータで測った場合は警告を出す。
+"""
+import json
+import os
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core.services.benchmark import (
+    DEFAULT_MAX_EXTRA_QUERIES,
+    DEFAULT_MAX_SLOWDOWN,
+    DEFAULT_MIN_DELTA_MS,
+    SCENARIO_NAMES,
+    compare,
+    run_benchmark,
+)
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Measure latency and query counts of hot API endpoints and write/compare a JSON baseline"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", help="結果を書き出す JSON ファイル")
+        parser.add_argument("--compare", help="比較するベースライン JSON ファイル")
+        parser.add_argument("--only", nargs="*", choices=SCENARIO_NAMES, help="計測するシナリオ（既定: 全部）")
+        parser.add_argument("--repeat", type=int, default=5, help="シナリオごとの計測回数（既定: 5）")
+        parser.add_argument("--warmup", type=int, default=1, help="計測前に捨てる回数（既定: 1）")
+        parser.add_argument("--user", help="リクエストするユーザーのログインID（既定: 最初のスーパーユーザー）")
+        parser.add_argument("--max-slowdown", type=float, default=DEFAULT_MAX_SLOWDOWN,
+                            help=f"劣化とみなす中央値の倍率（既定: {DEFAULT_MAX_SLOWDOWN}）")
+        parser.add_argument("--min-delta-ms", type=float, default=DEFAULT_MIN_DELTA_MS,
+                            help=f"劣化とみなす中央値の最小差（既定: {DEFAULT_MIN_DELTA_MS}ms）")
+        parser.add_argument("--max-extra-queries", type=int, default=DEFAULT_MAX_EXTRA_QUERIES,
+                            help=f"許容する SQL 件数の増加（既定: {DEFAULT_MAX_EXTRA_QUERIES}）")
+
+    def handle(self, *args, **options):
+        user = self._get_user(options["user"])
+
+        baseline = None
+        if options["compare"]:
+            try:
+                with open(options["compare"], encoding="utf-8") as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"ベースラインを読み込めません: {e}")
+
+        result = run_benchmark(user, names=options["only"], repeat=options["repeat"], warmup=options["warmup"])
+
+        self.stdout.write(f"データ: {result['dataset']}")
+        self.stdout.write(f"{'scenario':<26}{'status':>7}{'queries':>9}{'median':>10}{'p95':>10}  baseline")
+
+        report = None
+        if baseline is not None:
+            report = compare(
+                baseline, result,
+                max_slowdown=options["max_slowdown"],
+                min_delta_ms=options["min_delta_ms"],
+                max_extra_queries=options["max_extra_queries"],
+            )
+            rows = report["rows"]
+        else:
+            rows = [{"name": name, "current": cur, "base": None, "regressions": []}
+                    for name, cur in result["scenarios"].items()]
+
+        for row in rows:
+            cur = row["current"]
+            line = (
+                f"{row['name']:<26}{cur['status']:>7}{cur['queries']:>9}"
+                f"{cur['latency_ms']['median']:>9.1f}ms{cur['latency_ms']['p95']:>8.1f}ms"
+            )
+            base = row["base"]
+            if base is not None:
+                line += f"  {base['queries']}q / {base['latency_ms']['median']:.1f}ms"
+            elif baseline is not None:
+                line += "  (new)"
+            if row["regressions"]:
+                self.stdout.write(self.style.ERROR(f"{line}  ← {', '.join(row['regressions'])}"))
+            elif cur["max_repeat"] or not cur["queries_stable"]:
+                notes = []
+                if cur["max_repeat"]:
+                    notes.append(f"同一SQL最大{cur['max_repeat']}回")
+                if not cur["queries_stable"]:
+                    notes.append("SQL件数が回ごとに違う")
+                self.stdout.write(self.style.WARNING(f"{line}  ({', '.join(notes)})"))
+            else:
+                self.stdout.write(line)
+
+        if options["output"]:
+            directory = os.path.dirname(options["output"])
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(options["output"], "w", encoding="utf-8") as f:
+                json.dump(result, f, ensure_ascii=False, indent=2)
+            self.stdout.write(f"書き出し: {options['output']}")
+
+        if report is None:
+            return
+        if report["dataset_changed"]:
+            self.stdout.write(self.style.WARNING(
+                f"ベースラインとデータ件数が違います（baseline: {baseline.get('dataset')}）。比較は参考値です"
+            ))
+        if report["regressions"]:
+            raise CommandError(f"劣化したシナリオ: {report['regressions']} 件")
+        self.stdout.write(self.style.SUCCESS("劣化なし"))
+
+    def _get_user(self, login_id):
+        if login_id:
+            user = User.objects.filter(login_id=login_id).first()
+            if user is None:
+                raise CommandError(f"ユーザーが見つかりません: {login_id}")
+            return user
+        user = User.objects.filter(is_superuser=True, is_active=True).order_by("id").first()
+        if user is None:
+            raise CommandError("スーパーユーザーがいません。--user でログインIDを指定してください")
+        return user
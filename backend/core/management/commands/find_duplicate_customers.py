@@ -0,0 +1,48 @@
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.management.base import BaseCommand
+
+from core.services.customer_duplicates import (
+    DEFAULT_MAX_BLOCK_SIZE,
+    DEFAULT_MIN_SCORE,
+    find_duplicate_clusters,
+)
+
+
+class Command(BaseCommand):
+    help = "Find duplicate customer clusters across the whole customer table"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--min-score", type=int, default=DEFAULT_MIN_SCORE)
+        parser.add_argument("--max-block-size", type=int, default=DEFAULT_MAX_BLOCK_SIZE)
+        parser.add_argument("--json", dest="json_path", default=None, help="結果をJSONファイルに書き出す")
+
+    def handle(self, *args, **options):
+        result = find_duplicate_clusters(
+            min_score=options["min_score"],
+            max_block_size=options["max_block_size"],
+        )
+
+        for cluster in result["clusters"]:
+            self.stdout.write(f"[score {cluster['max_score']}]")
+            for c in cluster["customers"]:
+                self.stdout.write(
+                    f"  #{c['id']} {c['name']} / {c['kana'] or ''} / "
+                    f"{c['phone'] or ''} / {c['mobile_phone'] or ''} / {c['email'] or ''}"
+                )
+            for p in cluster["pairs"]:
+                self.stdout.write(f"    #{p['a']} - #{p['b']}: {p['score']} ({', '.join(p['reasons'])})")
+
+        for block in result["skipped_blocks"]:
+            self.stdout.write(self.style.WARNING(
+                f"Skipped block {block['key']} ({block['size']} customers)"
+            ))
+
+        if options["json_path"]:
+            with open(options["json_path"], "w", encoding="utf-8") as f:
+                json.dump(result, f, cls=DjangoJSONEncoder, ensure_ascii=False, indent=2)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Scanned: {result['customers_scanned']}  Clusters: {len(result['clusters'])}"
+        ))
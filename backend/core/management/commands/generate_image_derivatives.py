@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from core.services import image_derivatives
+
+
+class Command(BaseCommand):
+    help = "Build thumbnails / preview images for uploaded customer and vehicle images"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rebuild", action="store_true", help="作成済みの画像も作り直す（サイズ変更時など）")
+        parser.add_argument("--retry-failed", action="store_true", help="失敗した画像を作成待ちに戻す")
+        parser.add_argument("--batch-size", type=int, default=200)
+
+    def handle(self, *args, **options):
+        if options["rebuild"] or options["retry_failed"]:
+            requeued = image_derivatives.requeue(failed_only=not options["rebuild"])
+            self.stdout.write(f"Requeued: {requeued}")
+
+        total = 0
+        while True:
+            processed = image_derivatives.process_pending(limit=options["batch_size"])
+            if not processed:
+                break
+            total += processed
+            self.stdout.write(f"  {total} ...")
+
+        self.stdout.write(self.style.SUCCESS(f"Image derivatives built. Images: {total}"))
@@ -5,9 +5,25 @@
   python manage.py import_customers_from_excel /path/to/data.xlsx
   python manage.py import_customers_from_excel /path/to/data.csv
   python manage.py import_customers_from_excel /path/to/data.xlsx --dry-run
+  python manage.py import_customers_from_excel /path/to/data.xlsx --chunk-size 2000
+  python manage.py import_customers_from_excel /path/to/data.xlsx --restart
+
+行はストリーミングで読み（Excel は openpyxl の read-only、CSV は csv.reader）、
+--chunk-size 行ごとに1トランザクションでまとめて書き込む。
+- 既存顧客（氏名）・既存車両（車体№）はチャンク単位で一括照会
+- 各モデルはチャンク単位で bulk_create
+- チャンクのコミットごとにチェックポイント（既定: <ファイル>.checkpoint.json）を保存し、
+  中断後に同じコマンドを再実行すると続きのチャンクから再開する（--restart で最初から）
+- チャンクがエラーになった場合はそのチャンクだけ1行ずつ取り込み直し、問題の行をスキップする
 """
+import csv
+import itertools
+import json
+import os
 import sys
-from datetime import date
+import time
+from collections import Counter, defaultdict
+from datetime import date, datetime
 
 import jaconv
 import pandas as pd
@@ -17,16 +33,31 @@ from django.db import transaction
 from django.contrib.auth import get_user_model
 
 from core.models.categories import Category, Manufacturer
+from core.models.customer_search import CustomerSearchIndex
 from core.models.customers import Customer, CustomerMemo, CustomerVehicle
 from core.models.masters import Color, CustomerClass, Gender
-from core.models.vehicles import Vehicle, VehicleInsurance, VehicleMemo, VehicleRegistration
+from core.models.vehicles import (
+    Vehicle,
+    VehicleInsurance,
+    VehicleMemo,
+    VehicleRegistration,
+    refresh_current_registrations,
+)
 
 User = get_user_model()
 
+DEFAULT_CHUNK_SIZE = 1000
+
+# 見出し行の次（Excel 上の2行目）からがデータ
+FIRST_DATA_LINE = 2
+
 
 def _str(val):
-    if pd.isna(val):
+    if val is None or (not isinstance(val, str) and pd.isna(val)):
         return ""
+    # Excel の数値セル（1234.0 など）は整数表記にそろえる
+    if isinstance(val, float) and val.is_integer():
+        return str(int(val))
     return str(val).strip()
 
 
@@ -35,7 +66,7 @@ def _remove_spaces(val: str) -> str:
 
 
 def _int_or_none(val):
-    if pd.isna(val):
+    if val is None or val == "" or pd.isna(val):
         return None
     try:
         return int(float(val))
@@ -44,8 +75,10 @@ def _int_or_none(val):
 
 
 def _date_or_none(val):
-    if pd.isna(val):
+    if val is None or val == "" or (not isinstance(val, str) and pd.isna(val)):
         return None
+    if isinstance(val, datetime):
+        return val.date()
     if isinstance(val, date):
         return val
     try:
@@ -66,6 +99,401 @@ def _first_registration_date(year_str, month_str):
     return None
 
 
+# ==========================
+# 行の読み込み（ストリーミング）
+# ==========================
+def _open_rows(filepath):
+    """ファイルを開き、見出し行を除いたデータ行をタプルで順に返すイテレータを返す"""
+    if filepath.lower().endswith(".csv"):
+        f = open(filepath, encoding="shift_jis", newline="")
+        reader = csv.reader(f)
+        next(reader, None)
+        return _closing(f, (tuple(row) for row in reader))
+
+    from openpyxl import load_workbook
+
+    wb = load_workbook(filepath, read_only=True, data_only=True)
+    ws = wb.worksheets[0]
+    return _closing(wb, ws.iter_rows(min_row=FIRST_DATA_LINE, values_only=True))
+
+
+def _closing(resource, rows):
+    try:
+        yield from rows
+    finally:
+        resource.close()
+
+
+def _get(row, idx):
+    return _str(row[idx - 1]) if idx <= len(row) else ""
+
+
+def _get_date(row, idx):
+    return _date_or_none(row[idx - 1]) if idx <= len(row) else None
+
+
+def _get_int(row, idx):
+    return _int_or_none(row[idx - 1]) if idx <= len(row) else None
+
+
+# ==========================
+# チェックポイント
+# ==========================
+class Checkpoint:
+    """取り込み済みの行数と集計をJSONファイルに保存する（ファイルのサイズ・更新日時で同一性を確認）"""
+
+    def __init__(self, path, filepath):
+        self.path = path
+        stat = os.stat(filepath)
+        self.source = {
+            "file": os.path.abspath(filepath),
+            "size": stat.st_size,
+            "mtime": int(stat.st_mtime),
+        }
+
+    def load(self):
+        """(再開行数, 集計) を返す。チェックポイントがなければ None。別ファイルのものなら ValueError"""
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("source") != self.source:
+            raise ValueError(
+                f"チェックポイント {self.path} は別のファイル（または更新前のファイル）のものです。"
+                " --restart で最初から取り込んでください。"
+            )
+        return data["next_row"], Counter(data.get("stats", {}))
+
+    def save(self, next_row, stats):
+        # 書き込み途中で落ちても壊れないよう一時ファイルから置き換える
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"source": self.source, "next_row": next_row, "stats": dict(stats)}, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+# ==========================
+# チャンク単位の取り込み
+# ==========================
+class ChunkImporter:
+    """
+    パース済みの行（parse_row の戻り値）をチャンク単位で書き込む。
+    ファイル内の顧客No → 顧客ID の対応はコミット済みチャンクの分だけ保持する。
+    """
+
+    def __init__(self, memo_user):
+        self.memo_user = memo_user
+        self.customer_ids = {}
+
+        # --- マスタをキャッシュ ---
+        # 性別: "男"/"女" の部分一致でも拾えるようにリストで保持
+        self.all_genders = list(Gender.objects.all())
+        self.manufacturer_map = {m.name: m for m in Manufacturer.objects.all()}
+        self.color_map = {c.name: c for c in Color.objects.all()}
+        self.category_map = {c.name: c for c in Category.objects.filter(category_type="vehicle")}
+
+        # 顧客区分「個人」を取得（敬称が「様」の場合に使用）
+        self.kojin_class = CustomerClass.objects.filter(name__icontains="個人").first()
+
+    def _match_gender(self, val):
+        if not val:
+            return None
+        for g in self.all_genders:
+            if g.name == val:
+                return g
+        # 部分一致フォールバック（"男" → "男性" など）
+        for g in self.all_genders:
+            if val in g.name or g.name in val:
+                return g
+        return None
+
+    # ----------------------------
+    # 1行 → 取り込み内容
+    # ----------------------------
+    def parse_row(self, line, row):
+        """1行を取り込み内容の dict にする。顧客名が空なら None"""
+        customer_name = _remove_spaces(_get(row, 4))
+        if not customer_name:
+            return None
+
+        addr1 = _get(row, 5)
+        addr2 = _get(row, 6)
+        address = (addr1 + addr2).strip() or None
+
+        # 敬称が「様」なら顧客区分を個人に
+        keisho = _get(row, 24)
+
+        raw_kana = _remove_spaces(_get(row, 3))
+        kana = jaconv.h2z(raw_kana, kana=True, ascii=False, digit=False) if raw_kana else None
+
+        record = {
+            "line": line,
+            "customer_no": _get(row, 1),
+            "customer_name": customer_name,
+            "customer_data": {
+                "kana": kana,
+                "postal_code": _get(row, 22) or None,
+                "address": address,
+                "phone": _get(row, 102) or None,
+                "mobile_phone": _get(row, 103) or None,
+                "company": _get(row, 12) or None,
+                "company_phone": _get(row, 104) or None,
+                "email": _get(row, 47) or None,
+                "birthdate": _get_date(row, 36),
+                "gender": self._match_gender(_get(row, 35)),
+                "customer_class": self.kojin_class if keisho == "様" else None,
+                "app_no": _get(row, 32) or None,
+            },
+            # 客ﾒﾓ1-6 (col 88-93)
+            "customer_memos": [b for b in (_get(row, c) for c in range(88, 94)) if b],
+            # 顧担当 (col 21)
+            "legacy_staff": _get(row, 21),
+            "gender_raw": _get(row, 35),
+            "keisho": keisho,
+            "vehicle": None,
+        }
+
+        # --- 車両 ---
+        vehicle_name = _get(row, 51)
+        if not vehicle_name:
+            return record
+
+        manufacturer_name = _get(row, 70)
+        category_name = _get(row, 69)
+        color_name_val = _get(row, 73)
+
+        registration = {
+            "registration_area": _get(row, 55) or None,          # ③ 登録地
+            "registration_no": _get(row, 105) or None,           # ④ №ﾌﾟﾚｰﾄ
+            "certification_no": _get(row, 59) or None,           # ⑥ 型認番
+            "first_registration_date": _first_registration_date(  # ⑦ 初登年+初登月
+                _get(row, 82), _get(row, 83)
+            ),
+            "inspection_expiration": _get_date(row, 77),         # ② 車検終
+        }
+
+        insurances = []
+        # 自賠責：会社(col74) または 終了日(col79) があれば作成
+        jibai_company = _get(row, 74) or None
+        jibai_end = _get_date(row, 79)
+        if jibai_company or jibai_end:
+            insurances.append({"type": "mandatory", "company": jibai_company, "end_date": jibai_end})
+        # 任意保険：会社(col75) または 終了日(col78) があれば作成
+        nin_company = _get(row, 75) or None
+        nin_end = _get_date(row, 78)
+        if nin_company or nin_end:
+            insurances.append({"type": "optional", "company": nin_company, "end_date": nin_end})
+
+        record["vehicle"] = {
+            "chassis_no": _get(row, 57) or None,
+            "defaults": {
+                "vehicle_name": vehicle_name,
+                "displacement": _get_int(row, 52),
+                "model_year": _get(row, 53) or None,
+                "model_code": _get(row, 58) or None,
+                "new_car_type": _get(row, 68) or None,
+                "engine_type": _get(row, 60) or None,   # ⑤ 原動型
+                "manufacturer": self.manufacturer_map.get(manufacturer_name),
+                "category": self.category_map.get(category_name),
+                "color": self.color_map.get(color_name_val),
+                "color_name": color_name_val or None,
+                "color_code": _get(row, 72) or None,
+            },
+            "registration": registration if any(registration.values()) else None,
+            "insurances": insurances,
+            # 車ﾒﾓ1-6 (col 94-99)
+            "memos": [b for b in (_get(row, c) for c in range(94, 100)) if b],
+            "owned_from": _get_date(row, 76),
+            "manufacturer_name": manufacturer_name,
+            "category_name": category_name,
+        }
+        return record
+
+    # ----------------------------
+    # チャンクの書き込み
+    # ----------------------------
+    def write_chunk(self, records):
+        """
+        records を1トランザクションで書き込み、集計（Counter）を返す。
+        例外時はロールバックされ、顧客Noの対応表も更新しない。
+        """
+        stats = Counter()
+        with transaction.atomic():
+            new_customer_ids = self._write_customers(records, stats)
+            customer_ids = {**self.customer_ids, **new_customer_ids}
+            vehicle_ids = self._write_vehicles(records, stats)
+            self._write_ownerships(records, customer_ids, vehicle_ids, stats)
+
+            # bulk_create ではシグナルが飛ばないので検索インデックスはまとめて更新
+            CustomerSearchIndex.refresh(customer_ids[r["customer_no"]] for r in records)
+
+        self.customer_ids.update(new_customer_ids)
+        return stats
+
+    def _write_customers(self, records, stats):
+        """顧客（氏名で照合）と顧客メモを作成し、このチャンクで初出の {顧客No: 顧客ID} を返す"""
+        first_rows = {}
+        for r in records:
+            if r["customer_no"] not in self.customer_ids:
+                first_rows.setdefault(r["customer_no"], r)
+        if not first_rows:
+            return {}
+
+        # 同名の顧客が複数いる場合は最も古い顧客に寄せる
+        id_by_name = {}
+        for cid, name in Customer.objects.filter(
+            name__in={r["customer_name"] for r in first_rows.values()}
+        ).order_by("-id").values_list("id", "name"):
+            id_by_name[name] = cid
+
+        new_customers = {}
+        for r in first_rows.values():
+            name = r["customer_name"]
+            if name in id_by_name or name in new_customers:
+                stats["customers_updated"] += 1
+                continue
+            new_customers[name] = (Customer(name=name, **r["customer_data"]), r)
+            stats["customers_created"] += 1
+
+        # bulk_create は save() を通らないので重複検出用の照合キーをここで埋める
+        for c, _ in new_customers.values():
+            c.fill_match_keys()
+        Customer.objects.bulk_create([c for c, _ in new_customers.values()])
+        id_by_name.update({name: c.id for name, (c, _) in new_customers.items()})
+
+        memos = [
+            CustomerMemo(customer_id=c.id, body=body)
+            for c, r in new_customers.values()
+            for body in r["customer_memos"]
+        ]
+
+        # 顧担当 — 新規・既存ともに、まだなければ追加
+        staff_rows = [r for r in first_rows.values() if r["legacy_staff"]]
+        has_staff_memo = set(
+            CustomerMemo.objects.filter(
+                customer_id__in={id_by_name[r["customer_name"]] for r in staff_rows},
+                body__startswith="顧担当:",
+            ).values_list("customer_id", flat=True)
+        ) if staff_rows else set()
+        for r in staff_rows:
+            cid = id_by_name[r["customer_name"]]
+            if cid not in has_staff_memo:
+                memos.append(CustomerMemo(customer_id=cid, body=f"顧担当: {r['legacy_staff']}"))
+                has_staff_memo.add(cid)
+
+        CustomerMemo.objects.bulk_create(memos)
+
+        return {no: id_by_name[r["customer_name"]] for no, r in first_rows.items()}
+
+    def _write_vehicles(self, records, stats):
+        """車両（車体№で照合）と登録情報・保険・車両メモを作成し、{行番号: 車両ID} を返す"""
+        rows = [r for r in records if r["vehicle"]]
+        if not rows:
+            return {}
+
+        chassis_nos = {r["vehicle"]["chassis_no"] for r in rows if r["vehicle"]["chassis_no"]}
+        vehicle_by_chassis = dict(
+            Vehicle.objects.filter(chassis_no__in=chassis_nos).values_list("chassis_no", "id")
+        ) if chassis_nos else {}
+
+        new_vehicles = []          # (Vehicle, record)
+        vehicle_of_line = {}       # 行番号 → 車両ID または未保存の Vehicle
+        for r in rows:
+            v = r["vehicle"]
+            chassis_no = v["chassis_no"]
+            if chassis_no and chassis_no in vehicle_by_chassis:
+                vehicle_of_line[r["line"]] = vehicle_by_chassis[chassis_no]
+                continue
+
+            vehicle = Vehicle(chassis_no=chassis_no, **v["defaults"])
+            new_vehicles.append((vehicle, r))
+            vehicle_of_line[r["line"]] = vehicle
+            if chassis_no:
+                vehicle_by_chassis[chassis_no] = vehicle
+            stats["vehicles_created"] += 1
+
+        Vehicle.objects.bulk_create([v for v, _ in new_vehicles])
+
+        registrations, insurances, memos = [], [], []
+        for vehicle, r in new_vehicles:
+            v = r["vehicle"]
+            if v["registration"]:
+                registrations.append(VehicleRegistration(vehicle_id=vehicle.id, **v["registration"]))
+            insurances.extend(VehicleInsurance(vehicle_id=vehicle.id, **ins) for ins in v["insurances"])
+            memos.extend(
+                VehicleMemo(vehicle_id=vehicle.id, body=body, created_by=self.memo_user)
+                for body in v["memos"]
+            )
+
+        VehicleRegistration.objects.bulk_create(registrations)
+        VehicleInsurance.objects.bulk_create(insurances)
+        VehicleMemo.objects.bulk_create(memos)
+        # bulk_create ではシグナルが飛ばないので現在の登録もまとめて更新（検索インデックスより先）
+        refresh_current_registrations(r.vehicle_id for r in registrations)
+
+        return {
+            line: v if isinstance(v, int) else v.id
+            for line, v in vehicle_of_line.items()
+        }
+
+    def _write_ownerships(self, records, customer_ids, vehicle_ids, stats):
+        """
+        所有関係を行の順に反映する。
+        別の顧客が現所有していれば所有終了させ（終了日ごとに1回の update）、新しい所有をまとめて作成する。
+        """
+        if not vehicle_ids:
+            return
+
+        current = defaultdict(list)   # 車両ID → 現所有の CustomerVehicle（既存 or このチャンクで作成予定）
+        for cv in CustomerVehicle.objects.filter(
+            vehicle_id__in=set(vehicle_ids.values()),
+            owned_to__isnull=True,
+        ).only("id", "vehicle_id", "customer_id"):
+            current[cv.vehicle_id].append(cv)
+
+        ended = defaultdict(list)     # 終了日 → 既存 CustomerVehicle の ID
+        to_create = []
+
+        for r in records:
+            vehicle_id = vehicle_ids.get(r["line"])
+            if vehicle_id is None:
+                continue
+            customer_id = customer_ids[r["customer_no"]]
+
+            if any(cv.customer_id == customer_id for cv in current[vehicle_id]):
+                stats["cv_skipped"] += 1
+                continue
+
+            owned_from = r["vehicle"]["owned_from"]
+            owned_to = owned_from or date.today()
+            for cv in current[vehicle_id]:
+                if cv.pk:
+                    ended[owned_to].append(cv.pk)
+                else:
+                    cv.owned_to = owned_to
+                    cv.is_current = False
+
+            cv = CustomerVehicle(
+                customer_id=customer_id,
+                vehicle_id=vehicle_id,
+                owned_from=owned_from,
+                owned_to=None,
+                is_current=True,
+            )
+            current[vehicle_id] = [cv]
+            to_create.append(cv)
+            stats["cv_created"] += 1
+
+        # 現所有の一意制約があるので、終了させてから作成する
+        for owned_to, ids in ended.items():
+            CustomerVehicle.objects.filter(id__in=ids).update(owned_to=owned_to, is_current=False)
+        CustomerVehicle.objects.bulk_create(to_create)
+
+
 class Command(BaseCommand):
     help = "旧システムのExcel/CSVから顧客と所有車両をインポートする"
 
@@ -81,10 +509,27 @@ class Command(BaseCommand):
             default=None,
             help="車両メモのcreated_byに使うユーザー名（省略時はスーパーユーザーを自動選択）",
         )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help=f"1トランザクションで書き込む行数（既定: {DEFAULT_CHUNK_SIZE}）",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            default=None,
+            help="チェックポイントファイルのパス（既定: <ファイル>.checkpoint.json）",
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="チェックポイントを無視して最初から取り込む",
+        )
 
     def handle(self, *args, **options):
         filepath = options["file"]
         dry_run = options["dry_run"]
+        chunk_size = max(1, options["chunk_size"])
 
         # 車両メモのcreated_by用ユーザーを取得
         username = options.get("user")
@@ -99,282 +544,133 @@ class Command(BaseCommand):
             sys.exit(1)
         self.stdout.write(f"車両メモ作成者: {memo_user.username}")
 
+        if not os.path.exists(filepath):
+            self.stderr.write(f"ファイル読み込みエラー: {filepath} が見つかりません")
+            sys.exit(1)
+
+        # --- チェックポイント ---
+        checkpoint = Checkpoint(options["checkpoint"] or f"{filepath}.checkpoint.json", filepath)
+        start_row = 0
+        stats = Counter()
+        if not dry_run:
+            if options["restart"]:
+                checkpoint.clear()
+            try:
+                resumed = checkpoint.load()
+            except ValueError as e:
+                self.stderr.write(str(e))
+                sys.exit(1)
+            if resumed:
+                start_row, stats = resumed
+                self.stdout.write(f"チェックポイントから再開: {start_row} 行目まで取り込み済み")
+
+        importer = ChunkImporter(memo_user)
+
         self.stdout.write(f"読み込み中: {filepath}")
         try:
-            if filepath.lower().endswith(".csv"):
-                df = pd.read_csv(filepath, encoding="shift_jis", dtype=str)
-            else:
-                df = pd.read_excel(filepath, engine="openpyxl", dtype=str)
+            rows = enumerate(_open_rows(filepath))
+            rows = itertools.islice(rows, start_row, None)
         except Exception as e:
             self.stderr.write(f"ファイル読み込みエラー: {e}")
             sys.exit(1)
 
-        self.stdout.write(f"行数: {len(df)}  列数: {len(df.columns)}")
-
-        # --- マスタをキャッシュ ---
-        # 性別: "男"/"女" の部分一致でも拾えるようにリストで保持
-        all_genders = list(Gender.objects.all())
-        manufacturer_map = {m.name: m for m in Manufacturer.objects.all()}
-        color_map = {c.name: c for c in Color.objects.all()}
-        category_map = {c.name: c for c in Category.objects.filter(category_type="vehicle")}
-
-        # 顧客区分「個人」を取得（敬称が「様」の場合に使用）
-        kojin_class = CustomerClass.objects.filter(name__icontains="個人").first()
-
-        def _match_gender(val):
-            if not val:
-                return None
-            for g in all_genders:
-                if g.name == val:
-                    return g
-            # 部分一致フォールバック（"男" → "男性" など）
-            for g in all_genders:
-                if val in g.name or g.name in val:
-                    return g
-            return None
-
-        def get(row, idx):
-            try:
-                return _str(row.iloc[idx - 1])
-            except IndexError:
-                return ""
-
-        def get_date(row, idx):
-            try:
-                return _date_or_none(row.iloc[idx - 1])
-            except IndexError:
-                return None
+        processed = start_row
+        started = time.monotonic()
+        done_in_run = 0
+
+        while True:
+            chunk = list(itertools.islice(rows, chunk_size))
+            if not chunk:
+                break
+
+            records = []
+            for i, row in chunk:
+                try:
+                    record = importer.parse_row(i + FIRST_DATA_LINE, row)
+                except Exception as e:
+                    self.stderr.write(f"行 {i + FIRST_DATA_LINE} エラー: {e}")
+                    stats["skipped"] += 1
+                    continue
+                if record is None:
+                    stats["skipped"] += 1
+                    continue
+                records.append(record)
+
+            if dry_run:
+                self._print_dry_run(records, importer, stats)
+            else:
+                stats += self._write(importer, records)
 
-        def get_int(row, idx):
-            try:
-                return _int_or_none(row.iloc[idx - 1])
-            except IndexError:
-                return None
-
-        stats = {
-            "customers_created": 0,
-            "customers_updated": 0,
-            "vehicles_created": 0,
-            "cv_created": 0,
-            "cv_skipped": 0,
-            "skipped": 0,
-        }
+            processed = chunk[-1][0] + 1
+            done_in_run += len(chunk)
+            if not dry_run:
+                checkpoint.save(processed, stats)
 
-        seen_customer_no = {}
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f"  {processed} 行処理 ({done_in_run / elapsed if elapsed else 0:.0f} 行/秒)"
+            )
 
-        for i, row in df.iterrows():
-            try:
-                with transaction.atomic():
-                    customer_no = get(row, 1)
-                    customer_name = _remove_spaces(get(row, 4))
-
-                    if not customer_name:
-                        stats["skipped"] += 1
-                        continue
-
-                    # --- 顧客の作成/更新 ---
-                    if customer_no not in seen_customer_no:
-                        addr1 = get(row, 5)
-                        addr2 = get(row, 6)
-                        address = (addr1 + addr2).strip() or None
-
-                        gender = _match_gender(get(row, 35))
-
-                        # 敬称が「様」なら顧客区分を個人に
-                        keisho = get(row, 24)
-                        customer_class = kojin_class if keisho == "様" else None
-
-                        raw_kana = _remove_spaces(get(row, 3))
-                        kana = jaconv.h2z(raw_kana, kana=True, ascii=False, digit=False) if raw_kana else None
-
-                        customer_data = {
-                            "kana": kana,
-                            "postal_code": get(row, 22) or None,
-                            "address": address,
-                            "phone": get(row, 102) or None,
-                            "mobile_phone": get(row, 103) or None,
-                            "company": get(row, 12) or None,
-                            "company_phone": get(row, 104) or None,
-                            "email": get(row, 47) or None,
-                            "birthdate": get_date(row, 36),
-                            "gender": gender,
-                            "customer_class": customer_class,
-                            "app_no": get(row, 32) or None,
-                        }
-
-                        if not dry_run:
-                            customer, created = Customer.objects.get_or_create(
-                                name=customer_name,
-                                defaults=customer_data,
-                            )
-                            if created:
-                                stats["customers_created"] += 1
-                                # 客ﾒﾓ1-6 (col 88-93) を顧客メモに追加
-                                for memo_col in range(88, 94):
-                                    body = get(row, memo_col)
-                                    if body:
-                                        CustomerMemo.objects.create(customer=customer, body=body)
-                            else:
-                                stats["customers_updated"] += 1
-
-                            # 顧担当 (col 21) — 新規・既存ともに、まだなければ追加
-                            legacy_staff = get(row, 21)
-                            if legacy_staff and not customer.memos.filter(body__startswith="顧担当:").exists():
-                                CustomerMemo.objects.create(customer=customer, body=f"顧担当: {legacy_staff}")
-                        else:
-                            exists = Customer.objects.filter(name=customer_name).exists()
-                            self.stdout.write(
-                                f"  [顧客] {'更新' if exists else '新規'}: {customer_name}"
-                                f" 性別={get(row, 35)}→{'一致' if gender else '不一致'}"
-                                f" 敬称={keisho}"
-                            )
-                            customer = None
-                            stats["customers_created"] += 1
-
-                        seen_customer_no[customer_no] = customer
-                    else:
-                        customer = seen_customer_no[customer_no]
-
-                    # --- 車両の作成/取得 ---
-                    vehicle_name = get(row, 51)
-                    if not vehicle_name:
-                        continue
-
-                    chassis_no = get(row, 57) or None
-                    manufacturer_name = get(row, 70)
-                    category_name = get(row, 69)
-                    color_name_val = get(row, 73)
-
-                    manufacturer = manufacturer_map.get(manufacturer_name)
-                    category = category_map.get(category_name)
-                    color = color_map.get(color_name_val)
-
-                    vehicle_defaults = {
-                        "vehicle_name": vehicle_name,
-                        "displacement": get_int(row, 52),
-                        "model_year": get(row, 53) or None,
-                        "model_code": get(row, 58) or None,
-                        "new_car_type": get(row, 68) or None,
-                        "engine_type": get(row, 60) or None,   # ⑤ 原動型
-                        "manufacturer": manufacturer,
-                        "category": category,
-                        "color": color,
-                        "color_name": color_name_val or None,
-                        "color_code": get(row, 72) or None,
-                    }
-
-                    if not dry_run:
-                        if chassis_no:
-                            vehicle, created = Vehicle.objects.get_or_create(
-                                chassis_no=chassis_no,
-                                defaults=vehicle_defaults,
-                            )
-                        else:
-                            vehicle = Vehicle.objects.create(**vehicle_defaults)
-                            created = True
-
-                        if created:
-                            stats["vehicles_created"] += 1
-
-                            # --- VehicleRegistration 作成 ---
-                            reg_area  = get(row, 55)       # ③ 登録地
-                            reg_no    = get(row, 105)      # ④ №ﾌﾟﾚｰﾄ
-                            cert_no   = get(row, 59)       # ⑥ 型認番
-                            first_reg = _first_registration_date(  # ⑦ 初登年+初登月
-                                get(row, 82), get(row, 83)
-                            )
-                            inspection_exp = get_date(row, 77)  # ② 車検終
-
-                            if any([reg_area, reg_no, cert_no, first_reg, inspection_exp]):
-                                VehicleRegistration.objects.create(
-                                    vehicle=vehicle,
-                                    registration_area=reg_area or None,
-                                    registration_no=reg_no or None,
-                                    certification_no=cert_no or None,
-                                    first_registration_date=first_reg,
-                                    inspection_expiration=inspection_exp,
-                                )
-
-                            # --- 保険情報 作成 ---
-                            # 自賠責：会社(col74) または 終了日(col79) があれば作成
-                            jibai_company = get(row, 74) or None
-                            jibai_end     = get_date(row, 79)
-                            if jibai_company or jibai_end:
-                                VehicleInsurance.objects.create(
-                                    vehicle=vehicle,
-                                    type="mandatory",
-                                    company=jibai_company,
-                                    end_date=jibai_end,
-                                )
-
-                            # 任意保険：会社(col75) または 終了日(col78) があれば作成
-                            nin_company = get(row, 75) or None
-                            nin_end     = get_date(row, 78)
-                            if nin_company or nin_end:
-                                VehicleInsurance.objects.create(
-                                    vehicle=vehicle,
-                                    type="optional",
-                                    company=nin_company,
-                                    end_date=nin_end,
-                                )
-
-                            # 車ﾒﾓ1-6 (col 94-99) を車両メモに追加
-                            for memo_col in range(94, 100):
-                                body = get(row, memo_col)
-                                if body:
-                                    VehicleMemo.objects.create(
-                                        vehicle=vehicle,
-                                        body=body,
-                                        created_by=memo_user,
-                                    )
-
-                        # --- 所有関係の作成 ---
-                        if customer:
-                            owned_from = get_date(row, 76)
-
-                            already_owns = CustomerVehicle.objects.filter(
-                                customer=customer,
-                                vehicle=vehicle,
-                                owned_to__isnull=True,
-                            ).exists()
-                            if already_owns:
-                                stats["cv_skipped"] += 1
-                                continue
-
-                            # 別の顧客が現所有していれば所有終了させる
-                            CustomerVehicle.objects.filter(
-                                vehicle=vehicle,
-                                owned_to__isnull=True,
-                            ).update(owned_to=owned_from or date.today(), is_current=False)
-
-                            CustomerVehicle.objects.create(
-                                customer=customer,
-                                vehicle=vehicle,
-                                owned_from=owned_from,
-                                owned_to=None,
-                                is_current=True,
-                            )
-                            stats["cv_created"] += 1
-                    else:
-                        self.stdout.write(
-                            f"  [車両] {vehicle_name} (車体№: {chassis_no or 'なし'}) "
-                            f"メーカー={manufacturer_name}→{'一致' if manufacturer else '不一致'} "
-                            f"カテゴリ={category_name}→{'一致' if category else '不一致'} "
-                            f"エンジン={get(row, 60) or 'なし'} "
-                            f"初年度登録={_first_registration_date(get(row, 82), get(row, 83))}"
-                        )
-                        stats["vehicles_created"] += 1
-                        stats["cv_created"] += 1
-
-            except Exception as e:
-                self.stderr.write(f"行 {i + 2} エラー: {e}")
-                stats["skipped"] += 1
+        if not dry_run:
+            checkpoint.clear()
 
+        elapsed = time.monotonic() - started
         mode = "[DRY RUN] " if dry_run else ""
         self.stdout.write(self.style.SUCCESS(
             f"\n{mode}完了:\n"
             f"  顧客 新規: {stats['customers_created']}  更新: {stats['customers_updated']}\n"
             f"  車両 作成: {stats['vehicles_created']}\n"
             f"  所有関係 作成: {stats['cv_created']}  スキップ(重複): {stats['cv_skipped']}\n"
-            f"  行スキップ: {stats['skipped']}"
+            f"  行スキップ: {stats['skipped']}\n"
+            f"  処理: {done_in_run} 行 / {elapsed:.1f} 秒"
+            f" ({done_in_run / elapsed if elapsed else 0:.0f} 行/秒)"
         ))
+
+    def _write(self, importer, records):
+        """チャンクを書き込む。失敗したら1行ずつ取り込み直してエラー行だけスキップする"""
+        try:
+            return importer.write_chunk(records)
+        except Exception as e:
+            if len(records) == 1:
+                self.stderr.write(f"行 {records[0]['line']} エラー: {e}")
+                return Counter(skipped=1)
+
+        result = Counter()
+        for record in records:
+            try:
+                result += importer.write_chunk([record])
+            except Exception as e:
+                self.stderr.write(f"行 {record['line']} エラー: {e}")
+                result["skipped"] += 1
+        return result
+
+    def _print_dry_run(self, records, importer, stats):
+        existing = set(
+            Customer.objects.filter(
+                name__in={r["customer_name"] for r in records}
+            ).values_list("name", flat=True)
+        )
+        seen = importer.customer_ids
+        for r in records:
+            if r["customer_no"] not in seen:
+                self.stdout.write(
+                    f"  [顧客] {'更新' if r['customer_name'] in existing else '新規'}: {r['customer_name']}"
+                    f" 性別={r['gender_raw']}→{'一致' if r['customer_data']['gender'] else '不一致'}"
+                    f" 敬称={r['keisho']}"
+                )
+                seen[r["customer_no"]] = None
+                stats["customers_created"] += 1
+
+            v = r["vehicle"]
+            if not v:
+                continue
+            defaults = v["defaults"]
+            self.stdout.write(
+                f"  [車両] {defaults['vehicle_name']} (車体№: {v['chassis_no'] or 'なし'}) "
+                f"メーカー={v['manufacturer_name']}→{'一致' if defaults['manufacturer'] else '不一致'} "
+                f"カテゴリ={v['category_name']}→{'一致' if defaults['category'] else '不一致'} "
+                f"エンジン={defaults['engine_type'] or 'なし'} "
+                f"初年度登録={v['registration']['first_registration_date'] if v['registration'] else None}"
+            )
+            stats["vehicles_created"] += 1
+            stats["cv_created"] += 1
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from core.services.pdf_service import CACHE_MAX_AGE_DAYS, prune_cache
+
+
+class Command(BaseCommand):
+    help = "Delete cached estimate/order PDFs not used for a while"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days", type=int, default=CACHE_MAX_AGE_DAYS,
+            help=f"最終利用からこの日数を過ぎたものを削除（既定: {CACHE_MAX_AGE_DAYS}）",
+        )
+
+    def handle(self, *args, **options):
+        removed = prune_cache(options["days"])
+
+        self.stdout.write(
+            self.style.SUCCESS(f"PDF cache pruned. Removed files: {removed}")
+        )
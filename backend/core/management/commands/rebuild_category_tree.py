@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from core.models import CategoryClosure
+
+
+class Command(BaseCommand):
+    help = "Rebuild category closure table and root/path/depth columns"
+
+    def handle(self, *args, **options):
+        rows = CategoryClosure.rebuild()
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Category tree rebuilt. Closure rows: {rows}")
+        )
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from core.models import CustomerSearchIndex
+
+
+class Command(BaseCommand):
+    help = "Rebuild CustomerSearchIndex for all customers"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        count = CustomerSearchIndex.rebuild(batch_size=options["batch_size"])
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Customer search index rebuilt. Customers: {count}")
+        )
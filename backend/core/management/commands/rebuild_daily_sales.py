@@ -0,0 +1,25 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from core.models import DailySalesRollup
+
+
+class Command(BaseCommand):
+    help = "Rebuild DailySalesRollup for a date range (default: all dates)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", type=str, help="YYYY-MM-DD")
+        parser.add_argument("--end", type=str, help="YYYY-MM-DD")
+
+    def handle(self, *args, **options):
+        try:
+            start = datetime.strptime(options["start"], "%Y-%m-%d").date() if options["start"] else None
+            end = datetime.strptime(options["end"], "%Y-%m-%d").date() if options["end"] else None
+        except ValueError:
+            raise CommandError("日付形式は YYYY-MM-DD で指定してください")
+
+        rows = DailySalesRollup.rebuild(start=start, end=end)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Daily sales rollup rebuilt. Rows: {rows}")
+        )
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from core.models import Delivery, Order
+
+
+class Command(BaseCommand):
+    help = "Recalculate Order.delivery_status / final_delivery_date from DeliveryItem"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--order-id", type=int, nargs="*", help="対象の受注ID（省略時は全件）")
+
+    def handle(self, *args, **options):
+        order_ids = options["order_id"] or Order.objects.values_list("id", flat=True).order_by("id")
+
+        updated = Delivery.update_status_bulk(order_ids)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Delivery status recalculated. Updated orders: {updated}")
+        )
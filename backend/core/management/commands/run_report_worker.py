@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.services import image_derivatives
+from core.services.report_jobs import (
+    claim_next_job,
+    requeue_stale_jobs,
+    run_job,
+    worker_name,
+)
+
+
+class Command(BaseCommand):
+    help = "Process queued ReportJob rows (DB-backed queue)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="待機中ジョブを処理し終えたら終了")
+        parser.add_argument("--sleep", type=float, default=2.0, help="キューが空のときの待機秒数")
+        parser.add_argument("--image-batch", type=int, default=20,
+                            help="ジョブがないときに1回で処理する画像の派生ファイル作成の件数（0 で処理しない）")
+
+    def handle(self, *args, **options):
+        name = worker_name()
+        self.stdout.write(f"Report worker started: {name}")
+
+        while True:
+            close_old_connections()
+            requeue_stale_jobs()
+
+            job = claim_next_job(worker=name)
+            if job is None:
+                # レポートがないときにアップロード画像のサムネイル等を作る（レポートを待たせない）
+                if options["image_batch"] and image_derivatives.process_pending(limit=options["image_batch"]):
+                    continue
+                if options["once"]:
+                    break
+                time.sleep(options["sleep"])
+                continue
+
+            started = time.monotonic()
+            job = run_job(job)
+            elapsed = time.monotonic() - started
+
+            style = self.style.SUCCESS if job.status == "done" else self.style.ERROR
+            self.stdout.write(style(f"ReportJob #{job.id} {job.kind} {job.status} ({elapsed:.1f}s)"))
@@ -0,0 +1,788 @@
+"""
+性能計測用の合成データを作成する。
+
+使い方:
+  python manage.py seed_demo_data
+  python manage.py seed_demo_data --shops 5 --customers 20000 --years 5
+  python manage.py seed_demo_data --customers 100000 --estimates-per-customer 3 --seed 42
+
+作成するもの:
+- 店舗（コード <prefix>-01 …）とスタッフ（ログインID <prefix>-01-01 …、パスワードなし）
+- 顧客・所有車両（登録履歴・自賠責／任意保険つき）
+- 見積（明細つき）と、その一部から作った受注（明細・納品・入金管理・入金記録・支払い内訳・売上）
+  日付は --years 年前から今日までに散らし、古い受注ほど売上計上済みにする
+
+カテゴリは categories.csv（メーカー・単位・支払会社も同梱のCSV／seed コマンド）から取り込んだものを使う。
+取り込みコマンドはどれも既存データを重複作成しないので、毎回実行してよい（--skip-masters で省略）。
+
+書き込みは --batch-size 人の顧客ごとに1トランザクションで bulk_create し、signal は通さない。
+最後に検索インデックス・初回／最終店舗・納品状況・日次売上集計を作り直す。
+番号は DocumentSequence から年ごとにまとめて払い出すので、以後の通常採番と重ならない。
+
+本番データベースを汚さないよう、DEBUG=False の環境では --force がないと実行しない。
+"""
+import os
+import random
+import time
+from collections import defaultdict
+from datetime import date, datetime, time as dt_time, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from core.models import (
+    Category,
+    Customer,
+    CustomerSearchIndex,
+    CustomerVehicle,
+    DailySalesRollup,
+    Delivery,
+    DeliveryItem,
+    DocumentSequence,
+    Estimate,
+    EstimateItem,
+    EstimateParty,
+    Manufacturer,
+    Order,
+    OrderItem,
+    Payment,
+    PaymentCompany,
+    PaymentManagement,
+    PaymentRecord,
+    Settlement,
+    Shop,
+    Unit,
+    Vehicle,
+    VehicleInsurance,
+    VehicleRegistration,
+    refresh_current_registrations,
+    refresh_customer_shops,
+)
+from core.models.sales import Sales
+from core.services.line_items import calc_totals
+
+User = get_user_model()
+
+
+# ─────────────────────────────────────────────
+# 名前・住所などの素材
+# ─────────────────────────────────────────────
+SURNAMES = [
+    ("佐藤", "サトウ"), ("鈴木", "スズキ"), ("高橋", "タカハシ"), ("田中", "タナカ"),
+    ("伊藤", "イトウ"), ("渡辺", "ワタナベ"), ("山本", "ヤマモト"), ("中村", "ナカムラ"),
+    ("小林", "コバヤシ"), ("加藤", "カトウ"), ("吉田", "ヨシダ"), ("山田", "ヤマダ"),
+    ("佐々木", "ササキ"), ("山口", "ヤマグチ"), ("松本", "マツモト"), ("井上", "イノウエ"),
+    ("木村", "キムラ"), ("林", "ハヤシ"), ("斎藤", "サイトウ"), ("清水", "シミズ"),
+    ("山崎", "ヤマザキ"), ("森", "モリ"), ("池田", "イケダ"), ("橋本", "ハシモト"),
+    ("阿部", "アベ"), ("石川", "イシカワ"), ("前田", "マエダ"), ("藤田", "フジタ"),
+    ("小川", "オガワ"), ("岡田", "オカダ"), ("後藤", "ゴトウ"), ("長谷川", "ハセガワ"),
+]
+GIVEN_NAMES = [
+    ("太郎", "タロウ"), ("一郎", "イチロウ"), ("健太", "ケンタ"), ("翔太", "ショウタ"),
+    ("大輔", "ダイスケ"), ("拓也", "タクヤ"), ("直樹", "ナオキ"), ("誠", "マコト"),
+    ("花子", "ハナコ"), ("美咲", "ミサキ"), ("陽子", "ヨウコ"), ("由美", "ユミ"),
+    ("恵", "メグミ"), ("結衣", "ユイ"), ("彩", "アヤ"), ("真由美", "マユミ"),
+    ("亮", "リョウ"), ("悠斗", "ユウト"), ("蓮", "レン"), ("さくら", "サクラ"),
+]
+COMPANIES = ["株式会社サンプル", "有限会社テスト工業", "合同会社デモ", "株式会社見本商事"]
+ADDRESSES = [
+    ("150-0001", "東京都渋谷区神宮前"), ("160-0022", "東京都新宿区新宿"),
+    ("220-0011", "神奈川県横浜市西区高島"), ("330-0854", "埼玉県さいたま市大宮区桜木町"),
+    ("260-0013", "千葉県千葉市中央区中央"), ("460-0008", "愛知県名古屋市中区栄"),
+    ("530-0001", "大阪府大阪市北区梅田"), ("600-8216", "京都府京都市下京区東塩小路町"),
+    ("650-0021", "兵庫県神戸市中央区三宮町"), ("812-0011", "福岡県福岡市博多区博多駅前"),
+]
+REGISTRATION_AREAS = ["品川", "練馬", "足立", "多摩", "横浜", "大宮", "千葉", "名古屋", "なにわ", "福岡"]
+INSURANCE_COMPANIES = ["東京海上日動", "損保ジャパン", "三井住友海上", "あいおいニッセイ同和", "au損保"]
+PAYMENT_METHODS = [("cash", 45), ("bank_transfer", 25), ("credit_card", 20), ("loan", 10)]
+SETTLEMENT_TYPE_BY_METHOD = {
+    "cash": "cash",
+    "bank_transfer": "transfer",
+    "credit_card": "card",
+    "loan": "loan",
+}
+
+# カテゴリ種別（CSV の取り込み値・モデルの選択肢の両方）→ 明細種別
+ITEM_TYPE_BY_CATEGORY_TYPE = {
+    "vehicle": "vehicle",
+    "expense": "fee",
+    "taxable_expense": "fee",
+    "non_taxable_expense": "fee",
+}
+
+# 受注日からこの日数を過ぎた受注は、ほぼ納品・入金・売上計上まで済ませる
+SETTLED_AFTER_DAYS = 60
+
+DEFAULT_BATCH_SIZE = 500
+
+
+def _weighted(rng, pairs):
+    values, weights = zip(*pairs)
+    return rng.choices(values, weights=weights)[0]
+
+
+def _yen(rng, low, high, step=100):
+    return Decimal(rng.randrange(low // step, high // step + 1) * step)
+
+
+def _aware(day, rng):
+    """日付に営業時間内の時刻をつけて aware datetime にする"""
+    moment = datetime.combine(day, dt_time(rng.randint(9, 18), rng.randint(0, 59), rng.randint(0, 59)))
+    return timezone.make_aware(moment) if settings.USE_TZ else moment
+
+
+# ─────────────────────────────────────────────
+# マスタ
+# ─────────────────────────────────────────────
+class Masters:
+    """明細・車両に使うカテゴリ（末端）・メーカー・単位・支払会社をまとめて読み込む"""
+
+    def __init__(self):
+        leaves = (
+            Category.objects
+            .filter(is_deleted=False, children__isnull=True)
+            .select_related("root", "manufacturer_group")
+        )
+        self.leaves = defaultdict(list)
+        for leaf in leaves:
+            root = leaf.root or leaf
+            item_type = ITEM_TYPE_BY_CATEGORY_TYPE.get(root.category_type, "accessory")
+            tax_type = "non_taxable" if root.category_type == "non_taxable_expense" else (root.tax_type or "taxable")
+            self.leaves[item_type].append((leaf, tax_type))
+
+        self.manufacturers_by_group = defaultdict(list)
+        for group_id, manufacturer_id in Manufacturer.groups.through.objects.values_list(
+            "manufacturergroup_id", "manufacturer_id"
+        ):
+            self.manufacturers_by_group[group_id].append(manufacturer_id)
+        self.manufacturer_ids = list(Manufacturer.objects.filter(is_active=True).values_list("id", flat=True))
+
+        self.unit_ids = list(Unit.objects.values_list("id", flat=True))
+        self.companies = defaultdict(list)
+        for company_id, payment_type in PaymentCompany.objects.filter(is_active=True).values_list("id", "payment_type"):
+            self.companies[payment_type].append(company_id)
+
+    def check(self):
+        missing = [t for t in ("vehicle", "accessory", "fee") if not self.leaves[t]]
+        if missing:
+            raise CommandError(
+                f"カテゴリが足りません（{', '.join(missing)}）。categories.csv を取り込んでから実行してください"
+            )
+
+    def manufacturer_for(self, rng, leaf):
+        ids = self.manufacturers_by_group.get(leaf.manufacturer_group_id) or self.manufacturer_ids
+        return rng.choice(ids) if ids else None
+
+
+# ─────────────────────────────────────────────
+# 生成
+# ─────────────────────────────────────────────
+class DemoDataGenerator:
+    def __init__(self, rng, masters, start, end, batch_size):
+        self.rng = rng
+        self.masters = masters
+        self.start = start
+        self.end = end
+        self.batch_size = batch_size
+        self.span_days = max((end - start).days, 1)
+        self.ct_order = ContentType.objects.get_for_model(Order)
+        self.stats = defaultdict(int)
+
+    def _day(self, not_before=None):
+        low = not_before or self.start
+        span = max((self.end - low).days, 0)
+        return low + timedelta(days=self.rng.randint(0, span))
+
+    # ----------------------------
+    # 店舗・スタッフ
+    # ----------------------------
+    def ensure_shops(self, prefix, count):
+        shops = []
+        for i in range(1, count + 1):
+            postal_code, address = ADDRESSES[(i - 1) % len(ADDRESSES)]
+            shop, _ = Shop.objects.get_or_create(
+                code=f"{prefix}-{i:02d}",
+                defaults={
+                    "name": f"デモ{i}号店",
+                    "postal_code": postal_code,
+                    "location": address,
+                    "phone": f"03-0000-{i:04d}",
+                },
+            )
+            shops.append(shop)
+        return shops
+
+    def ensure_staff(self, prefix, shops, per_shop):
+        staff_by_shop = {}
+        for shop_no, shop in enumerate(shops, start=1):
+            members = []
+            for i in range(1, per_shop + 1):
+                login_id = f"{prefix}-{shop_no:02d}-{i:02d}"
+                user = User.objects.filter(login_id=login_id).first()
+                if user is None:
+                    surname, _ = self.rng.choice(SURNAMES)
+                    user = User(
+                        login_id=login_id,
+                        display_name=f"{surname}（{shop.name}）",
+                        shop=shop,
+                        role="store_manager" if i == 1 else "staff",
+                    )
+                    user.set_unusable_password()
+                    user.save()
+                members.append(user.id)
+            staff_by_shop[shop.id] = members
+        return staff_by_shop
+
+    # ----------------------------
+    # 顧客・車両
+    # ----------------------------
+    def build_customer(self, n, shop_id, staff_id):
+        rng = self.rng
+        surname, surname_kana = rng.choice(SURNAMES)
+        given, given_kana = rng.choice(GIVEN_NAMES)
+        postal_code, address = rng.choice(ADDRESSES)
+        has_phone = rng.random() < 0.5
+        customer = Customer(
+            name=f"{surname} {given}",
+            kana=f"{surname_kana} {given_kana}",
+            email=f"demo{n}@example.com" if rng.random() < 0.6 else None,
+            postal_code=postal_code,
+            address=f"{address}{rng.randint(1, 5)}-{rng.randint(1, 30)}-{rng.randint(1, 20)}",
+            phone=f"03-{rng.randint(1000, 9999)}-{rng.randint(0, 9999):04d}" if has_phone else None,
+            mobile_phone=f"090-{rng.randint(1000, 9999)}-{rng.randint(0, 9999):04d}",
+            company=rng.choice(COMPANIES) if rng.random() < 0.1 else None,
+            staff_id=staff_id,
+            birthdate=date(rng.randint(1950, 2005), rng.randint(1, 12), rng.randint(1, 28)),
+        )
+        customer.fill_match_keys()
+        customer._demo_shop_id = shop_id
+        # 古い顧客ほど多い（期間の前半に寄せる）ので、見積・受注が期間全体に散らばる
+        created_on = self.start + timedelta(days=int(self.span_days * rng.random() ** 2))
+        customer._demo_created = _aware(created_on, rng)
+        return customer
+
+    def create_vehicles(self, customers, chassis_start):
+        rng = self.rng
+        vehicles = []
+        owners = []
+        for customer in customers:
+            count = _weighted(rng, [(0, 30), (1, 55), (2, 15)])
+            for _ in range(count):
+                leaf, _ = rng.choice(self.masters.leaves["vehicle"])
+                chassis_start += 1
+                vehicle = Vehicle(
+                    vehicle_name=leaf.name,
+                    displacement=rng.choice([None, 50, 110, 125, 250, 400, 750, 1000]),
+                    model_year=str(rng.randint(self.start.year - 10, self.end.year)),
+                    new_car_type=rng.choice(["new", "used"]),
+                    manufacturer_id=self.masters.manufacturer_for(rng, leaf),
+                    category=leaf,
+                    model_code=f"DM{rng.randint(100, 999)}",
+                    chassis_no=f"DEMO{chassis_start:09d}",
+                )
+                vehicles.append(vehicle)
+                owners.append(customer)
+        Vehicle.objects.bulk_create(vehicles)
+
+        registrations = []
+        insurances = []
+        ownerships = []
+        for vehicle, customer in zip(vehicles, owners):
+            owned_from = customer._demo_created.date()
+            first_registration = owned_from - timedelta(days=rng.randint(0, 3650))
+            area = rng.choice(REGISTRATION_AREAS)
+            # 名義変更・再登録のあった車両は旧登録を1件残す
+            if rng.random() < 0.2:
+                changed_on = owned_from + timedelta(days=rng.randint(30, 365))
+                registrations.append(VehicleRegistration(
+                    vehicle=vehicle,
+                    registration_area=area,
+                    registration_no=f"あ {rng.randint(1, 9999)}",
+                    first_registration_date=first_registration,
+                    effective_from=owned_from,
+                    effective_to=changed_on,
+                ))
+                owned_from = changed_on
+            registrations.append(VehicleRegistration(
+                vehicle=vehicle,
+                registration_area=area,
+                registration_no=f"い {rng.randint(1, 9999)}",
+                certification_no=f"{rng.randint(10**9, 10**10 - 1)}",
+                inspection_expiration=self.end + timedelta(days=rng.randint(-180, 730)),
+                first_registration_date=first_registration,
+                effective_from=owned_from,
+            ))
+
+            mandatory_start = self.end - timedelta(days=rng.randint(0, 700))
+            insurances.append(VehicleInsurance(
+                vehicle=vehicle,
+                type="mandatory",
+                company=rng.choice(INSURANCE_COMPANIES),
+                start_date=mandatory_start,
+                end_date=mandatory_start + timedelta(days=365 * rng.choice([1, 2, 3])),
+                policy_no=f"M{rng.randint(10**7, 10**8 - 1)}",
+            ))
+            if rng.random() < 0.4:
+                optional_start = self.end - timedelta(days=rng.randint(0, 364))
+                insurances.append(VehicleInsurance(
+                    vehicle=vehicle,
+                    type="optional",
+                    company=rng.choice(INSURANCE_COMPANIES),
+                    start_date=optional_start,
+                    end_date=optional_start + timedelta(days=365),
+                    policy_no=f"O{rng.randint(10**7, 10**8 - 1)}",
+                ))
+            ownerships.append(CustomerVehicle(
+                customer=customer,
+                vehicle=vehicle,
+                owned_from=customer._demo_created.date(),
+                is_current=True,
+            ))
+
+        VehicleRegistration.objects.bulk_create(registrations)
+        refresh_current_registrations(v.id for v in vehicles)
+        VehicleInsurance.objects.bulk_create(insurances)
+        CustomerVehicle.objects.bulk_create(ownerships)
+        self.stats["vehicles"] += len(vehicles)
+        return chassis_start
+
+    # ----------------------------
+    # 見積・受注
+    # ----------------------------
+    def build_lines(self, vehicle_mode, staff_ids):
+        """明細の dict（EstimateItem / OrderItem 共通の項目）を作る"""
+        rng = self.rng
+        masters = self.masters
+        lines = []
+
+        def _line(item_type, leaf, tax_type, unit_price, quantity=1, labor_cost=0, discount=0, **extra):
+            unit_price = Decimal(unit_price)
+            quantity = Decimal(quantity)
+            labor_cost = Decimal(labor_cost)
+            discount = Decimal(discount)
+            lines.append({
+                "item_type": item_type,
+                "category": leaf,
+                "manufacturer_id": masters.manufacturer_for(rng, leaf) if leaf else None,
+                "unit_id": rng.choice(masters.unit_ids) if masters.unit_ids else None,
+                "staff_id": rng.choice(staff_ids),
+                "name": leaf.name if leaf else "値引き",
+                "quantity": quantity,
+                "unit_price": unit_price,
+                "labor_cost": labor_cost,
+                "tax_type": tax_type,
+                "discount": discount,
+                "subtotal": unit_price * quantity + labor_cost - discount,
+                **extra,
+            })
+
+        if vehicle_mode == "sale":
+            leaf, tax_type = rng.choice(masters.leaves["vehicle"])
+            _line("vehicle", leaf, tax_type, _yen(rng, 30000, 1500000, 1000),
+                  sale_type=_weighted(rng, [("new", 50), ("used", 40), ("rental_up", 5), ("consignment", 5)]))
+            for _ in range(rng.randint(1, 3)):
+                leaf, tax_type = rng.choice(masters.leaves["fee"])
+                _line("fee", leaf, tax_type, _yen(rng, 500, 30000))
+
+        accessory_count = rng.randint(1, 6) if vehicle_mode != "sale" else rng.randint(0, 3)
+        for _ in range(accessory_count):
+            leaf, tax_type = rng.choice(masters.leaves["accessory"])
+            labor = _yen(rng, 500, 15000) if vehicle_mode == "maintenance" and rng.random() < 0.6 else 0
+            discount = _yen(rng, 100, 2000) if rng.random() < 0.1 else 0
+            _line("accessory", leaf, tax_type, _yen(rng, 300, 80000), quantity=rng.randint(1, 3),
+                  labor_cost=labor, discount=discount)
+
+        if rng.random() < 0.1:
+            _line("discount", None, "taxable", -_yen(rng, 1000, 20000))
+        return lines
+
+    def create_documents(self, customers, staff_by_shop, estimates_per_customer, order_rate):
+        rng = self.rng
+        today = self.end
+
+        # 1. 見積の骨組み（顧客ごとに件数を散らす）
+        plans = []
+        for customer in customers:
+            count = min(int(rng.expovariate(1 / estimates_per_customer)) + 1, 20) \
+                if estimates_per_customer > 0 else 0
+            for _ in range(count):
+                shop_id = customer._demo_shop_id if rng.random() < 0.8 else rng.choice(list(staff_by_shop))
+                estimate_date = self._day(not_before=max(customer._demo_created.date(), self.start))
+                plans.append({
+                    "customer": customer,
+                    "shop_id": shop_id,
+                    "staff_ids": staff_by_shop[shop_id],
+                    "estimate_date": estimate_date,
+                    "vehicle_mode": _weighted(rng, [("sale", 30), ("maintenance", 50), ("none", 20)]),
+                    "ordered": rng.random() < order_rate,
+                })
+        if not plans:
+            return
+        plans.sort(key=lambda p: p["estimate_date"])
+
+        # 2. 見積先（顧客のスナップショット）と見積
+        parties = []
+        estimates = []
+        estimate_nos = self._numbers("estimate", [p["estimate_date"] for p in plans])
+        for plan, estimate_no in zip(plans, estimate_nos):
+            customer = plan["customer"]
+            party = EstimateParty(
+                source_customer=customer,
+                name=customer.name,
+                kana=customer.kana,
+                email=customer.email,
+                postal_code=customer.postal_code,
+                address=customer.address,
+                phone=customer.phone,
+                mobile_phone=customer.mobile_phone,
+                company=customer.company,
+                staff_id=customer.staff_id,
+            )
+            parties.append(party)
+
+            lines = self.build_lines(plan["vehicle_mode"], plan["staff_ids"])
+            subtotal, tax_total, grand_total = calc_totals(lines)
+            plan["lines"] = lines
+            plan["created_by_id"] = rng.choice(plan["staff_ids"])
+            estimate = Estimate(
+                estimate_no=estimate_no,
+                shop_id=plan["shop_id"],
+                party=party,
+                status="ordered" if plan["ordered"] else _weighted(rng, [("issued", 80), ("draft", 20)]),
+                estimate_date=plan["estimate_date"],
+                vehicle_mode=plan["vehicle_mode"],
+                subtotal=subtotal,
+                discount_total=sum((l["discount"] for l in lines), Decimal("0")),
+                tax_total=tax_total,
+                grand_total=grand_total,
+                valid_until=plan["estimate_date"] + timedelta(days=30),
+                created_by_id=plan["created_by_id"],
+            )
+            estimate._demo_created = _aware(plan["estimate_date"], rng)
+            estimates.append(estimate)
+            plan["estimate"] = estimate
+
+        EstimateParty.objects.bulk_create(parties)
+        Estimate.objects.bulk_create(estimates)
+        self._backdate(Estimate, estimates)
+        EstimateItem.objects.bulk_create([
+            EstimateItem(estimate=plan["estimate"], **line)
+            for plan in plans for line in plan["lines"]
+        ])
+        self.stats["estimates"] += len(estimates)
+
+        # 3. 受注（見積日から数日後）
+        ordered = [p for p in plans if p["ordered"]]
+        if not ordered:
+            return
+        for plan in ordered:
+            plan["order_date"] = min(plan["estimate_date"] + timedelta(days=rng.randint(0, 14)), today)
+        ordered.sort(key=lambda p: p["order_date"])
+
+        orders = []
+        order_nos = self._numbers("order", [p["order_date"] for p in ordered])
+        for plan, order_no in zip(ordered, order_nos):
+            estimate = plan["estimate"]
+            party = estimate.party
+            age = (today - plan["order_date"]).days
+            if age > SETTLED_AFTER_DAYS:
+                status = _weighted(rng, [("sales_completed", 85), ("delivered", 8), ("cancelled", 5), ("ordered", 2)])
+            else:
+                status = _weighted(rng, [("ordered", 55), ("delivered", 25), ("sales_completed", 15), ("cancelled", 5)])
+            plan["status"] = status
+            order = Order(
+                order_no=order_no,
+                shop_id=plan["shop_id"],
+                estimate=estimate,
+                customer=plan["customer"],
+                vehicle_mode=plan["vehicle_mode"],
+                party_name=party.name,
+                party_kana=party.kana,
+                phone=party.mobile_phone or party.phone,
+                email=party.email,
+                postal_code=party.postal_code,
+                address=party.address,
+                status=status,
+                order_date=plan["order_date"],
+                subtotal=estimate.subtotal,
+                discount_total=estimate.discount_total,
+                tax_total=estimate.tax_total,
+                grand_total=estimate.grand_total,
+                created_by_id=plan["created_by_id"],
+            )
+            order._demo_created = _aware(plan["order_date"], rng)
+            orders.append(order)
+            plan["order"] = order
+
+        Order.objects.bulk_create(orders)
+        self._backdate(Order, orders)
+
+        order_items = []
+        for plan in ordered:
+            plan["order_items"] = [OrderItem(order=plan["order"], **line) for line in plan["lines"]]
+            order_items.extend(plan["order_items"])
+        OrderItem.objects.bulk_create(order_items)
+        self.stats["orders"] += len(orders)
+
+        self._create_fulfilment(ordered)
+
+    def _create_fulfilment(self, ordered):
+        """納品・入金・支払い内訳・売上"""
+        rng = self.rng
+        today = self.end
+
+        deliveries = []
+        delivery_items = []
+        delivered_items = []
+        managements = []
+        settlements = []
+        credits = []
+        sales = []
+        changed_orders = []
+
+        for plan in ordered:
+            order = plan["order"]
+            status = plan["status"]
+            items = plan["order_items"]
+
+            # 納品: 完了済みは全明細、受注中は一部だけ
+            if status in ("delivered", "sales_completed"):
+                to_deliver = items
+            elif status == "ordered" and rng.random() < 0.3:
+                to_deliver = items[:max(1, len(items) // 2)]
+            else:
+                to_deliver = []
+
+            delivery_date = None
+            if to_deliver:
+                delivery_date = min(order.order_date + timedelta(days=rng.randint(0, 30)), today)
+                delivery = Delivery(order=order, delivery_date=delivery_date, delivery_status="delivered")
+                deliveries.append(delivery)
+                for item in to_deliver:
+                    delivery_items.append(DeliveryItem(delivery=delivery, order_item=item, quantity=item.quantity))
+                    item.delivery_status = "delivered"
+                    item.delivery_date = delivery_date
+                    delivered_items.append(item)
+
+            # 入金: 売上計上済みは全額、納品済みは全額か一部、受注中は手付のみ
+            method = _weighted(rng, PAYMENT_METHODS)
+            management = PaymentManagement(order=order)
+            managements.append(management)
+            amount = Decimal(order.grand_total).quantize(Decimal("1"))
+            if status == "sales_completed" or (status == "delivered" and rng.random() < 0.7):
+                paid = [amount]
+                if amount > 10000 and rng.random() < 0.3:
+                    first = (amount * Decimal("0.3")).quantize(Decimal("1"))
+                    paid = [first, amount - first]
+            elif status in ("ordered", "delivered") and amount > 10000 and rng.random() < 0.4:
+                paid = [(amount * Decimal("0.1")).quantize(Decimal("1"))]
+            else:
+                paid = []
+
+            payment_date = order.order_date
+            for value in paid:
+                payment_date = min(payment_date + timedelta(days=rng.randint(0, 20)), today)
+                management._demo_records = getattr(management, "_demo_records", [])
+                management._demo_records.append(PaymentRecord(
+                    payment_management=management,
+                    amount=value,
+                    payment_date=payment_date,
+                    method=method,
+                    company_id=self._company(method),
+                ))
+
+            if paid and sum(paid) >= amount:
+                order.final_payment_date = payment_date
+            if status == "sales_completed":
+                order.sales_date = max(d for d in (delivery_date, order.final_payment_date, order.order_date) if d)
+                sales.append(Sales(
+                    order=order,
+                    sales_date=order.sales_date,
+                    sales_amount=order.grand_total,
+                    sales_type="auto",
+                ))
+            if order.final_payment_date or order.sales_date:
+                changed_orders.append(order)
+
+            settlement_type = SETTLEMENT_TYPE_BY_METHOD[method]
+            settlements.append(Settlement(
+                content_type=self.ct_order,
+                object_id=order.id,
+                settlement_type=settlement_type,
+                company_id=self._company(method),
+                amount=amount,
+            ))
+            if method == "loan":
+                installments = rng.choice([12, 24, 36, 48, 60])
+                credits.append(Payment(
+                    content_type=self.ct_order,
+                    object_id=order.id,
+                    credit_company=rng.choice(["オリコ", "ジャックス", "アプラス"]),
+                    credit_first_payment=(amount / installments).quantize(Decimal("1")),
+                    credit_second_payment=(amount / installments).quantize(Decimal("1")),
+                    credit_installments=installments,
+                    credit_start_month=(order.order_date + timedelta(days=31)).strftime("%Y-%m"),
+                ))
+
+        Delivery.objects.bulk_create(deliveries)
+        DeliveryItem.objects.bulk_create(delivery_items)
+        OrderItem.objects.bulk_update(delivered_items, ["delivery_status", "delivery_date"], batch_size=1000)
+        PaymentManagement.objects.bulk_create(managements)
+        PaymentRecord.objects.bulk_create([
+            record for m in managements for record in getattr(m, "_demo_records", [])
+        ])
+        Order.objects.bulk_update(changed_orders, ["final_payment_date", "sales_date"], batch_size=1000)
+        Settlement.objects.bulk_create(settlements)
+        Payment.objects.bulk_create(credits)
+        Sales.objects.bulk_create(sales)
+
+        self.stats["deliveries"] += len(deliveries)
+        self.stats["payment_records"] += sum(len(getattr(m, "_demo_records", [])) for m in managements)
+        self.stats["sales"] += len(sales)
+        self.order_ids.extend(plan["order"].id for plan in ordered)
+
+    # ----------------------------
+    # 補助
+    # ----------------------------
+    def _numbers(self, kind, days):
+        """日付の並び（昇順）に合わせて年ごとに番号を払い出す"""
+        by_year = defaultdict(int)
+        for day in days:
+            by_year[day.year] += 1
+        pools = {
+            year: iter(DocumentSequence.next_nos(kind, count, on=date(year, 1, 1)))
+            for year, count in by_year.items()
+        }
+        return [next(pools[day.year]) for day in days]
+
+    def _company(self, method):
+        payment_type = {"credit_card": "card", "loan": "loan"}.get(method)
+        ids = self.masters.companies.get(payment_type) if payment_type else None
+        return self.rng.choice(ids) if ids else None
+
+    @staticmethod
+    def _backdate(model, objs):
+        """auto_now_add を上書きして作成日時を業務日付に合わせる（bulk_update は pre_save を通らない）"""
+        for obj in objs:
+            obj.created_at = obj._demo_created
+        model.objects.bulk_update(objs, ["created_at"], batch_size=1000)
+
+    # ----------------------------
+    # 実行
+    # ----------------------------
+    def run(self, customers_total, shops, staff_by_shop, estimates_per_customer, order_rate, progress):
+        self.order_ids = []
+        customer_ids = []
+        chassis_start = Vehicle.objects.aggregate(m=Max("id"))["m"] or 0
+        shop_ids = [shop.id for shop in shops]
+        first_no = (Customer.objects.aggregate(m=Max("id"))["m"] or 0) + 1
+
+        for offset in range(0, customers_total, self.batch_size):
+            size = min(self.batch_size, customers_total - offset)
+            with transaction.atomic():
+                customers = []
+                for n in range(first_no + offset, first_no + offset + size):
+                    shop_id = self.rng.choice(shop_ids)
+                    customers.append(self.build_customer(n, shop_id, self.rng.choice(staff_by_shop[shop_id])))
+                Customer.objects.bulk_create(customers)
+                self._backdate(Customer, customers)
+                customer_ids.extend(c.id for c in customers)
+                self.stats["customers"] += len(customers)
+
+                chassis_start = self.create_vehicles(customers, chassis_start)
+                self.create_documents(customers, staff_by_shop, estimates_per_customer, order_rate)
+            progress(offset + size)
+
+        return customer_ids
+
+
+class Command(BaseCommand):
+    help = "Generate synthetic shops/staff/customers/vehicles/estimates/orders for performance testing"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--shops", type=int, default=3, help="店舗数（既定: 3）")
+        parser.add_argument("--staff-per-shop", type=int, default=4, help="店舗ごとのスタッフ数（既定: 4）")
+        parser.add_argument("--customers", type=int, default=2000, help="顧客数（既定: 2000）")
+        parser.add_argument("--estimates-per-customer", type=float, default=2.0,
+                            help="顧客あたりの平均見積数（既定: 2.0）")
+        parser.add_argument("--order-rate", type=float, default=0.6, help="見積が受注になる割合（既定: 0.6）")
+        parser.add_argument("--years", type=int, default=3, help="何年分さかのぼって作るか（既定: 3）")
+        parser.add_argument("--seed", type=int, default=1, help="乱数シード（既定: 1）")
+        parser.add_argument("--prefix", default="demo", help="店舗コード・ログインIDの接頭辞（既定: demo）")
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                            help=f"1トランザクションで作る顧客数（既定: {DEFAULT_BATCH_SIZE}）")
+        parser.add_argument("--skip-masters", action="store_true",
+                            help="カテゴリ・メーカー・単位・支払会社の取り込みを省略する")
+        parser.add_argument("--force", action="store_true", help="DEBUG=False でも実行する")
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options["force"]:
+            raise CommandError("DEBUG=False の環境です。合成データを作成してよい場合は --force を指定してください")
+        if options["shops"] < 1 or options["staff_per_shop"] < 1:
+            raise CommandError("--shops と --staff-per-shop は1以上を指定してください")
+
+        started = time.monotonic()
+        if not options["skip_masters"]:
+            self._import_masters()
+
+        masters = Masters()
+        masters.check()
+
+        end = timezone.localdate()
+        start = end - timedelta(days=365 * max(options["years"], 1))
+        generator = DemoDataGenerator(
+            random.Random(options["seed"]), masters, start, end, max(1, options["batch_size"])
+        )
+
+        shops = generator.ensure_shops(options["prefix"], options["shops"])
+        staff_by_shop = generator.ensure_staff(options["prefix"], shops, options["staff_per_shop"])
+        self.stdout.write(f"店舗: {len(shops)} / スタッフ: {sum(len(v) for v in staff_by_shop.values())}")
+        self.stdout.write(f"期間: {start} 〜 {end}")
+
+        total = options["customers"]
+
+        def _progress(done):
+            elapsed = time.monotonic() - started
+            self.stdout.write(f"  顧客 {done}/{total}（{elapsed:.0f}秒）")
+
+        customer_ids = generator.run(
+            total, shops, staff_by_shop,
+            options["estimates_per_customer"], options["order_rate"], _progress,
+        )
+
+        # signal を通していない派生データを作り直す
+        self.stdout.write("派生データを再構築中…")
+        for i in range(0, len(customer_ids), 2000):
+            chunk = customer_ids[i:i + 2000]
+            CustomerSearchIndex.refresh(chunk)
+            refresh_customer_shops(chunk)
+        Delivery.update_status_bulk(generator.order_ids)
+        DailySalesRollup.rebuild(start=start, end=end)
+
+        summary = ", ".join(f"{k}={v}" for k, v in sorted(generator.stats.items()))
+        self.stdout.write(self.style.SUCCESS(
+            f"完了（{time.monotonic() - started:.1f}秒）: {summary}"
+        ))
+
+    def _import_masters(self):
+        base = settings.BASE_DIR
+        for command, filename in (
+            ("import_manufacturer_groups", "manufacturer_groups.csv"),
+            ("import_manufacturer", "manufacturers.csv"),
+            ("import_categories", "categories.csv"),
+        ):
+            path = os.path.join(base, filename)
+            if os.path.exists(path):
+                call_command(command, path, stdout=self.stdout)
+            else:
+                self.stdout.write(f"{filename} が見つからないため {command} を省略")
+        call_command("rebuild_category_tree", stdout=self.stdout)
+        call_command("seed_units", stdout=self.stdout)
+        call_command("seed_payment_companies", stdout=self.stdout)
@@ -0,0 +1,49 @@
+# core/middleware.py
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from core.services.request_metrics import QueryRecorder, store
+
+logger = logging.getLogger(__name__)
+
+
+class RequestMetricsMiddleware:
+    """
+    リクエストごとの応答時間・SQL件数・SQL時間・重複SQL（N+1 の疑い）を
+    URL 名（resolver_match.view_name）単位で集計する。
+    集計はプロセス内のヒストグラムに足し込むだけで、テーブルへの書き出しは一定間隔でまとめて行う。
+    REQUEST_METRICS_ENABLED = False で無効化できる。
+
+    StreamingHttpResponse の本文を返す間に実行された SQL は計測に含まれない。
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "REQUEST_METRICS_ENABLED", True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(recorder))
+            response = self.get_response(request)
+
+        latency_ms = (time.perf_counter() - start) * 1000
+
+        match = getattr(request, "resolver_match", None)
+        if match is not None:
+            try:
+                store.record(f"{request.method} {match.view_name}", latency_ms, response.status_code, recorder)
+                store.maybe_flush()
+            except Exception:
+                logger.warning("request metrics record failed", exc_info=True)
+
+        return response
@@ -0,0 +1,73 @@
+# Generated by Django 5.0.6 on 2026-10-17 20:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_category_closure(apps, schema_editor):
+    """既存カテゴリから閉包テーブルと root / path / depth を作成"""
+    Category = apps.get_model("core", "Category")
+    CategoryClosure = apps.get_model("core", "CategoryClosure")
+
+    categories = {c.pk: c for c in Category.objects.all()}
+
+    rows = []
+    for c in categories.values():
+        chain = [c]
+        parent_id = c.parent_id
+        while parent_id and parent_id in categories and len(chain) <= len(categories):
+            chain.append(categories[parent_id])
+            parent_id = categories[parent_id].parent_id
+
+        for depth, ancestor in enumerate(chain):
+            rows.append(CategoryClosure(ancestor_id=ancestor.pk, descendant_id=c.pk, depth=depth))
+
+        c.root_id = chain[-1].pk
+        c.path = " > ".join(a.name for a in reversed(chain))
+        c.depth = len(chain) - 1
+
+    CategoryClosure.objects.bulk_create(rows, batch_size=1000)
+    Category.objects.bulk_update(list(categories.values()), ["root", "path", "depth"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0091_add_app_no_to_customer'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='階層（最上位=0）'),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(blank=True, default='', max_length=600, verbose_name='カテゴリパス'),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='root',
+            field=models.ForeignKey(blank=True, help_text='最上位カテゴリ（最上位なら自身）', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.category'),
+        ),
+        migrations.CreateModel(
+            name='CategoryClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveSmallIntegerField()),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to='core.category')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to='core.category')),
+            ],
+            options={
+                'db_table': 'category_closure',
+                'indexes': [models.Index(fields=['descendant', 'depth'], name='category_cl_descend_d00dc6_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='categoryclosure',
+            constraint=models.UniqueConstraint(fields=('ancestor', 'descendant'), name='uq_category_closure'),
+        ),
+        migrations.RunPython(build_category_closure, migrations.RunPython.noop),
+    ]
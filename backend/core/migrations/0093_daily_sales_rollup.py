@@ -0,0 +1,71 @@
+# Generated by Django 5.0.6 on 2026-10-17 20:07
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Sum, Count
+
+
+def build_daily_sales_rollup(apps, schema_editor):
+    """既存の見積・受注から日別集計を作成"""
+    Estimate = apps.get_model("core", "Estimate")
+    Order = apps.get_model("core", "Order")
+    DailySalesRollup = apps.get_model("core", "DailySalesRollup")
+
+    rows = {}
+    sources = [
+        (Estimate, "estimate_date", "estimate"),
+        (Order, "order_date", "order"),
+        (Order, "sales_date", "sales"),
+    ]
+    for model, date_field, prefix in sources:
+        grouped = (
+            model.objects
+            .exclude(**{f"{date_field}__isnull": True})
+            .values(date_field, "shop_id", "created_by_id")
+            .annotate(total=Sum("grand_total"), count=Count("id"))
+            .order_by()
+        )
+        for g in grouped:
+            key = (g[date_field], g["shop_id"], g["created_by_id"])
+            row = rows.setdefault(key, DailySalesRollup(date=key[0], shop_id=key[1], staff_id=key[2]))
+            setattr(row, f"{prefix}_total", g["total"] or 0)
+            setattr(row, f"{prefix}_count", g["count"])
+
+    DailySalesRollup.objects.bulk_create(rows.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0092_category_closure'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('estimate_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('estimate_count', models.PositiveIntegerField(default=0)),
+                ('order_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('order_count', models.PositiveIntegerField(default=0)),
+                ('sales_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('sales_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('shop', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.shop')),
+                ('staff', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'daily_sales_rollups',
+                'ordering': ['date'],
+                'indexes': [models.Index(fields=['shop', 'date'], name='daily_sales_shop_id_47fd9f_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dailysalesrollup',
+            constraint=models.UniqueConstraint(fields=('date', 'shop', 'staff'), name='uq_daily_sales_rollup', nulls_distinct=False),
+        ),
+        migrations.RunPython(build_daily_sales_rollup, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.0.6 on 2026-10-17 20:12
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0093_daily_sales_rollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('product_analytics', '商品分析'), ('report', '帳票'), ('management_csv', '納品・入金CSV')], max_length=30, verbose_name='種類')),
+                ('params', models.JSONField(default=dict, verbose_name='パラメータ')),
+                ('params_hash', models.CharField(db_index=True, max_length=64, verbose_name='パラメータハッシュ')),
+                ('status', models.CharField(choices=[('queued', '待機中'), ('running', '実行中'), ('done', '完了'), ('failed', '失敗')], default='queued', max_length=20, verbose_name='ステータス')),
+                ('result', models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True, verbose_name='結果')),
+                ('result_file', models.FileField(blank=True, upload_to='report_jobs/', verbose_name='結果ファイル')),
+                ('result_filename', models.CharField(blank=True, max_length=255, verbose_name='ダウンロード名')),
+                ('result_content_type', models.CharField(blank=True, max_length=100, verbose_name='Content-Type')),
+                ('error', models.TextField(blank=True, verbose_name='エラー')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='試行回数')),
+                ('worker', models.CharField(blank=True, max_length=100, verbose_name='ワーカー')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='開始日時')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='終了日時')),
+                ('requested_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='report_jobs', to=settings.AUTH_USER_MODEL, verbose_name='依頼者')),
+            ],
+            options={
+                'db_table': 'report_jobs',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='report_jobs_status_a52eae_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='reportjob',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ('queued', 'running'))), fields=('params_hash',), name='uq_report_job_active_params'),
+        ),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 5.0.6 on 2026-10-17 20:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from core.utils.text import normalize_japanese
+
+
+SEARCH_FIELDS = (
+    "name", "kana", "company",
+    "phone", "mobile_phone", "company_phone",
+    "email", "postal_code", "address",
+)
+
+
+def create_trigram_index(apps, schema_editor):
+    # pg_trgm は PostgreSQL のみ（他DBでは部分一致の全件走査になる）
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS customer_search_document_trgm "
+        "ON customer_search_index USING gin (document gin_trgm_ops)"
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS customer_search_document_trgm")
+
+
+def build_customer_search_index(apps, schema_editor):
+    """既存顧客の検索文書を作成"""
+    Customer = apps.get_model("core", "Customer")
+    CustomerMemo = apps.get_model("core", "CustomerMemo")
+    VehicleRegistration = apps.get_model("core", "VehicleRegistration")
+    CustomerSearchIndex = apps.get_model("core", "CustomerSearchIndex")
+
+    ids = list(Customer.objects.order_by("id").values_list("id", flat=True))
+    for i in range(0, len(ids), 2000):
+        chunk = ids[i:i + 2000]
+        parts = {
+            row["id"]: [row[f] for f in SEARCH_FIELDS]
+            for row in Customer.objects.filter(id__in=chunk).values("id", *SEARCH_FIELDS)
+        }
+        for cid, body in CustomerMemo.objects.filter(customer_id__in=chunk).values_list("customer_id", "body"):
+            parts[cid].append(body)
+        for cid, area, no in VehicleRegistration.objects.filter(
+            vehicle__customer_vehicles__customer_id__in=chunk
+        ).values_list("vehicle__customer_vehicles__customer_id", "registration_area", "registration_no"):
+            parts[cid].extend([area, no])
+
+        CustomerSearchIndex.objects.bulk_create([
+            CustomerSearchIndex(
+                customer_id=cid,
+                document=" ".join(filter(None, (normalize_japanese(v) for v in values if v))),
+            )
+            for cid, values in parts.items()
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0094_report_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CustomerSearchIndex',
+            fields=[
+                ('customer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_index', serialize=False, to='core.customer')),
+                ('document', models.TextField(blank=True, default='')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'customer_search_index',
+            },
+        ),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+        migrations.RunPython(build_customer_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.0.6 on 2026-10-17 20:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0095_customer_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('order', '受注'), ('estimate', '見積')], max_length=20, verbose_name='種類')),
+                ('year', models.PositiveSmallIntegerField(verbose_name='年')),
+                ('last_number', models.PositiveIntegerField(default=0, verbose_name='最終番号')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('shop', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='document_sequences', to='core.shop')),
+            ],
+            options={
+                'db_table': 'document_sequences',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='documentsequence',
+            constraint=models.UniqueConstraint(condition=models.Q(('shop__isnull', False)), fields=('kind', 'year', 'shop'), name='uq_document_sequence_shop'),
+        ),
+        migrations.AddConstraint(
+            model_name='documentsequence',
+            constraint=models.UniqueConstraint(condition=models.Q(('shop__isnull', True)), fields=('kind', 'year'), name='uq_document_sequence_all_shops'),
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.0.6 on 2026-10-17 20:27
+
+from django.db import migrations, models
+
+from core.models.customers import email_match_key, phone_match_key
+from core.utils.text import normalize_japanese
+
+
+def fill_customer_match_keys(apps, schema_editor):
+    """既存顧客の照合キーを埋める"""
+    Customer = apps.get_model("core", "Customer")
+
+    ids = list(Customer.objects.order_by("id").values_list("id", flat=True))
+    for i in range(0, len(ids), 2000):
+        customers = list(
+            Customer.objects.filter(id__in=ids[i:i + 2000])
+            .only("id", "name", "kana", "phone", "mobile_phone", "email")
+        )
+        for c in customers:
+            c.name_key = normalize_japanese(c.name)[:100]
+            c.kana_key = normalize_japanese(c.kana)[:100]
+            c.phone_key = phone_match_key(c.phone)[:20]
+            c.mobile_phone_key = phone_match_key(c.mobile_phone)[:20]
+            c.email_key = email_match_key(c.email)[:255]
+        Customer.objects.bulk_update(
+            customers,
+            ["name_key", "kana_key", "phone_key", "mobile_phone_key", "email_key"],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0096_document_sequences'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customer',
+            name='email_key',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='kana_key',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='mobile_phone_key',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='name_key',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='phone_key',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='reportjob',
+            name='kind',
+            field=models.CharField(choices=[('product_analytics', '商品分析'), ('report', '帳票'), ('management_csv', '納品・入金CSV'), ('customer_duplicates', '顧客重複候補')], max_length=30, verbose_name='種類'),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['name_key'], name='customer_name_key_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['kana_key'], name='customer_kana_key_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.RunPython(fill_customer_match_keys, migrations.RunPython.noop),
+    ]
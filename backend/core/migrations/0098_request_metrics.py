@@ -0,0 +1,37 @@
+# Generated by Django 5.0.6 on 2026-10-17 20:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0097_customer_match_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestMetric',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_start', models.DateTimeField(verbose_name='集計開始')),
+                ('endpoint', models.CharField(max_length=200, verbose_name='エンドポイント')),
+                ('worker', models.CharField(blank=True, max_length=100, verbose_name='ワーカー')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='件数')),
+                ('error_count', models.PositiveIntegerField(default=0, verbose_name='5xx件数')),
+                ('latency_sum_ms', models.FloatField(default=0, verbose_name='応答時間合計(ms)')),
+                ('latency_max_ms', models.FloatField(default=0, verbose_name='応答時間最大(ms)')),
+                ('latency_hist', models.JSONField(default=list, verbose_name='応答時間ヒストグラム')),
+                ('query_count_sum', models.PositiveIntegerField(default=0, verbose_name='SQL件数合計')),
+                ('query_count_max', models.PositiveIntegerField(default=0, verbose_name='SQL件数最大')),
+                ('query_hist', models.JSONField(default=list, verbose_name='SQL件数ヒストグラム')),
+                ('query_time_sum_ms', models.FloatField(default=0, verbose_name='SQL時間合計(ms)')),
+                ('duplicates', models.JSONField(default=dict, verbose_name='重複SQL')),
+            ],
+            options={
+                'db_table': 'request_metrics',
+                'ordering': ['-period_start'],
+                'indexes': [models.Index(fields=['period_start', 'endpoint'], name='request_met_period__cc38fa_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-17 20:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0098_request_metrics'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='reportjob',
+            name='kind',
+            field=models.CharField(choices=[('product_analytics', '商品分析'), ('report', '帳票'), ('management_csv', '納品・入金CSV'), ('customer_duplicates', '顧客重複候補'), ('pdf_batch', 'PDF一括出力')], max_length=30, verbose_name='種類'),
+        ),
+    ]
@@ -0,0 +1,111 @@
+# Generated by Django 5.0.6 on 2026-10-17 20:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_thread_summaries(apps, schema_editor):
+    """既存スレッドの集計・参加者をメッセージから埋める（一覧の絞り込みが参加者を見るため必須）"""
+    Thread = apps.get_model("core", "BusinessCommunicationThread")
+    Message = apps.get_model("core", "BusinessCommunication")
+    ShopThrough = Thread.participant_shops.through
+    StaffThrough = Thread.participant_staff.through
+
+    def _name(staff, shop):
+        if staff is not None:
+            return staff.display_name or staff.login_id
+        if shop is not None:
+            return shop.name
+        return ""
+
+    summaries = {}
+    shops = set()
+    staff = set()
+    for m in (
+        Message.objects.filter(thread__isnull=False)
+        .select_related("sender_shop", "sender_staff", "receiver_shop", "receiver_staff")
+        .order_by("thread_id", "created_at", "id")
+        .iterator(chunk_size=2000)
+    ):
+        s = summaries.get(m.thread_id)
+        if s is None:
+            s = summaries[m.thread_id] = {
+                "message_count": 0,
+                "pending_count": 0,
+                "sender_name": _name(m.sender_staff, m.sender_shop),
+                "receiver_name": _name(m.receiver_staff, m.receiver_shop),
+            }
+        s["message_count"] += 1
+        s["pending_count"] += m.status == "pending"
+        s["last_message_at"] = m.created_at
+        s["last_message_preview"] = (m.content or "")[:200]
+        shops.update((m.thread_id, sid) for sid in (m.sender_shop_id, m.receiver_shop_id) if sid)
+        staff.update((m.thread_id, uid) for uid in (m.sender_staff_id, m.receiver_staff_id) if uid)
+
+    for thread_id, values in summaries.items():
+        Thread.objects.filter(pk=thread_id).update(**values)
+    ShopThrough.objects.bulk_create(
+        [ShopThrough(businesscommunicationthread_id=t, shop_id=s) for t, s in shops], batch_size=1000,
+    )
+    StaffThrough.objects.bulk_create(
+        [StaffThrough(businesscommunicationthread_id=t, user_id=u) for t, u in staff], batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0099_report_job_pdf_batch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='businesscommunicationthread',
+            name='last_message_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='最終メッセージ日時'),
+        ),
+        migrations.AddField(
+            model_name='businesscommunicationthread',
+            name='last_message_preview',
+            field=models.CharField(blank=True, default='', max_length=200, verbose_name='最終メッセージ（冒頭）'),
+        ),
+        migrations.AddField(
+            model_name='businesscommunicationthread',
+            name='message_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='メッセージ数'),
+        ),
+        migrations.AddField(
+            model_name='businesscommunicationthread',
+            name='participant_shops',
+            field=models.ManyToManyField(blank=True, related_name='communication_threads', to='core.shop', verbose_name='参加店舗'),
+        ),
+        migrations.AddField(
+            model_name='businesscommunicationthread',
+            name='participant_staff',
+            field=models.ManyToManyField(blank=True, related_name='participating_communication_threads', to=settings.AUTH_USER_MODEL, verbose_name='参加スタッフ'),
+        ),
+        migrations.AddField(
+            model_name='businesscommunicationthread',
+            name='pending_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='未対応メッセージ数'),
+        ),
+        migrations.AddField(
+            model_name='businesscommunicationthread',
+            name='receiver_name',
+            field=models.CharField(blank=True, default='', max_length=150, verbose_name='送信先名'),
+        ),
+        migrations.AddField(
+            model_name='businesscommunicationthread',
+            name='sender_name',
+            field=models.CharField(blank=True, default='', max_length=150, verbose_name='送信元名'),
+        ),
+        migrations.AddIndex(
+            model_name='businesscommunicationthread',
+            index=models.Index(fields=['status', '-updated_at'], name='bc_thread_status_upd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='businesscommunicationthread',
+            index=models.Index(fields=['-updated_at'], name='bc_thread_updated_idx'),
+        ),
+        migrations.RunPython(backfill_thread_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.0.6 on 2026-10-17 20:46
+
+import core.models.image_derivatives
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0100_business_communication_thread_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customerimage',
+            name='derivatives_status',
+            field=models.CharField(choices=[('pending', '作成待ち'), ('done', '作成済み'), ('failed', '失敗')], db_index=True, default='pending', max_length=10, verbose_name='派生ファイル作成状況'),
+        ),
+        migrations.AddField(
+            model_name='customerimage',
+            name='preview',
+            field=models.ImageField(blank=True, upload_to=core.models.image_derivatives.derivative_upload_to, verbose_name='表示用画像'),
+        ),
+        migrations.AddField(
+            model_name='customerimage',
+            name='thumbnail',
+            field=models.ImageField(blank=True, upload_to=core.models.image_derivatives.derivative_upload_to, verbose_name='サムネイル'),
+        ),
+        migrations.AddField(
+            model_name='vehicleimage',
+            name='derivatives_status',
+            field=models.CharField(choices=[('pending', '作成待ち'), ('done', '作成済み'), ('failed', '失敗')], db_index=True, default='pending', max_length=10, verbose_name='派生ファイル作成状況'),
+        ),
+        migrations.AddField(
+            model_name='vehicleimage',
+            name='preview',
+            field=models.ImageField(blank=True, upload_to=core.models.image_derivatives.derivative_upload_to, verbose_name='表示用画像'),
+        ),
+        migrations.AddField(
+            model_name='vehicleimage',
+            name='thumbnail',
+            field=models.ImageField(blank=True, upload_to=core.models.image_derivatives.derivative_upload_to, verbose_name='サムネイル'),
+        ),
+    ]
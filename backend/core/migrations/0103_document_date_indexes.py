@@ -0,0 +1,25 @@
+# Generated by Django 5.0.6 on 2026-10-17 20:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0102_generic_relation_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='estimate',
+            index=models.Index(fields=['estimate_date', 'id'], name='estimate_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['order_date', 'id'], name='order_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['sales_date', 'id'], name='order_sales_date_idx'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.0.6 on 2026-10-17 20:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_current_registrations(apps, schema_editor):
+    """既存車両の現在の登録（id が最大の登録）と車検満了日を埋める"""
+    Vehicle = apps.get_model("core", "Vehicle")
+    Registration = apps.get_model("core", "VehicleRegistration")
+    latest = Registration.objects.filter(vehicle=OuterRef("pk")).order_by("-id")
+    Vehicle.objects.update(
+        current_registration_id=Subquery(latest.values("id")[:1]),
+        inspection_expiration=Subquery(latest.values("inspection_expiration")[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0103_document_date_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vehicle',
+            name='current_registration',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.vehicleregistration'),
+        ),
+        migrations.AddField(
+            model_name='vehicle',
+            name='inspection_expiration',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=models.Index(fields=['inspection_expiration'], name='vehicle_inspection_exp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicleinsurance',
+            index=models.Index(fields=['end_date'], name='vehicle_ins_end_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicleinsurance',
+            index=models.Index(fields=['vehicle', 'type', 'end_date'], name='vehicle_ins_type_end_idx'),
+        ),
+        migrations.RunPython(backfill_current_registrations, migrations.RunPython.noop),
+    ]
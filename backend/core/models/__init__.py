@@ -18,7 +18,7 @@ from .order_delivery_payment import (
 from .business_communication_attachments import BusinessCommunicationAttachment
 from .business_communication_thread import BusinessCommunicationThread
 from .audit_log import AuditLog
-from .categories import Category, Product, Manufacturer, ManufacturerGroup
+from .categories import Category, CategoryClosure, Product, Manufacturer, ManufacturerGroup
 from .estimate_vehicle_registration import EstimateVehicleRegistration
 from .order_vehicle_registration import OrderVehicleRegistration
 from .settlements import Settlement
@@ -26,4 +26,11 @@ from .unit import Unit
 from .insurance import Insurance
 from .payment_company import PaymentCompany
 from .cancel_request import CancelRequest
-from .document_templates import DocumentTemplate, DocumentField
\ No newline at end of file
+from .document_templates import DocumentTemplate, DocumentField
+from .daily_sales_rollup import DailySalesRollup
+from .report_jobs import ReportJob
+from .customer_search import CustomerSearchIndex
+from .document_sequence import DocumentSequence
+from .customer_shops import refresh_customer_shops
+from .request_metrics import RequestMetric
+from .business_communication_summary import refresh_thread_summaries
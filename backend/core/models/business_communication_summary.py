@@ -0,0 +1,190 @@
+from collections import defaultdict
+
+from django.db.models import Case, Count, F, Max, Q, Value, When
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from core.models.business_communications import BusinessCommunication
+from core.models.business_communication_thread import BusinessCommunicationThread
+
+
+# ==========================
+# 業務連絡スレッドの集計（BusinessCommunicationThread.last_message_at など）
+# ==========================
+# 一覧・ダッシュボードはスレッドの列だけを読み、メッセージを数えたり並べたりしない。
+# - メッセージ作成時: 件数・最終メッセージ・参加者を差分で反映（読み込みなしの UPDATE 1回 + 参加者の INSERT）
+# - 対応状況・スレッド・送受信先の変更／削除時: 関係するスレッドだけ refresh_thread_summaries で作り直す
+# - backfill_thread_summaries コマンドで全件を作り直せる
+# 送信元名・送信先名は最初のメッセージ時点の表示名（後で名前を変えても自動では変わらない）。
+
+PREVIEW_LENGTH = 200
+
+ShopThrough = BusinessCommunicationThread.participant_shops.through
+StaffThrough = BusinessCommunicationThread.participant_staff.through
+
+
+def _staff_name(user):
+    return user.display_name or user.login_id
+
+
+def _sender_name(message):
+    if message.sender_staff_id:
+        return _staff_name(message.sender_staff)
+    if message.sender_shop_id:
+        return message.sender_shop.name
+    return ""
+
+
+def _receiver_name(message):
+    if message.receiver_staff_id:
+        return _staff_name(message.receiver_staff)
+    if message.receiver_shop_id:
+        return message.receiver_shop.name
+    return ""
+
+
+def _preview(content):
+    return (content or "")[:PREVIEW_LENGTH]
+
+
+def _participants(message):
+    shops = {message.sender_shop_id, message.receiver_shop_id} - {None}
+    staff = {message.sender_staff_id, message.receiver_staff_id} - {None}
+    return shops, staff
+
+
+def _add_participants(thread_id, shop_ids, staff_ids):
+    ShopThrough.objects.bulk_create(
+        [ShopThrough(businesscommunicationthread_id=thread_id, shop_id=sid) for sid in shop_ids],
+        ignore_conflicts=True,
+    )
+    StaffThrough.objects.bulk_create(
+        [StaffThrough(businesscommunicationthread_id=thread_id, user_id=uid) for uid in staff_ids],
+        ignore_conflicts=True,
+    )
+
+
+def note_thread_message(message):
+    """新しいメッセージが作られたときの差分反映"""
+    if not message.thread_id:
+        return
+    BusinessCommunicationThread.objects.filter(pk=message.thread_id).update(
+        last_message_at=message.created_at,
+        last_message_preview=_preview(message.content),
+        message_count=F("message_count") + 1,
+        pending_count=F("pending_count") + (1 if message.status == "pending" else 0),
+        # UPDATE の右辺は更新前の値を見るので、message_count=0 なら最初のメッセージ
+        sender_name=Case(When(message_count=0, then=Value(_sender_name(message))), default=F("sender_name")),
+        receiver_name=Case(When(message_count=0, then=Value(_receiver_name(message))), default=F("receiver_name")),
+    )
+    _add_participants(message.thread_id, *_participants(message))
+
+
+def refresh_thread_summaries(thread_ids):
+    """指定スレッドの集計をメッセージから作り直す。更新件数を返す"""
+    thread_ids = {tid for tid in thread_ids if tid}
+    if not thread_ids:
+        return 0
+
+    messages = BusinessCommunication.objects.filter(thread_id__in=thread_ids)
+
+    counts = {
+        row["thread_id"]: row
+        for row in messages.values("thread_id").annotate(
+            total=Count("id"),
+            pending=Count("id", filter=Q(status="pending")),
+            last_at=Max("created_at"),
+        )
+    }
+
+    # 最初・最後のメッセージと参加者（スレッドあたりのメッセージは多くないので1回で読む）
+    first = {}
+    last = {}
+    shops = defaultdict(set)
+    staff = defaultdict(set)
+    for m in (
+        messages
+        .select_related("sender_shop", "sender_staff", "receiver_shop", "receiver_staff")
+        .order_by("thread_id", "created_at", "id")
+    ):
+        first.setdefault(m.thread_id, m)
+        last[m.thread_id] = m
+        s, u = _participants(m)
+        shops[m.thread_id] |= s
+        staff[m.thread_id] |= u
+
+    threads = list(BusinessCommunicationThread.objects.filter(id__in=thread_ids))
+    for thread in threads:
+        row = counts.get(thread.id, {})
+        thread.message_count = row.get("total", 0)
+        thread.pending_count = row.get("pending", 0)
+        thread.last_message_at = row.get("last_at")
+        thread.last_message_preview = _preview(last[thread.id].content) if thread.id in last else ""
+        thread.sender_name = _sender_name(first[thread.id]) if thread.id in first else ""
+        thread.receiver_name = _receiver_name(first[thread.id]) if thread.id in first else ""
+
+    # save() を通さない（updated_at は変えない）
+    BusinessCommunicationThread.objects.bulk_update(
+        threads,
+        ["message_count", "pending_count", "last_message_at", "last_message_preview", "sender_name", "receiver_name"],
+        batch_size=1000,
+    )
+
+    existing_ids = [t.id for t in threads]
+    ShopThrough.objects.filter(businesscommunicationthread_id__in=existing_ids).delete()
+    StaffThrough.objects.filter(businesscommunicationthread_id__in=existing_ids).delete()
+    ShopThrough.objects.bulk_create(
+        [ShopThrough(businesscommunicationthread_id=tid, shop_id=sid) for tid in existing_ids for sid in shops[tid]],
+        batch_size=1000,
+    )
+    StaffThrough.objects.bulk_create(
+        [StaffThrough(businesscommunicationthread_id=tid, user_id=uid) for tid in existing_ids for uid in staff[tid]],
+        batch_size=1000,
+    )
+    return len(threads)
+
+
+# ==========================
+# BusinessCommunication 保存・削除時の反映
+# ==========================
+# これらが update_fields に含まれない保存は集計に影響しない
+_TRACKED = {
+    "thread", "thread_id", "status", "content",
+    "sender_shop", "sender_shop_id", "sender_staff", "sender_staff_id",
+    "receiver_shop", "receiver_shop_id", "receiver_staff", "receiver_staff_id",
+}
+_TRACKED_VALUES = (
+    "thread_id", "status", "content",
+    "sender_shop_id", "sender_staff_id", "receiver_shop_id", "receiver_staff_id",
+)
+
+
+def _affects_summary(update_fields):
+    return update_fields is None or bool(_TRACKED & set(update_fields))
+
+
+@receiver(pre_save, sender=BusinessCommunication)
+def _message_summary_pre_save(sender, instance, update_fields=None, **kwargs):
+    instance._summary_old = None
+    if instance._state.adding or not _affects_summary(update_fields):
+        return
+    instance._summary_old = sender.objects.filter(pk=instance.pk).values_list(*_TRACKED_VALUES).first()
+
+
+@receiver(post_save, sender=BusinessCommunication)
+def _message_summary_post_save(sender, instance, created, **kwargs):
+    if created:
+        note_thread_message(instance)
+        return
+    old = getattr(instance, "_summary_old", None)
+    if old and old != tuple(getattr(instance, f) for f in _TRACKED_VALUES):
+        refresh_thread_summaries({old[0], instance.thread_id})
+
+
+@receiver(post_delete, sender=BusinessCommunication)
+def _message_summary_post_delete(sender, instance, origin=None, **kwargs):
+    # スレッドごと削除しているときは作り直さない（削除中のスレッドに参加者を入れ直してしまう）
+    origin_model = getattr(origin, "model", type(origin))
+    if origin_model is BusinessCommunicationThread:
+        return
+    refresh_thread_summaries([instance.thread_id])
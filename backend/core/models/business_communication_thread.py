@@ -44,9 +44,70 @@ class BusinessCommunicationThread(models.Model):
         verbose_name="更新日時",
     )
 
+    # ==============================
+    # 集計（メッセージの保存・削除時に refresh_thread_summaries で更新）
+    # ==============================
+
+    last_message_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="最終メッセージ日時",
+    )
+
+    last_message_preview = models.CharField(
+        max_length=200,
+        blank=True,
+        default="",
+        verbose_name="最終メッセージ（冒頭）",
+    )
+
+    message_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name="メッセージ数",
+    )
+
+    pending_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name="未対応メッセージ数",
+    )
+
+    # 最初のメッセージの送信元・送信先（一覧の「A → B」表示用）
+    sender_name = models.CharField(
+        max_length=150,
+        blank=True,
+        default="",
+        verbose_name="送信元名",
+    )
+
+    receiver_name = models.CharField(
+        max_length=150,
+        blank=True,
+        default="",
+        verbose_name="送信先名",
+    )
+
+    # いずれかのメッセージの送信元・送信先になった店舗・スタッフ（閲覧範囲の絞り込み用）
+    participant_shops = models.ManyToManyField(
+        "core.Shop",
+        blank=True,
+        related_name="communication_threads",
+        verbose_name="参加店舗",
+    )
+
+    participant_staff = models.ManyToManyField(
+        settings.AUTH_USER_MODEL,
+        blank=True,
+        related_name="participating_communication_threads",
+        verbose_name="参加スタッフ",
+    )
+
     class Meta:
         db_table = "business_communication_threads"
         ordering = ["-updated_at"]
+        indexes = [
+            models.Index(fields=["status", "-updated_at"], name="bc_thread_status_upd_idx"),
+            models.Index(fields=["-updated_at"], name="bc_thread_updated_idx"),
+        ]
 
     def __str__(self):
         return f"{self.customer} - {self.title}"
\ No newline at end of file
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.core.exceptions import ValidationError
 from core.utils.text import normalize_japanese
 
@@ -76,6 +76,18 @@ class Category(models.Model):
     is_deleted = models.BooleanField(default=False, db_index=True)
     deleted_at = models.DateTimeField(null=True, blank=True)
 
+    # 🔥 ツリー非正規化（save 時に CategoryClosure と一緒に維持）
+    root = models.ForeignKey(
+        "self",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+        help_text="最上位カテゴリ（最上位なら自身）",
+    )
+    path = models.CharField("カテゴリパス", max_length=600, blank=True, default="")
+    depth = models.PositiveSmallIntegerField("階層（最上位=0）", default=0)
+
     class Meta:
         db_table = "categories"
         ordering = ["sort_order", "id"]
@@ -86,20 +98,224 @@ class Category(models.Model):
 
     @property
     def full_path(self):
+        if self.path:
+            return self.path
         if self.parent:
             return f"{self.parent.full_path} > {self.name}"
         return self.name
 
     def clean(self):
-        depth = 0
-        parent = self.parent
-        while parent:
-            depth += 1
-            parent = parent.parent
+        depth = self.parent.depth + 1 if self.parent else 0
 
         if depth >= 4:
             raise ValidationError("カテゴリは最大5階層までです。")
 
+    # ----------------------------
+    # ツリー参照
+    # ----------------------------
+    @staticmethod
+    def subtree_ids(category_id):
+        """category_id 自身と全子孫のID（サブクエリ用 values クエリセット）"""
+        return CategoryClosure.objects.filter(ancestor_id=category_id).values("descendant_id")
+
+    def get_descendant_ids(self) -> list[int]:
+        """自身と全子孫のIDリスト"""
+        return list(
+            CategoryClosure.objects
+            .filter(ancestor=self)
+            .order_by("depth", "descendant_id")
+            .values_list("descendant_id", flat=True)
+        )
+
+    def subtree_height(self) -> int:
+        """自身から最も深い子孫までの段数（子なし=0）"""
+        return (
+            CategoryClosure.objects
+            .filter(ancestor=self)
+            .aggregate(h=models.Max("depth"))["h"]
+        ) or 0
+
+    # ----------------------------
+    # ツリー維持
+    # ----------------------------
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and not {"parent", "name"} & set(update_fields):
+            return super().save(*args, **kwargs)
+
+        is_new = self._state.adding
+        old = None
+        if not is_new:
+            old = (
+                Category.objects
+                .filter(pk=self.pk)
+                .values("parent_id", "name")
+                .first()
+            )
+
+        with transaction.atomic():
+            self._apply_tree_fields()
+            if update_fields is not None:
+                kwargs["update_fields"] = set(update_fields) | {"root", "path", "depth"}
+            super().save(*args, **kwargs)
+
+            if self.root_id is None:
+                self.root_id = self.pk
+                Category.objects.filter(pk=self.pk).update(root_id=self.pk)
+
+            if is_new or old is None:
+                CategoryClosure.insert_node(self)
+            elif old["parent_id"] != self.parent_id:
+                CategoryClosure.move_subtree(self)
+                self._refresh_descendants()
+            elif old["name"] != self.name:
+                self._refresh_descendants()
+
+    def _apply_tree_fields(self):
+        parent = self.parent
+        if parent:
+            self.root_id = parent.root_id or parent.id
+            self.path = f"{parent.path or parent.full_path} > {self.name}"
+            self.depth = parent.depth + 1
+        else:
+            self.root_id = self.pk
+            self.path = self.name
+            self.depth = 0
+
+    def _refresh_descendants(self):
+        """子孫の root / path / depth を自身から再計算"""
+        descendants = list(
+            Category.objects
+            .filter(id__in=Category.subtree_ids(self.pk))
+            .exclude(pk=self.pk)
+            .order_by("depth", "id")
+        )
+        if not descendants:
+            return
+
+        # 旧 depth 順 = 親が必ず先に来る（サブツリー内の相対段数は移動で変わらない）
+        nodes = {self.pk: self}
+        for c in descendants:
+            parent = nodes[c.parent_id]
+            c.root_id = self.root_id
+            c.path = f"{parent.path} > {c.name}"
+            c.depth = parent.depth + 1
+            nodes[c.pk] = c
+
+        Category.objects.bulk_update(descendants, ["root", "path", "depth"])
+
+
+# ============================================
+# カテゴリ閉包テーブル（祖先 × 子孫）
+# ============================================
+class CategoryClosure(models.Model):
+    """
+    カテゴリの祖先-子孫ペアをすべて保持する閉包テーブル。
+    自身との組（depth=0）も含むので「X の配下すべて」「Y の祖先すべて」が
+    インデックス1回の参照で取れる。Category.save で維持する。
+    """
+    ancestor = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        related_name="descendant_links",
+    )
+    descendant = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        related_name="ancestor_links",
+    )
+    depth = models.PositiveSmallIntegerField()
+
+    class Meta:
+        db_table = "category_closure"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["ancestor", "descendant"],
+                name="uq_category_closure",
+            )
+        ]
+        indexes = [
+            models.Index(fields=["descendant", "depth"]),
+        ]
+
+    def __str__(self):
+        return f"{self.ancestor_id} -> {self.descendant_id} ({self.depth})"
+
+    @classmethod
+    def insert_node(cls, category):
+        """新規カテゴリ: 親の祖先すべて + 自身 の行を追加"""
+        rows = [cls(ancestor_id=category.pk, descendant_id=category.pk, depth=0)]
+        if category.parent_id:
+            rows += [
+                cls(ancestor_id=a_id, descendant_id=category.pk, depth=d + 1)
+                for a_id, d in cls.objects
+                .filter(descendant_id=category.parent_id)
+                .values_list("ancestor_id", "depth")
+            ]
+        cls.objects.bulk_create(rows, ignore_conflicts=True)
+
+    @classmethod
+    def move_subtree(cls, category):
+        """親の付け替え: サブツリー外の祖先との行を張り替える"""
+        subtree = list(
+            cls.objects
+            .filter(ancestor_id=category.pk)
+            .values_list("descendant_id", "depth")
+        )
+        subtree_ids = [s_id for s_id, _ in subtree]
+
+        cls.objects.filter(
+            descendant_id__in=subtree_ids
+        ).exclude(
+            ancestor_id__in=subtree_ids
+        ).delete()
+
+        if not category.parent_id:
+            return
+
+        ancestors = list(
+            cls.objects
+            .filter(descendant_id=category.parent_id)
+            .values_list("ancestor_id", "depth")
+        )
+        cls.objects.bulk_create([
+            cls(ancestor_id=a_id, descendant_id=s_id, depth=a_depth + s_depth + 1)
+            for a_id, a_depth in ancestors
+            for s_id, s_depth in subtree
+        ])
+
+    @classmethod
+    def rebuild(cls):
+        """閉包テーブルと root / path / depth を全件から作り直す"""
+        categories = {
+            c.pk: c
+            for c in Category.objects.only("id", "parent_id", "name", "root_id", "path", "depth")
+        }
+
+        rows = []
+        for c in categories.values():
+            chain = [c]
+            parent_id = c.parent_id
+            while parent_id and parent_id in categories and len(chain) <= len(categories):
+                chain.append(categories[parent_id])
+                parent_id = categories[parent_id].parent_id
+
+            for depth, ancestor in enumerate(chain):
+                rows.append(cls(ancestor_id=ancestor.pk, descendant_id=c.pk, depth=depth))
+
+            c.root_id = chain[-1].pk
+            c.path = " > ".join(a.name for a in reversed(chain))
+            c.depth = len(chain) - 1
+
+        with transaction.atomic():
+            cls.objects.all().delete()
+            cls.objects.bulk_create(rows, batch_size=1000)
+            Category.objects.bulk_update(
+                list(categories.values()), ["root", "path", "depth"], batch_size=500
+            )
+
+        return len(rows)
+
 
 # ============================================
 # 商品
@@ -0,0 +1,157 @@
+from django.db import models
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.models.customers import Customer, CustomerMemo, CustomerVehicle
+from core.models.vehicles import VehicleRegistration
+from core.utils.text import normalize_japanese
+
+
+# 検索文書に入れる Customer の項目
+CUSTOMER_SEARCH_FIELDS = (
+    "name", "kana", "company",
+    "phone", "mobile_phone", "company_phone",
+    "email", "postal_code", "address",
+)
+
+
+# ==========================
+# 顧客検索インデックス
+# ==========================
+class CustomerSearchIndex(models.Model):
+    """
+    顧客検索用の非正規化テーブル（1顧客1行）。
+    氏名・カナ・会社名・電話番号・メール・住所・メモ・所有車両の現在の登録番号を
+    normalize_japanese で正規化して1つの文書にまとめ、部分一致で検索する。
+    PostgreSQL では document に pg_trgm の GIN インデックスを張る（migration 0095）。
+
+    Customer / CustomerMemo / CustomerVehicle / VehicleRegistration の保存・削除時に
+    該当顧客だけ作り直し、rebuild_customer_search コマンドで全件を作り直せる。
+    """
+    customer = models.OneToOneField(
+        "core.Customer",
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="search_index",
+    )
+    document = models.TextField(blank=True, default="")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "customer_search_index"
+
+    def __str__(self):
+        return f"CustomerSearchIndex customer={self.customer_id}"
+
+    # ----------------------------
+    # 検索
+    # ----------------------------
+    @staticmethod
+    def normalize_query(q):
+        """検索語を文書と同じ規則で正規化する（記号・ハイフンは落ちる）"""
+        return normalize_japanese(q or "")
+
+    @classmethod
+    def filter_customers(cls, qs, q):
+        """Customer の queryset を検索語で絞る。正規化後に空なら絞らない"""
+        term = cls.normalize_query(q)
+        if not term:
+            return qs
+        return qs.filter(search_index__document__contains=term)
+
+    # ----------------------------
+    # 文書の作成・更新
+    # ----------------------------
+    @classmethod
+    def build_documents(cls, customer_ids):
+        """{customer_id: document} を返す（顧客・メモ・登録番号の3クエリ）"""
+        parts = {}
+
+        for row in Customer.objects.filter(id__in=customer_ids).values("id", *CUSTOMER_SEARCH_FIELDS):
+            parts[row["id"]] = [row[f] for f in CUSTOMER_SEARCH_FIELDS]
+
+        for cid, body in CustomerMemo.objects.filter(
+            customer_id__in=parts.keys()
+        ).values_list("customer_id", "body"):
+            parts[cid].append(body)
+
+        # 登録番号は車両の現在の登録だけ（旧登録の行はたどらない）
+        for cid, area, no in CustomerVehicle.objects.filter(
+            customer_id__in=parts.keys(), vehicle__current_registration__isnull=False
+        ).values_list(
+            "customer_id",
+            "vehicle__current_registration__registration_area",
+            "vehicle__current_registration__registration_no",
+        ):
+            parts[cid].extend([area, no])
+
+        # 項目をまたいだ誤一致を防ぐため項目ごとに正規化して空白で区切る
+        return {
+            cid: " ".join(filter(None, (normalize_japanese(v) for v in values if v)))
+            for cid, values in parts.items()
+        }
+
+    @classmethod
+    def refresh(cls, customer_ids):
+        """指定顧客の検索文書を作り直す"""
+        customer_ids = {cid for cid in customer_ids if cid}
+        if not customer_ids:
+            return
+
+        documents = cls.build_documents(customer_ids)
+        now = timezone.now()
+
+        cls.objects.bulk_create(
+            [cls(customer_id=cid, document=doc, updated_at=now) for cid, doc in documents.items()],
+            update_conflicts=True,
+            unique_fields=["customer"],
+            update_fields=["document", "updated_at"],
+        )
+
+    @classmethod
+    def rebuild(cls, batch_size=2000):
+        """全顧客の検索文書を作り直す。処理件数を返す"""
+        ids = list(Customer.objects.order_by("id").values_list("id", flat=True))
+        for i in range(0, len(ids), batch_size):
+            cls.refresh(ids[i:i + batch_size])
+        return len(ids)
+
+
+# ==========================
+# 保存・削除時の差分反映
+# ==========================
+@receiver(post_save, sender=Customer)
+def _customer_search_on_customer_save(sender, instance, **kwargs):
+    CustomerSearchIndex.refresh([instance.id])
+
+
+def _deleted_with_customer(origin):
+    """顧客の削除に伴う CASCADE なら True（検索文書も一緒に消えるので作り直さない）"""
+    if isinstance(origin, Customer):
+        return True
+    return isinstance(origin, models.QuerySet) and origin.model is Customer
+
+
+@receiver(post_save, sender=CustomerMemo)
+@receiver(post_save, sender=CustomerVehicle)
+def _customer_search_on_related_save(sender, instance, **kwargs):
+    CustomerSearchIndex.refresh([instance.customer_id])
+
+
+@receiver(post_delete, sender=CustomerMemo)
+@receiver(post_delete, sender=CustomerVehicle)
+def _customer_search_on_related_delete(sender, instance, origin=None, **kwargs):
+    if _deleted_with_customer(origin):
+        return
+    CustomerSearchIndex.refresh([instance.customer_id])
+
+
+@receiver(post_save, sender=VehicleRegistration)
+@receiver(post_delete, sender=VehicleRegistration)
+def _customer_search_on_registration_change(sender, instance, **kwargs):
+    # vehicles.py の receiver が先に接続されているので、現在の登録は更新済み
+    # 車両削除時の CASCADE では所有者（PROTECT）が残っていないので対象なしになる
+    CustomerSearchIndex.refresh(
+        CustomerVehicle.objects.filter(vehicle_id=instance.vehicle_id).values_list("customer_id", flat=True)
+    )
@@ -0,0 +1,163 @@
+from collections import defaultdict
+
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from core.models.customers import Customer
+from core.models.estimates import Estimate, EstimateParty
+from core.models.orders import Order
+
+
+# ==========================
+# 顧客の初回・最終対応店舗（Customer.first_shop / last_shop）
+# ==========================
+# 対応 = 顧客の受注（Order.customer）と見積（Estimate.party.source_customer）。
+# 店舗のある対応のうち作成日時が最も古いものが初回店舗、最も新しいものが最終店舗。
+# - 作成時: 最終店舗を新しい対応の店舗にし、初回店舗が空なら埋める（読み込みなしの UPDATE 1回）
+# - 顧客・店舗の付け替え／削除時: 関係する顧客だけ refresh_customer_shops で作り直す
+# - backfill_customer_shops コマンドで全件を作り直せる
+# 対応が1件もない顧客は、backfill では手入力の値を残し、付け替え・削除で対応がなくなった場合は空にする。
+
+
+def refresh_customer_shops(customer_ids, clear_missing=False):
+    """
+    指定顧客の初回・最終店舗を受注・見積から作り直す。更新件数を返す。
+    clear_missing=True なら対応のない顧客の初回・最終店舗を空にする。
+    """
+    customer_ids = {cid for cid in customer_ids if cid}
+    if not customer_ids:
+        return 0
+
+    actions = defaultdict(list)
+    for cid, shop_id, created_at, pk in (
+        Order.objects
+        .filter(customer_id__in=customer_ids, shop__isnull=False)
+        .values_list("customer_id", "shop_id", "created_at", "id")
+    ):
+        actions[cid].append((created_at, 0, pk, shop_id))
+    for cid, shop_id, created_at, pk in (
+        Estimate.objects
+        .filter(party__source_customer_id__in=customer_ids, shop__isnull=False)
+        .values_list("party__source_customer_id", "shop_id", "created_at", "id")
+    ):
+        actions[cid].append((created_at, 1, pk, shop_id))
+
+    targets = customer_ids if clear_missing else actions.keys()
+
+    changed = []
+    for customer in Customer.objects.filter(id__in=targets).only("id", "first_shop", "last_shop"):
+        rows = actions.get(customer.id)
+        first_shop_id = min(rows)[3] if rows else None
+        last_shop_id = max(rows)[3] if rows else None
+        if (customer.first_shop_id, customer.last_shop_id) != (first_shop_id, last_shop_id):
+            customer.first_shop_id = first_shop_id
+            customer.last_shop_id = last_shop_id
+            changed.append(customer)
+
+    # save() を通さない（updated_at や検索インデックスの更新は不要）
+    Customer.objects.bulk_update(changed, ["first_shop", "last_shop"], batch_size=1000)
+    return len(changed)
+
+
+def note_customer_action(customer_id, shop_id):
+    """新しい対応が作られたときの差分反映"""
+    if not customer_id or not shop_id:
+        return
+    Customer.objects.filter(pk=customer_id).update(
+        first_shop_id=Coalesce(F("first_shop_id"), Value(shop_id)),
+        last_shop_id=shop_id,
+    )
+
+
+# ==========================
+# Order / Estimate / EstimateParty 保存時の差分反映
+# ==========================
+# これらが update_fields に含まれない保存は初回・最終店舗に影響しない
+_ORDER_TRACKED = {"customer", "customer_id", "shop", "shop_id"}
+_ESTIMATE_TRACKED = {"party", "party_id", "shop", "shop_id"}
+_PARTY_TRACKED = {"source_customer", "source_customer_id"}
+
+
+def _affects_shops(update_fields, tracked):
+    return update_fields is None or bool(tracked & set(update_fields))
+
+
+def _estimate_customer_id(estimate):
+    if not estimate.party_id:
+        return None
+    return (
+        EstimateParty.objects
+        .filter(pk=estimate.party_id)
+        .values_list("source_customer_id", flat=True)
+        .first()
+    )
+
+
+@receiver(pre_save, sender=Order)
+def _order_shops_pre_save(sender, instance, update_fields=None, **kwargs):
+    instance._shops_old = None
+    if instance._state.adding or not _affects_shops(update_fields, _ORDER_TRACKED):
+        return
+    instance._shops_old = sender.objects.filter(pk=instance.pk).values_list("customer_id", "shop_id").first()
+
+
+@receiver(post_save, sender=Order)
+def _order_shops_post_save(sender, instance, created, **kwargs):
+    if created:
+        note_customer_action(instance.customer_id, instance.shop_id)
+        return
+    old = getattr(instance, "_shops_old", None)
+    if old and old != (instance.customer_id, instance.shop_id):
+        refresh_customer_shops({old[0], instance.customer_id}, clear_missing=True)
+
+
+@receiver(post_delete, sender=Order)
+def _order_shops_post_delete(sender, instance, **kwargs):
+    refresh_customer_shops([instance.customer_id], clear_missing=True)
+
+
+@receiver(pre_save, sender=Estimate)
+def _estimate_shops_pre_save(sender, instance, update_fields=None, **kwargs):
+    instance._shops_old = None
+    if instance._state.adding or not _affects_shops(update_fields, _ESTIMATE_TRACKED):
+        return
+    instance._shops_old = sender.objects.filter(pk=instance.pk).values_list("party_id", "shop_id").first()
+
+
+@receiver(post_save, sender=Estimate)
+def _estimate_shops_post_save(sender, instance, created, **kwargs):
+    if created:
+        note_customer_action(_estimate_customer_id(instance), instance.shop_id)
+        return
+    old = getattr(instance, "_shops_old", None)
+    if not old or old == (instance.party_id, instance.shop_id):
+        return
+    old_customer_id = (
+        EstimateParty.objects.filter(pk=old[0]).values_list("source_customer_id", flat=True).first()
+        if old[0] else None
+    )
+    refresh_customer_shops({old_customer_id, _estimate_customer_id(instance)}, clear_missing=True)
+
+
+@receiver(post_delete, sender=Estimate)
+def _estimate_shops_post_delete(sender, instance, **kwargs):
+    refresh_customer_shops([_estimate_customer_id(instance)], clear_missing=True)
+
+
+@receiver(pre_save, sender=EstimateParty)
+def _party_shops_pre_save(sender, instance, update_fields=None, **kwargs):
+    instance._shops_old = None
+    if instance._state.adding or not _affects_shops(update_fields, _PARTY_TRACKED):
+        return
+    instance._shops_old = sender.objects.filter(pk=instance.pk).values_list("source_customer_id").first()
+
+
+@receiver(post_save, sender=EstimateParty)
+def _party_shops_post_save(sender, instance, created, **kwargs):
+    # 新規作成時はまだ見積に紐づいていないので対応はない
+    old = getattr(instance, "_shops_old", None)
+    if created or not old or old[0] == instance.source_customer_id:
+        return
+    refresh_customer_shops({old[0], instance.source_customer_id}, clear_missing=True)
@@ -1,9 +1,26 @@
 from django.db import models
 from django.conf import settings
 from django.core.validators import FileExtensionValidator
-from PIL import Image
 import os
 from django.db.models import Q
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+import re
+import unicodedata
+
+from core.utils.text import normalize_japanese
+from core.models.image_derivatives import ImageDerivatives
+
+
+def phone_match_key(value):
+    """電話番号の照合キー（数字のみ。全角数字も半角にそろえる）"""
+    if not value:
+        return ""
+    return re.sub(r"\D", "", unicodedata.normalize("NFKC", str(value)))
+
+
+def email_match_key(value):
+    return (value or "").strip().lower()
 
 
 class Customer(models.Model):
@@ -26,13 +43,46 @@ class Customer(models.Model):
 
     birthdate = models.DateField(null=True, blank=True)
     app_no = models.CharField("アプリNo", max_length=50, blank=True, null=True)
+
+    # 重複検出用の照合キー（save 時に自動設定。bulk_create する場合は fill_match_keys を呼ぶ）
+    name_key = models.CharField(max_length=100, blank=True, default="", editable=False)
+    kana_key = models.CharField(max_length=100, blank=True, default="", editable=False)
+    phone_key = models.CharField(max_length=20, blank=True, default="", editable=False, db_index=True)
+    mobile_phone_key = models.CharField(max_length=20, blank=True, default="", editable=False, db_index=True)
+    email_key = models.CharField(max_length=255, blank=True, default="", editable=False, db_index=True)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    MATCH_KEY_FIELDS = ("name_key", "kana_key", "phone_key", "mobile_phone_key", "email_key")
+
+    class Meta:
+        indexes = [
+            # 前方一致（LIKE 'xxx%'）でも使えるよう pattern_ops で張る（PostgreSQL）
+            models.Index(fields=["name_key"], name="customer_name_key_idx", opclasses=["varchar_pattern_ops"]),
+            models.Index(fields=["kana_key"], name="customer_kana_key_idx", opclasses=["varchar_pattern_ops"]),
+        ]
+
     def __str__(self):
         return self.name
 
-class CustomerImage(models.Model):
+    def fill_match_keys(self):
+        self.name_key = normalize_japanese(self.name)[:100]
+        self.kana_key = normalize_japanese(self.kana)[:100]
+        self.phone_key = phone_match_key(self.phone)[:20]
+        self.mobile_phone_key = phone_match_key(self.mobile_phone)[:20]
+        self.email_key = email_match_key(self.email)[:255]
+
+    def save(self, *args, **kwargs):
+        self.fill_match_keys()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = set(update_fields) | set(self.MATCH_KEY_FIELDS)
+        super().save(*args, **kwargs)
+
+class CustomerImage(ImageDerivatives):
+    DERIVATIVE_DIR = "customer_images/derivatives"
+
     customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name="images")
     image = models.ImageField(upload_to="customer_images/", validators=[FileExtensionValidator(["jpg", "jpeg", "png", "gif"])])
     mime = models.CharField(max_length=100, blank=True, null=True)
@@ -42,17 +92,16 @@ class CustomerImage(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     def save(self, *args, **kwargs):
-        if self.image:
-            try:
-                img = Image.open(self.image)
-                self.width, self.height = img.size
-                self.bytes = self.image.size
-                self.mime = Image.MIME.get(img.format, None)
-            except Exception:
-                pass
+        if self.image and self._state.adding:
+            self.fill_upload_meta()
         super().save(*args, **kwargs)
 
 
+@receiver(post_delete, sender=CustomerImage)
+def delete_customer_image_file(sender, instance, **kwargs):
+    instance.delete_files()
+
+
 class CustomerMemo(models.Model):
     customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name="memos")
     body = models.TextField(blank=True, null=True)
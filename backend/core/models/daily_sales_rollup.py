@@ -0,0 +1,279 @@
+from django.db import connection, models, transaction
+from django.conf import settings
+from django.db.models import Count, Q, Sum
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from core.models.estimates import Estimate
+from core.models.orders import Order
+
+
+# ==========================
+# 日別 見積/受注/売上 集計（店舗 × 担当）
+# ==========================
+ROLLUP_VALUE_FIELDS = (
+    "estimate_total", "estimate_count",
+    "order_total", "order_count",
+    "sales_total", "sales_count",
+)
+
+
+class DailySalesRollup(models.Model):
+    """
+    SalesDailyAPIView 用の事前集計テーブル。
+    (日付, 店舗, 担当) ごとに見積・受注・売上の合計と件数を持つ。
+    Estimate / Order の保存・削除時に該当キーだけ再集計し、
+    rebuild_daily_sales コマンドで任意期間を作り直せる。
+    """
+    date = models.DateField()
+    shop = models.ForeignKey(
+        "core.Shop",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    staff = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+
+    estimate_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    estimate_count = models.PositiveIntegerField(default=0)
+    order_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    order_count = models.PositiveIntegerField(default=0)
+    sales_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    sales_count = models.PositiveIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "daily_sales_rollups"
+        ordering = ["date"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["date", "shop", "staff"],
+                name="uq_daily_sales_rollup",
+                nulls_distinct=False,
+            )
+        ]
+        indexes = [
+            models.Index(fields=["shop", "date"]),
+        ]
+
+    def __str__(self):
+        return f"{self.date} shop={self.shop_id} staff={self.staff_id}"
+
+    # ----------------------------
+    # 差分更新（キー単位で再集計）
+    # ----------------------------
+    @classmethod
+    def refresh(cls, keys):
+        """
+        (date, shop_id, staff_id) の集合について元テーブルから再集計する。
+        同じキーを同時に再集計すると、後から書いた方が相手の伝票を含まない値で上書きしうるので、
+        先にキーの行を用意して行ロックを取り、ロック後に集計して upsert する（キー単位で直列化）。
+        """
+        keys = sorted(
+            {k for k in keys if k[0] is not None},
+            key=lambda k: (k[0], k[1] or 0, k[2] or 0),
+        )
+        if not keys:
+            return
+
+        # SQLite は NULL を含む一意制約（nulls_distinct=False）を張れないので ON CONFLICT が使えない
+        upsert = connection.features.supports_nulls_distinct_unique_constraints
+
+        with transaction.atomic():
+            if upsert:
+                cls.objects.bulk_create(
+                    [cls(date=day, shop_id=shop_id, staff_id=staff_id) for day, shop_id, staff_id in keys],
+                    ignore_conflicts=True,
+                )
+            key_q = Q()
+            for day, shop_id, staff_id in keys:
+                key_q |= Q(date=day, shop_id=shop_id, staff_id=staff_id)
+            list(cls.objects.select_for_update().filter(key_q).order_by("id").values_list("id"))
+
+            rows, empty = [], Q()
+            for day, shop_id, staff_id in keys:
+                values = cls._aggregate_key(day, shop_id, staff_id)
+                if not any(values[f] for f in ("estimate_count", "order_count", "sales_count")):
+                    empty |= Q(date=day, shop_id=shop_id, staff_id=staff_id)
+                elif upsert:
+                    rows.append(cls(date=day, shop_id=shop_id, staff_id=staff_id, **values))
+                else:
+                    cls.objects.update_or_create(
+                        date=day, shop_id=shop_id, staff_id=staff_id, defaults=values
+                    )
+
+            if rows:
+                cls.objects.bulk_create(
+                    rows,
+                    update_conflicts=True,
+                    unique_fields=["date", "shop", "staff"],
+                    update_fields=[*ROLLUP_VALUE_FIELDS, "updated_at"],
+                )
+            if empty:
+                cls.objects.filter(empty).delete()
+
+    @classmethod
+    def _aggregate_key(cls, day, shop_id, staff_id):
+        base = {"shop_id": shop_id, "created_by_id": staff_id}
+
+        est = Estimate.objects.filter(estimate_date=day, **base).aggregate(
+            total=Sum("grand_total"), count=Count("id")
+        )
+        od = Order.objects.filter(order_date=day, **base).aggregate(
+            total=Sum("grand_total"), count=Count("id")
+        )
+        sales = Order.objects.filter(sales_date=day, **base).aggregate(
+            total=Sum("grand_total"), count=Count("id")
+        )
+
+        return {
+            "estimate_total": est["total"] or 0,
+            "estimate_count": est["count"],
+            "order_total":    od["total"] or 0,
+            "order_count":    od["count"],
+            "sales_total":    sales["total"] or 0,
+            "sales_count":    sales["count"],
+        }
+
+    @classmethod
+    def refresh_orders(cls, order_ids):
+        """QuerySet.update など signal を通らない更新の後に呼ぶ"""
+        keys = set()
+        for row in Order.objects.filter(id__in=order_ids).values(*ORDER_ROLLUP_FIELDS):
+            keys |= _order_keys_from_values(row)
+        cls.refresh(keys)
+
+    @classmethod
+    def refresh_estimates(cls, estimate_ids):
+        """QuerySet.update など signal を通らない更新の後に呼ぶ"""
+        keys = set()
+        for row in Estimate.objects.filter(id__in=estimate_ids).values(*ESTIMATE_ROLLUP_FIELDS):
+            keys |= _estimate_keys_from_values(row)
+        cls.refresh(keys)
+
+    # ----------------------------
+    # 期間再構築
+    # ----------------------------
+    @classmethod
+    def rebuild(cls, start=None, end=None):
+        """期間内の集計行を削除し、GROUP BY 3本から作り直す。作成行数を返す"""
+        def _range(qs, field):
+            if start:
+                qs = qs.filter(**{f"{field}__gte": start})
+            if end:
+                qs = qs.filter(**{f"{field}__lte": end})
+            return qs
+
+        rows = {}
+
+        def _merge(qs, date_field, prefix):
+            grouped = (
+                _range(qs, date_field)
+                .exclude(**{f"{date_field}__isnull": True})
+                .values(date_field, "shop_id", "created_by_id")
+                .annotate(total=Sum("grand_total"), count=Count("id"))
+                .order_by()
+            )
+            for g in grouped:
+                key = (g[date_field], g["shop_id"], g["created_by_id"])
+                row = rows.setdefault(key, cls(date=key[0], shop_id=key[1], staff_id=key[2]))
+                setattr(row, f"{prefix}_total", g["total"] or 0)
+                setattr(row, f"{prefix}_count", g["count"])
+
+        _merge(Estimate.objects.all(), "estimate_date", "estimate")
+        _merge(Order.objects.all(), "order_date", "order")
+        _merge(Order.objects.all(), "sales_date", "sales")
+
+        with transaction.atomic():
+            _range(cls.objects.all(), "date").delete()
+            cls.objects.bulk_create(rows.values(), batch_size=1000)
+
+        return len(rows)
+
+
+# ==========================
+# Estimate / Order 保存時の差分反映
+# ==========================
+ORDER_ROLLUP_FIELDS = ("order_date", "sales_date", "shop_id", "created_by_id")
+ESTIMATE_ROLLUP_FIELDS = ("estimate_date", "shop_id", "created_by_id")
+
+# これらが update_fields に含まれない保存は集計に影響しない
+_ORDER_TRACKED = {"order_date", "sales_date", "shop", "shop_id", "created_by", "created_by_id", "grand_total"}
+_ESTIMATE_TRACKED = {"estimate_date", "shop", "shop_id", "created_by", "created_by_id", "grand_total"}
+
+
+def _order_keys_from_values(v):
+    return {
+        (v["order_date"], v["shop_id"], v["created_by_id"]),
+        (v["sales_date"], v["shop_id"], v["created_by_id"]),
+    }
+
+
+def _estimate_keys_from_values(v):
+    return {(v["estimate_date"], v["shop_id"], v["created_by_id"])}
+
+
+def _instance_values(instance, fields):
+    return {f: getattr(instance, f) for f in fields}
+
+
+def _affects_rollup(update_fields, tracked):
+    return update_fields is None or bool(tracked & set(update_fields))
+
+
+@receiver(pre_save, sender=Order)
+def _order_rollup_pre_save(sender, instance, update_fields=None, **kwargs):
+    instance._rollup_old_keys = set()
+    if instance._state.adding or not _affects_rollup(update_fields, _ORDER_TRACKED):
+        return
+    old = sender.objects.filter(pk=instance.pk).values(*ORDER_ROLLUP_FIELDS).first()
+    if old:
+        instance._rollup_old_keys = _order_keys_from_values(old)
+
+
+@receiver(post_save, sender=Order)
+def _order_rollup_post_save(sender, instance, update_fields=None, **kwargs):
+    if not _affects_rollup(update_fields, _ORDER_TRACKED):
+        return
+    keys = _order_keys_from_values(_instance_values(instance, ORDER_ROLLUP_FIELDS))
+    DailySalesRollup.refresh(keys | getattr(instance, "_rollup_old_keys", set()))
+
+
+@receiver(post_delete, sender=Order)
+def _order_rollup_post_delete(sender, instance, **kwargs):
+    DailySalesRollup.refresh(
+        _order_keys_from_values(_instance_values(instance, ORDER_ROLLUP_FIELDS))
+    )
+
+
+@receiver(pre_save, sender=Estimate)
+def _estimate_rollup_pre_save(sender, instance, update_fields=None, **kwargs):
+    instance._rollup_old_keys = set()
+    if instance._state.adding or not _affects_rollup(update_fields, _ESTIMATE_TRACKED):
+        return
+    old = sender.objects.filter(pk=instance.pk).values(*ESTIMATE_ROLLUP_FIELDS).first()
+    if old:
+        instance._rollup_old_keys = _estimate_keys_from_values(old)
+
+
+@receiver(post_save, sender=Estimate)
+def _estimate_rollup_post_save(sender, instance, update_fields=None, **kwargs):
+    if not _affects_rollup(update_fields, _ESTIMATE_TRACKED):
+        return
+    keys = _estimate_keys_from_values(_instance_values(instance, ESTIMATE_ROLLUP_FIELDS))
+    DailySalesRollup.refresh(keys | getattr(instance, "_rollup_old_keys", set()))
+
+
+@receiver(post_delete, sender=Estimate)
+def _estimate_rollup_post_delete(sender, instance, **kwargs):
+    DailySalesRollup.refresh(
+        _estimate_keys_from_values(_instance_values(instance, ESTIMATE_ROLLUP_FIELDS))
+    )
@@ -0,0 +1,150 @@
+from datetime import date
+
+from django.apps import apps
+from django.db import IntegrityError, models, transaction
+from django.db.models import IntegerField, Max, Q
+from django.db.models.functions import Cast, Substr
+
+
+class DocumentSequence(models.Model):
+    """
+    受注番号・見積番号の採番テーブル（種類・年・店舗ごとに1行）。
+    番号は「西暦下2桁 + 5桁連番」（例: 2600001）。
+
+    next_no() は行を select_for_update でロックして1つ進めるので、同時に作成しても番号が重複しない。
+    呼び出し側のトランザクション内で使えば、作成に失敗したとき番号も巻き戻る。
+    行がまだない年は、既存データの最大番号から開始する（初回のみ MAX を取る）。
+    店舗は現在の採番では使っていない（全店共通 = NULL）。
+    """
+    KIND_CHOICES = [
+        ("order",    "受注"),
+        ("estimate", "見積"),
+    ]
+
+    # 種類 → (モデル, 番号フィールド)
+    SOURCES = {
+        "order":    ("core.Order", "order_no"),
+        "estimate": ("core.Estimate", "estimate_no"),
+    }
+
+    kind = models.CharField("種類", max_length=20, choices=KIND_CHOICES)
+    year = models.PositiveSmallIntegerField("年")
+    shop = models.ForeignKey(
+        "core.Shop",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="document_sequences",
+    )
+    last_number = models.PositiveIntegerField("最終番号", default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "document_sequences"
+        constraints = [
+            # NULL 同士は一意制約で重複扱いにならないので、全店共通とで分けて張る
+            models.UniqueConstraint(
+                fields=["kind", "year", "shop"],
+                condition=Q(shop__isnull=False),
+                name="uq_document_sequence_shop",
+            ),
+            models.UniqueConstraint(
+                fields=["kind", "year"],
+                condition=Q(shop__isnull=True),
+                name="uq_document_sequence_all_shops",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.year} shop={self.shop_id}: {self.last_number}"
+
+    # ----------------------------
+    # 採番
+    # ----------------------------
+    @classmethod
+    def next_no(cls, kind, shop=None, on=None):
+        """次の番号を確定して返す（行ロックあり）"""
+        year = (on or date.today()).year
+        model, field = cls._source(kind)
+
+        with transaction.atomic():
+            seq = cls._get_locked(kind, year, shop)
+            while True:
+                seq.last_number += 1
+                no = cls.format_no(year, seq.last_number)
+                # 手入力された番号と重なったら飛ばす（一意インデックスで1件確認）
+                if not model.objects.filter(**{field: no}).exists():
+                    break
+            seq.save(update_fields=["last_number", "updated_at"])
+        return no
+
+    @classmethod
+    def next_nos(cls, kind, count, shop=None, on=None):
+        """count 件分の番号をまとめて確定して返す（一括作成用。行ロックは1回）"""
+        year = (on or date.today()).year
+        model, field = cls._source(kind)
+
+        numbers = []
+        with transaction.atomic():
+            seq = cls._get_locked(kind, year, shop)
+            while len(numbers) < count:
+                need = count - len(numbers)
+                candidates = [cls.format_no(year, seq.last_number + i) for i in range(1, need + 1)]
+                taken = set(
+                    model.objects.filter(**{f"{field}__in": candidates}).values_list(field, flat=True)
+                )
+                numbers.extend(no for no in candidates if no not in taken)
+                seq.last_number += need
+            seq.save(update_fields=["last_number", "updated_at"])
+        return numbers
+
+    @classmethod
+    def peek_no(cls, kind, shop=None, on=None):
+        """次に振られる予定の番号（ロックしない・確定しない）"""
+        year = (on or date.today()).year
+        last_number = (
+            cls.objects.filter(kind=kind, year=year, shop=shop)
+            .values_list("last_number", flat=True)
+            .first()
+        )
+        if last_number is None:
+            last_number = cls._max_existing(kind, year)
+        return cls.format_no(year, last_number + 1)
+
+    @staticmethod
+    def format_no(year, number):
+        return f"{year % 100:02d}{number:05d}"
+
+    # ----------------------------
+    # 内部
+    # ----------------------------
+    @classmethod
+    def _source(cls, kind):
+        label, field = cls.SOURCES[kind]
+        return apps.get_model(label), field
+
+    @classmethod
+    def _get_locked(cls, kind, year, shop):
+        lookup = {"kind": kind, "year": year, "shop": shop}
+        seq = cls.objects.select_for_update().filter(**lookup).first()
+        if seq is not None:
+            return seq
+
+        # 初回: 既存データの最大番号から開始。同時に作られたら相手の行を使う
+        try:
+            with transaction.atomic():
+                cls.objects.create(**lookup, last_number=cls._max_existing(kind, year))
+        except IntegrityError:
+            pass
+        return cls.objects.select_for_update().get(**lookup)
+
+    @classmethod
+    def _max_existing(cls, kind, year):
+        model, field = cls._source(kind)
+        return (
+            model.objects
+            .filter(**{f"{field}__startswith": f"{year % 100:02d}"})
+            .annotate(number_part=Cast(Substr(field, 3, 5), IntegerField()))
+            .aggregate(max_number=Max("number_part"))
+            .get("max_number")
+        ) or 0
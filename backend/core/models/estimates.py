@@ -2,6 +2,7 @@ from django.db import models
 from django.conf import settings
 from django.contrib.contenttypes.fields import GenericRelation
 from core.models.payments import Payment
+from core.models.settlements import Settlement
 from decimal import Decimal
 
 from django.db import models
@@ -107,6 +108,7 @@ class Estimate(models.Model):
         default=Decimal("0"),
     )
     payments = GenericRelation(Payment, related_query_name="estimate")
+    settlements = GenericRelation(Settlement, related_query_name="estimate")
     memo = models.TextField(blank=True, null=True)
     internal_memo = models.TextField(
         "内部メモ",
@@ -118,6 +120,12 @@ class Estimate(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # 期間での絞り込み・キーセットページング（見積日 DESC, id DESC）用
+            models.Index(fields=["estimate_date", "id"], name="estimate_date_idx"),
+        ]
+
 # core/models/estimates.py
 
 class EstimateItem(models.Model):
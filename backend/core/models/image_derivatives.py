@@ -0,0 +1,53 @@
+import os
+
+from django.db import models
+
+
+# ==========================
+# 画像の派生ファイル（一覧用サムネイル・詳細表示用）
+# ==========================
+# アップロードされた画像はそのまま保存し、リクエスト内では加工しない。
+# レポートワーカー（run_report_worker）が derivatives_status="pending" の画像を拾って
+# サムネイル・表示用の縮小版と幅・高さを作る（core/services/image_derivatives.py）。
+
+DERIVATIVE_STATUS_CHOICES = [
+    ("pending", "作成待ち"),
+    ("done", "作成済み"),
+    ("failed", "失敗"),
+]
+
+
+def derivative_upload_to(instance, filename):
+    return os.path.join(instance.DERIVATIVE_DIR, filename)
+
+
+class ImageDerivatives(models.Model):
+    """image（元画像）を持つモデルに派生ファイルの列を足す"""
+
+    # 派生ファイルの保存先（MEDIA_ROOT からの相対パス）
+    DERIVATIVE_DIR = "derivatives"
+
+    thumbnail = models.ImageField(upload_to=derivative_upload_to, blank=True, verbose_name="サムネイル")
+    preview = models.ImageField(upload_to=derivative_upload_to, blank=True, verbose_name="表示用画像")
+    derivatives_status = models.CharField(
+        max_length=10,
+        choices=DERIVATIVE_STATUS_CHOICES,
+        default="pending",
+        db_index=True,
+        verbose_name="派生ファイル作成状況",
+    )
+
+    class Meta:
+        abstract = True
+
+    def fill_upload_meta(self):
+        """アップロード時に分かる情報だけ埋める（ファイルは開かない。幅・高さはワーカーで入れる）"""
+        upload = getattr(self.image, "file", None)
+        self.bytes = getattr(upload, "size", None) or self.bytes
+        self.mime = getattr(upload, "content_type", None) or self.mime
+
+    def delete_files(self):
+        """元画像と派生ファイルを消す（レコード削除後に呼ぶ）"""
+        for field in (self.image, self.thumbnail, self.preview):
+            if field:
+                field.storage.delete(field.name)
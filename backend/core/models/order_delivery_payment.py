@@ -1,5 +1,5 @@
 from django.db import models
-from django.db.models import Sum
+from django.db.models import Sum, Max
 
 
 class Delivery(models.Model):
@@ -28,65 +28,115 @@ class Delivery(models.Model):
     # ============================================================
     def update_status(self):
         order = self.order
-        all_items = order.items.all()
+        status, final_date = calc_delivery_status([order.id])[order.id]
 
-        total_items = all_items.count()
-        completed = 0
-        partial = 0
+        order.delivery_status = status
+        order.final_delivery_date = final_date
+        order.save(update_fields=["delivery_status", "final_delivery_date"])
+
+        return status
 
-        delivered_dates = []  # itemごとの最終納品日
+    @classmethod
+    def update_status_bulk(cls, order_ids, batch_size=500):
+        """
+        複数受注の納品状況をまとめて再計算する（バックフィル・インポート用）。
+        bulk_update で書き込むため Order の signal は通らない。更新件数を返す。
+        """
+        from core.models.orders import Order
 
-        for oi in all_items:
-            ordered_qty = oi.quantity
+        order_ids = list(order_ids)
+        updated = 0
 
-            delivered_qty = DeliveryItem.objects.filter(
-                order_item=oi
-            ).aggregate(total=Sum("quantity"))["total"] or 0
+        for i in range(0, len(order_ids), batch_size):
+            chunk = order_ids[i:i + batch_size]
+            results = calc_delivery_status(chunk)
 
-            # itemの納品日（最大値）
-            item_dates = DeliveryItem.objects.filter(
-                order_item=oi
-            ).values_list("delivery__delivery_date", flat=True)
+            changed = []
+            for order in Order.objects.filter(id__in=chunk).only(
+                "id", "delivery_status", "final_delivery_date"
+            ):
+                status, final_date = results[order.id]
+                if (order.delivery_status, order.final_delivery_date) != (status, final_date):
+                    order.delivery_status = status
+                    order.final_delivery_date = final_date
+                    changed.append(order)
 
-            if item_dates:
-                delivered_dates.append(max(item_dates))
+            Order.objects.bulk_update(changed, ["delivery_status", "final_delivery_date"])
+            updated += len(changed)
 
-            # ステータス判定
-            if delivered_qty == 0:
-                # 未納品
-                continue
-            elif delivered_qty < ordered_qty:
-                # 部分納品
-                partial += 1
-            else:
-                # すべて納品完了
-                completed += 1
+        return updated
 
+
+# ==================================================
+# 納品状況の計算（明細ごとの納品数量合計・最終納品日を1クエリで集計）
+# ==================================================
+def calc_delivery_status(order_ids):
+    """
+    {order_id: (delivery_status, final_delivery_date)} を返す。
+    明細のない受注は ("not_delivered", None)。
+    """
+    from core.models.orders import OrderItem
+
+    counts = {
+        oid: {"total": 0, "completed": 0, "partial": 0, "dates": []}
+        for oid in order_ids
+    }
+
+    rows = (
+        OrderItem.objects
+        .filter(order_id__in=order_ids)
+        .values("id", "order_id", "quantity")
+        .annotate(
+            delivered_qty=Sum("deliveryitem__quantity"),
+            last_date=Max("deliveryitem__delivery__delivery_date"),
+        )
+        .order_by()
+    )
+
+    for r in rows:
+        c = counts[r["order_id"]]
+        c["total"] += 1
+
+        # itemの納品日（最大値）
+        if r["last_date"] is not None:
+            c["dates"].append(r["last_date"])
+
+        delivered_qty = r["delivered_qty"] or 0
+        if delivered_qty == 0:
+            # 未納品
+            continue
+        elif delivered_qty < r["quantity"]:
+            # 部分納品
+            c["partial"] += 1
+        else:
+            # すべて納品完了
+            c["completed"] += 1
+
+    results = {}
+    for oid, c in counts.items():
         # ---------------------------------------
         #  Order.delivery_status の判定
         # ---------------------------------------
-        if total_items == 0:
+        if c["total"] == 0:
             status = "not_delivered"
-        elif completed == total_items:
+        elif c["completed"] == c["total"]:
             status = "delivered"
-        elif partial > 0 or completed > 0:
+        elif c["partial"] > 0 or c["completed"] > 0:
             status = "partial"
         else:
             status = "not_delivered"
 
-        order.delivery_status = status
-
         # ---------------------------------------
         #  final_delivery_date の決定
         # ---------------------------------------
-        if status == "delivered" and delivered_dates:
-            order.final_delivery_date = max(delivered_dates)
+        if status == "delivered" and c["dates"]:
+            final_date = max(c["dates"])
         else:
-            order.final_delivery_date = None
+            final_date = None
 
-        order.save(update_fields=["delivery_status", "final_delivery_date"])
+        results[oid] = (status, final_date)
 
-        return status
+    return results
 
 
 # ==================================================
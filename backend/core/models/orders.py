@@ -2,6 +2,7 @@ from django.db import models
 from django.conf import settings
 from django.contrib.contenttypes.fields import GenericRelation
 from core.models.payments import Payment
+from core.models.settlements import Settlement
 from core.models.unit import Unit
 from decimal import Decimal
 
@@ -79,6 +80,7 @@ class Order(models.Model):
         default=Decimal("0"),
     )
     payments = GenericRelation(Payment, related_query_name="order")
+    settlements = GenericRelation(Settlement, related_query_name="order")
     memo = models.TextField(blank=True, null=True)
     internal_memo = models.TextField(
         "内部メモ",
@@ -100,6 +102,11 @@ class Order(models.Model):
     class Meta:
         db_table = "orders"
         ordering = ["-created_at"]
+        indexes = [
+            # 期間での絞り込み・キーセットページング（日付 DESC, id DESC）用
+            models.Index(fields=["order_date", "id"], name="order_date_idx"),
+            models.Index(fields=["sales_date", "id"], name="order_sales_date_idx"),
+        ]
 
     def __str__(self):
         return self.order_no
@@ -19,3 +19,9 @@ class Payment(models.Model):
     credit_start_month = models.CharField(max_length=7, null=True, blank=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # 見積・受注ごとの取得（payments の prefetch）用
+            models.Index(fields=["content_type", "object_id"], name="payment_target_idx"),
+        ]
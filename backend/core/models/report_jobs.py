@@ -0,0 +1,74 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.db.models import Q
+
+
+class ReportJob(models.Model):
+    """
+    重い帳票・分析・CSV をリクエスト外で実行するためのジョブ。
+    DB をキューとして使い、run_report_worker コマンドが queued を1件ずつ取り出して処理する。
+    同じ種類・同じパラメータで待機中/実行中のジョブがあれば新規登録せずそれを返す。
+    """
+    KIND_CHOICES = [
+        ("product_analytics", "商品分析"),
+        ("report",            "帳票"),
+        ("management_csv",    "納品・入金CSV"),
+        ("customer_duplicates", "顧客重複候補"),
+        ("pdf_batch",         "PDF一括出力"),
+    ]
+    STATUS_CHOICES = [
+        ("queued",  "待機中"),
+        ("running", "実行中"),
+        ("done",    "完了"),
+        ("failed",  "失敗"),
+    ]
+    ACTIVE_STATUSES = ("queued", "running")
+
+    kind = models.CharField("種類", max_length=30, choices=KIND_CHOICES)
+    params = models.JSONField("パラメータ", default=dict)
+    params_hash = models.CharField("パラメータハッシュ", max_length=64, db_index=True)
+
+    status = models.CharField(
+        "ステータス", max_length=20, choices=STATUS_CHOICES, default="queued"
+    )
+    requested_by = models.ForeignKey(
+        "core.User",
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name="report_jobs",
+        verbose_name="依頼者",
+    )
+
+    # 結果（JSON 系はそのまま、CSV はファイル）
+    result = models.JSONField("結果", null=True, blank=True, encoder=DjangoJSONEncoder)
+    result_file = models.FileField("結果ファイル", upload_to="report_jobs/", blank=True)
+    result_filename = models.CharField("ダウンロード名", max_length=255, blank=True)
+    result_content_type = models.CharField("Content-Type", max_length=100, blank=True)
+    error = models.TextField("エラー", blank=True)
+
+    attempts = models.PositiveSmallIntegerField("試行回数", default=0)
+    worker = models.CharField("ワーカー", max_length=100, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField("開始日時", null=True, blank=True)
+    # 実行中のワーカーが定期的に更新する（途絶えたら停止とみなして戻す）
+    heartbeat_at = models.DateTimeField("生存確認日時", null=True, blank=True)
+    finished_at = models.DateTimeField("終了日時", null=True, blank=True)
+
+    class Meta:
+        db_table = "report_jobs"
+        ordering = ["-created_at"]
+        constraints = [
+            # 同一パラメータの待機中/実行中ジョブは1件だけ
+            models.UniqueConstraint(
+                fields=["params_hash"],
+                condition=Q(status__in=("queued", "running")),
+                name="uq_report_job_active_params",
+            )
+        ]
+        indexes = [
+            models.Index(fields=["status", "created_at"]),
+        ]
+
+    def __str__(self):
+        return f"ReportJob #{self.id} {self.kind} [{self.status}]"
@@ -0,0 +1,38 @@
+from django.db import models
+
+
+class RequestMetric(models.Model):
+    """
+    エンドポイントごとのリクエスト計測（RequestMetricsMiddleware がプロセス内で集計し、一定間隔で書き出す）。
+    1行 = 1プロセス × 集計期間 × エンドポイント。複数ワーカーの行は読み出し時に合算する。
+    ヒストグラムは core/services/request_metrics.py の LATENCY_BUCKETS_MS / QUERY_BUCKETS の区切りごとの件数。
+    """
+    period_start = models.DateTimeField("集計開始")
+    endpoint = models.CharField("エンドポイント", max_length=200)   # "GET core.views....CustomerListCreateView" など
+    worker = models.CharField("ワーカー", max_length=100, blank=True)
+
+    count = models.PositiveIntegerField("件数", default=0)
+    error_count = models.PositiveIntegerField("5xx件数", default=0)
+
+    latency_sum_ms = models.FloatField("応答時間合計(ms)", default=0)
+    latency_max_ms = models.FloatField("応答時間最大(ms)", default=0)
+    latency_hist = models.JSONField("応答時間ヒストグラム", default=list)
+
+    query_count_sum = models.PositiveIntegerField("SQL件数合計", default=0)
+    query_count_max = models.PositiveIntegerField("SQL件数最大", default=0)
+    query_hist = models.JSONField("SQL件数ヒストグラム", default=list)
+    query_time_sum_ms = models.FloatField("SQL時間合計(ms)", default=0)
+
+    # 同じSQL（パラメータ違い）が1リクエスト内で繰り返されたもの（N+1 の疑い）
+    # {fingerprint: {"requests": 件数, "repeats": 合計回数, "max_repeat": 最大回数}}
+    duplicates = models.JSONField("重複SQL", default=dict)
+
+    class Meta:
+        db_table = "request_metrics"
+        ordering = ["-period_start"]
+        indexes = [
+            models.Index(fields=["period_start", "endpoint"]),
+        ]
+
+    def __str__(self):
+        return f"{self.period_start:%Y-%m-%d %H:%M} {self.endpoint} ({self.count})"
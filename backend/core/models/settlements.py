@@ -34,4 +34,8 @@ class Settlement(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
-        db_table = "settlements"
\ No newline at end of file
+        db_table = "settlements"
+        indexes = [
+            # 見積・受注ごとの取得（settlements の prefetch）用
+            models.Index(fields=["content_type", "object_id"], name="settlement_target_idx"),
+        ]
\ No newline at end of file
@@ -1,11 +1,12 @@
 from django.db import models
 from django.conf import settings
 from django.core.validators import FileExtensionValidator
-from PIL import Image
-import os
-from django.db.models.signals import post_delete
+from django.db.models import OuterRef, Subquery
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
+from core.models.image_derivatives import ImageDerivatives
+
 
 # ==========================
 # 車両基本情報
@@ -87,19 +88,44 @@ class Vehicle(models.Model):
         null=True
     )
 
+    # 現在の登録（最新の VehicleRegistration）と、その車検満了日の写し。
+    # 登録の保存・削除時に refresh_current_registrations で更新する（画面・API からは書かない）
+    current_registration = models.ForeignKey(
+        "VehicleRegistration",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name="+",
+    )
+    inspection_expiration = models.DateField(null=True, blank=True, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # 登録から作る列
+    REGISTRATION_FIELDS = ("current_registration", "inspection_expiration")
+
     class Meta:
         db_table = "vehicles"
         indexes = [
             models.Index(fields=["vehicle_name"]),
             models.Index(fields=["model_year"]),
+            models.Index(fields=["inspection_expiration"], name="vehicle_inspection_exp_idx"),
         ]
 
     def __str__(self):
         return self.vehicle_name or f"Vehicle {self.id}"
 
+    def save(self, *args, **kwargs):
+        # 読み込んだあとに登録が変わっていることがあるので、既存行の保存では登録から作る列を書かない
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.REGISTRATION_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
 
 # ==========================
 # 車両登録情報
@@ -125,6 +151,47 @@ class VehicleRegistration(models.Model):
         ordering = ["-created_at"]
 
 
+# ==========================
+# 現在の登録（Vehicle.current_registration / inspection_expiration）
+# ==========================
+# 現在の登録 = 車両の登録のうち id が最大のもの（登録し直すたびに新しい行を作る運用）。
+# - 登録の保存・削除時: その車両だけ refresh_current_registrations で作り直す
+# - bulk_create は signal を通らないので、呼び出し側で refresh_current_registrations を呼ぶ
+# - backfill_current_registrations コマンドで全件を作り直せる
+
+
+def refresh_current_registrations(vehicle_ids=None):
+    """
+    指定車両（None なら全車両）の現在の登録と車検満了日を作り直す。
+    読み込みなしの UPDATE 1回。更新件数を返す。
+    """
+    latest = VehicleRegistration.objects.filter(vehicle=OuterRef("pk")).order_by("-id")
+    qs = Vehicle.objects.all()
+    if vehicle_ids is not None:
+        vehicle_ids = {vid for vid in vehicle_ids if vid}
+        if not vehicle_ids:
+            return 0
+        qs = qs.filter(id__in=vehicle_ids)
+    # save() を通さない（updated_at は車両本体の更新日時なので変えない）
+    return qs.update(
+        current_registration_id=Subquery(latest.values("id")[:1]),
+        inspection_expiration=Subquery(latest.values("inspection_expiration")[:1]),
+    )
+
+
+@receiver(post_save, sender=VehicleRegistration)
+def _current_registration_on_save(sender, instance, **kwargs):
+    refresh_current_registrations([instance.vehicle_id])
+
+
+@receiver(post_delete, sender=VehicleRegistration)
+def _current_registration_on_delete(sender, instance, origin=None, **kwargs):
+    # 車両の削除に伴う CASCADE なら車両も消えるので作り直さない
+    if isinstance(origin, Vehicle) or (isinstance(origin, models.QuerySet) and origin.model is Vehicle):
+        return
+    refresh_current_registrations([instance.vehicle_id])
+
+
 # ==========================
 # 保険
 # ==========================
@@ -149,6 +216,11 @@ class VehicleInsurance(models.Model):
     class Meta:
         db_table = "vehicle_insurances"
         ordering = ["-start_date"]
+        indexes = [
+            # 満了が近い保険の一覧（期間で絞る）と、同じ種類の新しい契約の有無の確認
+            models.Index(fields=["end_date"], name="vehicle_ins_end_idx"),
+            models.Index(fields=["vehicle", "type", "end_date"], name="vehicle_ins_type_end_idx"),
+        ]
 
 
 # ==========================
@@ -206,7 +278,9 @@ class VehicleMemo(models.Model):
 # ==========================
 # 車両画像（VehicleImage）
 # ==========================
-class VehicleImage(models.Model):
+class VehicleImage(ImageDerivatives):
+    DERIVATIVE_DIR = "vehicle_images/derivatives"
+
     vehicle = models.ForeignKey(
         Vehicle, on_delete=models.CASCADE, related_name="images"
     )
@@ -228,19 +302,11 @@ class VehicleImage(models.Model):
         indexes = [models.Index(fields=["vehicle"])]
 
     def save(self, *args, **kwargs):
-        if self.image:
-            try:
-                img = Image.open(self.image)
-                self.width, self.height = img.size
-                self.bytes = self.image.size
-                self.mime = Image.MIME.get(img.format, None)
-            except Exception as e:
-                print(f"Image metadata extract failed: {e}")
+        if self.image and self._state.adding:
+            self.fill_upload_meta()
         super().save(*args, **kwargs)
 
 
 @receiver(post_delete, sender=VehicleImage)
 def delete_vehicle_image_file(sender, instance, **kwargs):
-    if instance.image and instance.image.path:
-        if os.path.isfile(instance.image.path):
-            os.remove(instance.image.path)
+    instance.delete_files()
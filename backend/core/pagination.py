@@ -0,0 +1,118 @@
+import base64
+import json
+from datetime import date
+
+from django.db.models import F, Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class DateKeysetPagination(BasePagination):
+    """
+    (日付 DESC NULLS LAST, id DESC) のキーセットページング（descending = False なら ASC）。
+    OFFSET を使わないので何ページ目でも索引の範囲走査1回で済む。
+
+    ?limit= を指定したときだけ有効（未指定なら None を返し、呼び出し側は全件を返す）。
+    次ページは ?cursor=<next_cursor> で取得する。
+    """
+    date_field = "order_date"
+    limit_query_param = "limit"
+    cursor_query_param = "cursor"
+    max_limit = 500
+    descending = True
+
+    def get_ordering(self):
+        if self.descending:
+            return (F(self.date_field).desc(nulls_last=True), "-id")
+        return (F(self.date_field).asc(nulls_last=True), "id")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        limit = request.query_params.get(self.limit_query_param)
+        if not limit:
+            return None
+
+        try:
+            self.limit = max(1, min(int(limit), self.max_limit))
+        except ValueError:
+            raise ValidationError({"limit": "数値で指定してください"})
+
+        self.request = request
+        queryset = queryset.order_by(*self.get_ordering())
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(self._after_q(*self.decode_cursor(cursor)))
+
+        rows = list(queryset[: self.limit + 1])
+        self.has_next = len(rows) > self.limit
+        rows = rows[: self.limit]
+
+        self.next_cursor = None
+        if self.has_next and rows:
+            last = rows[-1]
+            self.next_cursor = self.encode_cursor(self._value(last, self.date_field), self._value(last, "id"))
+
+        return rows
+
+    def get_paginated_response(self, data):
+        next_url = None
+        if self.next_cursor:
+            next_url = replace_query_param(
+                self.request.build_absolute_uri(), self.cursor_query_param, self.next_cursor
+            )
+        return Response({
+            "next": next_url,
+            "next_cursor": self.next_cursor,
+            "results": data,
+        })
+
+    # ----------------------------
+    # cursor
+    # ----------------------------
+    def _after_q(self, last_date, last_id):
+        f = self.date_field
+        op = "lt" if self.descending else "gt"
+        if last_date is None:
+            return Q(**{f"{f}__isnull": True, f"id__{op}": last_id})
+        return (
+            Q(**{f"{f}__{op}": last_date})
+            | Q(**{f: last_date, f"id__{op}": last_id})
+            | Q(**{f"{f}__isnull": True})
+        )
+
+    @staticmethod
+    def _value(row, key):
+        return row[key] if isinstance(row, dict) else getattr(row, key)
+
+    @staticmethod
+    def encode_cursor(last_date, last_id):
+        raw = json.dumps([last_date.isoformat() if last_date else None, last_id])
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor):
+        try:
+            last_date, last_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return (date.fromisoformat(last_date) if last_date else None), int(last_id)
+        except Exception:
+            raise ValidationError({"cursor": "cursor が不正です"})
+
+
+class EstimateDatePagination(DateKeysetPagination):
+    date_field = "estimate_date"
+
+
+class OrderDatePagination(DateKeysetPagination):
+    date_field = "order_date"
+
+
+class SalesDatePagination(DateKeysetPagination):
+    date_field = "sales_date"
+
+
+class ExpirationDatePagination(DateKeysetPagination):
+    """満了日の近い順（core/services/vehicle_expirations.py の expires_on）"""
+    date_field = "expires_on"
+    descending = False
@@ -0,0 +1,20 @@
+# core/permissions.py
+from rest_framework import permissions
+
+# 管理操作を許可するロール
+MANAGER_ROLES = {"executive", "manager", "store_manager", "admin"}
+
+
+def is_manager(user):
+    return bool(
+        user
+        and user.is_authenticated
+        and (user.is_superuser or getattr(user, "role", "") in MANAGER_ROLES)
+    )
+
+
+class IsManager(permissions.BasePermission):
+    """スーパーユーザーか MANAGER_ROLES のロールのみ"""
+
+    def has_permission(self, request, view):
+        return is_manager(request.user)
@@ -142,6 +142,7 @@ class BusinessCommunicationThreadSerializer(serializers.ModelSerializer):
         read_only=True
     )
 
+    # 最初のメッセージの送信元・送信先（スレッドの集計列。メッセージがなければ null）
     sender_name = serializers.SerializerMethodField()
     receiver_name = serializers.SerializerMethodField()
 
@@ -158,34 +159,33 @@ class BusinessCommunicationThreadSerializer(serializers.ModelSerializer):
             "messages",
             "sender_name",
             "receiver_name",
+            "last_message_at",
+            "last_message_preview",
+            "message_count",
+            "pending_count",
+        ]
+        read_only_fields = [
+            "last_message_at",
+            "last_message_preview",
+            "message_count",
+            "pending_count",
         ]
 
     def get_sender_name(self, obj):
-
-        first = obj.messages.first()
-
-        if not first:
-            return None
-
-        if first.sender_staff:
-            return first.sender_staff.display_name or first.sender_staff.login_id
-
-        if first.sender_shop:
-            return first.sender_shop.name
-
-        return None
+        return obj.sender_name or None
 
     def get_receiver_name(self, obj):
+        return obj.receiver_name or None
 
-        first = obj.messages.first()
-
-        if not first:
-            return None
 
-        if first.receiver_staff:
-            return first.receiver_staff.display_name or first.receiver_staff.login_id
+# ==================================================
+# Thread Serializer（一覧用。メッセージは含めず集計列だけ返す）
+# ==================================================
 
-        if first.receiver_shop:
-            return first.receiver_shop.name
+class BusinessCommunicationThreadListSerializer(BusinessCommunicationThreadSerializer):
 
-        return None
\ No newline at end of file
+    class Meta(BusinessCommunicationThreadSerializer.Meta):
+        fields = [
+            f for f in BusinessCommunicationThreadSerializer.Meta.fields
+            if f != "messages"
+        ]
\ No newline at end of file
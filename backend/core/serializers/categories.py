@@ -9,6 +9,8 @@ class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = ["id", "name", "parent"]
+        # 階層は最大4段（depth 0〜3）
+        field_lookups = {"parent": ("parent__parent__parent",)}
 
     def get_parent(self, obj):
         """親カテゴリを再帰的に返す（Noneまで遡る）"""
@@ -25,10 +27,11 @@ class CategoryTreeSerializer(serializers.ModelSerializer):
         fields = ["id", "name", "children"]
 
     def get_children(self, obj):
-        children = obj.children.all().order_by("id")
-        if children.exists():
-            return CategoryTreeSerializer(children, many=True).data
-        return []
+        # ビューが tree_children を載せていればそれを使う（追加クエリなし）
+        children = getattr(obj, "tree_children", None)
+        if children is None:
+            children = obj.children.all().order_by("id")
+        return CategoryTreeSerializer(children, many=True).data
 
 class CategoryBreadcrumbSerializer(serializers.ModelSerializer):
     parent = serializers.SerializerMethodField()
@@ -36,6 +39,7 @@ class CategoryBreadcrumbSerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = ["id", "name", "parent"]
+        field_lookups = {"parent": ("parent__parent__parent",)}
 
     def get_parent(self, obj):
         if obj.parent:
@@ -60,6 +64,10 @@ class CategoryAdminSerializer(serializers.ModelSerializer):
         ]
 
     def get_children(self, obj):
+        children = getattr(obj, "tree_children", None)
+        if children is not None:
+            return CategoryAdminSerializer(children, many=True).data
+
         # filter() は prefetch キャッシュを無効化するので Python でフィルタ
         children = sorted(
             (c for c in obj.children.all() if not c.is_deleted),
@@ -83,14 +91,17 @@ class CategoryWriteSerializer(serializers.ModelSerializer):
         fields = ["id", "name", "parent", "category_type", "tax_type", "sort_order"]
 
     def validate(self, data):
-        # 深さチェック
+        # 深さチェック（移動時は配下の段数も含める）
         parent = data.get("parent", getattr(self.instance, "parent", None))
         if parent:
-            depth = 0
-            p = parent
-            while p:
-                depth += 1
-                p = p.parent
+            height = 0
+            if self.instance and self.instance.pk:
+                if parent.pk in self.instance.get_descendant_ids():
+                    raise serializers.ValidationError(
+                        {"parent": "自身または配下のカテゴリを親にはできません。"}
+                    )
+                height = self.instance.subtree_height()
+            depth = parent.depth + 1 + height
             if depth >= 4:
                 raise serializers.ValidationError(
                     {"parent": "カテゴリは最大5階層までです。"}
@@ -4,88 +4,14 @@ from rest_framework import serializers
 from core.models import (
     Customer, CustomerVehicle, Vehicle, Shop,
     CustomerClass, Gender, Region, CustomerImage,
-    CustomerMemo, Order, Estimate,
+    CustomerMemo,
 )
 from .vehicles import VehicleWriteSerializer, VehicleDetailSerializer
-from PIL import Image
 from io import BytesIO
 from django.core.files.base import ContentFile
-from core.utils.images import compress_image
 
 User = get_user_model()
 
-class CustomerShopMixin:
-    """
-    初回・最終対応店舗を返すMixin。
-    views.py 側で prefetch_related("orders__shop", "...) を設定すれば
-    追加クエリなしで動作する。
-    フォールバックとして prefetch がない場合も動く（ただしN+1になる）。
-    """
-
-    def _get_actions_from_prefetch(self, obj):
-        """
-        prefetch済みの orders / estimate_parties から actions を作る。
-        prefetch がない場合は None を返す。
-        """
-        actions = []
-
-        # orders は Customer に直接紐づく
-        if hasattr(obj, "_prefetched_objects_cache") and "orders" in obj._prefetched_objects_cache:
-            for o in obj.orders.all():
-                if o.shop_id:
-                    actions.append({
-                        "shop__id":   o.shop.id   if o.shop else None,
-                        "shop__name": o.shop.name if o.shop else None,
-                        "shop__code": o.shop.code if o.shop else None,
-                        "created_at": o.created_at,
-                    })
-            return actions  # prefetch 済みなら DB追加クエリなし
-
-        return None  # fallback へ
-
-    def _get_actions(self, obj):
-        prefetched = self._get_actions_from_prefetch(obj)
-        if prefetched is not None:
-            return prefetched
-
-        # fallback: prefetch なし（一覧以外の用途など）
-        orders = (
-            Order.objects
-            .filter(customer_id=obj.id)
-            .select_related("shop")
-            .values("shop__id", "shop__name", "shop__code", "created_at")
-        )
-        estimates = (
-            Estimate.objects
-            .filter(party__source_customer_id=obj.id)
-            .select_related("shop")
-            .values("shop__id", "shop__name", "shop__code", "created_at")
-        )
-        return list(orders) + list(estimates)
-
-    def get_first_shop(self, obj):
-        actions = self._get_actions(obj)
-        if not actions:
-            return None
-        first = min(actions, key=lambda x: x["created_at"])
-        return {
-            "id":   first["shop__id"],
-            "name": first["shop__name"],
-            "code": first["shop__code"],
-        }
-
-    def get_last_shop(self, obj):
-        actions = self._get_actions(obj)
-        if not actions:
-            return None
-        last = max(actions, key=lambda x: x["created_at"])
-        return {
-            "id":   last["shop__id"],
-            "name": last["shop__name"],
-            "code": last["shop__code"],
-        }
-
-
 # ---- Tiny / Mini serializers ----
 class ShopTinySerializer(serializers.ModelSerializer):
     class Meta:
@@ -106,7 +32,7 @@ class VehicleMiniSerializer(serializers.ModelSerializer):
         )
 
     def get_registration_no(self, obj):
-        reg = obj.registrations.first() 
+        reg = obj.current_registration
         return reg.registration_no if reg else None
 
 
@@ -131,6 +57,7 @@ class UserTinySerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ("id", "login_id", "full_name")
+        field_lookups = {"full_name": ("display_name", "login_id")}
 
     def get_full_name(self, obj):
         # display_name があればそれ、なければ login_id
@@ -139,10 +66,11 @@ class UserTinySerializer(serializers.ModelSerializer):
 
 
 # ---- List ----
-class CustomerListSerializer(CustomerShopMixin, serializers.ModelSerializer):
+class CustomerListSerializer(serializers.ModelSerializer):
     owned_vehicle_count = serializers.IntegerField(read_only=True)
-    first_shop = serializers.SerializerMethodField()
-    last_shop  = serializers.SerializerMethodField()
+    # 初回・最終店舗は受注・見積の作成時に Customer へ保存済み（core/models/customer_shops.py）
+    first_shop = ShopTinySerializer(read_only=True, allow_null=True)
+    last_shop  = ShopTinySerializer(read_only=True, allow_null=True)
     staff = UserTinySerializer(read_only=True, allow_null=True)
 
     class Meta:
@@ -166,13 +94,13 @@ class OwnedVehicleSerializer(serializers.ModelSerializer):
         model = CustomerVehicle
         fields = ("id", "owned_from", "owned_to", "vehicle")
 
-class CustomerDetailSerializer(CustomerShopMixin, serializers.ModelSerializer):
+class CustomerDetailSerializer(serializers.ModelSerializer):
     customer_class = CustomerClassMiniSerializer(read_only=True, allow_null=True)
     staff         = UserTinySerializer(read_only=True, allow_null=True)
     region        = RegionMiniSerializer(read_only=True, allow_null=True)
     gender        = GenderMiniSerializer(read_only=True, allow_null=True)
-    first_shop = serializers.SerializerMethodField()
-    last_shop  = serializers.SerializerMethodField()
+    first_shop    = ShopTinySerializer(read_only=True, allow_null=True)
+    last_shop     = ShopTinySerializer(read_only=True, allow_null=True)
 
     owned_vehicles = serializers.SerializerMethodField()
 
@@ -192,6 +120,8 @@ class CustomerDetailSerializer(CustomerShopMixin, serializers.ModelSerializer):
             "owned_vehicles",
             "created_at", "updated_at",
         )
+        # owned_vehicles は自分でクエリを出す
+        field_lookups = {"owned_vehicles": ()}
 
 
 
@@ -286,8 +216,15 @@ class CustomerWriteSerializer(serializers.ModelSerializer):
 class CustomerImageSerializer(serializers.ModelSerializer):
     class Meta:
         model = CustomerImage
-        fields = ["id", "customer", "image", "mime", "width", "height", "bytes", "created_at"]
-        read_only_fields = ["id", "customer", "mime", "width", "height", "bytes", "created_at"]
+        fields = [
+            "id", "customer", "image", "thumbnail", "preview", "derivatives_status",
+            "mime", "width", "height", "bytes", "created_at",
+        ]
+        # thumbnail / preview はワーカーが作るまで null（表示側は image を使う）
+        read_only_fields = [
+            "id", "customer", "thumbnail", "preview", "derivatives_status",
+            "mime", "width", "height", "bytes", "created_at",
+        ]
             # 🔥 容量制限
     def validate_image(self, image):
         max_size = 5 * 1024 * 1024  # 5MB
@@ -297,32 +234,6 @@ class CustomerImageSerializer(serializers.ModelSerializer):
 
         return image
 
-    # 🔥 圧縮
-    def create(self, validated_data):
-        image = validated_data.get("image")
-
-        if image:
-            compressed = compress_image(image)
-            validated_data["image"] = compressed
-
-            # 🔥 ここ追加（超重要）
-            img = Image.open(compressed)
-
-            validated_data["width"] = img.width
-            validated_data["height"] = img.height
-            validated_data["bytes"] = compressed.size
-
-            # MIME
-            ext = compressed.name.lower().split(".")[-1]
-            if ext in ["jpg", "jpeg"]:
-                validated_data["mime"] = "image/jpeg"
-            elif ext == "png":
-                validated_data["mime"] = "image/png"
-            else:
-                validated_data["mime"] = "image/jpeg"
-
-        return super().create(validated_data)
-
 
 class CustomerMemosSerializer(serializers.ModelSerializer):
     customer = serializers.StringRelatedField()
@@ -1,8 +1,6 @@
-from decimal import Decimal, ROUND_HALF_UP
 from rest_framework import serializers
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.auth import get_user_model
-from django.db.models import Sum
 
 from core.models.estimates import Estimate
 from core.models.base import Shop
@@ -15,7 +13,6 @@ from core.models import (
     Schedule,
     Settlement,
     Insurance,
-    Product,
 )
 from core.models.masters import Gender, CustomerClass, Region
 from core.models import EstimateVehicleRegistration
@@ -27,6 +24,8 @@ from core.serializers.payment import PaymentSerializer
 from core.serializers.masters import ShopSerializer
 from core.serializers.settlement import SettlementSerializer
 from core.serializers.insurance import InsuranceSerializer
+from core.services.line_items import calc_totals, sync_line_items, save_lines_as_products
+from core.services.document_relations import by_id
 from datetime import timedelta
 from django.utils.dateparse import parse_date
 from dateutil.relativedelta import relativedelta
@@ -141,45 +140,30 @@ class EstimateSerializer(serializers.ModelSerializer):
     # =========================================
     def _recalculate_estimate(self, estimate):
         """全アイテムの subtotal から grand_total を再計算して保存する"""
-        items = estimate.items.all()
-        subtotal = items.aggregate(total=Sum("subtotal"))["total"] or Decimal("0.00")
-        taxable_subtotal = items.filter(tax_type="taxable").aggregate(
-            total=Sum("subtotal")
-        )["total"] or Decimal("0.00")
-        tax_total = (taxable_subtotal * Decimal("0.10")).quantize(
-            Decimal("1"), rounding=ROUND_HALF_UP
+        estimate.subtotal, estimate.tax_total, estimate.grand_total = calc_totals(
+            estimate.items.only("subtotal", "tax_type"), estimate.final_adjustment
         )
-        estimate.subtotal = subtotal
-        estimate.tax_total = tax_total
-        estimate.grand_total = subtotal + tax_total + (estimate.final_adjustment or Decimal("0"))
         estimate.save(update_fields=["subtotal", "tax_total", "grand_total"])
 
     # =========================================
-    # items 一括生成（saveAsProduct 対応 + 合計再計算）
+    # items 差分保存（saveAsProduct 対応）
     # =========================================
-    def _create_items(self, estimate, items_data):
+    def _save_items(self, estimate, items_data):
         """
-        items_data（EstimateItemSerializer の validated_data リスト）から
-        EstimateItem を一括生成し、saveAsProduct フラグがあれば Product も作成する。
-        最後に estimate の合計を再計算する。
+        items_data（EstimateItemSerializer の validated_data リスト）と既存明細を比べ、
+        変わった行だけ bulk_update / bulk_create / 削除する。
+        saveAsProduct フラグのある行は Product をまとめて作成する。
+        合計は呼び出し側で calc_totals(items_data) から設定して estimate と一緒に保存する。
         """
-        for item in items_data:
-            save_flag = item.pop("saveAsProduct", False)
-            created_item = EstimateItem.objects.create(estimate=estimate, **item)
-
-            if save_flag and created_item.name and created_item.category_id:
-                Product.objects.get_or_create(
-                    name=created_item.name,
-                    category=created_item.category,
-                    manufacturer=created_item.manufacturer,
-                    defaults={
-                        "unit_price": created_item.unit_price,
-                        "tax_type": created_item.tax_type,
-                        "is_active": True,
-                    },
-                )
+        flagged = [item for item in items_data if item.pop("saveAsProduct", False)]
+
+        changed_ids, removed_ids, created = sync_line_items(
+            EstimateItem, "estimate", estimate, items_data
+        )
+        if removed_ids:
+            EstimateItem.objects.filter(id__in=removed_ids).delete()
 
-        self._recalculate_estimate(estimate)
+        save_lines_as_products(flagged)
 
     # =========================================
     # settlements
@@ -344,6 +328,13 @@ class EstimateSerializer(serializers.ModelSerializer):
             if estimate_date:
                 validated_data["valid_until"] = estimate_date + relativedelta(months=1)
 
+        # 合計は明細から計算して見積と同時に保存する
+        (
+            validated_data["subtotal"],
+            validated_data["tax_total"],
+            validated_data["grand_total"],
+        ) = calc_totals(items_data, validated_data.get("final_adjustment"))
+
         estimate = Estimate.objects.create(**validated_data)
 
         if insurance_data is not None:
@@ -354,7 +345,7 @@ class EstimateSerializer(serializers.ModelSerializer):
                 **insurance_data
             )
 
-        self._create_items(estimate, items_data)
+        self._save_items(estimate, items_data)
         self._upsert_vehicle(estimate, vehicles_data)
         self._create_settlements(estimate, settlements_data)
         self._upsert_payment(estimate, payment_data, settlements_data)
@@ -393,11 +384,15 @@ class EstimateSerializer(serializers.ModelSerializer):
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
 
+        if items_data is not None:
+            instance.subtotal, instance.tax_total, instance.grand_total = calc_totals(
+                items_data, instance.final_adjustment
+            )
+
         instance.save()
 
         if items_data is not None:
-            instance.items.all().delete()
-            self._create_items(instance, items_data)
+            self._save_items(instance, items_data)
 
         if vehicles_data is not None:
             self._upsert_vehicle(instance, vehicles_data)
@@ -515,26 +510,20 @@ class EstimateDetailSerializer(serializers.ModelSerializer):
             "created_at",
             "updated_at",
         ]
+        field_lookups = {
+            "payments": ("payments",),
+            "schedule": ("schedules__delivery_shop",),
+            "settlements": ("settlements__company",),
+        }
 
     def get_payments(self, obj):
-        qs = Payment.objects.filter(
-            content_type=ContentType.objects.get_for_model(Estimate),
-            object_id=obj.id,
-        ).order_by("id")
-        return PaymentSerializer(qs, many=True).data
+        return PaymentSerializer(by_id(obj.payments), many=True).data
     
     def get_settlements(self, obj):
-        ct = ContentType.objects.get_for_model(Estimate)
-
-        qs = Settlement.objects.filter(
-            content_type=ct,
-            object_id=obj.id,
-        )
-
-        return SettlementSerializer(qs, many=True).data
+        return SettlementSerializer(by_id(obj.settlements), many=True).data
     
     def get_schedule(self, obj):
-        s = Schedule.objects.filter(estimate=obj).first()
+        s = min(obj.schedules.all(), key=lambda s: s.id, default=None)
 
         if not s:
             return None
@@ -1,7 +1,6 @@
 from rest_framework import serializers
-from django.contrib.contenttypes.models import ContentType
 
-from core.models import Order, Payment, Schedule, Settlement, Insurance
+from core.models import Order
 from core.serializers.order_items import OrderItemSerializer
 from core.serializers.order_vehicles import OrderVehicleSerializer
 from core.serializers.payment import PaymentSerializer
@@ -11,6 +10,7 @@ from core.serializers.customers import CustomerDetailSerializer
 from core.serializers.estimates import EstimateSerializer
 from core.serializers.settlement import SettlementSerializer
 from core.serializers.insurance import InsuranceSerializer
+from core.services.document_relations import by_id
 
 
 class OrderDetailSerializer(serializers.ModelSerializer):
@@ -69,19 +69,17 @@ class OrderDetailSerializer(serializers.ModelSerializer):
             "created_at",
             "updated_at",
         ]
+        field_lookups = {
+            "payments": ("payments",),
+            "schedule": ("schedules__delivery_shop",),
+            "settlements": ("settlements__company",),
+        }
 
     def get_payments(self, obj):
-        order_ct = ContentType.objects.get_for_model(Order)
-
-        qs = Payment.objects.filter(
-            content_type=order_ct,
-            object_id=obj.id,
-        ).order_by("id")
-
-        return PaymentSerializer(qs, many=True).data
+        return PaymentSerializer(by_id(obj.payments), many=True).data
     
     def get_schedule(self, obj):
-        s = Schedule.objects.filter(order=obj).order_by("-start_at").first()
+        s = max(obj.schedules.all(), key=lambda s: s.start_at, default=None)
 
         if not s:
             return None
@@ -97,11 +95,4 @@ class OrderDetailSerializer(serializers.ModelSerializer):
         }
     
     def get_settlements(self, obj):
-        ct = ContentType.objects.get_for_model(Order)
-
-        qs = Settlement.objects.filter(
-            content_type=ct,
-            object_id=obj.id,
-        )
-
-        return SettlementSerializer(qs, many=True).data
\ No newline at end of file
+        return SettlementSerializer(by_id(obj.settlements), many=True).data
\ No newline at end of file
@@ -133,6 +133,7 @@ class OrderItemSerializer(serializers.ModelSerializer):
             "created_at",
             "updated_at",
         ]
+        field_lookups = {"category": ("category",)}
 
     # ==================================================
     # 表示用カテゴリ
@@ -1,9 +1,8 @@
 from rest_framework import serializers
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.auth import get_user_model
-from decimal import Decimal, ROUND_HALF_UP
-from django.db.models import Sum
 from core.services.order_finalize import create_customer_vehicle_from_order
+from core.services.line_items import calc_totals, sync_line_items
 
 from core.models import (
     Order,
@@ -17,6 +16,7 @@ from core.models import (
     Insurance,
 )
 from core.models.order_vehicle import OrderVehicle
+from core.models.order_delivery_payment import DeliveryItem, calc_delivery_status
 from core.models.categories import Manufacturer, Category
 from core.models.masters import Color
 from core.models import OrderVehicleRegistration
@@ -112,6 +112,7 @@ class OrderSerializer(serializers.ModelSerializer):
             "postal_code",
             "address",
         ]
+        field_lookups = {"schedule": ("schedules__delivery_shop",)}
 
     # =========================================
     # 共通
@@ -134,7 +135,8 @@ class OrderSerializer(serializers.ModelSerializer):
         return Customer.objects.create(**data)
     
     def get_schedule(self, obj):
-        s = Schedule.objects.filter(order=obj).order_by("-id").first()
+        # prefetch 済みなら追加クエリなし（一覧は prefetch_document_relations を使う）
+        s = max(obj.schedules.all(), key=lambda s: s.id, default=None)
 
         if not s:
             return None
@@ -376,6 +378,16 @@ class OrderSerializer(serializers.ModelSerializer):
         settlements_data = validated_data.pop("settlements", [])
         payment_data = validated_data.pop("payment", None)
 
+        for item in items_data:
+            item.pop("saveAsProduct", None)
+
+        # 合計は明細から計算して受注と同時に保存する
+        (
+            validated_data["subtotal"],
+            validated_data["tax_total"],
+            validated_data["grand_total"],
+        ) = calc_totals(items_data, validated_data.get("final_adjustment"))
+
         order = Order.objects.create(**validated_data)
 
         if insurance_data is not None:
@@ -406,13 +418,10 @@ class OrderSerializer(serializers.ModelSerializer):
                 description=schedule_data.get("note", ""),
             )
 
-        for item in items_data:
-            item.pop("saveAsProduct", None)
-            OrderItem.objects.create(order=order, **item)
+        OrderItem.objects.bulk_create([OrderItem(order=order, **item) for item in items_data])
 
         self._create_settlements(order, settlements_data)
         self._upsert_payment(order, payment_data, settlements_data)
-        self._recalculate_order(order)
         self._upsert_target_vehicle(order, raw_target_vehicle)
         self._replace_trade_in_vehicle(order, raw_trade_in_vehicle)
 
@@ -474,18 +483,18 @@ class OrderSerializer(serializers.ModelSerializer):
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
 
+        if items_data is not None:
+            for item in items_data:
+                item.pop("saveAsProduct", None)
+            instance.subtotal, instance.tax_total, instance.grand_total = calc_totals(
+                items_data, instance.final_adjustment
+            )
+
         instance.save()
 
         # 明細
         if items_data is not None:
-            # DeliveryItem は OrderItem を PROTECT FK で参照しているため先に削除
-            for order_item in instance.items.all():
-                order_item.deliveryitem_set.all().delete()
-            instance.items.all().delete()
-            for item in items_data:
-                item.pop("saveAsProduct", None)
-                OrderItem.objects.create(order=instance, **item)
-            self._recalculate_order(instance)
+            self._sync_items(instance, items_data)
 
         # =========================
         # 🔥 schedule更新（追加）
@@ -542,35 +551,27 @@ class OrderSerializer(serializers.ModelSerializer):
 
         return instance
     
-    def _recalculate_order(self, order):
-        items = order.items.all()
-
-        subtotal = items.aggregate(
-            total=Sum("subtotal")
-        )["total"] or Decimal("0.00")
-
-        taxable_subtotal = items.filter(
-            tax_type="taxable"
-        ).aggregate(
-            total=Sum("subtotal")
-        )["total"] or Decimal("0.00")
-
-        tax_total = (taxable_subtotal * Decimal("0.10")).quantize(
-            Decimal("1"),
-            rounding=ROUND_HALF_UP
+    def _sync_items(self, order, items_data):
+        """
+        明細を差分保存する（内容が同じ行は残し、変わった行・増えた行・減った行だけ書く）。
+        変わった行・減った行の納品明細は従来どおり削除し、納品状況を再計算する。
+        """
+        changed_ids, removed_ids, created = sync_line_items(
+            OrderItem, "order", order, items_data
         )
 
-        final_adjustment = order.final_adjustment or Decimal("0")
-
-        order.subtotal = subtotal
-        order.tax_total = tax_total
-        order.grand_total = subtotal + tax_total + final_adjustment
-
-        order.save(update_fields=[
-            "subtotal",
-            "tax_total",
-            "grand_total",
-        ])
+        if changed_ids or removed_ids:
+            # DeliveryItem は OrderItem を PROTECT FK で参照しているため先に削除
+            DeliveryItem.objects.filter(order_item_id__in=changed_ids + removed_ids).delete()
+        if removed_ids:
+            OrderItem.objects.filter(id__in=removed_ids).delete()
+
+        if changed_ids or removed_ids or created:
+            status, final_date = calc_delivery_status([order.id])[order.id]
+            if (order.delivery_status, order.final_delivery_date) != (status, final_date):
+                order.delivery_status = status
+                order.final_delivery_date = final_date
+                order.save(update_fields=["delivery_status", "final_delivery_date"])
 
     def validate(self, data):
         settlements = self.initial_data.get("settlements", [])
@@ -20,6 +20,7 @@ class CustomerVehicleSerializer(serializers.ModelSerializer):
             "created_at",
             "updated_at",
         ]
+        field_lookups = {"is_current": ("owned_to",)}
 
     def get_is_current(self, obj):
         return obj.owned_to is None
@@ -21,6 +21,7 @@ class SettlementSerializer(serializers.ModelSerializer):
             "company_name",
         ]
         read_only_fields = ["id"]
+        field_lookups = {"company_name": ("company__name",)}
 
     def get_company_name(self, obj):
         return obj.company.name if obj.company else None
@@ -10,8 +10,6 @@ from core.models import (
 )
 from core.models import Manufacturer, VehicleCategory, Color
 from core.models.categories import Category
-from core.utils.images import compress_image
-from PIL import Image
 
 
 
@@ -219,6 +217,8 @@ class VehicleDetailSerializer(serializers.ModelSerializer):
             "created_at",
             "updated_at",
         )
+        # 画面では使っていないので ?expand=memos,owners のときだけ返す（SparseFieldsMixin のビュー）
+        expandable_fields = ("memos", "owners")
 
 
 # ---- 一覧表示 ----
@@ -227,6 +227,8 @@ class VehicleListSerializer(serializers.ModelSerializer):
         source="manufacturer.name",
         read_only=True
     )
+    # 現在の登録だけ（select_related("vehicle__current_registration") で読む）
+    current_registration = VehicleRegistrationReadSerializer(read_only=True)
     class Meta:
         model = Vehicle
         fields = (
@@ -237,6 +239,7 @@ class VehicleListSerializer(serializers.ModelSerializer):
             "chassis_no",
             "color_name",
             "color_code",
+            "current_registration",
         )
 
 class VehicleImageSerializer(serializers.ModelSerializer):
@@ -249,15 +252,22 @@ class VehicleImageSerializer(serializers.ModelSerializer):
             "vehicle",
             "image",
             "image_url",
+            "thumbnail",
+            "preview",
+            "derivatives_status",
             "mime",
             "width",
             "height",
             "bytes",
             "created_at",
         ]
+        # thumbnail / preview はワーカーが作るまで null（表示側は image を使う）
         read_only_fields = [
             "id",
             "vehicle",
+            "thumbnail",
+            "preview",
+            "derivatives_status",
             "mime",
             "width",
             "height",
@@ -278,30 +288,6 @@ class VehicleImageSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("画像は5MB以下にしてください")
         return image
 
-    # 🔥 圧縮＋メタ保存
-    def create(self, validated_data):
-        image = validated_data.get("image")
-
-        if image:
-            compressed = compress_image(image)
-            validated_data["image"] = compressed
-
-            img = Image.open(compressed)
-
-            validated_data["width"] = img.width
-            validated_data["height"] = img.height
-            validated_data["bytes"] = compressed.size
-
-            ext = compressed.name.lower().split(".")[-1]
-            if ext in ["jpg", "jpeg"]:
-                validated_data["mime"] = "image/jpeg"
-            elif ext == "png":
-                validated_data["mime"] = "image/png"
-            else:
-                validated_data["mime"] = "image/jpeg"
-
-        return super().create(validated_data)
-
 class VehicleMemosSerializer(serializers.ModelSerializer):
     vehicle = serializers.StringRelatedField()  
     created_by = serializers.StringRelatedField()
@@ -0,0 +1,215 @@
+# core/services/benchmark.py
+import math
+import statistics
+import time
+from contextlib import ExitStack
+from datetime import timedelta
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.db import connection, connections
+from django.db.models import Max
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.models import Customer, Estimate, Order, Shop, Vehicle
+from core.services.request_metrics import QueryRecorder
+
+
+# ─────────────────────────────────────────────
+# 計測対象（名前, パス, パラメータを作る関数）
+# ─────────────────────────────────────────────
+# パラメータはデータの最新受注日を基準に作るので、同じデータなら日をまたいでも同じ条件になる
+SCENARIOS = [
+    ("customers.list",          "/api/customers/",                 lambda c: {}),
+    ("customers.search_name",   "/api/customers/",                 lambda c: {"search": c["surname"]}),
+    ("customers.search_phone",  "/api/customers/",                 lambda c: {"search": c["phone_tail"]}),
+    ("customers.export_csv",    "/api/customers/export-csv/",      lambda c: {"search": c["surname"]}),
+    ("orders.list",             "/api/orders/",                    lambda c: {}),
+    ("orders.list_shop",        "/api/orders/",                    lambda c: {"shop_id": c["shop_id"]}),
+    ("orders.search",           "/api/orders/",                    lambda c: {"search": c["surname"]}),
+    ("estimates.list",          "/api/estimates/",                 lambda c: {}),
+    ("management.orders",       "/api/management/orders/",         lambda c: {"month": c["month"]}),
+    ("management.orders_shop",  "/api/management/orders/",         lambda c: {"month": c["month"], "shop_id": c["shop_id"]}),
+    ("management.csv",          "/api/management/orders/csv/",     lambda c: {"month": c["month"]}),
+    ("management.monthly",      "/api/management/orders/monthly/", lambda c: {"shop_id": c["shop_id"]}),
+    ("analytics.sales_daily",   "/api/analytics/sales-daily/",     lambda c: {"start": c["quarter_start"], "end": c["end"]}),
+    ("analytics.sales_list",    "/api/analytics/sales-list/",      lambda c: {"start": c["month_start"], "end": c["end"]}),
+    ("analytics.product",       "/api/analytics/product/",
+        lambda c: {"mode": "order", "type": "category", "level": "L3", "start": c["year_start"], "end": c["end"]}),
+    ("reports.ar_list",         "/api/reports/",                   lambda c: {"type": "ar_list", "start": c["year_start"], "end": c["end"]}),
+    ("reports.credit_list",     "/api/reports/",                   lambda c: {"type": "credit_list", "start": c["year_start"], "end": c["end"]}),
+    ("dashboard",               "/api/dashboard/",                 lambda c: {}),
+]
+
+SCENARIO_NAMES = [name for name, _, _ in SCENARIOS]
+
+# 比較の既定値
+DEFAULT_MAX_SLOWDOWN = 1.5     # 中央値がこの倍率を超えて遅くなったら劣化
+DEFAULT_MIN_DELTA_MS = 20.0    # ただし差がこれ未満なら誤差とみなす
+DEFAULT_MAX_EXTRA_QUERIES = 0  # SQL件数はデータが同じなら決定的なので1件でも増えたら劣化
+
+
+# ─────────────────────────────────────────────
+# 条件（データから作る）
+# ─────────────────────────────────────────────
+def build_context():
+    end = Order.objects.aggregate(m=Max("order_date"))["m"] or timezone.localdate()
+    last_month = end.replace(day=1) - timedelta(days=1)
+
+    sample = Customer.objects.exclude(mobile_phone_key="").order_by("id").values("name", "mobile_phone_key").first()
+    surname = (sample["name"].split()[0] if sample and sample["name"].split() else "山田")
+    phone_tail = sample["mobile_phone_key"][-4:] if sample else "0000"
+
+    shop_id = (
+        Order.objects.exclude(shop__isnull=True)
+        .values_list("shop_id", flat=True)
+        .order_by("shop_id")
+        .first()
+    )
+
+    return {
+        "end": end.isoformat(),
+        "month": f"{last_month:%Y-%m}",
+        "month_start": (end - timedelta(days=30)).isoformat(),
+        "quarter_start": (end - timedelta(days=90)).isoformat(),
+        "year_start": (end - timedelta(days=365)).isoformat(),
+        "surname": surname,
+        "phone_tail": phone_tail,
+        "shop_id": shop_id or "",
+    }
+
+
+def dataset_summary():
+    """ベースラインと同じ規模のデータで測ったかを確かめるための件数"""
+    return {
+        "shops": Shop.objects.count(),
+        "customers": Customer.objects.count(),
+        "vehicles": Vehicle.objects.count(),
+        "estimates": Estimate.objects.count(),
+        "orders": Order.objects.count(),
+    }
+
+
+# ─────────────────────────────────────────────
+# 計測
+# ─────────────────────────────────────────────
+def _percentile(values, q):
+    ordered = sorted(values)
+    index = max(math.ceil(q * len(ordered)) - 1, 0)
+    return ordered[index]
+
+
+def _timed_get(client, url):
+    """1リクエスト分の応答時間・SQL・本文サイズ（ストリーミング応答は読み切るまで）"""
+    recorder = QueryRecorder()
+    start = time.perf_counter()
+    with ExitStack() as stack:
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(recorder))
+        response = client.get(url)
+        if response.streaming:
+            size = sum(len(chunk) for chunk in response.streaming_content)
+        else:
+            size = len(response.content)
+    latency_ms = (time.perf_counter() - start) * 1000
+    return response.status_code, latency_ms, recorder, size
+
+
+def run_benchmark(user, names=None, repeat=5, warmup=1):
+    """
+    SCENARIOS を順に GET し、シナリオごとの応答時間（ms）と SQL 件数を返す。
+    RequestMetricsMiddleware は止めて計測する（ベンチマークの要求を本番の集計に混ぜない）。
+    """
+    context = build_context()
+    selected = [s for s in SCENARIOS if not names or s[0] in names]
+
+    results = {}
+    with override_settings(
+        REQUEST_METRICS_ENABLED=False,
+        ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+    ):
+        client = APIClient()
+        client.force_authenticate(user)
+
+        for name, path, params in selected:
+            query = urlencode(params(context))
+            url = f"{path}?{query}" if query else path
+
+            for _ in range(warmup):
+                _timed_get(client, url)
+
+            latencies = []
+            query_counts = []
+            status = None
+            size = 0
+            duplicates = {}
+            for _ in range(max(repeat, 1)):
+                status, latency_ms, recorder, size = _timed_get(client, url)
+                latencies.append(latency_ms)
+                query_counts.append(recorder.count)
+                duplicates = recorder.duplicates()
+
+            results[name] = {
+                "url": url,
+                "status": status,
+                "bytes": size,
+                "latency_ms": {
+                    "min": round(min(latencies), 1),
+                    "median": round(statistics.median(latencies), 1),
+                    "p95": round(_percentile(latencies, 0.95), 1),
+                    "max": round(max(latencies), 1),
+                },
+                "queries": max(query_counts),
+                "queries_stable": len(set(query_counts)) == 1,
+                # 同じSQLの最大繰り返し回数（N+1 の目安）
+                "max_repeat": max(duplicates.values(), default=0),
+            }
+
+    return {
+        "created_at": timezone.now().isoformat(),
+        "database": connection.vendor,
+        "repeat": repeat,
+        "warmup": warmup,
+        "dataset": dataset_summary(),
+        "context": context,
+        "scenarios": results,
+    }
+
+
+# ─────────────────────────────────────────────
+# ベースラインとの比較
+# ─────────────────────────────────────────────
+def compare(baseline, current,
+            max_slowdown=DEFAULT_MAX_SLOWDOWN,
+            min_delta_ms=DEFAULT_MIN_DELTA_MS,
+            max_extra_queries=DEFAULT_MAX_EXTRA_QUERIES):
+    """
+    シナリオごとに base / current を並べ、劣化したものに regressions を付ける。
+    戻り値: {"rows": [...], "regressions": 件数, "dataset_changed": bool}
+    """
+    rows = []
+    regressions = 0
+    base_scenarios = baseline.get("scenarios", {})
+
+    for name, cur in current["scenarios"].items():
+        base = base_scenarios.get(name)
+        row = {"name": name, "current": cur, "base": base, "regressions": []}
+        if base is not None:
+            if cur["status"] != base["status"]:
+                row["regressions"].append(f"status {base['status']} → {cur['status']}")
+            if cur["queries"] > base["queries"] + max_extra_queries:
+                row["regressions"].append(f"queries {base['queries']} → {cur['queries']}")
+            base_ms = base["latency_ms"]["median"]
+            cur_ms = cur["latency_ms"]["median"]
+            if cur_ms > base_ms * max_slowdown and cur_ms - base_ms >= min_delta_ms:
+                row["regressions"].append(f"median {base_ms}ms → {cur_ms}ms")
+        regressions += bool(row["regressions"])
+        rows.append(row)
+
+    return {
+        "rows": rows,
+        "regressions": regressions,
+        "dataset_changed": baseline.get("dataset") != current.get("dataset"),
+    }
@@ -0,0 +1,191 @@
+# core/services/customer_duplicates.py
+from collections import defaultdict
+from itertools import combinations
+
+from core.models import Customer
+from core.models.customers import email_match_key, phone_match_key
+from core.utils.text import normalize_japanese
+
+
+# ─────────────────────────────────────────────
+# スコア（SimilarCustomerAPIView と共通）
+# ─────────────────────────────────────────────
+W_EMAIL_EXACT = 100
+W_PHONE_EXACT = 80
+W_MOBILE_EXACT = 80
+W_NAME = 30
+W_KANA = 30
+W_ADDRESS = 10
+
+# 同じキーの顧客がこれより多いブロックは総当たりしない（よくある氏名など）
+DEFAULT_MAX_BLOCK_SIZE = 50
+
+# クラスタにまとめる最低スコア（メール・電話のどれか、または氏名＋カナ＋住所）
+DEFAULT_MIN_SCORE = 70
+
+CANDIDATE_FIELDS = (
+    "id", "name", "kana", "phone", "mobile_phone", "email", "address", "created_at",
+    "name_key", "kana_key", "phone_key", "mobile_phone_key", "email_key",
+)
+
+
+def match_keys(name=None, kana=None, phone=None, mobile_phone=None, email=None, address=None):
+    """入力値を Customer の照合キーと同じ規則で正規化する"""
+    return {
+        "name_key": normalize_japanese(name),
+        "kana_key": normalize_japanese(kana),
+        "phone_key": phone_match_key(phone),
+        "mobile_phone_key": phone_match_key(mobile_phone),
+        "email_key": email_match_key(email),
+        "address_key": normalize_japanese(address),
+    }
+
+
+def score_pair(a, b):
+    """
+    照合キー同士を比べて (score, reasons) を返す。
+    氏名・カナは片方がもう片方の先頭に一致すれば一致とみなす（入力途中の候補表示用）。
+    """
+    score = 0
+    reasons = []
+
+    def _prefix(x, y):
+        return bool(x and y) and (x.startswith(y) or y.startswith(x))
+
+    if a["email_key"] and a["email_key"] == b["email_key"]:
+        score += W_EMAIL_EXACT
+        reasons.append("email一致")
+    phone_matched = False
+    if a["phone_key"] and a["phone_key"] == b["phone_key"]:
+        score += W_PHONE_EXACT
+        reasons.append("phone一致")
+        phone_matched = True
+    if a["mobile_phone_key"] and a["mobile_phone_key"] == b["mobile_phone_key"]:
+        score += W_MOBILE_EXACT
+        reasons.append("mobile_phone一致")
+        phone_matched = True
+    if not phone_matched:
+        # 電話と携帯が入れ違いで登録されている場合
+        phones_a = {a["phone_key"], a["mobile_phone_key"]} - {""}
+        phones_b = {b["phone_key"], b["mobile_phone_key"]} - {""}
+        if phones_a & phones_b:
+            score += W_PHONE_EXACT
+            reasons.append("phone/mobile_phone一致")
+    if _prefix(a["name_key"], b["name_key"]):
+        score += W_NAME
+        reasons.append("name部分一致")
+    if _prefix(a["kana_key"], b["kana_key"]):
+        score += W_KANA
+        reasons.append("kana部分一致")
+    if _prefix(a.get("address_key"), b.get("address_key")):
+        score += W_ADDRESS
+        reasons.append("address部分一致")
+    return score, reasons
+
+
+def _with_address_key(row):
+    row["address_key"] = normalize_japanese(row["address"])
+    return row
+
+
+# ─────────────────────────────────────────────
+# 全件の重複クラスタ検出
+# ─────────────────────────────────────────────
+def find_duplicate_clusters(min_score=DEFAULT_MIN_SCORE, max_block_size=DEFAULT_MAX_BLOCK_SIZE):
+    """
+    顧客テーブル全体から重複クラスタを探す。
+    1. 照合キー（メール・電話/携帯・氏名）でブロック分けする（全件を1回読むだけ）
+    2. 同じブロック内の組だけスコアを計算し、min_score 以上の組を Union-Find でまとめる
+    戻り値: {"clusters": [...], "skipped_blocks": [...], "customers_scanned": n}
+    """
+    blocks = defaultdict(list)
+    scanned = 0
+    for cid, name_key, phone_key, mobile_key, email_key in (
+        Customer.objects.order_by("id")
+        .values_list("id", "name_key", "phone_key", "mobile_phone_key", "email_key")
+        .iterator(chunk_size=5000)
+    ):
+        scanned += 1
+        if email_key:
+            blocks[("email", email_key)].append(cid)
+        # 電話と携帯は入れ違いで登録されることがあるので同じブロックに入れる
+        for key in {phone_key, mobile_key} - {""}:
+            blocks[("phone", key)].append(cid)
+        if name_key:
+            blocks[("name", name_key)].append(cid)
+
+    candidate_blocks = []
+    skipped_blocks = []
+    for key, ids in blocks.items():
+        if len(ids) < 2:
+            continue
+        if len(ids) > max_block_size:
+            skipped_blocks.append({"key": list(key), "size": len(ids)})
+            continue
+        candidate_blocks.append(ids)
+
+    rows = {}
+    needed = {cid for ids in candidate_blocks for cid in ids}
+    needed_list = sorted(needed)
+    for i in range(0, len(needed_list), 2000):
+        for row in Customer.objects.filter(id__in=needed_list[i:i + 2000]).values(*CANDIDATE_FIELDS):
+            rows[row["id"]] = _with_address_key(row)
+
+    parent = {}
+
+    def _find(x):
+        parent.setdefault(x, x)
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    pairs = {}
+    compared = set()
+    for ids in candidate_blocks:
+        for a, b in combinations(sorted(set(ids)), 2):
+            if (a, b) in compared:
+                continue
+            compared.add((a, b))
+            score, reasons = score_pair(rows[a], rows[b])
+            if score < min_score:
+                continue
+            pairs[(a, b)] = {"a": a, "b": b, "score": score, "reasons": reasons}
+            parent[_find(b)] = _find(a)
+
+    members = defaultdict(set)
+    for a, b in pairs:
+        members[_find(a)].update((a, b))
+
+    pairs_by_root = defaultdict(list)
+    for (a, b), pair in pairs.items():
+        pairs_by_root[_find(a)].append(pair)
+
+    clusters = []
+    for root, ids in members.items():
+        cluster_pairs = sorted(pairs_by_root[root], key=lambda p: (-p["score"], p["a"], p["b"]))
+        clusters.append({
+            "customers": [_public(rows[cid]) for cid in sorted(ids)],
+            "pairs": cluster_pairs,
+            "max_score": cluster_pairs[0]["score"],
+        })
+    clusters.sort(key=lambda c: (-c["max_score"], -len(c["customers"]), c["customers"][0]["id"]))
+
+    return {
+        "customers_scanned": scanned,
+        "clusters": clusters,
+        "skipped_blocks": skipped_blocks,
+    }
+
+
+def _public(row):
+    return {
+        "id": row["id"],
+        "name": row["name"],
+        "kana": row["kana"],
+        "phone": row["phone"],
+        "mobile_phone": row["mobile_phone"],
+        "email": row["email"],
+        "address": row["address"],
+        "created_at": row["created_at"],
+    }
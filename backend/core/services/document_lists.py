@@ -0,0 +1,157 @@
+# core/services/document_lists.py
+from collections import defaultdict
+
+from django.contrib.contenttypes.fields import GenericRelation
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import F
+from rest_framework.exceptions import ValidationError
+
+from core.models import Estimate, Order
+
+
+# ─────────────────────────────────────────────
+# 見積・受注の一覧用（軽量）表現
+# ─────────────────────────────────────────────
+# 一覧・分析のドリルダウンで表示するのは番号・日付・顧客・担当・金額だけなので、
+# EstimateSerializer / OrderSerializer（明細・車両・精算・保険・スケジュール付き）は使わず
+# .values() で必要な列だけ読む。1ページ = 1クエリ。
+# 入れ子のデータは ?expand=items,vehicles のように指定したときだけ、関連ごとに1クエリで付ける。
+# ?fields= / ?omit=（core/services/sparse_fields.py と同じ指定）で行の列を絞れる。
+
+ROW_FIELDS = {
+    Estimate: (
+        ("id", "estimate_no", "estimate_date", "status", "grand_total", "shop_id", "created_at"),
+        {
+            "customer_name": F("party__name"),
+            "staff_name": F("created_by__display_name"),
+        },
+    ),
+    Order: (
+        (
+            "id", "order_no", "order_date", "sales_date", "status", "delivery_status",
+            "grand_total", "shop_id", "customer_id", "estimate_id", "created_at",
+        ),
+        {
+            "customer_name": F("party_name"),
+            "staff_name": F("created_by__display_name"),
+        },
+    ),
+}
+
+# expand 名 → (モデルごとの関連名, 列, 式)
+EXPANSIONS = {
+    "items": (
+        {Estimate: "items", Order: "items"},
+        ("id", "item_type", "name", "quantity", "unit_price", "subtotal"),
+        {},
+    ),
+    "vehicles": (
+        {Estimate: "estimate_vehicles", Order: "order_vehicles"},
+        ("id", "is_trade_in", "vehicle_name", "chassis_no"),
+        {},
+    ),
+    "settlements": (
+        {Estimate: "settlements", Order: "settlements"},
+        ("id", "settlement_type", "amount"),
+        {"company_name": F("company__name")},
+    ),
+    "payments": (
+        {Estimate: "payments", Order: "payments"},
+        ("id", "credit_company", "credit_installments", "credit_start_month"),
+        {},
+    ),
+    "schedules": (
+        {Estimate: "schedules", Order: "schedules"},
+        ("id", "title", "start_at", "end_at", "delivery_method"),
+        {},
+    ),
+}
+
+
+def compact_rows(qs, spec=None, required=("id",)):
+    """
+    一覧用の列だけを読むクエリセット（dict を返す）。
+    spec（SparseSpec）の fields / omit で列を絞る。required の列（ページング・expand に使う）は常に読む
+    """
+    fields, expressions = ROW_FIELDS[qs.model]
+    if spec is not None:
+        names = set(fields) | expressions.keys()
+        unknown = ((spec.only or set()) | spec.omit) - names
+        if unknown:
+            raise ValidationError({
+                "fields": f"指定できない項目です（{', '.join(sorted(unknown))}）"
+            })
+
+        def _keep(name):
+            if name in required:
+                return True
+            return (spec.only is None or name in spec.only) and name not in spec.omit
+
+        fields = [name for name in fields if _keep(name)]
+        expressions = {name: expr for name, expr in expressions.items() if _keep(name)}
+    return qs.select_related(None).prefetch_related(None).values(*fields, **expressions)
+
+
+# ─────────────────────────────────────────────
+# expand
+# ─────────────────────────────────────────────
+def parse_expand(request):
+    """?expand=items,vehicles を set にする（未知の名前は 400）"""
+    raw = request.query_params.get("expand") or ""
+    names = {name.strip() for name in raw.split(",") if name.strip()}
+    unknown = names - EXPANSIONS.keys()
+    if unknown:
+        raise ValidationError({
+            "expand": f"指定できるのは {', '.join(EXPANSIONS)} です（{', '.join(sorted(unknown))}）"
+        })
+    return names
+
+
+def _related_rows(model, relation, ids, fields, expressions):
+    """{親id: [関連の dict, ...]}（関連1つにつき1クエリ）"""
+    field = model._meta.get_field(relation)
+    related = field.related_model
+    if isinstance(field, GenericRelation):
+        key = "object_id"
+        qs = related.objects.filter(
+            content_type=ContentType.objects.get_for_model(model), object_id__in=ids
+        )
+    else:
+        key = field.field.attname
+        qs = related.objects.filter(**{f"{key}__in": ids})
+
+    grouped = defaultdict(list)
+    for row in qs.order_by("id").values(key, *fields, **expressions):
+        grouped[row.pop(key)].append(row)
+    return grouped
+
+
+def expand_rows(model, rows, expand):
+    """compact_rows で読んだ行に expand 指定の関連を付ける（rows を書き換えて返す）"""
+    if not expand or not rows:
+        return rows
+    ids = [row["id"] for row in rows]
+    for name in sorted(expand):
+        relations, fields, expressions = EXPANSIONS[name]
+        grouped = _related_rows(model, relations[model], ids, fields, expressions)
+        for row in rows:
+            row[name] = grouped.get(row["id"], [])
+    return rows
+
+
+# ─────────────────────────────────────────────
+# 1ページ分の読み込み
+# ─────────────────────────────────────────────
+def compact_page(qs, request, pagination_class, expand=(), spec=None):
+    """
+    一覧用の行を読む。?limit= があればキーセットページングの1ページ分、なければ全件（日付の新しい順）。
+    spec は compact_rows に渡す列の指定。
+    戻り値: (rows, paginator)。ページングしなかったときの paginator は None
+    """
+    paginator = pagination_class()
+    rows_qs = compact_rows(qs, spec, required=("id", paginator.date_field))
+    rows = paginator.paginate_queryset(rows_qs, request)
+    if rows is None:
+        paginator = None
+        rows = list(rows_qs.order_by(*pagination_class().get_ordering()))
+    return expand_rows(qs.model, rows, expand), paginator
@@ -0,0 +1,49 @@
+# core/services/document_relations.py
+from django.db.models import Prefetch
+
+from core.models import Category, Estimate, Order, Payment, Schedule, Settlement
+
+
+# ─────────────────────────────────────────────
+# 見積・受注の関連をまとめて読む（シリアライザの N+1 回避）
+# ─────────────────────────────────────────────
+# OrderSerializer / OrderDetailSerializer / EstimateSerializer / EstimateDetailSerializer は
+# 明細・車両・支払い・精算・スケジュール・保険を読む。一覧で many=True にすると
+# 1件ごとにクエリが出るので、関連ごとに1クエリで読んでおく。
+# シリアライザ側は obj.payments.all() などで読むので、prefetch していなくても動く。
+
+# CategorySerializer は親を最上位までたどる。階層は最大4段（depth 0〜3）なので JOIN で足りる
+CATEGORY_QUERYSET = Category.objects.select_related("parent__parent__parent")
+
+# モデルごとの違い（select_related する FK / 車両の related_name）
+SELECT_RELATED = {
+    Order: ("shop", "created_by", "insurance"),
+    Estimate: ("shop", "created_by", "insurance", "party"),
+}
+VEHICLE_RELATION = {
+    Order: "order_vehicles",
+    Estimate: "estimate_vehicles",
+}
+
+
+def prefetch_document_relations(qs):
+    """Order / Estimate のクエリセットにシリアライザが読む関連の prefetch を付ける"""
+    vehicles = VEHICLE_RELATION[qs.model]
+    return qs.select_related(*SELECT_RELATED[qs.model]).prefetch_related(
+        Prefetch("payments", queryset=Payment.objects.order_by("id")),
+        Prefetch("settlements", queryset=Settlement.objects.select_related("company").order_by("id")),
+        Prefetch("schedules", queryset=Schedule.objects.select_related("delivery_shop").order_by("id")),
+        "items__product",
+        "items__unit",
+        Prefetch("items__category", queryset=CATEGORY_QUERYSET),
+        "items__manufacturer",
+        "items__staff",
+        f"{vehicles}__registrations",
+        f"{vehicles}__manufacturer",
+        f"{vehicles}__source_customer_vehicle",
+    )
+
+
+def by_id(manager):
+    """関連の一覧を id 順で返す（prefetch 済みならクエリを出さない）"""
+    return sorted(manager.all(), key=lambda obj: obj.id)
@@ -0,0 +1,317 @@
+# core/services/estimate_conversion.py
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core.models import (
+    Customer,
+    DailySalesRollup,
+    DocumentSequence,
+    Estimate,
+    Insurance,
+    Order,
+    OrderItem,
+    OrderVehicle,
+    OrderVehicleRegistration,
+    Payment,
+    Schedule,
+    Settlement,
+    refresh_customer_shops,
+)
+from core.models.customers import email_match_key, phone_match_key
+from core.services.line_items import calc_totals
+from core.services.order_finalize import create_customer_vehicle_from_order
+from core.utils.text import normalize_japanese
+
+
+# ─────────────────────────────────────────────
+# 見積 → 受注の変換
+# ─────────────────────────────────────────────
+# 見積1件でも複数件でも、明細・車両・登録・スケジュール・支払い・精算・保険はモデルごとに
+# bulk_create 1回で作る。クエリ数は明細の行数・見積の件数によらない（顧客の新規作成と
+# 商談車両からの所有車両登録だけは受注ごと）。
+# bulk_create は signal を通らないので、受注作成時の差分反映（顧客の初回・最終店舗、
+# 日別集計）は最後にまとめて行う。
+
+# コピーする列（attname）。Order 側で null 不可の文字列は "" にそろえる
+ITEM_FIELDS = (
+    "item_type", "unit_id", "product_id", "category_id", "manufacturer_id", "staff_id",
+    "name", "quantity", "unit_price", "labor_cost", "tax_type", "discount", "subtotal", "sale_type",
+)
+VEHICLE_FIELDS = (
+    "is_trade_in", "source_customer_vehicle_id", "category_id", "vehicle_name", "displacement",
+    "model_year", "sale_type", "manufacturer_id", "color_id", "color_name", "color_code",
+    "model_code", "chassis_no", "engine_type",
+)
+REGISTRATION_FIELDS = (
+    "registration_area", "registration_no", "certification_no",
+    "inspection_expiration", "first_registration_date",
+)
+PAYMENT_FIELDS = (
+    "credit_company", "credit_first_payment", "credit_second_payment",
+    "credit_bonus_payment", "credit_installments", "credit_start_month",
+)
+SETTLEMENT_FIELDS = ("settlement_type", "company_id", "amount")
+INSURANCE_FIELDS = ("company_name", "bodily_injury", "property_damage", "passenger", "vehicle", "option")
+
+# 自動マッチングで返す候補の上限
+MAX_CANDIDATES = 20
+
+
+class ConversionError(Exception):
+    def __init__(self, detail, status=400):
+        super().__init__(detail)
+        self.detail = detail
+        self.status = status
+
+
+class CustomerSelectionRequired(Exception):
+    """似た顧客がいるので、どの顧客の受注にするか選んでもらう"""
+
+    def __init__(self, candidates):
+        super().__init__("customer selection required")
+        self.candidates = candidates
+
+
+def _copy(src, model, fields, **extra):
+    values = {}
+    for name in fields:
+        value = getattr(src, name)
+        if value is None and not model._meta.get_field(name).null:
+            value = ""
+        values[name] = value
+    return model(**values, **extra)
+
+
+# ─────────────────────────────────────────────
+# 読み込み
+# ─────────────────────────────────────────────
+def load_estimates(estimate_ids, lock=False):
+    """
+    変換に必要なものをまとめて読む（件数によらずクエリ数は一定）。{id: Estimate}
+    lock=True なら先に見積の行をロックする（トランザクション内で呼ぶ）。同じ見積を同時に
+    変換しようとした側はここで待ち、ロック後の読み込みで受注済みのステータスを見る。
+    """
+    if lock:
+        # select_related の外部結合側には FOR UPDATE を付けられないので、ロックは別クエリ
+        list(
+            Estimate.objects.select_for_update()
+            .filter(id__in=estimate_ids)
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+    estimates = (
+        Estimate.objects
+        .filter(id__in=estimate_ids)
+        .select_related("party__source_customer", "shop", "insurance")
+        .prefetch_related(
+            "items",
+            "estimate_vehicles__registrations",
+            "schedules",
+            "payments",
+            "settlements",
+        )
+    )
+    return {e.id: e for e in estimates}
+
+
+# ─────────────────────────────────────────────
+# 顧客の決定
+# ─────────────────────────────────────────────
+def similar_customers(party):
+    """氏名が同じで電話・携帯・メールのどれかが一致する顧客（照合キーの索引を使う1クエリ）"""
+    name_key = normalize_japanese(party.name)
+    if not name_key:
+        return []
+    contact = Q()
+    for field, key in (
+        ("phone_key", phone_match_key(party.phone)),
+        ("mobile_phone_key", phone_match_key(party.mobile_phone)),
+        ("email_key", email_match_key(party.email)),
+    ):
+        if key:
+            contact |= Q(**{field: key})
+    if not contact:
+        return []
+    return list(
+        Customer.objects
+        .filter(contact, name_key=name_key[:100])
+        .order_by("id")
+        .only("id", "name", "phone", "email", "address")[:MAX_CANDIDATES]
+    )
+
+
+def _customer_from_party(party, shop):
+    customer = Customer.objects.create(
+        name=party.name,
+        kana=party.kana,
+        phone=party.phone,
+        email=party.email,
+        mobile_phone=party.mobile_phone,
+        company=party.company,
+        company_phone=party.company_phone,
+        birthdate=party.birthdate,
+        postal_code=party.postal_code,
+        address=party.address,
+        customer_class=party.customer_class,
+        staff=party.staff,           # 見積パーティのstaffを引き継ぐ
+        gender=party.gender,
+        region=party.region,
+        first_shop=party.first_shop or shop,
+        last_shop=party.last_shop or shop,
+    )
+    party.source_customer = customer
+    party.save(update_fields=["source_customer"])
+    return customer
+
+
+def resolve_customer(estimate, selected_customer_id=None):
+    """
+    受注の顧客を決める。
+    見積作成時の顧客 → 画面で選んだ顧客 → 似た顧客がいれば CustomerSelectionRequired → 新規作成
+    """
+    party = estimate.party
+    if not party:
+        raise ConversionError("見積に顧客情報がありません")
+
+    if party.source_customer:
+        return party.source_customer
+
+    if selected_customer_id:
+        customer = Customer.objects.filter(id=selected_customer_id).first()
+        if customer is None:
+            raise ConversionError("選択された顧客が存在しません", status=404)
+        return customer
+
+    candidates = similar_customers(party)
+    if candidates:
+        raise CustomerSelectionRequired(candidates)
+
+    return _customer_from_party(party, estimate.shop)
+
+
+# ─────────────────────────────────────────────
+# 変換本体
+# ─────────────────────────────────────────────
+@transaction.atomic
+def convert_estimates(pairs, user, shop=None):
+    """
+    [(estimate, customer), ...] を受注にして、同じ順で Order のリストを返す。
+    estimate は load_estimates で読んだもの。shop を省略すると見積の店舗。
+    """
+    if not pairs:
+        return []
+
+    today = timezone.localdate()
+    order_ct = ContentType.objects.get_for_model(Order)
+    estimate_ids = [e.id for e, _ in pairs]
+
+    # 見積を先に受注済みにする（status は集計・初回/最終店舗に影響しないので UPDATE 1回）。
+    # 受注済みの見積は更新されないので、件数が合わなければ同時に変換されている → 全体を巻き戻す
+    claimed = (
+        Estimate.objects
+        .filter(id__in=estimate_ids)
+        .exclude(status="ordered")
+        .update(status="ordered")
+    )
+    if claimed != len(estimate_ids):
+        raise ConversionError("受注済みの見積が含まれています", status=409)
+    for estimate, _ in pairs:
+        estimate.status = "ordered"
+
+    numbers = DocumentSequence.next_nos("order", len(pairs), on=today)
+
+    # 受注（合計は見積明細からメモリ上で計算）
+    orders = []
+    for (estimate, customer), order_no in zip(pairs, numbers):
+        items = list(estimate.items.all())
+        subtotal, tax_total, grand_total = calc_totals(items, estimate.final_adjustment)
+        orders.append(Order(
+            order_no=order_no,
+            shop=shop or estimate.shop,
+            estimate=estimate,
+            customer=customer,
+            vehicle_mode=estimate.vehicle_mode,
+            party_name=customer.name,
+            party_kana=customer.kana,
+            phone=customer.phone,
+            email=customer.email,
+            postal_code=customer.postal_code,
+            address=customer.address,
+            status="ordered",
+            order_date=today,
+            subtotal=subtotal,
+            discount_total=estimate.discount_total,
+            tax_total=tax_total,
+            grand_total=grand_total,
+            final_adjustment=estimate.final_adjustment,
+            created_by=user,
+        ))
+    Order.objects.bulk_create(orders)
+
+    items = []
+    vehicles = []
+    vehicle_sources = []
+    schedules = []
+    payments = []
+    new_settlements = []
+    insurances = []
+    for (estimate, _), order in zip(pairs, orders):
+        items.extend(_copy(i, OrderItem, ITEM_FIELDS, order=order) for i in estimate.items.all())
+
+        for ev in estimate.estimate_vehicles.all():
+            vehicles.append(_copy(ev, OrderVehicle, VEHICLE_FIELDS, order=order))
+            vehicle_sources.append(ev)
+
+        schedules.extend(
+            Schedule(
+                schedule_type="delivery",
+                order=order,
+                customer=order.customer,
+                shop=order.shop,
+                staff=order.created_by,
+                title=s.title,
+                start_at=s.start_at,
+                end_at=s.end_at,
+                delivery_method=s.delivery_method,
+                delivery_shop_id=s.delivery_shop_id,
+                description=s.description,
+            )
+            for s in estimate.schedules.all()
+        )
+        payments.extend(
+            _copy(p, Payment, PAYMENT_FIELDS, content_type=order_ct, object_id=order.id)
+            for p in estimate.payments.all()
+        )
+        new_settlements.extend(
+            _copy(s, Settlement, SETTLEMENT_FIELDS, content_type=order_ct, object_id=order.id)
+            for s in estimate.settlements.all()
+        )
+        insurance = getattr(estimate, "insurance", None)
+        if insurance is not None:
+            insurances.append(_copy(insurance, Insurance, INSURANCE_FIELDS, order=order))
+
+    OrderItem.objects.bulk_create(items, batch_size=1000)
+    OrderVehicle.objects.bulk_create(vehicles, batch_size=1000)
+    OrderVehicleRegistration.objects.bulk_create([
+        _copy(r, OrderVehicleRegistration, REGISTRATION_FIELDS, vehicle=ov)
+        for ov, ev in zip(vehicles, vehicle_sources)
+        for r in ev.registrations.all()
+    ], batch_size=1000)
+    Schedule.objects.bulk_create(schedules, batch_size=1000)
+    Payment.objects.bulk_create(payments, batch_size=1000)
+    Settlement.objects.bulk_create(new_settlements, batch_size=1000)
+    Insurance.objects.bulk_create(insurances, batch_size=1000)
+
+    # signal を通らなかった分の差分反映
+    refresh_customer_shops({o.customer_id for o in orders})
+    DailySalesRollup.refresh_orders([o.id for o in orders])
+
+    # 商談車両から所有車両を登録（車台番号での照合などがあるので受注ごと）
+    with_target = {ov.order_id for ov in vehicles if not ov.is_trade_in}
+    for order in orders:
+        if order.id in with_target:
+            create_customer_vehicle_from_order(order)
+
+    return orders
@@ -0,0 +1,113 @@
+# core/services/image_derivatives.py
+import logging
+import os
+
+from django.conf import settings
+from django.db import transaction
+from PIL import Image
+
+from core.models import CustomerImage, VehicleImage
+from core.utils.images import make_derivative, oriented_size
+
+logger = logging.getLogger(__name__)
+
+
+# ─────────────────────────────────────────────
+# 設定
+# ─────────────────────────────────────────────
+# 派生ファイル名 → 長辺の最大ピクセル
+SIZES = {
+    "thumbnail": getattr(settings, "IMAGE_THUMBNAIL_SIZE", 320),
+    "preview":   getattr(settings, "IMAGE_PREVIEW_SIZE", 1200),
+}
+QUALITY = getattr(settings, "IMAGE_DERIVATIVE_QUALITY", 80)
+
+IMAGE_MODELS = (CustomerImage, VehicleImage)
+
+
+# ─────────────────────────────────────────────
+# 1枚分の作成
+# ─────────────────────────────────────────────
+def build_derivatives(obj):
+    """
+    元画像を1回だけ開き、幅・高さ・MIME とサムネイル・表示用画像を作って保存する。
+    失敗したら derivatives_status="failed" にして False を返す。
+    """
+    try:
+        with obj.image.open("rb") as f:
+            img = Image.open(f)
+            obj.width, obj.height = oriented_size(img)
+            obj.mime = Image.MIME.get(img.format) or obj.mime
+            obj.bytes = obj.image.size
+
+            # JPEG は必要な大きさまで縮小しながら読み込む（大きな写真の展開が軽くなる）
+            img.draft("RGB", (max(SIZES.values()),) * 2)
+            img.load()
+
+            stem = os.path.splitext(os.path.basename(obj.image.name))[0]
+            for field_name, size in SIZES.items():
+                content = make_derivative(img, size, quality=QUALITY)
+                field = getattr(obj, field_name)
+                if field:
+                    field.storage.delete(field.name)
+                field.save(f"{stem}_{field_name}.jpg", content, save=False)
+    except Exception:
+        logger.warning("image derivatives failed: %s #%s", obj._meta.label, obj.pk, exc_info=True)
+        type(obj).objects.filter(pk=obj.pk).update(derivatives_status="failed")
+        return False
+
+    obj.derivatives_status = "done"
+    # save() を通さない（アップロード時の処理・updated_at は不要）
+    type(obj).objects.filter(pk=obj.pk).update(
+        width=obj.width,
+        height=obj.height,
+        mime=obj.mime,
+        bytes=obj.bytes,
+        thumbnail=obj.thumbnail.name,
+        preview=obj.preview.name,
+        derivatives_status="done",
+    )
+    return True
+
+
+# ─────────────────────────────────────────────
+# 作成待ちの処理（run_report_worker から呼ぶ）
+# ─────────────────────────────────────────────
+def process_pending(limit=50):
+    """
+    作成待ちの画像を最大 limit 件処理して件数を返す。
+    複数のワーカーが同時に動いても同じ画像を二重に処理しないよう行ロック（SKIP LOCKED）で取る。
+    """
+    processed = 0
+    for model in IMAGE_MODELS:
+        remaining = limit - processed
+        if remaining <= 0:
+            break
+        ids = list(
+            model.objects
+            .filter(derivatives_status="pending")
+            .order_by("id")
+            .values_list("id", flat=True)[:remaining]
+        )
+        for pk in ids:
+            with transaction.atomic():
+                obj = (
+                    model.objects
+                    .select_for_update(skip_locked=True)
+                    .filter(pk=pk, derivatives_status="pending")
+                    .first()
+                )
+                if obj is None:
+                    continue
+                build_derivatives(obj)
+            processed += 1
+    return processed
+
+
+def requeue(models=IMAGE_MODELS, failed_only=False):
+    """派生ファイルを作り直す対象に戻す（サイズ変更時・失敗分の再実行）。件数を返す"""
+    statuses = ["failed"] if failed_only else ["failed", "done"]
+    return sum(
+        model.objects.filter(derivatives_status__in=statuses).update(derivatives_status="pending")
+        for model in models
+    )
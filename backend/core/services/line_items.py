@@ -0,0 +1,134 @@
+# core/services/line_items.py
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.utils import timezone
+
+from core.models import Product
+from core.utils.text import normalize_japanese
+
+
+TAX_RATE = Decimal("0.10")
+
+
+# ─────────────────────────────────────────────
+# 合計計算（DB を使わずに明細から算出）
+# ─────────────────────────────────────────────
+def calc_totals(lines, final_adjustment=None):
+    """
+    明細（validated_data の dict / モデル）から (subtotal, tax_total, grand_total) を返す。
+    各明細の subtotal は DB と同じく小数2桁に丸めてから合計する。
+    """
+    subtotal = Decimal("0.00")
+    taxable_subtotal = Decimal("0.00")
+
+    for line in lines:
+        value = Decimal(str(_get(line, "subtotal") or "0")).quantize(
+            Decimal("0.01"), rounding=ROUND_HALF_UP
+        )
+        subtotal += value
+        if _get(line, "tax_type", "taxable") == "taxable":
+            taxable_subtotal += value
+
+    tax_total = (taxable_subtotal * TAX_RATE).quantize(
+        Decimal("1"), rounding=ROUND_HALF_UP
+    )
+    grand_total = subtotal + tax_total + (final_adjustment or Decimal("0"))
+    return subtotal, tax_total, grand_total
+
+
+def _get(line, key, default=None):
+    if isinstance(line, dict):
+        return line.get(key, default)
+    return getattr(line, key, default)
+
+
+# ─────────────────────────────────────────────
+# 明細の差分保存
+# ─────────────────────────────────────────────
+def sync_line_items(model, parent_field, parent, items_data):
+    """
+    既存明細（id 順）と入力明細を先頭から対応付け、差分だけ書き込む。
+    - 内容が同じ行はそのまま残す
+    - 内容が変わった行は bulk_update、増えた行は bulk_create、余った行は削除対象
+    戻り値: (changed_ids, removed_ids, created)
+      changed_ids / removed_ids は呼び出し側で依存データ（納品明細など）を始末するため。
+      removed_ids の行はまだ削除していない。
+    """
+    existing = list(model.objects.filter(**{parent_field: parent}).order_by("id"))
+
+    to_update = []
+    update_fields = set()
+    for obj, data in zip(existing, items_data):
+        diff = [name for name, value in data.items() if not _same_value(obj, name, value)]
+        if not diff:
+            continue
+        for name in diff:
+            setattr(obj, name, data[name])
+        to_update.append(obj)
+        update_fields.update(diff)
+
+    if to_update:
+        now = timezone.now()
+        for obj in to_update:
+            obj.updated_at = now
+        model.objects.bulk_update(to_update, sorted(update_fields) + ["updated_at"])
+
+    created = model.objects.bulk_create([
+        model(**{parent_field: parent}, **data)
+        for data in items_data[len(existing):]
+    ])
+
+    changed_ids = [obj.id for obj in to_update]
+    removed_ids = [obj.id for obj in existing[len(items_data):]]
+    return changed_ids, removed_ids, created
+
+
+def _same_value(obj, name, value):
+    field = obj._meta.get_field(name)
+    if field.is_relation:
+        # 関連先を読みに行かないよう *_id で比較
+        return getattr(obj, field.attname) == (value.pk if value is not None else None)
+    return getattr(obj, name) == value
+
+
+# ─────────────────────────────────────────────
+# 「商品として保存」フラグ付き明細の商品登録
+# ─────────────────────────────────────────────
+def save_lines_as_products(lines):
+    """
+    明細から Product をまとめて作成する（名前・カテゴリ・メーカーが同じ商品があれば作らない）。
+    既存確認1クエリ + bulk_create 1クエリ。
+    """
+    candidates = {}
+    for line in lines:
+        name = _get(line, "name")
+        category = _get(line, "category")
+        if not name or not category:
+            continue
+        manufacturer = _get(line, "manufacturer")
+        key = (name, category.pk, manufacturer.pk if manufacturer else None)
+        candidates.setdefault(key, line)
+
+    if not candidates:
+        return []
+
+    existing = set(
+        Product.objects.filter(
+            name__in={k[0] for k in candidates},
+            category_id__in={k[1] for k in candidates},
+        ).values_list("name", "category_id", "manufacturer_id")
+    )
+
+    return Product.objects.bulk_create([
+        Product(
+            name=name,
+            name_search=normalize_japanese(name),
+            category_id=category_id,
+            manufacturer_id=manufacturer_id,
+            unit_price=_get(line, "unit_price") or 0,
+            tax_type=_get(line, "tax_type") or "taxable",
+            is_active=True,
+        )
+        for (name, category_id, manufacturer_id), line in candidates.items()
+        if (name, category_id, manufacturer_id) not in existing
+    ])
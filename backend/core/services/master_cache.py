@@ -0,0 +1,137 @@
+# core/services/master_cache.py
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from rest_framework import status
+from rest_framework.response import Response
+
+
+# 一度作ったレスポンスはバージョンが変わるまで有効（念のため1日で失効）
+MASTER_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+# ─────────────────────────────────────────────
+# グループ → 変更を監視するモデル
+# ─────────────────────────────────────────────
+def _group_models():
+    from core.models import (
+        Shop, Color, Region, Gender, CustomerClass,
+        Category, Manufacturer, ManufacturerGroup,
+    )
+    from core.models.unit import Unit
+    from core.models.payment_company import PaymentCompany
+
+    return {
+        "shops":             [Shop],
+        "colors":            [Color],
+        "regions":           [Region],
+        "genders":           [Gender],
+        "customer_classes":  [CustomerClass],
+        "units":             [Unit],
+        "payment_companies": [PaymentCompany],
+        "manufacturers":     [Manufacturer, ManufacturerGroup],
+        "categories":        [Category],
+    }
+
+
+# ─────────────────────────────────────────────
+# バージョン付きキー
+# ─────────────────────────────────────────────
+def _version_key(group):
+    return f"master:version:{group}"
+
+
+def master_version(group):
+    """グループの現在バージョン。未設定（キャッシュ消去後など）なら採番する"""
+    version = cache.get(_version_key(group))
+    if version is None:
+        cache.add(_version_key(group), time.time_ns(), None)
+        version = cache.get(_version_key(group))
+    return version
+
+
+def bump_master_version(*groups):
+    """グループのバージョンを進める（以前のキー・ETag はすべて無効になる）"""
+    for group in groups:
+        cache.set(_version_key(group), time.time_ns(), None)
+
+
+def _etag(request, groups):
+    versions = ",".join(f"{g}={master_version(g)}" for g in groups)
+    raw = f"{request.get_full_path()}|{versions}"
+    return '"m-' + hashlib.sha1(raw.encode()).hexdigest()[:20] + '"'
+
+
+def _etag_matches(request, etag):
+    header = request.META.get("HTTP_IF_NONE_MATCH", "")
+    if not header:
+        return False
+    candidates = [t.strip().removeprefix("W/") for t in header.split(",")]
+    return etag in candidates or "*" in candidates
+
+
+# ─────────────────────────────────────────────
+# レスポンス
+# ─────────────────────────────────────────────
+def cached_master_response(request, groups, build):
+    """
+    マスタ系一覧のレスポンスをキャッシュして返す。
+    - groups: 依存するグループ（どれかが更新されると無効）
+    - build : キャッシュがないときにレスポンスデータを作る関数
+    If-None-Match が一致すれば 304 を返し、DB には触れない。
+    """
+    if isinstance(groups, str):
+        groups = (groups,)
+
+    etag = _etag(request, groups)
+    if _etag_matches(request, etag):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        key = f"master:data:{etag.strip(chr(34))}"
+        data = cache.get(key)
+        if data is None:
+            data = build()
+            cache.set(key, data, MASTER_CACHE_TIMEOUT)
+        response = Response(data)
+
+    response["ETag"] = etag
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
+
+class MasterCacheMixin:
+    """ListAPIView 用。list() の結果を cached_master_response でキャッシュする"""
+    master_cache_groups = ()
+
+    def list(self, request, *args, **kwargs):
+        return cached_master_response(
+            request,
+            self.master_cache_groups,
+            lambda: super(MasterCacheMixin, self).list(request, *args, **kwargs).data,
+        )
+
+
+# ─────────────────────────────────────────────
+# 無効化（CoreConfig.ready から接続）
+# ─────────────────────────────────────────────
+def connect_master_cache_signals():
+    for group, models in _group_models().items():
+        def _invalidate(sender, _group=group, **kwargs):
+            bump_master_version(_group)
+
+        for model in models:
+            post_save.connect(_invalidate, sender=model, weak=False,
+                              dispatch_uid=f"master_cache_save_{group}_{model._meta.label}")
+            post_delete.connect(_invalidate, sender=model, weak=False,
+                                dispatch_uid=f"master_cache_delete_{group}_{model._meta.label}")
+
+    # メーカー ⇔ メーカーグループの紐付け変更
+    from core.models import Manufacturer
+
+    def _invalidate_manufacturers(sender, **kwargs):
+        bump_master_version("manufacturers")
+
+    m2m_changed.connect(_invalidate_manufacturers, sender=Manufacturer.groups.through, weak=False,
+                        dispatch_uid="master_cache_m2m_manufacturer_groups")
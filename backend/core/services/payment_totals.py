@@ -0,0 +1,54 @@
+# core/services/payment_totals.py
+from decimal import Decimal
+
+from django.db.models import (
+    Sum, F, Value, Case, When, CharField, DecimalField, OuterRef, Subquery,
+)
+from django.db.models.functions import Coalesce, Greatest
+
+from core.models import PaymentRecord
+
+
+_MONEY = DecimalField(max_digits=12, decimal_places=2)
+
+
+# ─────────────────────────────────────────────
+# 入金済み合計をサブクエリで取得（N+1回避）
+# ─────────────────────────────────────────────
+def paid_total_subquery(order_ref="pk"):
+    """受注ごとの PaymentRecord.amount 合計（入金なしは 0）"""
+    return Coalesce(
+        Subquery(
+            PaymentRecord.objects.filter(
+                payment_management__order_id=OuterRef(order_ref)
+            ).values("payment_management__order_id")
+             .annotate(s=Sum("amount"))
+             .values("s")[:1],
+            output_field=_MONEY,
+        ),
+        Value(Decimal("0")),
+        output_field=_MONEY,
+    )
+
+
+def annotate_payment_totals(qs):
+    """
+    paid_total / unpaid_total / payment_status を付与する。
+    payment_status: 受注金額0円は入金不要=paid、入金0=pending、一部=partial、全額=paid
+    """
+    return qs.annotate(
+        paid_total=paid_total_subquery(),
+    ).annotate(
+        unpaid_total=Greatest(
+            F("grand_total") - F("paid_total"),
+            Value(Decimal("0")),
+            output_field=_MONEY,
+        ),
+        payment_status=Case(
+            When(grand_total__lte=0, then=Value("paid")),
+            When(paid_total__lte=0, then=Value("pending")),
+            When(paid_total__lt=F("grand_total"), then=Value("partial")),
+            default=Value("paid"),
+            output_field=CharField(),
+        ),
+    )
@@ -0,0 +1,379 @@
+# core/services/pdf_service.py
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.template import engines
+from django.template.loader import get_template
+
+from core.models import CompanySettings, Estimate, Order
+
+logger = logging.getLogger(__name__)
+
+
+# ─────────────────────────────────────────────
+# 設定
+# ─────────────────────────────────────────────
+TEMPLATE_NAME = "pdf/estimate.html"
+CSS_PATH = Path(__file__).resolve().parent.parent / "templates" / "pdf" / "document.css"
+
+# テンプレート・CSS 以外（このファイルの整形処理など）で見た目が変わったら上げる。
+# キャッシュキーに含めるので、上げると以前の PDF は使われなくなる。
+LAYOUT_VERSION = 1
+
+CACHE_DIR = Path(settings.PDF_CACHE_DIR)
+CACHE_MAX_AGE_DAYS = getattr(settings, "PDF_CACHE_MAX_AGE_DAYS", 90)
+BATCH_WORKERS = getattr(settings, "PDF_BATCH_WORKERS", 0) or os.cpu_count() or 1
+
+TITLES = {
+    "estimate": "御見積書",
+    "order":    "注文書",
+}
+
+
+class PDFUnavailable(RuntimeError):
+    """WeasyPrint（または Pango などのライブラリ）が使えない"""
+
+
+# ─────────────────────────────────────────────
+# レンダラ（フォント・CSS・テンプレートはプロセスごとに1回だけ読む）
+# ─────────────────────────────────────────────
+def ensure_available():
+    try:
+        import weasyprint  # noqa: F401
+    except (ImportError, OSError) as e:
+        raise PDFUnavailable(f"WeasyPrint を読み込めません: {e}") from e
+
+
+class _Renderer:
+    def __init__(self):
+        ensure_available()
+        from weasyprint import CSS, HTML
+        from weasyprint.text.fonts import FontConfiguration
+
+        css_source = CSS_PATH.read_text(encoding="utf-8")
+        template = get_template(TEMPLATE_NAME)
+
+        self._html_class = HTML
+        self.font_config = FontConfiguration()
+        self.stylesheet = CSS(string=css_source, font_config=self.font_config)
+        self.template = template
+
+    def render(self, data):
+        html = self.template.render({"doc": data})
+        return self._html_class(string=html, base_url=str(CSS_PATH.parent)).write_pdf(
+            stylesheets=[self.stylesheet],
+            font_config=self.font_config,
+        )
+
+
+_renderer = None
+_template_version = None
+
+
+def get_renderer():
+    global _renderer
+    if _renderer is None:
+        _renderer = _Renderer()
+    return _renderer
+
+
+def template_version():
+    """テンプレート・CSS の内容と LAYOUT_VERSION から作る版（キャッシュキーの一部）"""
+    global _template_version
+    if _template_version is None:
+        template = engines["django"].engine.find_template(TEMPLATE_NAME)[0]
+        digest = hashlib.sha256()
+        digest.update(str(LAYOUT_VERSION).encode())
+        digest.update(template.source.encode())
+        digest.update(CSS_PATH.read_bytes())
+        _template_version = digest.hexdigest()[:16]
+    return _template_version
+
+
+def warm_up():
+    """
+    ワーカー起動時に呼ぶ（config/wsgi.py）。
+    最初の印刷要求でフォント読み込みを待たせないよう、空の文書を1回描画しておく。
+    WeasyPrint が使えない環境では警告だけ出す。
+    """
+    try:
+        started = time.monotonic()
+        get_renderer().render({"kind": "estimate", "title": TITLES["estimate"], "items": []})
+        template_version()
+        logger.info("pdf renderer ready (%.2fs)", time.monotonic() - started)
+    except Exception:
+        logger.warning("pdf renderer warm-up failed", exc_info=True)
+
+
+# ─────────────────────────────────────────────
+# 文書データ（PDF に載る値だけを JSON にできる形で持つ）
+# ─────────────────────────────────────────────
+def _s(value):
+    if value is None:
+        return ""
+    if isinstance(value, Decimal):
+        return str(int(value)) if value == value.to_integral() else str(value)
+    return str(value)
+
+
+def _yen(value):
+    return f"{int((value or Decimal('0')).quantize(Decimal('1'))):,}"
+
+
+def _shop_data(shop):
+    if shop is None:
+        return {}
+    return {
+        "name": shop.name,
+        "postal_code": shop.postal_code,
+        "address": shop.location,
+        "phone": shop.phone,
+        "fax": shop.fax,
+        "bank_name": shop.bank_name,
+        "bank_branch_name": shop.bank_branch_name,
+        "bank_account_type": shop.bank_account_type,
+        "bank_account_no": shop.bank_account_no,
+        "bank_account_holder": shop.bank_account_holder,
+    }
+
+
+def _items_data(items):
+    return [
+        {
+            "name": item.name,
+            "item_type": item.item_type,
+            "quantity": _s(item.quantity),
+            "unit": item.unit.name if item.unit_id else "",
+            "unit_price": _yen(item.unit_price),
+            "labor_cost": _yen(item.labor_cost) if item.labor_cost else "",
+            "discount": _yen(item.discount) if item.discount else "",
+            "subtotal": _yen(item.subtotal),
+            "non_taxable": item.tax_type == "non_taxable",
+        }
+        for item in items
+    ]
+
+
+def _totals_data(doc):
+    return {
+        "subtotal": _yen(doc.subtotal),
+        "discount_total": _yen(doc.discount_total) if doc.discount_total else "",
+        "tax_total": _yen(doc.tax_total),
+        "final_adjustment": _yen(doc.final_adjustment) if doc.final_adjustment else "",
+        "grand_total": _yen(doc.grand_total),
+    }
+
+
+def _staff_name(user):
+    if user is None:
+        return ""
+    return user.display_name or user.get_full_name() or user.login_id
+
+
+def estimate_data(estimate, company):
+    party = estimate.party
+    return {
+        "kind": "estimate",
+        "title": TITLES["estimate"],
+        "number": estimate.estimate_no,
+        "date": _s(estimate.estimate_date),
+        "valid_until": _s(estimate.valid_until),
+        "party": {
+            "name": party.name if party else "",
+            "postal_code": _s(party.postal_code) if party else "",
+            "address": _s(party.address) if party else "",
+            "phone": _s(party.mobile_phone or party.phone) if party else "",
+        },
+        "shop": _shop_data(estimate.shop),
+        "staff": _staff_name(estimate.created_by),
+        "registration_number": company.registration_number,
+        "items": _items_data(estimate.items.all()),
+        "totals": _totals_data(estimate),
+        "memo": _s(estimate.memo),
+    }
+
+
+def order_data(order, company):
+    return {
+        "kind": "order",
+        "title": TITLES["order"],
+        "number": order.order_no,
+        "date": _s(order.order_date),
+        "valid_until": "",
+        "party": {
+            "name": order.party_name,
+            "postal_code": _s(order.postal_code),
+            "address": _s(order.address),
+            "phone": _s(order.phone),
+        },
+        "shop": _shop_data(order.shop),
+        "staff": _staff_name(order.created_by),
+        "registration_number": company.registration_number,
+        "items": _items_data(order.items.all()),
+        "totals": _totals_data(order),
+        "memo": _s(order.memo),
+    }
+
+
+# 種類 → (QuerySet, データ化関数, 番号フィールド)
+def _sources():
+    return {
+        "estimate": (
+            Estimate.objects
+            .select_related("party", "shop", "created_by")
+            .prefetch_related("items__unit"),
+            estimate_data,
+            "estimate_no",
+        ),
+        "order": (
+            Order.objects
+            .select_related("shop", "created_by")
+            .prefetch_related("items__unit"),
+            order_data,
+            "order_no",
+        ),
+    }
+
+
+def documents(kind, queryset_filter):
+    """
+    queryset_filter（QuerySet を受け取って絞り込む関数）に合う文書の (number, data) を返す。
+    明細・単位は prefetch するので件数によらずクエリ数は一定。
+    """
+    qs, to_data, number_field = _sources()[kind]
+    company = CompanySettings.get()
+    return [
+        (getattr(doc, number_field), to_data(doc, company))
+        for doc in queryset_filter(qs).order_by(number_field)
+    ]
+
+
+def count_documents(kind, queryset_filter):
+    """documents() の件数だけ（COUNT 1回。明細の読み込みや整形はしない）"""
+    qs, _, _ = _sources()[kind]
+    return queryset_filter(qs).count()
+
+
+# ─────────────────────────────────────────────
+# キャッシュ（内容のハッシュ = ファイル名）
+# ─────────────────────────────────────────────
+def cache_key(data):
+    raw = json.dumps(data, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    digest = hashlib.sha256()
+    digest.update(template_version().encode())
+    digest.update(raw.encode())
+    return digest.hexdigest()
+
+
+def cache_path(key):
+    return CACHE_DIR / key[:2] / f"{key}.pdf"
+
+
+def render_cached(data):
+    """data の PDF のパスを返す。同じ内容・同じテンプレートで作成済みならそのまま使う"""
+    key = cache_key(data)
+    path = cache_path(key)
+    if path.exists():
+        # 最終利用日時を更新して prune_cache で消されにくくする
+        os.utime(path)
+        return key, path
+
+    pdf = get_renderer().render(data)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(pdf)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return key, path
+
+
+def prune_cache(max_age_days=None):
+    """最終利用から max_age_days 日を過ぎた PDF を消す。削除件数を返す"""
+    max_age_days = CACHE_MAX_AGE_DAYS if max_age_days is None else max_age_days
+    threshold = time.time() - max_age_days * 86400
+    removed = 0
+    if not CACHE_DIR.exists():
+        return 0
+    for path in CACHE_DIR.glob("*/*"):
+        if path.suffix not in (".pdf", ".tmp"):
+            continue
+        try:
+            if path.stat().st_mtime < threshold:
+                path.unlink()
+                removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+# ─────────────────────────────────────────────
+# 一括出力（月末の一括印刷など）
+# ─────────────────────────────────────────────
+def _pool_init():
+    # 子プロセスは DB を使わず、親で作った data を描画するだけ。フォント・CSS はここで1回読む
+    get_renderer()
+
+
+def _pool_render(data):
+    return str(render_cached(data)[1])
+
+
+def render_batch(items, workers=None):
+    """
+    [(number, data), ...] を PDF にして [(number, path), ...] を返す。
+    キャッシュにないものだけをプロセスプールで描画する（レポートワーカーから呼ぶ。リクエスト内では使わない）。
+    """
+    paths = {}
+    missing = []
+    for number, data in items:
+        path = cache_path(cache_key(data))
+        if path.exists():
+            os.utime(path)
+            paths[number] = path
+        else:
+            missing.append((number, data))
+
+    if len(missing) == 1:
+        number, data = missing[0]
+        paths[number] = render_cached(data)[1]
+    elif missing:
+        # 子プロセスの初期化で失敗するとプール全体が壊れるので、先に親で確かめる
+        ensure_available()
+        workers = min(workers or BATCH_WORKERS, len(missing))
+        # 子プロセスに DB 接続を引き継がせない（親は次のクエリで接続し直す）。
+        # fork なので Django の設定・読み込み済みテンプレートはそのまま使える
+        connections.close_all()
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("fork"),
+            initializer=_pool_init,
+        ) as pool:
+            rendered = pool.map(_pool_render, [data for _, data in missing], chunksize=4)
+            for (number, _), path in zip(missing, rendered):
+                paths[number] = Path(path)
+
+    return [(number, paths[number]) for number, _ in items]
+
+
+def write_zip(rendered, fileobj):
+    """render_batch の結果を ZIP に書く（PDF はほぼ圧縮できないので無圧縮）"""
+    with zipfile.ZipFile(fileobj, "w", compression=zipfile.ZIP_STORED) as zf:
+        for number, path in rendered:
+            zf.write(path, arcname=f"{number}.pdf")
@@ -0,0 +1,265 @@
+# core/services/report_jobs.py
+import hashlib
+import json
+import logging
+import os
+import socket
+import tempfile
+import threading
+from datetime import timedelta
+from urllib.parse import unquote
+
+from django.core.files import File
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Q
+from django.http import QueryDict
+from django.utils import timezone
+
+from core.models import ReportJob
+
+logger = logging.getLogger(__name__)
+
+
+# ─────────────────────────────────────────────
+# ジョブ種別 → 実行するビュー
+# ─────────────────────────────────────────────
+def _job_view(kind):
+    # views → services の import 順を崩さないよう遅延 import
+    from core.views.analytics.views import ProductAnalyticsAPIView
+    from core.views.reports.views import ReportAPIView
+    from core.views.management.management_csv_export import ManagementCSVExportView
+    from core.views.customers.similar import DuplicateCustomerClusterAPIView
+    from core.views.estimate_pdf import PDFBatchJobView
+
+    return {
+        "product_analytics": ProductAnalyticsAPIView,
+        "report":            ReportAPIView,
+        "management_csv":    ManagementCSVExportView,
+        "customer_duplicates": DuplicateCustomerClusterAPIView,
+        "pdf_batch":         PDFBatchJobView,
+    }[kind]
+
+
+# shop_id 未指定時にログインユーザーの店舗で絞る種別
+_USER_SHOP_DEFAULT_KINDS = {"product_analytics", "report"}
+
+# 失敗扱いにするまでの試行回数
+MAX_ATTEMPTS = 3
+# 実行中はワーカーが HEARTBEAT_INTERVAL 秒ごとに heartbeat_at を更新する。
+# STALE_AFTER の間更新がなければワーカーが止まったとみなして戻す（実行時間の長さには依存しない）
+HEARTBEAT_INTERVAL = 30
+STALE_AFTER = timedelta(minutes=5)
+
+
+class _JobRequest:
+    """ワーカーからビューの get() を呼ぶための最小限のリクエスト"""
+
+    def __init__(self, params, user):
+        query = QueryDict(mutable=True)
+        for key, value in params.items():
+            query[key] = value
+        self.query_params = query
+        self.GET = query
+        self.user = user
+
+
+# ─────────────────────────────────────────────
+# 登録（重複排除）
+# ─────────────────────────────────────────────
+def normalize_params(params):
+    """空値を落とし、値は文字列に揃える（ハッシュを安定させるため）"""
+    return {
+        str(k): str(v)
+        for k, v in sorted((params or {}).items())
+        if v not in (None, "")
+    }
+
+
+def params_hash(kind, params, user):
+    # 結果は依頼者本人しか取得できないので、依頼者ごとに別のジョブにする
+    key = {"kind": kind, "params": params, "user": getattr(user, "pk", None)}
+    if kind in _USER_SHOP_DEFAULT_KINDS and "shop_id" not in params:
+        # 結果が依頼者の店舗に依存するのでキーに含める
+        key["user_shop"] = getattr(user, "shop_id", None)
+    raw = json.dumps(key, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def submit_job(kind, params, user):
+    """
+    ジョブを登録して (job, created) を返す。
+    同じパラメータの待機中/実行中ジョブがあればそれを返す。
+    """
+    if kind not in dict(ReportJob.KIND_CHOICES):
+        raise ValueError(f"unknown job kind: {kind}")
+
+    params = normalize_params(params)
+    digest = params_hash(kind, params, user)
+
+    existing = ReportJob.objects.filter(
+        params_hash=digest, status__in=ReportJob.ACTIVE_STATUSES
+    ).first()
+    if existing:
+        return existing, False
+
+    try:
+        with transaction.atomic():
+            job = ReportJob.objects.create(
+                kind=kind,
+                params=params,
+                params_hash=digest,
+                requested_by=user if getattr(user, "is_authenticated", False) else None,
+            )
+        return job, True
+    except IntegrityError:
+        # 同時登録に負けた → 勝った方を返す
+        job = ReportJob.objects.filter(
+            params_hash=digest, status__in=ReportJob.ACTIVE_STATUSES
+        ).first()
+        if job is None:
+            raise
+        return job, False
+
+
+# ─────────────────────────────────────────────
+# ワーカー
+# ─────────────────────────────────────────────
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def claim_next_job(worker=""):
+    """queued を古い順に1件取り出して running にする。なければ None"""
+    with transaction.atomic():
+        job = (
+            ReportJob.objects
+            .select_for_update(skip_locked=True)
+            .filter(status="queued")
+            .order_by("created_at", "id")
+            .first()
+        )
+        if job is None:
+            return None
+
+        job.status = "running"
+        job.started_at = job.heartbeat_at = timezone.now()
+        job.attempts += 1
+        job.worker = worker
+        job.save(update_fields=["status", "started_at", "heartbeat_at", "attempts", "worker"])
+    return job
+
+
+def requeue_stale_jobs(now=None):
+    """ワーカー停止などで heartbeat が途絶えた running のジョブを戻す（上限超過は failed）"""
+    now = now or timezone.now()
+    cutoff = now - STALE_AFTER
+    stale = ReportJob.objects.filter(status="running").filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff)
+    )
+
+    failed = stale.filter(attempts__gte=MAX_ATTEMPTS).update(
+        status="failed", error="タイムアウト", finished_at=now
+    )
+    requeued = stale.filter(attempts__lt=MAX_ATTEMPTS).update(status="queued")
+    return requeued, failed
+
+
+class _Heartbeat:
+    """実行中のジョブの heartbeat_at を別スレッドで定期的に更新する"""
+
+    def __init__(self, job_id, interval=HEARTBEAT_INTERVAL):
+        self.job_id = job_id
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        try:
+            while not self._stop.wait(self.interval):
+                ReportJob.objects.filter(pk=self.job_id, status="running").update(
+                    heartbeat_at=timezone.now()
+                )
+        finally:
+            # スレッドごとの DB 接続を閉じる
+            connection.close()
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def run_job(job):
+    """ジョブを実行して結果を保存する"""
+    view = _job_view(job.kind)()
+    request = _JobRequest(job.params, job.requested_by)
+
+    try:
+        with _Heartbeat(job.id):
+            response = view.get(request)
+
+            if response.status_code >= 400:
+                # ビューが返したエラー（400 / 404 など）は結果として保存しない
+                job.status = "failed"
+                job.error = _response_error(response)[:2000]
+            else:
+                if hasattr(response, "streaming_content"):
+                    _save_stream(job, response)
+                else:
+                    job.result = response.data
+                job.status = "done"
+                job.error = ""
+    except Exception as e:
+        logger.exception("report job #%s failed", job.id)
+        job.status = "failed"
+        job.error = _error_message(e)[:2000]
+
+    job.finished_at = timezone.now()
+    job.save()
+    return job
+
+
+def _response_error(response):
+    """エラー応答の本文（detail があればそれ）"""
+    data = getattr(response, "data", None)
+    if isinstance(data, dict) and "detail" in data:
+        return str(data["detail"])
+    if data is not None:
+        return json.dumps(data, ensure_ascii=False, default=str)
+    return f"HTTP {response.status_code}"
+
+
+def _error_message(e):
+    # DRF の ValidationError は detail（list / dict）を文字列にする
+    detail = getattr(e, "detail", None)
+    if isinstance(detail, list):
+        return " ".join(str(d) for d in detail)
+    if detail is not None:
+        return str(detail)
+    return str(e)
+
+
+def _save_stream(job, response):
+    """StreamingHttpResponse（CSV・ZIP）をファイルに書き出して result_file に保存する"""
+    filename = _attachment_filename(response)
+
+    with tempfile.TemporaryFile() as tmp:
+        for chunk in response.streaming_content:
+            tmp.write(chunk)
+        tmp.seek(0)
+        job.result_file.save(f"{job.id}_{filename}", File(tmp), save=False)
+
+    job.result_filename = filename
+    job.result_content_type = response.get("Content-Type", "text/csv")
+
+
+def _attachment_filename(response):
+    disposition = response.get("Content-Disposition", "")
+    if "filename*=UTF-8''" in disposition:
+        return unquote(disposition.split("filename*=UTF-8''", 1)[1])
+    if 'filename="' in disposition:
+        return disposition.split('filename="', 1)[1].split('"', 1)[0]
+    return "report.csv"
@@ -0,0 +1,304 @@
+# core/services/request_metrics.py
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+# ─────────────────────────────────────────────
+# 設定
+# ─────────────────────────────────────────────
+# ヒストグラムの区切り（上限値。最後の要素の次は「それ以上」）
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 75, 100, 150, 200, 300, 500, 750, 1000, 1500, 2000, 3000, 5000, 10000)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144, 233, 377, 610)
+
+# 1リクエスト内で同じSQLがこの回数以上実行されたら N+1 の疑いとして記録
+DUPLICATE_MIN_REPEAT = 3
+# エンドポイントごとに保持する重複SQLの上限（多いものから残す）
+MAX_DUPLICATES_PER_ENDPOINT = 20
+# 保存する SQL の長さ
+FINGERPRINT_MAX_LENGTH = 500
+
+FLUSH_INTERVAL = getattr(settings, "REQUEST_METRICS_FLUSH_SECONDS", 60)
+RETENTION = timedelta(days=getattr(settings, "REQUEST_METRICS_RETENTION_DAYS", 14))
+PRUNE_INTERVAL = 60 * 60
+
+
+# ─────────────────────────────────────────────
+# 1リクエスト分の SQL 計測（connection.execute_wrapper に渡す）
+# ─────────────────────────────────────────────
+class QueryRecorder:
+    """
+    実行した SQL の件数・時間と、同じ SQL 文（プレースホルダのまま）の実行回数を数える。
+    パラメータは見ないので、値だけ違うループ内のクエリが同じ文として数えられる。
+    """
+    __slots__ = ("count", "time", "statements")
+
+    def __init__(self):
+        self.count = 0
+        self.time = 0.0
+        self.statements = defaultdict(int)
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.time += time.perf_counter() - start
+            self.count += 1
+            self.statements[sql] += 1
+
+    def duplicates(self):
+        return {
+            sql: n for sql, n in self.statements.items()
+            if n >= DUPLICATE_MIN_REPEAT
+        }
+
+
+# ─────────────────────────────────────────────
+# プロセス内の集計
+# ─────────────────────────────────────────────
+class _EndpointStats:
+    __slots__ = (
+        "count", "error_count",
+        "latency_sum", "latency_max", "latency_hist",
+        "query_sum", "query_max", "query_hist", "query_time_sum",
+        "duplicates",
+    )
+
+    def __init__(self):
+        self.count = 0
+        self.error_count = 0
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        self.latency_hist = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.query_sum = 0
+        self.query_max = 0
+        self.query_hist = [0] * (len(QUERY_BUCKETS) + 1)
+        self.query_time_sum = 0.0
+        self.duplicates = {}
+
+    def add(self, latency_ms, status_code, recorder):
+        self.count += 1
+        if status_code >= 500:
+            self.error_count += 1
+
+        self.latency_sum += latency_ms
+        self.latency_max = max(self.latency_max, latency_ms)
+        self.latency_hist[bisect_left(LATENCY_BUCKETS_MS, latency_ms)] += 1
+
+        self.query_sum += recorder.count
+        self.query_max = max(self.query_max, recorder.count)
+        self.query_hist[bisect_left(QUERY_BUCKETS, recorder.count)] += 1
+        self.query_time_sum += recorder.time * 1000
+
+        for sql, n in recorder.duplicates().items():
+            d = self.duplicates.get(sql)
+            if d is None:
+                if len(self.duplicates) >= MAX_DUPLICATES_PER_ENDPOINT * 2:
+                    self._trim_duplicates()
+                d = self.duplicates[sql] = {"requests": 0, "repeats": 0, "max_repeat": 0}
+            d["requests"] += 1
+            d["repeats"] += n
+            d["max_repeat"] = max(d["max_repeat"], n)
+
+    def _trim_duplicates(self):
+        keep = sorted(self.duplicates.items(), key=lambda kv: -kv[1]["repeats"])[:MAX_DUPLICATES_PER_ENDPOINT]
+        self.duplicates = dict(keep)
+
+
+class MetricsStore:
+    """
+    エンドポイント別の集計をプロセス内に持ち、FLUSH_INTERVAL ごとに RequestMetric へ書き出す。
+    書き出しはリクエスト処理の後（計測の外）で行い、失敗しても握りつぶす。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._period_start = None
+        self._last_flush = time.monotonic()
+        self._last_prune = 0.0
+
+    def record(self, endpoint, latency_ms, status_code, recorder):
+        with self._lock:
+            if self._period_start is None:
+                self._period_start = timezone.now()
+            stats = self._stats.get(endpoint)
+            if stats is None:
+                stats = self._stats[endpoint] = _EndpointStats()
+            stats.add(latency_ms, status_code, recorder)
+
+    def maybe_flush(self):
+        if time.monotonic() - self._last_flush >= FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            stats, self._stats = self._stats, {}
+            period_start, self._period_start = self._period_start, None
+            self._last_flush = time.monotonic()
+
+        if not stats:
+            return 0
+
+        from core.models import RequestMetric
+        from core.services.report_jobs import worker_name
+
+        worker = worker_name()
+        try:
+            RequestMetric.objects.bulk_create([
+                RequestMetric(
+                    period_start=period_start,
+                    endpoint=endpoint[:200],
+                    worker=worker,
+                    count=s.count,
+                    error_count=s.error_count,
+                    latency_sum_ms=round(s.latency_sum, 3),
+                    latency_max_ms=round(s.latency_max, 3),
+                    latency_hist=s.latency_hist,
+                    query_count_sum=s.query_sum,
+                    query_count_max=s.query_max,
+                    query_hist=s.query_hist,
+                    query_time_sum_ms=round(s.query_time_sum, 3),
+                    duplicates={
+                        sql[:FINGERPRINT_MAX_LENGTH]: d
+                        for sql, d in sorted(
+                            s.duplicates.items(), key=lambda kv: -kv[1]["repeats"]
+                        )[:MAX_DUPLICATES_PER_ENDPOINT]
+                    },
+                )
+                for endpoint, s in stats.items()
+            ])
+            self._prune()
+        except Exception:
+            logger.warning("request metrics flush failed", exc_info=True)
+            return 0
+        return len(stats)
+
+    def _prune(self):
+        if time.monotonic() - self._last_prune < PRUNE_INTERVAL:
+            return
+        self._last_prune = time.monotonic()
+
+        from core.models import RequestMetric
+
+        RequestMetric.objects.filter(period_start__lt=timezone.now() - RETENTION).delete()
+
+
+store = MetricsStore()
+
+
+# ─────────────────────────────────────────────
+# 集計結果（管理画面 API 用）
+# ─────────────────────────────────────────────
+def _percentile(hist, bounds, q, max_value):
+    """ヒストグラムから q 分位点（該当区切りの上限値）を返す"""
+    total = sum(hist)
+    if not total:
+        return None
+    threshold = total * q
+    running = 0
+    for i, n in enumerate(hist):
+        running += n
+        if running >= threshold:
+            value = min(bounds[i], max_value) if i < len(bounds) else max_value
+            return round(value, 1)
+    return round(max_value, 1)
+
+
+def _merge_hist(a, b):
+    if not a:
+        return list(b)
+    return [x + y for x, y in zip(a, b)]
+
+
+def summarize(since, limit=20, sort="p95"):
+    """
+    since 以降の RequestMetric を合算して
+    - endpoints: エンドポイント別の件数・p50/p95/p99・SQL件数・SQL時間
+    - n_plus_one: 重複SQLの多いもの（エンドポイント × SQL）
+    を返す。
+    """
+    from core.models import RequestMetric
+
+    merged = {}
+    duplicates = {}
+
+    for row in RequestMetric.objects.filter(period_start__gte=since).iterator(chunk_size=2000):
+        m = merged.setdefault(row.endpoint, {
+            "count": 0, "error_count": 0,
+            "latency_sum_ms": 0.0, "latency_max_ms": 0.0, "latency_hist": [],
+            "query_count_sum": 0, "query_count_max": 0, "query_hist": [],
+            "query_time_sum_ms": 0.0,
+        })
+        m["count"] += row.count
+        m["error_count"] += row.error_count
+        m["latency_sum_ms"] += row.latency_sum_ms
+        m["latency_max_ms"] = max(m["latency_max_ms"], row.latency_max_ms)
+        m["latency_hist"] = _merge_hist(m["latency_hist"], row.latency_hist)
+        m["query_count_sum"] += row.query_count_sum
+        m["query_count_max"] = max(m["query_count_max"], row.query_count_max)
+        m["query_hist"] = _merge_hist(m["query_hist"], row.query_hist)
+        m["query_time_sum_ms"] += row.query_time_sum_ms
+
+        for sql, d in (row.duplicates or {}).items():
+            agg = duplicates.setdefault((row.endpoint, sql), {"requests": 0, "repeats": 0, "max_repeat": 0})
+            agg["requests"] += d["requests"]
+            agg["repeats"] += d["repeats"]
+            agg["max_repeat"] = max(agg["max_repeat"], d["max_repeat"])
+
+    endpoints = []
+    for endpoint, m in merged.items():
+        count = m["count"] or 1
+        endpoints.append({
+            "endpoint": endpoint,
+            "count": m["count"],
+            "error_count": m["error_count"],
+            "latency_ms": {
+                "avg": round(m["latency_sum_ms"] / count, 1),
+                "p50": _percentile(m["latency_hist"], LATENCY_BUCKETS_MS, 0.50, m["latency_max_ms"]),
+                "p95": _percentile(m["latency_hist"], LATENCY_BUCKETS_MS, 0.95, m["latency_max_ms"]),
+                "p99": _percentile(m["latency_hist"], LATENCY_BUCKETS_MS, 0.99, m["latency_max_ms"]),
+                "max": round(m["latency_max_ms"], 1),
+            },
+            "queries": {
+                "avg": round(m["query_count_sum"] / count, 1),
+                "p50": _percentile(m["query_hist"], QUERY_BUCKETS, 0.50, m["query_count_max"]),
+                "p95": _percentile(m["query_hist"], QUERY_BUCKETS, 0.95, m["query_count_max"]),
+                "p99": _percentile(m["query_hist"], QUERY_BUCKETS, 0.99, m["query_count_max"]),
+                "max": m["query_count_max"],
+            },
+            "sql_time_ms_avg": round(m["query_time_sum_ms"] / count, 1),
+        })
+
+    sort_keys = {
+        "p95":     lambda e: e["latency_ms"]["p95"] or 0,
+        "p99":     lambda e: e["latency_ms"]["p99"] or 0,
+        "count":   lambda e: e["count"],
+        "queries": lambda e: e["queries"]["avg"],
+        "sql_time": lambda e: e["sql_time_ms_avg"],
+    }
+    endpoints.sort(key=sort_keys.get(sort, sort_keys["p95"]), reverse=True)
+
+    n_plus_one = sorted(
+        (
+            {"endpoint": endpoint, "sql": sql, **d,
+             "avg_repeat": round(d["repeats"] / d["requests"], 1)}
+            for (endpoint, sql), d in duplicates.items()
+        ),
+        key=lambda d: -d["repeats"],
+    )
+
+    return {
+        "since": since,
+        "endpoints": endpoints[:limit],
+        "n_plus_one": n_plus_one[:limit],
+    }
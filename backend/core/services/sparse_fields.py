@@ -0,0 +1,317 @@
+# core/services/sparse_fields.py
+from django.contrib.contenttypes.fields import GenericRelation
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+
+# ─────────────────────────────────────────────
+# ?fields= / ?omit= / ?expand=（返す項目の指定）
+# ─────────────────────────────────────────────
+# ?fields=id,order_no,items.name   … 返す項目だけ（"." で入れ子の項目）
+# ?omit=estimate,customer.owned_vehicles … 除く項目
+# ?expand=memos                   … シリアライザの Meta.expandable_fields（既定では返さない重い項目）を返す
+#
+# 指定はシリアライザの fields から項目を取り除く形で反映し、queryset の select_related /
+# prefetch_related / only() は残った項目から作り直す（SparseFieldsMixin）。返さない入れ子は
+# クエリも直列化も発生しない。
+#
+# SerializerMethodField は何を読むか分からないので、シリアライザの Meta.field_lookups に
+# {項目名: (読む列・関連のルックアップ, ...)} を書く。書いていないメソッド項目があると、
+# その階層は全列を読む（関連は読まないので、必要なら field_lookups に書く）。
+#
+#     class Meta:
+#         expandable_fields = ("memos",)
+#         field_lookups = {"schedule": ("schedules__delivery_shop",)}
+
+
+class SparseSpec:
+    """1階層分の指定。children は入れ子の項目名 → SparseSpec"""
+
+    def __init__(self):
+        self.only = None      # None なら全項目
+        self.omit = set()
+        self.expand = set()
+        self.children = {}
+
+    def child(self, name):
+        return self.children.setdefault(name, SparseSpec())
+
+    @property
+    def is_empty(self):
+        return self.only is None and not self.omit and not self.expand and not self.children
+
+
+_EMPTY = SparseSpec()
+
+
+def _split(raw):
+    return [path.strip() for path in (raw or "").split(",") if path.strip()]
+
+
+def parse_sparse(params):
+    """クエリパラメータの fields / omit / expand を SparseSpec にする"""
+    spec = SparseSpec()
+    for path in _split(params.get("fields")):
+        node = spec
+        for name in path.split("."):
+            if node.only is None:
+                node.only = set()
+            node.only.add(name)
+            node = node.child(name)
+    for path in _split(params.get("omit")):
+        *parents, name = path.split(".")
+        node = spec
+        for parent in parents:
+            node = node.child(parent)
+        node.omit.add(name)
+    for path in _split(params.get("expand")):
+        node = spec
+        for name in path.split("."):
+            node.expand.add(name)
+            node = node.child(name)
+    return spec
+
+
+# ─────────────────────────────────────────────
+# シリアライザへの反映
+# ─────────────────────────────────────────────
+def _unwrap(field):
+    """many=True の ListSerializer なら中身のシリアライザ"""
+    return field.child if isinstance(field, serializers.ListSerializer) else field
+
+
+def apply_sparse(serializer, spec, path=""):
+    """serializer.fields から指定外の項目を取り除く（入れ子にも再帰）。未知の項目名は 400"""
+    serializer = _unwrap(serializer)
+    meta = getattr(serializer, "Meta", None)
+    expandable = set(getattr(meta, "expandable_fields", ()))
+    fields = serializer.fields
+
+    named = (spec.only or set()) | spec.omit | spec.expand | spec.children.keys()
+    unknown = named - fields.keys()
+    if unknown:
+        label = f"{path}." if path else ""
+        raise ValidationError({
+            "fields": f"指定できない項目です（{', '.join(label + n for n in sorted(unknown))}）"
+        })
+
+    for name in list(fields):
+        requested = name in spec.expand or (spec.only is not None and name in spec.only)
+        if spec.only is not None:
+            keep = requested
+        else:
+            keep = name not in expandable or requested
+        if not keep or name in spec.omit:
+            fields.pop(name)
+
+    for name, child_spec in spec.children.items():
+        if name in fields and not child_spec.is_empty and not isinstance(
+            _unwrap(fields[name]), serializers.BaseSerializer
+        ):
+            raise ValidationError({"fields": f"{path + '.' if path else ''}{name} は項目を選べません"})
+
+    # 入れ子のシリアライザにも反映する（指定がなくても expandable_fields は落とす）
+    for name, field in fields.items():
+        nested = _unwrap(field)
+        if isinstance(nested, serializers.Serializer):
+            apply_sparse(nested, spec.children.get(name) or _EMPTY, f"{path}.{name}" if path else name)
+    return serializer
+
+
+# ─────────────────────────────────────────────
+# queryset の組み立て
+# ─────────────────────────────────────────────
+def _model_field(model, name):
+    """名前（逆参照はアクセサ名）からモデルのフィールド。なければ None（プロパティなど）"""
+    try:
+        return model._meta.get_field(name)
+    except FieldDoesNotExist:
+        pass
+    for field in model._meta.get_fields():
+        if field.auto_created and not field.concrete and field.get_accessor_name() == name:
+            return field
+    return None
+
+
+class _Plan:
+    """1モデル分の読み方（読む列・select_related する関連・prefetch する関連）"""
+
+    def __init__(self, model):
+        self.model = model
+        self.columns = {model._meta.pk.name}
+        self.all_columns = False
+        self.joins = {}
+        self.prefetches = {}
+
+    def _child(self, group, name, model):
+        if name not in group:
+            group[name] = _Plan(model)
+        return group[name]
+
+    def relation(self, field):
+        """関連をたどった先の _Plan（1件なら JOIN、複数なら prefetch）"""
+        if field.concrete and (field.many_to_one or field.one_to_one):
+            self.columns.add(field.name)
+            return self._child(self.joins, field.name, field.related_model)
+        if field.one_to_one:
+            child = self._child(self.joins, field.get_accessor_name(), field.related_model)
+            child.columns.add(field.field.name)
+            return child
+        if isinstance(field, GenericRelation):
+            child = self._child(self.prefetches, field.name, field.related_model)
+            child.columns.update({field.object_id_field_name, field.content_type_field_name})
+            return child
+        name = field.name if field.concrete else field.get_accessor_name()
+        child = self._child(self.prefetches, name, field.related_model)
+        if field.one_to_many:
+            # prefetch の突き合わせに親への FK が要る
+            child.columns.add(field.field.name)
+        return child
+
+    def walk(self, parts, whole=False):
+        """
+        parts（列・関連の名前の並び）をたどる。最後が関連ならその _Plan、列なら None。
+        whole=True ならたどった関連を全列読む（field_lookups 用）
+        """
+        plan = self
+        for name in parts:
+            field = _model_field(plan.model, name)
+            if field is None:
+                plan.all_columns = True
+                return None
+            if not field.is_relation:
+                plan.columns.add(field.name)
+                return None
+            plan = plan.relation(field)
+            if whole:
+                plan.all_columns = True
+        return plan
+
+    def add_serializer(self, serializer, annotations=()):
+        serializer = _unwrap(serializer)
+        lookups = getattr(getattr(serializer, "Meta", None), "field_lookups", {})
+
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if name in lookups:
+                for lookup in lookups[name]:
+                    self.walk(lookup.split("__"), whole=True)
+                continue
+            if isinstance(field, serializers.SerializerMethodField):
+                self.all_columns = True
+                continue
+            if field.source == "*":
+                self.all_columns = True
+                if isinstance(field, serializers.BaseSerializer):
+                    self.add_serializer(field)
+                continue
+
+            parts = field.source.split(".")
+            if parts[0] in annotations:
+                continue
+
+            # 単一の PK 参照は FK の列だけ読めば足りる
+            if isinstance(field, serializers.PrimaryKeyRelatedField) and len(parts) == 1:
+                model_field = _model_field(self.model, parts[0])
+                if model_field is not None and model_field.concrete and model_field.many_to_one:
+                    self.columns.add(model_field.name)
+                    continue
+
+            target = self.walk(parts)
+            if target is None:
+                continue
+            nested = _unwrap(field)
+            if isinstance(nested, serializers.BaseSerializer):
+                target.add_serializer(nested)
+            elif isinstance(field, serializers.ManyRelatedField) and isinstance(
+                field.child_relation, serializers.PrimaryKeyRelatedField
+            ):
+                pass  # PK の一覧（主キーだけ読む）
+            else:
+                # StringRelatedField など、関連先の何を読むか分からないもの
+                target.all_columns = True
+
+    # ----------------------------
+    # queryset へ
+    # ----------------------------
+    def only_fields(self, prefix=""):
+        if self.all_columns:
+            names = [f.name for f in self.model._meta.concrete_fields]
+        else:
+            names = sorted(self.columns)
+        result = [prefix + name for name in names]
+        for name, child in self.joins.items():
+            result += child.only_fields(f"{prefix}{name}__")
+        return result
+
+    def select_related(self, prefix=""):
+        result = []
+        for name, child in self.joins.items():
+            result.append(prefix + name)
+            result += child.select_related(f"{prefix}{name}__")
+        return result
+
+    def prefetch_related(self, prefix=""):
+        result = [
+            Prefetch(prefix + name, queryset=child.queryset())
+            for name, child in self.prefetches.items()
+        ]
+        for name, child in self.joins.items():
+            result += child.prefetch_related(f"{prefix}{name}__")
+        return result
+
+    def queryset(self, qs=None):
+        if qs is None:
+            qs = self.model._default_manager.all()
+        qs = qs.select_related(None).prefetch_related(None)
+        select = self.select_related()
+        if select:
+            qs = qs.select_related(*select)
+        prefetch = self.prefetch_related()
+        if prefetch:
+            qs = qs.prefetch_related(*prefetch)
+        return qs.only(*self.only_fields())
+
+
+def sparse_queryset(qs, serializer):
+    """
+    serializer が返す項目（apply_sparse 済み）に合わせて、qs の select_related /
+    prefetch_related / only() を作り直す。絞り込み・並び順・annotate はそのまま。
+    """
+    plan = _Plan(qs.model)
+    plan.add_serializer(serializer, annotations=set(qs.query.annotations))
+    return plan.queryset(qs)
+
+
+# ─────────────────────────────────────────────
+# ビュー
+# ─────────────────────────────────────────────
+class SparseFieldsMixin:
+    """
+    GenericAPIView 用。GET のとき ?fields= / ?omit= / ?expand= をシリアライザに反映し、
+    queryset（filter_queryset の結果）を残った項目から組み立て直す。
+    """
+
+    def get_sparse_spec(self):
+        if not hasattr(self, "_sparse_spec"):
+            self._sparse_spec = parse_sparse(self.request.query_params)
+        return self._sparse_spec
+
+    def _sparse_enabled(self):
+        return getattr(self, "request", None) is not None and self.request.method in SAFE_METHODS
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        if self._sparse_enabled():
+            apply_sparse(serializer, self.get_sparse_spec())
+        return serializer
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self._sparse_enabled():
+            queryset = sparse_queryset(queryset, self.get_serializer())
+        return queryset
@@ -0,0 +1,98 @@
+# core/services/vehicle_expirations.py
+from django.db.models import Exists, F, OuterRef
+from rest_framework.exceptions import ValidationError
+
+from core.models import Vehicle, VehicleInsurance
+
+
+# ─────────────────────────────────────────────
+# 満了が近い車検・保険
+# ─────────────────────────────────────────────
+# 車検: 現在の登録の車検満了日の写し Vehicle.inspection_expiration（索引あり）を期間で絞る。
+#       登録の行はたどらない。
+# 保険: VehicleInsurance.end_date（索引あり）を期間で絞り、同じ車両・種類でより新しい満了日の契約
+#       （更新済み）があるものは除く。除外の判定は (vehicle, type, end_date) の索引で引く。
+# どちらも現在の所有者がいる車両だけ。店舗は所有者の最終対応店舗（Customer.last_shop）。
+# 行は .values() の dict で、満了日（expires_on）・id の昇順。
+
+KINDS = ("inspection", "insurance")
+
+# 両方に共通の列（車両・所有者への経路 → 式）
+_VEHICLE_COLUMNS = {
+    "vehicle_name": "vehicle_name",
+    "chassis_no": "chassis_no",
+    "registration_area": "current_registration__registration_area",
+    "registration_no": "current_registration__registration_no",
+    "customer_id": "customer_vehicles__customer_id",
+    "customer_name": "customer_vehicles__customer__name",
+    "customer_phone": "customer_vehicles__customer__phone",
+    "customer_mobile_phone": "customer_vehicles__customer__mobile_phone",
+    "shop_id": "customer_vehicles__customer__last_shop_id",
+}
+
+
+def _columns(prefix=""):
+    """.values() に渡す (列名, 式)。Vehicle から読むときは同名の列をそのまま読む"""
+    fields, expressions = [], {}
+    for name, path in _VEHICLE_COLUMNS.items():
+        if prefix + path == name:
+            fields.append(name)
+        else:
+            expressions[name] = F(prefix + path)
+    return fields, expressions
+
+
+def _owner_filter(prefix, shop_id):
+    """現在の所有者がいる車両（shop_id を指定すると所有者の最終対応店舗で絞る）"""
+    conditions = {f"{prefix}customer_vehicles__is_current": True}
+    if shop_id:
+        conditions[f"{prefix}customer_vehicles__customer__last_shop_id"] = shop_id
+    return conditions
+
+
+def inspection_rows(date_from, date_to, shop_id=None):
+    """車検満了日が期間内の車両（id は車両ID）"""
+    fields, expressions = _columns()
+    return (
+        Vehicle.objects
+        .filter(inspection_expiration__range=(date_from, date_to), **_owner_filter("", shop_id))
+        .values("id", *fields, vehicle_id=F("id"), expires_on=F("inspection_expiration"), **expressions)
+    )
+
+
+def insurance_rows(date_from, date_to, shop_id=None, insurance_type=None):
+    """満了日が期間内で、まだ更新されていない保険（id は保険ID）"""
+    renewed = VehicleInsurance.objects.filter(
+        vehicle_id=OuterRef("vehicle_id"),
+        type=OuterRef("type"),
+        end_date__gt=OuterRef("end_date"),
+    )
+    qs = VehicleInsurance.objects.filter(
+        end_date__range=(date_from, date_to), **_owner_filter("vehicle__", shop_id)
+    )
+    if insurance_type:
+        qs = qs.filter(type=insurance_type)
+    fields, expressions = _columns("vehicle__")
+    return (
+        qs.filter(~Exists(renewed))
+        .values(
+            "id", "vehicle_id", "policy_no", *fields,
+            expires_on=F("end_date"),
+            insurance_type=F("type"),
+            insurance_company=F("company"),
+            **expressions,
+        )
+    )
+
+
+def upcoming_expirations(kind, date_from, date_to, shop_id=None, insurance_type=None):
+    """kind（inspection / insurance）ごとの行のクエリセット"""
+    if date_from > date_to:
+        raise ValidationError({"to": "終了日は開始日以降を指定してください"})
+    if kind == "inspection":
+        return inspection_rows(date_from, date_to, shop_id)
+    if kind == "insurance":
+        if insurance_type and insurance_type not in dict(VehicleInsurance.TYPE_CHOICES):
+            raise ValidationError({"insurance_type": "mandatory か optional を指定してください"})
+        return insurance_rows(date_from, date_to, shop_id, insurance_type)
+    raise ValidationError({"kind": f"指定できるのは {', '.join(KINDS)} です"})
@@ -0,0 +1,39 @@
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+
+from core.models import DailySalesRollup, Order
+
+
+class DailySalesRollupRefreshTests(TestCase):
+    """キー単位の再集計（何度呼んでも1キー1行・元テーブルの合計と一致）"""
+
+    DAY = date(2026, 3, 10)
+
+    def _order(self, order_no, total):
+        # 保存時の signal で refresh される
+        return Order.objects.create(
+            order_no=order_no, party_name="テスト", order_date=self.DAY, grand_total=total
+        )
+
+    def test_refresh_same_key_twice(self):
+        self._order("2600001", 1000)
+        self._order("2600002", 2500)
+        key = (self.DAY, None, None)
+
+        DailySalesRollup.refresh([key])
+        DailySalesRollup.refresh([key, key])
+
+        rows = DailySalesRollup.objects.filter(date=self.DAY)
+        self.assertEqual(rows.count(), 1)
+        row = rows.get()
+        self.assertEqual(row.order_count, 2)
+        self.assertEqual(row.order_total, Decimal("3500"))
+        self.assertEqual(row.estimate_count, 0)
+
+    def test_refresh_removes_empty_key(self):
+        order = self._order("2600001", 1000)
+        order.delete()
+        DailySalesRollup.refresh([(self.DAY, None, None)])
+        self.assertFalse(DailySalesRollup.objects.filter(date=self.DAY).exists())
@@ -0,0 +1,44 @@
+from datetime import date
+
+from django.test import TestCase
+
+from core.models import Order
+from core.models.document_sequence import DocumentSequence
+
+
+class DocumentSequenceTests(TestCase):
+    """受注番号の採番（手入力などで使用済みの番号は飛ばす）"""
+
+    ON = date(2026, 4, 1)
+
+    def _order(self, order_no):
+        return Order.objects.create(order_no=order_no, party_name="テスト")
+
+    def test_next_no_starts_after_existing_max(self):
+        self._order("2600007")
+        self.assertEqual(DocumentSequence.next_no("order", on=self.ON), "2600008")
+        self.assertEqual(DocumentSequence.next_no("order", on=self.ON), "2600009")
+
+    def test_next_no_skips_taken_number(self):
+        self.assertEqual(DocumentSequence.next_no("order", on=self.ON), "2600001")
+        # 採番行より先の番号が手入力で使われている
+        self._order("2600002")
+        self.assertEqual(DocumentSequence.next_no("order", on=self.ON), "2600003")
+
+    def test_next_nos_skips_taken_numbers(self):
+        self.assertEqual(DocumentSequence.next_no("order", on=self.ON), "2600001")
+        self._order("2600003")
+        self._order("2600004")
+        self._order("2600006")
+
+        numbers = DocumentSequence.next_nos("order", 4, on=self.ON)
+
+        self.assertEqual(numbers, ["2600002", "2600005", "2600007", "2600008"])
+        seq = DocumentSequence.objects.get(kind="order", year=2026, shop=None)
+        self.assertEqual(seq.last_number, 8)
+        self.assertEqual(DocumentSequence.next_no("order", on=self.ON), "2600009")
+
+    def test_next_nos_separate_years(self):
+        self._order("2600010")
+        self.assertEqual(DocumentSequence.next_nos("order", 2, on=date(2027, 1, 5)), ["2700001", "2700002"])
+        self.assertEqual(DocumentSequence.next_nos("order", 1, on=self.ON), ["2600011"])
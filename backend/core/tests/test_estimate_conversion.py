@@ -0,0 +1,53 @@
+from datetime import date
+
+from django.test import TestCase
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+
+from core.models import Customer, DocumentSequence, Estimate, EstimateParty, Order, User
+from core.services import estimate_conversion
+
+
+@override_settings(ALLOWED_HOSTS=["*"])
+class EstimateConversionTests(TestCase):
+    """同じ見積を二重に受注にしない（受注も番号も増えない）"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(login_id="conv-test", password="x")
+        cls.customer = Customer.objects.create(name="山田 太郎")
+        party = EstimateParty.objects.create(name="山田 太郎", source_customer=cls.customer)
+        cls.estimate = Estimate.objects.create(
+            estimate_no="E0001", party=party, status="issued", estimate_date=date(2026, 4, 1)
+        )
+
+    def test_stale_second_conversion_is_rejected(self):
+        # 同時に読み込んだ2つのリクエストを再現（どちらも issued の見積を持っている）
+        first = estimate_conversion.load_estimates([self.estimate.id])[self.estimate.id]
+        second = estimate_conversion.load_estimates([self.estimate.id])[self.estimate.id]
+
+        estimate_conversion.convert_estimates([(first, self.customer)], self.user)
+        last_number = DocumentSequence.objects.get(kind="order").last_number
+
+        with self.assertRaises(estimate_conversion.ConversionError) as ctx:
+            estimate_conversion.convert_estimates([(second, self.customer)], self.user)
+
+        self.assertEqual(ctx.exception.status, 409)
+        self.assertEqual(Order.objects.filter(estimate=self.estimate).count(), 1)
+        self.assertEqual(DocumentSequence.objects.get(kind="order").last_number, last_number)
+
+    def test_views_skip_ordered_estimate(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        res = client.post("/api/orders/from-estimates/", {"estimate_ids": [self.estimate.id]}, format="json")
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(len(res.data["created"]), 1)
+
+        res = client.post("/api/orders/from-estimates/", {"estimate_ids": [self.estimate.id]}, format="json")
+        self.assertEqual(res.data["created"], [])
+        self.assertEqual(res.data["skipped"][0]["reason"], "status_ordered")
+
+        res = client.post("/api/orders/from-estimate/", {"estimate_id": self.estimate.id}, format="json")
+        self.assertEqual(res.status_code, 409)
+        self.assertEqual(Order.objects.filter(estimate=self.estimate).count(), 1)
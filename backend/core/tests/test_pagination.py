@@ -0,0 +1,86 @@
+from datetime import date
+
+from django.test import TestCase
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from core.models import Estimate, Order
+from core.pagination import DateKeysetPagination, EstimateDatePagination
+from core.services.document_lists import compact_rows
+
+
+def walk(pagination_class, queryset, limit, key="id"):
+    """limit 件ずつ cursor をたどって読んだ行の key の並び"""
+    factory = APIRequestFactory()
+    keys, cursor = [], None
+    while True:
+        params = {"limit": limit}
+        if cursor:
+            params["cursor"] = cursor
+        paginator = pagination_class()
+        rows = paginator.paginate_queryset(queryset, Request(factory.get("/", params)))
+        keys += [DateKeysetPagination._value(row, key) for row in rows]
+        cursor = paginator.next_cursor
+        if cursor is None:
+            return keys
+
+
+class DateKeysetPaginationTests(TestCase):
+    """cursor をたどった結果が全件の並び順と一致すること（NULL の日付は末尾）"""
+
+    DATES = [
+        date(2026, 1, 3), date(2026, 1, 1), None, date(2026, 1, 2),
+        date(2026, 1, 1), None, date(2026, 1, 3), date(2026, 1, 2), None,
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        for i, order_date in enumerate(cls.DATES, start=1):
+            Order.objects.create(order_no=f"T{i:05d}", party_name="テスト", order_date=order_date)
+
+    def assertRoundTrip(self, pagination_class):
+        expected = list(
+            Order.objects.order_by(*pagination_class().get_ordering()).values_list("id", flat=True)
+        )
+        for limit in (1, 2, 4, 20):
+            with self.subTest(limit=limit):
+                ids = walk(pagination_class, Order.objects.all(), limit)
+                self.assertEqual(ids, expected)
+
+                dates = dict(Order.objects.values_list("id", "order_date"))
+                self.assertEqual([dates[i] for i in ids[-3:]], [None, None, None])
+                self.assertNotIn(None, [dates[i] for i in ids[:-3]])
+
+    def test_descending_round_trip(self):
+        self.assertRoundTrip(DateKeysetPagination)
+
+    def test_ascending_round_trip(self):
+        class AscendingPagination(DateKeysetPagination):
+            descending = False
+
+        self.assertRoundTrip(AscendingPagination)
+
+    def test_cursor_encodes_null_date(self):
+        cursor = DateKeysetPagination.encode_cursor(None, 42)
+        self.assertEqual(DateKeysetPagination.decode_cursor(cursor), (None, 42))
+        cursor = DateKeysetPagination.encode_cursor(date(2026, 1, 2), 7)
+        self.assertEqual(DateKeysetPagination.decode_cursor(cursor), (date(2026, 1, 2), 7))
+
+
+class CompactRowPaginationTests(TestCase):
+    """一覧の軽量表現（.values() の dict 行）でも cursor をたどれること"""
+
+    @classmethod
+    def setUpTestData(cls):
+        for i, estimate_date in enumerate(DateKeysetPaginationTests.DATES, start=1):
+            Estimate.objects.create(estimate_no=f"E{i:05d}", estimate_date=estimate_date)
+
+    def test_round_trip_over_dict_rows(self):
+        rows = compact_rows(Estimate.objects.all(), required=("id", "estimate_date"))
+        expected = list(
+            Estimate.objects.order_by(*EstimateDatePagination().get_ordering())
+            .values_list("id", flat=True)
+        )
+        for limit in (1, 3, 20):
+            with self.subTest(limit=limit):
+                self.assertEqual(walk(EstimateDatePagination, rows, limit), expected)
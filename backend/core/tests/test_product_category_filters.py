@@ -0,0 +1,44 @@
+from django.test import TestCase
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+
+from core.models import User
+from core.models.categories import Category, Product
+
+
+@override_settings(ALLOWED_HOSTS=["*"])
+class ProductCategoryTypeFilterTests(TestCase):
+    """
+    子カテゴリの category_type が最上位と違う場合の絞り込み
+    （最上位だけでは判定しない。各 API の段数は従来どおり）
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(login_id="cat-test", password="x")
+        root = Category.objects.create(name="車両", category_type="vehicle")
+        child = Category.objects.create(name="用品", parent=root, category_type="other")
+        grandchild = Category.objects.create(name="用品2", parent=child, category_type="other")
+        leaf = Category.objects.create(name="用品3", parent=grandchild, category_type="other")
+        Product.objects.create(name="P1", category=child)
+        Product.objects.create(name="P3", category=leaf)
+
+    def _names(self, url):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        res = client.get(url)
+        self.assertEqual(res.status_code, 200)
+        data = res.data["results"] if isinstance(res.data, dict) else res.data
+        return sorted(p["name"] for p in data)
+
+    def test_product_list_matches_own_or_ancestor_type(self):
+        self.assertEqual(self._names("/api/products/?type=other"), ["P1", "P3"])
+        self.assertEqual(self._names("/api/products/?type=vehicle"), ["P1", "P3"])
+
+    def test_product_search_matches_own_type(self):
+        self.assertEqual(self._names("/api/products/search/?type=other"), ["P1", "P3"])
+        self.assertEqual(self._names("/api/products/search/?type=vehicle"), [])
+
+    def test_product_admin_matches_up_to_two_levels(self):
+        self.assertEqual(self._names("/api/products/admin/?category_type=other"), ["P1", "P3"])
+        self.assertEqual(self._names("/api/products/admin/?category_type=vehicle"), ["P1"])
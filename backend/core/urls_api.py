@@ -55,6 +55,7 @@ from core.views.vehicles.views import (
     VehicleUpdateAPIView,
     VehicleDuplicateCheckAPIView
 )
+from core.views.vehicles.expirations import VehicleExpirationListAPIView
 from core.views.vehicles.images import (
     VehicleImageListCreateView,
     VehicleImageDeleteView,
@@ -148,6 +149,7 @@ from core.views.orders.views import (
     OrderListCreateAPIView,
     OrderRetrieveUpdateDestroyAPIView,
     OrderFromEstimateAPIView,
+    OrderFromEstimatesBatchAPIView,
     PrepareOrderFromEstimateAPIView,
     OrderStatusUpdateAPIView,
 )
@@ -204,6 +206,7 @@ from core.views.management.management_list_view import (
 
 # === Audit Logs ===
 from core.views.audit_logs.views import AuditLogViewSet, AuditLogListAPIView
+from core.views.request_metrics import RequestMetricsAPIView
 
 # === Analytics ===
 from core.views.analytics.views import (
@@ -214,8 +217,14 @@ from core.views.analytics.views import (
 
 # === Reports ===
 from core.views.reports.views import ReportAPIView
+from core.views.reports.jobs import (
+    ReportJobCreateAPIView,
+    ReportJobDetailAPIView,
+    ReportJobDownloadAPIView,
+)
 
 # === Documents（書類印刷） ===
+from core.views.estimate_pdf import EstimatePDFView, OrderPDFView
 from core.views.documents import (
     DocumentTemplateListCreateView,
     DocumentTemplateDetailView,
@@ -223,6 +232,7 @@ from core.views.documents import (
     DocumentFieldDetailView,
     DocumentSourceKeyChoicesView,
     DocumentRenderView,
+    DocumentBatchRenderView,
 )
 
 urlpatterns = [
@@ -287,6 +297,7 @@ urlpatterns = [
     # =========================
     # Vehicle Master
     # =========================
+    path("vehicles/expirations/", VehicleExpirationListAPIView.as_view()),
     path("vehicles/<int:pk>/", VehicleDetailAPIView.as_view()),
     path("vehicles/<int:pk>/update/", VehicleUpdateAPIView.as_view()),
     path("vehicles/<int:vehicle_id>/images/", VehicleImageListCreateView.as_view()),
@@ -335,6 +346,7 @@ urlpatterns = [
     path("estimates/<int:estimate_id>/vehicles/", ev.EstimateVehicleListCreateAPIView.as_view()),
     path("estimates/<int:estimate_id>/vehicles/<int:pk>/", ev.EstimateVehicleRetrieveUpdateDestroyAPIView.as_view()),
     path("estimates/<int:pk>/status/", EstimateStatusUpdateAPIView.as_view()),
+    path("estimates/<int:pk>/pdf/", EstimatePDFView.as_view()),
 
     # =========================
     # Orders
@@ -342,6 +354,7 @@ urlpatterns = [
     path("orders/", OrderListCreateAPIView.as_view()),
     path("orders/<int:pk>/", OrderRetrieveUpdateDestroyAPIView.as_view()),
     path("orders/from-estimate/", OrderFromEstimateAPIView.as_view()),
+    path("orders/from-estimates/", OrderFromEstimatesBatchAPIView.as_view()),
     path("orders/prepare-from-estimate/", PrepareOrderFromEstimateAPIView.as_view()),
     path("orders/<int:order_id>/items/", OrderItemListCreateAPIView.as_view()),
     path("order-items/<int:pk>/", OrderItemRetrieveUpdateDestroyAPIView.as_view()),
@@ -354,6 +367,7 @@ urlpatterns = [
     path("orders/<int:pk>/uncancel/",          uncancel_order),
     path("orders/<int:pk>/force-delete/",      delete_order_privileged),
     path("orders/<int:pk>/status/", OrderStatusUpdateAPIView.as_view()),
+    path("orders/<int:pk>/pdf/", OrderPDFView.as_view()),
 
     # =========================
     # Deliveries
@@ -373,6 +387,9 @@ urlpatterns = [
     # Reports（帳票）
     # =========================
     path("reports/", ReportAPIView.as_view()),
+    path("report-jobs/", ReportJobCreateAPIView.as_view()),
+    path("report-jobs/<int:pk>/", ReportJobDetailAPIView.as_view()),
+    path("report-jobs/<int:pk>/download/", ReportJobDownloadAPIView.as_view()),
 
 
     # =========================
@@ -452,6 +469,11 @@ urlpatterns = [
     path("audit-logs/", AuditLogListAPIView.as_view()),
     path("audit-logs/<int:pk>/", AuditLogViewSet.as_view({"get": "retrieve"})),
 
+    # =========================
+    # Request Metrics（リクエスト計測・管理者のみ）
+    # =========================
+    path("admin/request-metrics/", RequestMetricsAPIView.as_view()),
+
     # =========================
     # Documents（書類印刷）
     # =========================
@@ -460,6 +482,7 @@ urlpatterns = [
     path("document-templates/<int:template_id>/fields/",    DocumentFieldListCreateView.as_view()),
     path("document-fields/<int:pk>/",         DocumentFieldDetailView.as_view()),
     path("document-templates/<int:pk>/render/", DocumentRenderView.as_view()),
+    path("document-templates/<int:pk>/render-batch/", DocumentBatchRenderView.as_view()),
     path("document-source-keys/",             DocumentSourceKeyChoicesView.as_view()),
 
 ]
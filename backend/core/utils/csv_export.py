@@ -0,0 +1,50 @@
+import csv
+from urllib.parse import quote
+
+from django.http import StreamingHttpResponse
+
+
+class _Echo:
+    """csv.writer の書き込み先。書いた行をそのまま返す"""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(header, rows, encoding="cp932", bom=False, flush_rows=200):
+    """
+    header + rows を CSV バイト列のチャンクとして順に返す。
+    行ごとにエンコードするので、全体を文字列に組み立ててから変換するより
+    メモリは一定で済み、最初のチャンクもすぐ返せる。
+    """
+    writer = csv.writer(_Echo())
+
+    if bom:
+        yield "\ufeff".encode(encoding)
+
+    yield writer.writerow(header).encode(encoding, errors="replace")
+
+    buffer = []
+    for row in rows:
+        buffer.append(writer.writerow(row))
+        if len(buffer) >= flush_rows:
+            yield "".join(buffer).encode(encoding, errors="replace")
+            buffer = []
+
+    if buffer:
+        yield "".join(buffer).encode(encoding, errors="replace")
+
+
+def streaming_csv_response(filename, header, rows, encoding="cp932", bom=False):
+    """
+    CSV を StreamingHttpResponse で返す。
+    rows は行（list）を順に返すイテラブル。queryset は .iterator(chunk_size=...) で渡すこと。
+    """
+    response = StreamingHttpResponse(
+        iter_csv(header, rows, encoding=encoding, bom=bom),
+        content_type=f"text/csv; charset={encoding}",
+    )
+    response["Content-Disposition"] = (
+        f"attachment; filename*=UTF-8''{quote(filename)}"
+    )
+    return response
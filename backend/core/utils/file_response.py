@@ -0,0 +1,40 @@
+from pathlib import Path
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.utils.http import content_disposition_header
+
+
+def _accel_uri(path):
+    """ファイルのパスを nginx の内部 location の URI にする（対応する location がなければ None）"""
+    path = Path(path).resolve()
+    for root, location in getattr(settings, "ACCEL_REDIRECT_LOCATIONS", {}).items():
+        try:
+            relative = path.relative_to(Path(root).resolve())
+        except ValueError:
+            continue
+        return location.rstrip("/") + "/" + quote(relative.as_posix())
+    return None
+
+
+def send_file(path, *, content_type, filename=None, as_attachment=False):
+    """
+    ファイルを返す。MEDIA_ACCEL_REDIRECT が有効なら本文は nginx に送らせ（X-Accel-Redirect）、
+    gunicorn のワーカーはヘッダを返すだけで空く。無効・対象外のパスなら FileResponse。
+    """
+    uri = _accel_uri(path) if getattr(settings, "MEDIA_ACCEL_REDIRECT", False) else None
+    if uri is None:
+        return FileResponse(
+            open(path, "rb"),
+            content_type=content_type,
+            as_attachment=as_attachment,
+            filename=filename or "",
+        )
+
+    response = HttpResponse(content_type=content_type)
+    response["X-Accel-Redirect"] = uri
+    disposition = content_disposition_header(as_attachment, filename or Path(path).name)
+    if disposition:
+        response["Content-Disposition"] = disposition
+    return response
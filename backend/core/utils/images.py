@@ -1,28 +1,37 @@
-from PIL import Image
+from PIL import Image, ImageOps
 from io import BytesIO
 from django.core.files.base import ContentFile
 
 
-def compress_image(image, quality=70, max_width=1200):
-    img = Image.open(image)
+def make_derivative(img, max_size, quality=80):
+    """
+    長辺を max_size 以下に縮小した JPEG を返す（拡大はしない）。
+    元の img は変更しない。
+    """
+    img = ImageOps.exif_transpose(img)
 
-    if img.mode in ("RGBA", "P"):
-        img = img.convert("RGB")
+    if img.mode not in ("RGB", "L"):
+        # 透過は白背景に合成する
+        background = Image.new("RGB", img.size, (255, 255, 255))
+        rgba = img.convert("RGBA")
+        background.paste(rgba, mask=rgba.split()[-1])
+        img = background
+    else:
+        img = img.copy()
 
-    if img.width > max_width:
-        ratio = max_width / img.width
-        height = int(img.height * ratio)
-        img = img.resize((max_width, height), Image.LANCZOS)
+    img.thumbnail((max_size, max_size), Image.LANCZOS)
 
     buffer = BytesIO()
-
-    ext = image.name.lower().split(".")[-1]
-
-    if ext in ["jpg", "jpeg"]:
-        img.save(buffer, format="JPEG", quality=quality)
-    elif ext == "png":
-        img.save(buffer, format="PNG", optimize=True)
-    else:
-        img.save(buffer, format="JPEG", quality=quality)
-
-    return ContentFile(buffer.getvalue(), name=image.name)
\ No newline at end of file
+    img.save(buffer, format="JPEG", quality=quality, optimize=True, progressive=True)
+    return ContentFile(buffer.getvalue())
+
+
+def oriented_size(img):
+    """EXIF の向きを反映した (幅, 高さ)"""
+    try:
+        orientation = img.getexif().get(0x0112)
+    except Exception:
+        orientation = None
+    if orientation in (5, 6, 7, 8):
+        return img.height, img.width
+    return img.width, img.height
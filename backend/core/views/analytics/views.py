@@ -2,34 +2,69 @@
 
 from datetime import datetime, timedelta, date
 
-from django.db.models import Sum
+from django.db.models import Sum, Count, Q, F, Case, When, OuterRef, Subquery, BigIntegerField
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.exceptions import ValidationError
 
-from core.models import Order, Estimate, EstimateItem
-from core.serializers.orders import OrderSerializer
-from core.serializers.estimates import EstimateSerializer
+from core.models import Order, Estimate, EstimateItem, DailySalesRollup
+from core.pagination import EstimateDatePagination, OrderDatePagination, SalesDatePagination
+from core.services.document_lists import compact_page, parse_expand
 from core.models import OrderItem, EstimateItem
 from core.models.order_vehicle import OrderVehicle
 from core.models.estimate_vehicle import EstimateVehicle
+from core.models.categories import Category, CategoryClosure
 
 # -----------------------------
 # カテゴリパス生成関数 ★追加
 # -----------------------------
 def build_category_path(cat):
-    path = []
-
-    current = cat
-    while current:
-        path.insert(0, {
-            "id": current.id,
-            "name": current.name,
+    return build_category_paths([cat.id]).get(cat.id, [])
+
+
+def build_category_paths(category_ids):
+    """カテゴリIDごとのパス（最上位→自身）を閉包テーブル1クエリで返す"""
+    links = (
+        CategoryClosure.objects
+        .filter(descendant_id__in=set(category_ids))
+        .select_related("ancestor")
+        .order_by("descendant_id", "-depth")
+    )
+
+    paths = {}
+    for link in links:
+        paths.setdefault(link.descendant_id, []).append({
+            "id": link.ancestor.id,
+            "name": link.ancestor.name,
         })
-        current = current.parent
+    return paths
+
+
+# -----------------------------
+# カテゴリ階層の SQL 式（閉包テーブル / Category.root を参照）
+# -----------------------------
+def _category_subtree_q(category_id) -> Q:
+    """category_id 自身または配下のカテゴリを持つ明細"""
+    return Q(category_id__in=Category.subtree_ids(category_id))
 
-    return path
+
+def _category_root_expr():
+    """明細カテゴリの最上位カテゴリID"""
+    return F("category__root_id")
+
+
+def _category_child_of_expr(category_id):
+    """明細カテゴリの祖先のうち category_id 直下のもの（一致すれば自身）のID"""
+    return Case(
+        When(category_id=category_id, then=F("category_id")),
+        default=Subquery(
+            CategoryClosure.objects
+            .filter(descendant_id=OuterRef("category_id"), ancestor__parent_id=category_id)
+            .values("ancestor_id")[:1]
+        ),
+        output_field=BigIntegerField(),
+    )
 
 
 # ==================================================
@@ -53,79 +88,42 @@ class SalesDailyAPIView(APIView):
             raise ValidationError("日付形式は YYYY-MM-DD で指定してください")
 
         # -----------------------------
-        # filter作成
-        # -----------------------------
-        estimate_filter = {
-            "estimate_date__range": [start, end],
-        }
-
-        order_filter = {
-            "order_date__range": [start, end],
-        }
-
-        # 店舗フィルタ
+        # 事前集計テーブルから取得（DailySalesRollup）
         # "all" = 全店舗（フィルタなし）、未指定/空 = ユーザーの所属店舗
-        if shop_id and shop_id != "all":
-            estimate_filter["shop_id"] = shop_id
-            order_filter["shop_id"] = shop_id
-        elif not shop_id:
-            estimate_filter["shop"] = request.user.shop
-            order_filter["shop"] = request.user.shop
-
-        if staff_id and staff_id != "all":
-            estimate_filter["created_by_id"] = staff_id
-            order_filter["created_by_id"] = staff_id
-
-        # -----------------------------
-        # DB取得
         # -----------------------------
-        estimate_qs = (
-            Estimate.objects
-            .filter(**estimate_filter)
-            .values("estimate_date")
-            .annotate(total=Sum("grand_total"))
-        )
-
-        order_qs = (
-            Order.objects
-            .filter(**order_filter)
-            .values("order_date")
-            .annotate(total=Sum("grand_total"))
-        )
+        rollup_filter = {"date__range": [start, end]}
 
-        # -----------------------------
-        # dict化
-        # -----------------------------
-        estimate_map = {x["estimate_date"]: x["total"] for x in estimate_qs}
-        order_map    = {x["order_date"]:    x["total"] for x in order_qs}
-
-        # 売上集計（sales_date 基準）
-        sales_filter: dict = {"sales_date__range": [start, end]}
         if shop_id and shop_id != "all":
-            sales_filter["shop_id"] = shop_id
+            rollup_filter["shop_id"] = shop_id
         elif not shop_id:
-            sales_filter["shop"] = request.user.shop
+            rollup_filter["shop"] = request.user.shop
+
         if staff_id and staff_id != "all":
-            sales_filter["created_by_id"] = staff_id
-
-        sales_qs = (
-            Order.objects
-            .filter(**sales_filter)
-            .exclude(sales_date__isnull=True)
-            .values("sales_date")
-            .annotate(total=Sum("grand_total"))
+            rollup_filter["staff_id"] = staff_id
+
+        rollup_qs = (
+            DailySalesRollup.objects
+            .filter(**rollup_filter)
+            .values("date")
+            .annotate(
+                estimate=Sum("estimate_total"),
+                order=Sum("order_total"),
+                sales=Sum("sales_total"),
+            )
+            .order_by()
         )
-        sales_map = {x["sales_date"]: x["total"] for x in sales_qs}
+        rollup_map = {x["date"]: x for x in rollup_qs}
 
         result = []
         current = start
 
         while current <= end:
+            row = rollup_map.get(current, {})
             result.append({
                 "date":     current,
-                "estimate": float(estimate_map.get(current, 0) or 0),
-                "order":    float(order_map.get(current, 0) or 0),
-                "sales":    float(sales_map.get(current, 0) or 0),
+                "estimate": float(row.get("estimate") or 0),
+                "order":    float(row.get("order") or 0),
+                "sales":    float(row.get("sales") or 0),
             })
             current += timedelta(days=1)
 
@@ -136,14 +134,35 @@ class SalesDailyAPIView(APIView):
 # 日別明細一覧API
 # ==================================================
 class SalesListAPIView(APIView):
+    """
+    売上分析のドリルダウン（見積・受注・売上の一覧）。
+    表示に使う列（番号・日付・顧客・担当・金額）だけを .values() で返す。
+
+    - ?expand=items,vehicles,...   入れ子のデータを付ける（関連ごとに1クエリ）
+    - ?limit=100&cursor=...        キーセットページング（未指定なら全件）
+    - ?kind=estimates|orders|sales その一覧だけを返す（次ページの取得用）
+
+    kind 未指定のときは種類ごとの件数・合計を summary に入れる（一覧がページングされていても全体の値）。
+    """
     permission_classes = [IsAuthenticated]
 
+    KINDS = {
+        "estimates": EstimateDatePagination,
+        "orders":    OrderDatePagination,
+        "sales":     SalesDatePagination,
+    }
+
     def get(self, request):
         date_str = request.query_params.get("date")
         start_str = request.query_params.get("start")
         end_str = request.query_params.get("end")
         shop_id = request.query_params.get("shop_id")
         staff_id = request.query_params.get("staff_id")
+        kind = request.query_params.get("kind")
+
+        if kind and kind not in self.KINDS:
+            raise ValidationError({"kind": "estimates / orders / sales のいずれかを指定してください"})
+        expand = parse_expand(request)
 
         # -----------------------------
         # 日付指定
@@ -185,11 +204,40 @@ class SalesListAPIView(APIView):
             orders    = orders.filter(created_by_id=staff_id)
             sales     = sales.filter(created_by_id=staff_id)
 
-        return Response({
-            "estimates": EstimateSerializer(estimates, many=True).data,
-            "orders":    OrderSerializer(orders,    many=True).data,
-            "sales":     OrderSerializer(sales,     many=True).data,
-        })
+        querysets = {"estimates": estimates, "orders": orders, "sales": sales}
+
+        # -----------------------------
+        # 1種類だけ（次ページ）
+        # -----------------------------
+        if kind:
+            rows, paginator = compact_page(querysets[kind], request, self.KINDS[kind], expand)
+            if paginator is not None:
+                return paginator.get_paginated_response(rows)
+            return Response(rows)
+
+        # -----------------------------
+        # 3種類まとめて（1ページ目 ＋ 件数・合計）
+        # -----------------------------
+        result = {"summary": self._summary(querysets), "next_cursors": {}}
+        for name, qs in querysets.items():
+            rows, paginator = compact_page(qs, request, self.KINDS[name], expand)
+            result[name] = rows
+            result["next_cursors"][name] = paginator.next_cursor if paginator else None
+        return Response(result)
+
+    @staticmethod
+    def _summary(querysets):
+        """種類ごとの件数・合計（見積は受注済みの件数・合計も）。種類ごとに集計1クエリ"""
+        summary = {}
+        for name, qs in querysets.items():
+            aggregates = {"count": Count("id"), "total": Sum("grand_total")}
+            if name == "estimates":
+                ordered = Q(status="ordered")
+                aggregates["ordered_count"] = Count("id", filter=ordered)
+                aggregates["ordered_total"] = Sum("grand_total", filter=ordered)
+            values = qs.aggregate(**aggregates)
+            summary[name] = {key: value or 0 for key, value in values.items()}
+        return summary
 
 class ProductAnalyticsAPIView(APIView):
     permission_classes = [IsAuthenticated]
@@ -261,8 +309,6 @@ class ProductAnalyticsAPIView(APIView):
         # -----------------------------
         if type_ == "category":
 
-            from django.db.models import Q
-
             # item_type フィルタ（vehicle / non_vehicle / accessory / fee 等）
             item_type_param = request.query_params.get("item_type")
             if item_type_param:
@@ -283,77 +329,47 @@ class ProductAnalyticsAPIView(APIView):
             # フィルター（広く絞る）
             # -----------------------------
             if filter_category_id:
-                qs = qs.filter(
-                    Q(category_id=filter_category_id) |
-                    Q(category__parent_id=filter_category_id) |
-                    Q(category__parent__parent_id=filter_category_id) |
-                    Q(category__parent__parent__parent_id=filter_category_id)
-                )
+                qs = qs.filter(_category_subtree_q(filter_category_id))
 
             # -----------------------------
             # ドリルダウン（配下全部）
             # -----------------------------
             if category_id:
-                qs = qs.filter(
-                    Q(category_id=category_id) |
-                    Q(category__parent_id=category_id) |
-                    Q(category__parent__parent_id=category_id) |
-                    Q(category__parent__parent__parent_id=category_id)
-                )
+                qs = qs.filter(_category_subtree_q(category_id))
 
             # -----------------------------
-            # 次の階層を判定
+            # 次の階層を判定して DB 側で集計
+            # root: 最上位カテゴリ / drill中: category_id 直下のカテゴリ
             # -----------------------------
-            data = qs.select_related("category")
-
-            result = {}
-
-            for item in data:
-                cat = item.category
-
-                # ▼ root
-                if not category_id:
-                    current = cat
-
-                    while current.parent:
-                        current = current.parent
-
-                    target = current
-
-                # ▼ drill中
-                else:
-                    current = cat
-
-                    # 🔥 完全一致ならそのまま
-                    if str(current.id) == str(category_id):
-                        target = current
-
-                    else:
-                        # 親を辿る（従来）
-                        while current.parent and str(current.parent.id) != str(category_id):
-                            current = current.parent
-
-                        target = current
-
-                if not target:
-                    continue
-
-                key = target.id
-
-                if key not in result:
-                    result[key] = {
-                        "category_id": target.id,
-                        "name": target.name,
-                        "total": 0,
-                        "count": 0,
-                    }
-
-                result[key]["total"] += item.subtotal or 0
-                result[key]["count"] += 1 
+            if category_id:
+                target = _category_child_of_expr(category_id)
+            else:
+                target = _category_root_expr()
+
+            rows = (
+                qs.annotate(target_id=target)
+                .filter(target_id__isnull=False)
+                .values("target_id")
+                .annotate(
+                    name=Subquery(
+                        Category.objects.filter(pk=OuterRef("target_id")).values("name")[:1]
+                    ),
+                    total=Sum("subtotal"),
+                    count=Count("id"),
+                )
+                .filter(total__gt=0)
+                .order_by("-total", "target_id")
+            )
 
-            data = list(result.values())
-            data = [d for d in data if d["total"] and d["total"] > 0]
-            data.sort(key=lambda x: x["total"], reverse=True)
+            data = [
+                {
+                    "category_id": r["target_id"],
+                    "name":        r["name"],
+                    "total":       r["total"],
+                    "count":       r["count"],
+                }
+                for r in rows
+            ]
 
             grand_total = sum(float(d["total"]) for d in data)
             for d in data:
@@ -363,15 +379,9 @@ class ProductAnalyticsAPIView(APIView):
 
         elif type_ == "manufacturer":
 
-            from django.db.models import Q as _Q
             _filter_cat = request.query_params.get("filter_category_id")
             if _filter_cat:
-                qs = qs.filter(
-                    _Q(category_id=_filter_cat) |
-                    _Q(category__parent_id=_filter_cat) |
-                    _Q(category__parent__parent_id=_filter_cat) |
-                    _Q(category__parent__parent__parent_id=_filter_cat)
-                )
+                qs = qs.filter(_category_subtree_q(_filter_cat))
 
             # item_type フィルタ（車両/用品/保険/諸費用 等で絞り込み可）
             item_type = request.query_params.get("item_type")
@@ -393,9 +403,14 @@ class ProductAnalyticsAPIView(APIView):
                 for item in qs.filter(manufacturer__isnull=True)
             )
 
+            items = list(qs)
+            category_paths = build_category_paths(
+                {item.category_id for item in items if item.category_id}
+            )
+
             data = {}
 
-            for item in qs:
+            for item in items:
                 m = item.manufacturer
                 if not m:
                     continue
@@ -419,8 +434,8 @@ class ProductAnalyticsAPIView(APIView):
                 # -----------------------------
                 # カテゴリパス
                 # -----------------------------
-                if item.category:
-                    path = build_category_path(item.category)
+                if item.category_id:
+                    path = category_paths.get(item.category_id, [])
 
                     key = " > ".join([p["name"] for p in path])
 
@@ -465,7 +480,6 @@ class ProductAnalyticsAPIView(APIView):
 
         elif type_ == "color":
 
-            from django.db.models import Q as _QC
 
             # カテゴリフィルタ用: OrderItem.category 経由で order_id を絞る
             _color_filter_cat = request.query_params.get("filter_category_id")
@@ -492,14 +506,12 @@ class ProductAnalyticsAPIView(APIView):
 
                 # カテゴリで絞り込み（OrderItem.category 経由）
                 if _color_filter_cat:
-                    order_ids = OrderItem.objects.filter(
-                        item_type="vehicle"
-                    ).filter(
-                        _QC(category_id=_color_filter_cat) |
-                        _QC(category__parent_id=_color_filter_cat) |
-                        _QC(category__parent__parent_id=_color_filter_cat) |
-                        _QC(category__parent__parent__parent_id=_color_filter_cat)
-                    ).values_list("order_id", flat=True)
+                    order_ids = (
+                        OrderItem.objects
+                        .filter(item_type="vehicle")
+                        .filter(_category_subtree_q(_color_filter_cat))
+                        .values_list("order_id", flat=True)
+                    )
                     vqs = vqs.filter(order_id__in=order_ids)
 
                 total_field = "order__grand_total"
@@ -520,14 +532,12 @@ class ProductAnalyticsAPIView(APIView):
 
                 # カテゴリで絞り込み（EstimateItem.category 経由）
                 if _color_filter_cat:
-                    estimate_ids = EstimateItem.objects.filter(
-                        item_type="vehicle"
-                    ).filter(
-                        _QC(category_id=_color_filter_cat) |
-                        _QC(category__parent_id=_color_filter_cat) |
-                        _QC(category__parent__parent_id=_color_filter_cat) |
-                        _QC(category__parent__parent__parent_id=_color_filter_cat)
-                    ).values_list("estimate_id", flat=True)
+                    estimate_ids = (
+                        EstimateItem.objects
+                        .filter(item_type="vehicle")
+                        .filter(_category_subtree_q(_color_filter_cat))
+                        .values_list("estimate_id", flat=True)
+                    )
                     vqs = vqs.filter(estimate_id__in=estimate_ids)
 
                 total_field = "estimate__grand_total"
@@ -4,7 +4,7 @@ from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from rest_framework.views import APIView
 
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
+from django.db.models import Exists, OuterRef, Q
 
 from core.models import (
     BusinessCommunicationThread,
@@ -19,6 +19,7 @@ from core.serializers.business_communications import (
     BusinessCommunicationSerializer,
     BusinessCommunicationWriteSerializer,
     BusinessCommunicationThreadSerializer,
+    BusinessCommunicationThreadListSerializer,
 )
 
 User = get_user_model()
@@ -46,6 +47,30 @@ def _can_access_thread(user, thread: BusinessCommunicationThread) -> bool:
     ).exists() or thread.created_by_id == user.id
 
 
+def visible_threads_q(user) -> Q:
+    """
+    ユーザーが一覧で見られるスレッドの条件（作成者・参加スタッフ・参加店舗）。
+    スレッドの参加者（集計列）だけを見るので JOIN・DISTINCT が要らない。
+    """
+    shop = _user_shop(user)
+    Thread = BusinessCommunicationThread
+
+    conditions = Q(created_by=user) | Exists(
+        Thread.participant_staff.through.objects.filter(
+            businesscommunicationthread_id=OuterRef("pk"),
+            user_id=user.id,
+        )
+    )
+    if shop:
+        conditions |= Exists(
+            Thread.participant_shops.through.objects.filter(
+                businesscommunicationthread_id=OuterRef("pk"),
+                shop_id=shop.id,
+            )
+        )
+    return conditions
+
+
 def _can_access_message(user, message: BusinessCommunication) -> bool:
 
     shop = _user_shop(user)
@@ -76,35 +101,26 @@ def _thread_prefetch(qs):
 
 
 class CommunicationThreadListCreateAPIView(generics.ListCreateAPIView):
+    """
+    一覧はメッセージを読まず、スレッドの集計列（最終メッセージ・件数・送受信者名）だけを返す。
+    メッセージ本体は /communication-threads/<id>/messages/ で取得する。
+    """
 
     permission_classes = [permissions.IsAuthenticated]
-    serializer_class = BusinessCommunicationThreadSerializer
+    serializer_class = BusinessCommunicationThreadListSerializer
     parser_classes = [MultiPartParser, FormParser, JSONParser]
 
     def get_queryset(self):
 
-        user = self.request.user
-        shop = _user_shop(user)
-
-        conditions = (
-            Q(created_by=user)
-            | Q(messages__sender_staff=user)
-            | Q(messages__receiver_staff=user)
+        qs = BusinessCommunicationThread.objects.filter(
+            visible_threads_q(self.request.user)
         )
 
-        if shop:
-            conditions |= (
-                Q(messages__sender_shop=shop)
-                | Q(messages__receiver_shop=shop)
-            )
-
-        qs = BusinessCommunicationThread.objects.filter(conditions).distinct()
-
         status_param = self.request.query_params.get("status")
         if status_param in ("pending", "done"):
             qs = qs.filter(status=status_param)
 
-        return _thread_prefetch(qs)
+        return qs.select_related("customer", "created_by").order_by("-updated_at")
 
     def create(self, request, *args, **kwargs):
 
@@ -219,7 +235,13 @@ class CustomerBusinessCommunicationThreadListCreateAPIView(
 ):
 
     permission_classes = [permissions.IsAuthenticated]
-    serializer_class = BusinessCommunicationThreadSerializer
+
+    def get_serializer_class(self):
+
+        if self.request.method == "GET":
+            return BusinessCommunicationThreadListSerializer
+
+        return BusinessCommunicationThreadSerializer
 
     def get_queryset(self):
 
@@ -229,10 +251,6 @@ class CustomerBusinessCommunicationThreadListCreateAPIView(
             BusinessCommunicationThread.objects
             .filter(customer_id=customer_id)
             .select_related("customer", "created_by")
-            .prefetch_related(
-                "messages",
-                "messages__attachments"
-            )
             .order_by("-updated_at")
         )
 
@@ -3,7 +3,7 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.generics import get_object_or_404
 
-from core.models.categories import Category, Product
+from core.models.categories import Category, CategoryClosure, Product
 from core.serializers.categories import (
     CategorySerializer,
     CategoryTreeSerializer,
@@ -13,17 +13,51 @@ from core.serializers.categories import (
 )
 from core.serializers.products import ProductSerializer
 from core.utils.text import normalize_japanese
+from core.services.master_cache import cached_master_response, bump_master_version
 
-from django.db.models import Q
+from django.db.models import Exists, OuterRef, Q
 from django.utils import timezone
 
 
-def _get_descendant_ids(category: Category) -> list[int]:
-    """カテゴリとその全子孫のIDリストを返す（再帰）"""
-    ids = [category.id]
-    for child in category.children.all():
-        ids.extend(_get_descendant_ids(child))
-    return ids
+def _category_type_in(category_types, max_depth):
+    """
+    商品のカテゴリ自身か、max_depth 段上までの祖先のどれかの category_type が category_types に入る
+    （閉包テーブルへの EXISTS 1回。親を段ごとに JOIN して OR でつないでいたのと同じ結果）
+    """
+    return Exists(
+        CategoryClosure.objects.filter(
+            descendant_id=OuterRef("category_id"),
+            depth__lte=max_depth,
+            ancestor__category_type__in=category_types,
+        )
+    )
+
+
+def _attach_tree_children(roots, sort_key, include_deleted=True):
+    """
+    roots 配下のカテゴリを Category.root で1クエリ取得し、
+    各ノードの tree_children に子を並べて載せる（シリアライザが参照）
+    """
+    nodes = {r.id: r for r in roots}
+    descendants = Category.objects.filter(
+        root_id__in=list(nodes), depth__gt=0
+    ).order_by("depth", "id")
+    if not include_deleted:
+        descendants = descendants.filter(is_deleted=False)
+
+    for node in nodes.values():
+        node.tree_children = []
+    for c in descendants:
+        parent = nodes.get(c.parent_id)
+        if parent is None:
+            continue
+        c.tree_children = []
+        parent.tree_children.append(c)
+        nodes[c.id] = c
+
+    for node in nodes.values():
+        node.tree_children.sort(key=sort_key)
+    return roots
 
 
 # ============================================
@@ -77,13 +111,9 @@ class ProductListAPIView(generics.ListCreateAPIView):
             qs = qs.filter(category_id=category_id)
 
         # 🔥 ここが本質
+        # カテゴリ自身か祖先（最大3段上 = 最上位まで）のどれかが指定の種別
         if category_types:
-            qs = qs.filter(
-                Q(category__category_type__in=category_types) |
-                Q(category__parent__category_type__in=category_types) |
-                Q(category__parent__parent__category_type__in=category_types) |
-                Q(category__parent__parent__parent__category_type__in=category_types)
-            )
+            qs = qs.filter(_category_type_in(category_types, max_depth=3))
 
         if search:
             normalized_q = normalize_japanese(search)
@@ -166,7 +196,7 @@ class CategoryRetrieveAPIView(generics.RetrieveAPIView):
 class CategoryTreeAPIView(generics.ListAPIView):
     serializer_class = CategoryTreeSerializer
     permission_classes = [permissions.IsAuthenticated]
-    pagination_class = None 
+    pagination_class = None
 
     def get_queryset(self):
         qs = Category.objects.filter(parent__isnull=True, is_deleted=False)
@@ -185,15 +215,15 @@ class CategoryTreeAPIView(generics.ListAPIView):
             else:
                 qs = qs.filter(tax_type="non_taxable")
 
-        return (
-            qs.prefetch_related(
-                "children",
-                "children__children",
-                "children__children__children",
-                "children__children__children__children",
-            )
-            .order_by("sort_order", "id")
-        )
+        return qs.order_by("sort_order", "id")
+
+    def list(self, request, *args, **kwargs):
+        return cached_master_response(request, "categories", self._build_tree)
+
+    def _build_tree(self):
+        roots = list(self.filter_queryset(self.get_queryset()))
+        _attach_tree_children(roots, sort_key=lambda c: c.id)
+        return self.get_serializer(roots, many=True).data
 
 
 # ============================================
@@ -224,15 +254,18 @@ class CategoryAdminTreeAPIView(generics.ListAPIView):
     def get_queryset(self):
         return (
             Category.objects.filter(parent__isnull=True, is_deleted=False)
-            .prefetch_related(
-                "children",
-                "children__children",
-                "children__children__children",
-                "children__children__children__children",
-            )
             .order_by("sort_order", "id")
         )
 
+    def list(self, request, *args, **kwargs):
+        roots = list(self.filter_queryset(self.get_queryset()))
+        _attach_tree_children(
+            roots,
+            sort_key=lambda c: (c.sort_order, c.id),
+            include_deleted=False,
+        )
+        return Response(self.get_serializer(roots, many=True).data)
+
 
 # ============================================
 # カテゴリ 作成
@@ -276,8 +309,10 @@ class CategoryUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
         instance = self.get_object()
         now = timezone.now()
         # 自身と全子孫を論理削除
-        ids = _get_descendant_ids(instance)
+        ids = instance.get_descendant_ids()
         Category.objects.filter(id__in=ids).update(is_deleted=True, deleted_at=now)
+        # update() は signal を通らないので明示的に無効化
+        bump_master_version("categories")
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -293,7 +328,7 @@ class CategoryUsageAPIView(APIView):
         except Category.DoesNotExist:
             return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
 
-        ids = _get_descendant_ids(category)
+        ids = category.get_descendant_ids()
 
         # 遅延インポートで循環参照を回避
         from core.models.estimates import EstimateItem
@@ -370,12 +405,9 @@ class ProductAdminListAPIView(generics.ListAPIView):
             normalized = normalize_japanese(search)
             qs = qs.filter(name_search__icontains=normalized)
 
+        # カテゴリ自身か祖先（2段上まで）のどれかが指定の種別
         if category_type:
-            qs = qs.filter(
-                Q(category__category_type=category_type) |
-                Q(category__parent__category_type=category_type) |
-                Q(category__parent__parent__category_type=category_type)
-            )
+            qs = qs.filter(_category_type_in([category_type], max_depth=2))
 
         if is_active == "true":
             qs = qs.filter(is_active=True)
@@ -4,25 +4,33 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
 
-from django.db.models import Q, Value, IntegerField, BooleanField, Case, When, F
-from django.db.models.functions import Replace
+from django.db.models import Q
 
 from core.models import Customer
+from core.utils.text import normalize_japanese
+from core.services.customer_duplicates import (
+    CANDIDATE_FIELDS,
+    DEFAULT_MAX_BLOCK_SIZE,
+    DEFAULT_MIN_SCORE,
+    find_duplicate_clusters,
+    match_keys,
+    score_pair,
+)
 
 
 class SimilarCustomerAPIView(APIView):
     """
     顧客の重複候補を検索するAPI（理由付き + スコア順）
+    Customer の照合キー列（正規化済み・インデックスあり）で候補を絞り、スコアは Python で計算する。
+    - メール・電話・携帯: 完全一致（電話と携帯の入れ違いも一致とみなす）
+    - 氏名・カナ: 前方一致（入力途中でも候補が出る）
+    - 住所: 他の条件で見つかった候補の加点のみ
     """
     permission_classes = [permissions.IsAuthenticated]
 
-    # スコア重み（必要なら調整してOK）
-    W_EMAIL_EXACT = 100
-    W_PHONE_EXACT = 80
-    W_MOBILE_EXACT = 80
-    W_NAME_PARTIAL = 30
-    W_KANA_PARTIAL = 30
-    W_ADDRESS_PARTIAL = 10
+    MAX_CANDIDATES = 20
+    # スコア計算の対象にする最大件数（よくある氏名の前方一致で膨らまないように）
+    MAX_SCAN = 500
 
     def post(self, request, *args, **kwargs):
         name = request.data.get("name")
@@ -38,145 +46,60 @@ class SimilarCustomerAPIView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        def normalize_phone(p):
-            if not p:
-                return None
-            return (
-                str(p)
-                .replace("-", "")
-                .replace(" ", "")
-                .replace("　", "")
-                .replace("(", "")
-                .replace(")", "")
-            )
-
-        phone_norm = normalize_phone(phone)
-        mobile_norm = normalize_phone(mobile_phone)
-
-        # --------------------
-        # DB側電話も正規化して比較できるように annotate
-        # --------------------
-        qs = Customer.objects.all().annotate(
-            phone_norm_db=Replace(
-                Replace(Replace(Replace(Replace(F("phone"), Value("-"), Value("")), Value(" "), Value("")),
-                                Value("　"), Value("")), Value("("), Value("")),
-                Value(")"), Value("")
-            ),
-            mobile_norm_db=Replace(
-                Replace(Replace(Replace(Replace(F("mobile_phone"), Value("-"), Value("")), Value(" "), Value("")),
-                                Value("　"), Value("")), Value("("), Value("")),
-                Value(")"), Value("")
-            ),
-        )
-
-        # --------------------
-        # 各一致フラグ（理由出し用）
-        # --------------------
-        match_email = Case(
-            When(email=email, then=Value(True)),
-            default=Value(False),
-            output_field=BooleanField(),
-        ) if email else Value(False, output_field=BooleanField())
-
-        match_phone = Case(
-            When(phone_norm_db=phone_norm, then=Value(True)),
-            default=Value(False),
-            output_field=BooleanField(),
-        ) if phone_norm else Value(False, output_field=BooleanField())
-
-        match_mobile = Case(
-            When(mobile_norm_db=mobile_norm, then=Value(True)),
-            default=Value(False),
-            output_field=BooleanField(),
-        ) if mobile_norm else Value(False, output_field=BooleanField())
-
-        match_name = Case(
-            When(name__icontains=name, then=Value(True)),
-            default=Value(False),
-            output_field=BooleanField(),
-        ) if name else Value(False, output_field=BooleanField())
-
-        match_kana = Case(
-            When(kana__icontains=kana, then=Value(True)),
-            default=Value(False),
-            output_field=BooleanField(),
-        ) if kana else Value(False, output_field=BooleanField())
-
-        match_address = Case(
-            When(address__icontains=address, then=Value(True)),
-            default=Value(False),
-            output_field=BooleanField(),
-        ) if address else Value(False, output_field=BooleanField())
-
-        qs = qs.annotate(
-            match_email=match_email,
-            match_phone=match_phone,
-            match_mobile=match_mobile,
-            match_name=match_name,
-            match_kana=match_kana,
-            match_address=match_address,
-        )
-
-        # --------------------
-        # スコア計算（重み付き加算）
-        # --------------------
-        qs = qs.annotate(
-            score=(
-                Case(When(match_email=True, then=Value(self.W_EMAIL_EXACT)), default=Value(0), output_field=IntegerField())
-                + Case(When(match_phone=True, then=Value(self.W_PHONE_EXACT)), default=Value(0), output_field=IntegerField())
-                + Case(When(match_mobile=True, then=Value(self.W_MOBILE_EXACT)), default=Value(0), output_field=IntegerField())
-                + Case(When(match_name=True, then=Value(self.W_NAME_PARTIAL)), default=Value(0), output_field=IntegerField())
-                + Case(When(match_kana=True, then=Value(self.W_KANA_PARTIAL)), default=Value(0), output_field=IntegerField())
-                + Case(When(match_address=True, then=Value(self.W_ADDRESS_PARTIAL)), default=Value(0), output_field=IntegerField())
-            )
-        )
-
-        # --------------------
-        # 候補の抽出条件：どれか1つでも一致してるものだけ
-        # （住所だけで大量ヒットが気になるなら、ここを調整）
-        # --------------------
-        qs = qs.filter(
-            Q(match_email=True)
-            | Q(match_phone=True)
-            | Q(match_mobile=True)
-            | Q(match_name=True)
-            | Q(match_kana=True)
-            | Q(match_address=True)
-        )
-
-        # スコア順に上位だけ（必要なら件数変更）
-        qs = qs.order_by("-score", "id")[:20]
+        keys = match_keys(name, kana, phone, mobile_phone, email, address)
+
+        # 完全一致（メール・電話）は件数が少なく重複の根拠として最も強いので、件数上限をかけずに全件読む
+        exact = Q()
+        if keys["email_key"]:
+            exact |= Q(email_key=keys["email_key"])
+        # 電話と携帯の入れ違いも拾う
+        phones = {keys["phone_key"], keys["mobile_phone_key"]} - {""}
+        if phones:
+            exact |= Q(phone_key__in=phones) | Q(mobile_phone_key__in=phones)
+
+        # 氏名・カナの前方一致は MAX_SCAN 件まで
+        prefix = Q()
+        if keys["name_key"]:
+            prefix |= Q(name_key__startswith=keys["name_key"])
+        if keys["kana_key"]:
+            prefix |= Q(kana_key__startswith=keys["kana_key"])
+
+        if not exact and not prefix:
+            # 記号だけの入力など、正規化すると空になる場合
+            return Response({"has_similar": False, "count": 0, "candidates": []}, status=status.HTTP_200_OK)
+
+        rows = {}
+        if exact:
+            for row in Customer.objects.filter(exact).values(*CANDIDATE_FIELDS):
+                rows[row["id"]] = row
+        if prefix:
+            for row in Customer.objects.filter(prefix).order_by("id").values(*CANDIDATE_FIELDS)[:self.MAX_SCAN]:
+                rows.setdefault(row["id"], row)
 
         candidates = []
-        for c in qs:
-            reasons = []
-            if getattr(c, "match_email", False):
-                reasons.append("email一致")
-            if getattr(c, "match_phone", False):
-                reasons.append("phone一致")
-            if getattr(c, "match_mobile", False):
-                reasons.append("mobile_phone一致")
-            if getattr(c, "match_name", False):
-                reasons.append("name部分一致")
-            if getattr(c, "match_kana", False):
-                reasons.append("kana部分一致")
-            if getattr(c, "match_address", False):
-                reasons.append("address部分一致")
-
+        for row in rows.values():
+            row["address_key"] = normalize_japanese(row["address"])
+            score, reasons = score_pair(keys, row)
+            if not score:
+                continue
             candidates.append(
                 {
-                    "id": c.id,
-                    "name": c.name,
-                    "kana": getattr(c, "kana", None),
-                    "phone": getattr(c, "phone", None),
-                    "mobile_phone": getattr(c, "mobile_phone", None),
-                    "email": getattr(c, "email", None),
-                    "address": getattr(c, "address", None),
-                    "score": getattr(c, "score", 0),
+                    "id": row["id"],
+                    "name": row["name"],
+                    "kana": row["kana"],
+                    "phone": row["phone"],
+                    "mobile_phone": row["mobile_phone"],
+                    "email": row["email"],
+                    "address": row["address"],
+                    "score": score,
                     "reasons": reasons,
                 }
             )
 
+        # スコア順に上位だけ
+        candidates.sort(key=lambda c: (-c["score"], c["id"]))
+        candidates = candidates[:self.MAX_CANDIDATES]
+
         return Response(
             {
                 "has_similar": len(candidates) > 0,
@@ -185,3 +108,27 @@ class SimilarCustomerAPIView(APIView):
             },
             status=status.HTTP_200_OK,
         )
+
+
+class DuplicateCustomerClusterAPIView(APIView):
+    """
+    顧客テーブル全体の重複クラスタ一覧（データ移行後の名寄せ用）
+    全件を走査するのでリクエスト内では実行しない。URL には出さず、
+    帳票ジョブ（POST /report-jobs/ kind=customer_duplicates, params={min_score, max_block_size}）の
+    ワーカーからだけ呼ぶ。
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        try:
+            min_score = int(request.query_params.get("min_score", DEFAULT_MIN_SCORE))
+            max_block_size = int(request.query_params.get("max_block_size", DEFAULT_MAX_BLOCK_SIZE))
+        except ValueError:
+            return Response(
+                {"detail": "min_score / max_block_size は整数で指定してください"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        result = find_duplicate_clusters(min_score=min_score, max_block_size=max_block_size)
+        result["cluster_count"] = len(result["clusters"])
+        return Response(result)
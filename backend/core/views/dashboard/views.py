@@ -2,7 +2,6 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import permissions
 
-from django.db.models import Q
 from django.utils import timezone
 
 from core.models import (
@@ -12,6 +11,7 @@ from core.models import (
 )
 
 from core.serializers.dashboard import DashboardSerializer
+from core.views.business_communication.views import visible_threads_q
 
 
 class DashboardAPIView(APIView):
@@ -27,28 +27,22 @@ class DashboardAPIView(APIView):
         # =========================
         threads = (
             BusinessCommunicationThread.objects
-            .filter(
-                Q(messages__sender_shop=shop)
-                | Q(messages__receiver_shop=shop)
-                | Q(messages__sender_staff=user)
-                | Q(messages__receiver_staff=user)
-            )
-            .distinct()
+            .filter(visible_threads_q(user))
+            .select_related("customer")
             .order_by("-updated_at")[:5]
         )
 
-        communication_data = []
-        for t in threads:
-            last = t.messages.order_by("-created_at").first()
-
-            communication_data.append({
+        communication_data = [
+            {
                 "id": t.id,
                 "title": t.title,
                 "customer": t.customer.name if t.customer else None,
-                "last_message": last.content if last else None,
-                "last_message_at": last.created_at if last else None,
-                "is_pending": t.messages.filter(status="pending").exists(),
-            })
+                "last_message": t.last_message_preview if t.message_count else None,
+                "last_message_at": t.last_message_at,
+                "is_pending": t.pending_count > 0,
+            }
+            for t in threads
+        ]
 
         # =========================
         # ② スケジュール（今日）
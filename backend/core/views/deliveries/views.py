@@ -55,7 +55,6 @@ class DeliveryUpdateAPIView(generics.RetrieveUpdateDestroyAPIView):
         order = instance.order
         super().perform_destroy(instance)
 
-        # 残った Delivery のステータス再計算
-        for d in order.deliveries.all():
-            d.update_status()
+        # 残った Delivery から受注の納品状況を再計算（納品が0件になった場合も含む）
+        Delivery.update_status_bulk([order.id])
 
@@ -1,11 +1,16 @@
+import calendar
+import json
 from datetime import date
+
+from django.http import StreamingHttpResponse
 from rest_framework import generics, status
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 
 from core.models.document_templates import DocumentTemplate, DocumentField, SOURCE_KEY_CHOICES
-from core.models.customers import Customer
+from core.models.customers import Customer, CustomerVehicle
 from core.models.vehicles import Vehicle, VehicleRegistration
 from core.models.base import CompanySettings
 from core.serializers.document_templates import DocumentTemplateSerializer, DocumentFieldSerializer
@@ -71,6 +76,114 @@ def _wareki(d: date) -> str:
     return d.strftime("%Y/%m/%d")
 
 
+class _RenderContext:
+    """1枚分の値の取得元"""
+    __slots__ = ("customer", "vehicle", "registration", "company", "today", "inputs")
+
+    def __init__(self, customer, vehicle, registration, company, today, inputs):
+        self.customer = customer
+        self.vehicle = vehicle
+        self.registration = registration
+        self.company = company
+        self.today = today
+        self.inputs = inputs
+
+
+# source_key の接頭辞 → _RenderContext の属性
+_OBJECT_SOURCES = ("customer", "vehicle", "registration", "company")
+
+
+def _attr_resolver(source, attr):
+    def resolve(ctx):
+        obj = getattr(ctx, source)
+        if obj is None:
+            return ""
+        val = getattr(obj, attr, None)
+        return str(val) if val is not None else ""
+    return resolve
+
+
+def _compile_field(field: DocumentField):
+    """フィールド1つ分の値の取り出し方を先に決めておく（1枚ごとに source_key を解釈しない）"""
+    k = field.source_key
+    if k == "static":
+        value = field.static_value or ""
+        return lambda ctx: value
+    if k == "input":
+        key = field.input_label or field.label
+        return lambda ctx: ctx.inputs.get(key, "")
+    if k == "date_today":
+        return lambda ctx: ctx.today.strftime("%Y/%m/%d")
+    if k == "date_wareki":
+        return lambda ctx: _wareki(ctx.today)
+
+    source, _, attr = k.partition(".")
+    if source in _OBJECT_SOURCES and attr:
+        return _attr_resolver(source, attr)
+    return lambda ctx: ""
+
+
+class CompiledTemplate:
+    """
+    テンプレートのフィールドごとの取り出し関数と、値の取得に必要なデータ（顧客・車両・登録）。
+    一括印刷では1回だけ作って全件に使う。
+    """
+
+    def __init__(self, template: DocumentTemplate):
+        self.template = template
+        self.fields = list(template.fields.all())
+        self.resolvers = [_compile_field(f) for f in self.fields]
+        prefixes = {f.source_key.partition(".")[0] for f in self.fields}
+        self.needs_customer = "customer" in prefixes
+        self.needs_vehicle = bool(prefixes & {"vehicle", "registration"})
+        self.needs_registration = "registration" in prefixes
+
+    def template_data(self):
+        t = self.template
+        return {
+            "id": t.id,
+            "name": t.name,
+            "paper_width": t.paper_width,
+            "paper_height": t.paper_height,
+        }
+
+    def values(self, ctx):
+        return [resolve(ctx) for resolve in self.resolvers]
+
+    def render(self, ctx):
+        return [
+            {
+                "id": f.id,
+                "label": f.label,
+                "source_key": f.source_key,
+                "input_label": f.input_label,
+                "value": value,
+                "x": f.x,
+                "y": f.y,
+                "font_size": f.font_size,
+                "letter_spacing": f.letter_spacing,
+            }
+            for f, value in zip(self.fields, self.values(ctx))
+        ]
+
+
+def _get_template(pk):
+    template = DocumentTemplate.objects.prefetch_related("fields").filter(pk=pk).first()
+    if template is None:
+        raise NotFound("書類テンプレートが見つかりません")
+    return CompiledTemplate(template)
+
+
+def current_registrations(vehicle_ids):
+    """{vehicle_id: 現在の VehicleRegistration}（Vehicle.current_registration をたどる1クエリ）"""
+    return {
+        reg.vehicle_id: reg
+        for reg in VehicleRegistration.objects.filter(
+            id__in=Vehicle.objects.filter(id__in=vehicle_ids).values("current_registration_id")
+        )
+    }
+
+
 class DocumentRenderView(APIView):
     """
     POST /api/document-templates/<id>/render/
@@ -84,7 +197,7 @@ class DocumentRenderView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request, pk):
-        template = DocumentTemplate.objects.prefetch_related("fields").get(pk=pk)
+        compiled = _get_template(pk)
         customer_id = request.data.get("customer_id")
         vehicle_id = request.data.get("vehicle_id")
         inputs = request.data.get("inputs", {})
@@ -94,76 +207,168 @@ class DocumentRenderView(APIView):
         vehicle = None
         registration = None
         if vehicle_id:
-            vehicle = Vehicle.objects.select_related("manufacturer", "color").get(pk=vehicle_id)
-            registration = (
-                VehicleRegistration.objects.filter(vehicle=vehicle)
-                .order_by("-id")
-                .first()
+            vehicle = (
+                Vehicle.objects
+                .select_related("manufacturer", "color", "current_registration")
+                .get(pk=vehicle_id)
             )
+            registration = vehicle.current_registration
 
-        company = CompanySettings.get()
-        today = date.today()
+        ctx = _RenderContext(customer, vehicle, registration, CompanySettings.get(), date.today(), inputs)
 
-        def resolve(field: DocumentField) -> str:
-            k = field.source_key
-            if k == "static":
-                return field.static_value or ""
-            if k == "input":
-                return inputs.get(field.input_label or field.label, "")
-            if k == "date_today":
-                return today.strftime("%Y/%m/%d")
-            if k == "date_wareki":
-                return _wareki(today)
-
-            # customer.*
-            if k.startswith("customer.") and customer:
-                attr = k[len("customer."):]
-                val = getattr(customer, attr, None)
-                return str(val) if val is not None else ""
-
-            # vehicle.*
-            if k.startswith("vehicle.") and vehicle:
-                attr = k[len("vehicle."):]
-                val = getattr(vehicle, attr, None)
-                if val is None and attr == "vehicle_name":
-                    val = getattr(vehicle, "vehicle_name", None)
-                return str(val) if val is not None else ""
-
-            # registration.*
-            if k.startswith("registration.") and registration:
-                attr = k[len("registration."):]
-                val = getattr(registration, attr, None)
-                return str(val) if val is not None else ""
-
-            # company.*
-            if k.startswith("company."):
-                attr = k[len("company."):]
-                # CompanySettings の属性、なければ Shop 情報
-                val = getattr(company, attr, None)
-                return str(val) if val is not None else ""
+        return Response({
+            "template": compiled.template_data(),
+            "fields": compiled.render(ctx),
+        })
 
-            return ""
 
-        result = []
-        for f in template.fields.all():
-            result.append({
-                "id": f.id,
-                "label": f.label,
-                "source_key": f.source_key,
-                "input_label": f.input_label,
-                "value": resolve(f),
-                "x": f.x,
-                "y": f.y,
-                "font_size": f.font_size,
-                "letter_spacing": f.letter_spacing,
-            })
+# ── 一括印刷（NDJSON） ─────────────────────────────────────────────
 
-        return Response({
-            "template": {
-                "id": template.id,
-                "name": template.name,
-                "paper_width": template.paper_width,
-                "paper_height": template.paper_height,
-            },
-            "fields": result,
-        })
+MAX_BATCH_DOCUMENTS = 5000
+BATCH_CHUNK_SIZE = 500
+
+
+def inspection_due_pairs(date_from, date_to, shop_id=None):
+    """
+    現在の登録の車検満了日（Vehicle.inspection_expiration）が期間内の車両と、
+    その現在の所有者の (customer_id, vehicle_id)。顧客ID・車両ID順。1クエリ。
+    """
+    qs = CustomerVehicle.objects.filter(
+        is_current=True, vehicle__inspection_expiration__range=(date_from, date_to)
+    )
+    if shop_id and shop_id != "all":
+        qs = qs.filter(customer__last_shop_id=shop_id)
+    return list(qs.order_by("customer_id", "vehicle_id").values_list("customer_id", "vehicle_id"))
+
+
+def _parse_pairs(raw):
+    message = "pairs は {customer_id, vehicle_id} の配列で指定してください"
+    if not isinstance(raw, list):
+        raise ValidationError(message)
+    pairs = []
+    for p in raw:
+        if not isinstance(p, dict):
+            raise ValidationError(message)
+        try:
+            customer_id = int(p["customer_id"]) if p.get("customer_id") else None
+            vehicle_id = int(p["vehicle_id"]) if p.get("vehicle_id") else None
+        except (TypeError, ValueError):
+            raise ValidationError("customer_id / vehicle_id は数値で指定してください")
+        pairs.append((customer_id, vehicle_id))
+    return pairs
+
+
+def _parse_filter(raw):
+    """{"inspection_month": "YYYY-MM"} または {"inspection_from": "...", "inspection_to": "..."}"""
+    message = "filter は inspection_month (YYYY-MM) か inspection_from / inspection_to で指定してください"
+    if not isinstance(raw, dict):
+        raise ValidationError(message)
+    month = raw.get("inspection_month")
+    try:
+        if month:
+            year, m = (int(x) for x in month.split("-"))
+            date_from = date(year, m, 1)
+            date_to = date(year, m, calendar.monthrange(year, m)[1])
+        else:
+            date_from = date.fromisoformat(raw["inspection_from"])
+            date_to = date.fromisoformat(raw["inspection_to"])
+    except (AttributeError, KeyError, TypeError, ValueError):
+        raise ValidationError(message)
+    return inspection_due_pairs(date_from, date_to, raw.get("shop_id"))
+
+
+class DocumentBatchRenderView(APIView):
+    """
+    POST /api/document-templates/<id>/render-batch/
+    {
+        "pairs": [{"customer_id": 1, "vehicle_id": 2}, ...],
+        または
+        "filter": {"inspection_month": "2026-11", "shop_id": 1},
+        "inputs": {"手入力ラベル名": "値", ...}     # 全件共通
+    }
+    → application/x-ndjson で1行ずつ返す
+      {"type": "template", "template": {...}, "fields": [フィールドの位置など（value なし）]}
+      {"type": "document", "customer_id": 1, "vehicle_id": 2, "values": [fields と同じ順の値]}
+      ...
+      {"type": "summary", "count": 件数, "missing": [見つからなかった組]}
+
+    テンプレートの取り出し関数は1回だけ作り、顧客・車両・最新登録は BATCH_CHUNK_SIZE 件ごとに
+    まとめて読む（件数によらずクエリ数は 1チャンクあたり最大3本）。
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, pk):
+        compiled = _get_template(pk)
+        inputs = request.data.get("inputs") or {}
+
+        if request.data.get("pairs") is not None:
+            pairs = _parse_pairs(request.data["pairs"])
+        elif request.data.get("filter") is not None:
+            pairs = _parse_filter(request.data["filter"])
+        else:
+            raise ValidationError("pairs か filter を指定してください")
+
+        if len(pairs) > MAX_BATCH_DOCUMENTS:
+            raise ValidationError(f"一度に作成できるのは {MAX_BATCH_DOCUMENTS} 件までです（{len(pairs)} 件）")
+
+        company = CompanySettings.get()
+        today = date.today()
+
+        response = StreamingHttpResponse(
+            self._stream(compiled, pairs, inputs, company, today),
+            content_type="application/x-ndjson; charset=utf-8",
+        )
+        response["X-Document-Count"] = str(len(pairs))
+        return response
+
+    def _stream(self, compiled, pairs, inputs, company, today):
+        def _line(obj):
+            return json.dumps(obj, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+        layout = [
+            {k: v for k, v in field.items() if k != "value"}
+            for field in compiled.render(_RenderContext(None, None, None, company, today, inputs))
+        ]
+        yield _line({"type": "template", "template": compiled.template_data(), "fields": layout})
+
+        count = 0
+        missing = []
+        for i in range(0, len(pairs), BATCH_CHUNK_SIZE):
+            chunk = pairs[i:i + BATCH_CHUNK_SIZE]
+            customers, vehicles, registrations = self._load(compiled, chunk)
+
+            for customer_id, vehicle_id in chunk:
+                customer = customers.get(customer_id)
+                vehicle = vehicles.get(vehicle_id)
+                if (customer_id and customer is None) or (vehicle_id and vehicle is None):
+                    missing.append({"customer_id": customer_id, "vehicle_id": vehicle_id})
+                    continue
+                ctx = _RenderContext(customer, vehicle, registrations.get(vehicle_id), company, today, inputs)
+                count += 1
+                yield _line({
+                    "type": "document",
+                    "customer_id": customer_id,
+                    "vehicle_id": vehicle_id,
+                    "values": compiled.values(ctx),
+                })
+
+        yield _line({"type": "summary", "count": count, "missing": missing})
+
+    @staticmethod
+    def _load(compiled, chunk):
+        customer_ids = {c for c, _ in chunk if c}
+        vehicle_ids = {v for _, v in chunk if v}
+
+        # テンプレートが使わないデータは読まない（存在確認のため ID だけは引く）
+        customer_qs = Customer.objects.all() if compiled.needs_customer else Customer.objects.only("id")
+        vehicle_qs = (
+            Vehicle.objects.select_related("manufacturer", "color")
+            if compiled.needs_vehicle else Vehicle.objects.only("id")
+        )
+        customers = customer_qs.in_bulk(customer_ids) if customer_ids else {}
+        vehicles = vehicle_qs.in_bulk(vehicle_ids) if vehicle_ids else {}
+        registrations = (
+            current_registrations(vehicle_ids)
+            if compiled.needs_registration and vehicle_ids else {}
+        )
+        return customers, vehicles, registrations
@@ -0,0 +1,133 @@
+import tempfile
+
+from django.http import FileResponse, HttpResponseNotModified
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.services import pdf_service
+from core.utils.file_response import send_file
+
+
+# ── 1件の PDF ─────────────────────────────────────────────────────
+
+class _DocumentPDFView(APIView):
+    """
+    GET /api/estimates/<pk>/pdf/ ・ /api/orders/<pk>/pdf/
+    ?download=1 で添付ファイルとして返す。
+    同じ内容の PDF は作成済みのものを返し、ETag（内容のハッシュ）が一致すれば 304。
+    """
+    permission_classes = [IsAuthenticated]
+    kind = None
+
+    def get(self, request, pk):
+        found = pdf_service.documents(self.kind, lambda qs: qs.filter(pk=pk))
+        if not found:
+            raise NotFound()
+        number, data = found[0]
+
+        etag = f'"{pdf_service.cache_key(data)}"'
+        if request.headers.get("If-None-Match") == etag:
+            response = HttpResponseNotModified()
+            response["ETag"] = etag
+            return response
+
+        try:
+            _, path = pdf_service.render_cached(data)
+        except pdf_service.PDFUnavailable as e:
+            return Response({"detail": str(e)}, status=503)
+
+        response = send_file(
+            path,
+            content_type="application/pdf",
+            as_attachment=request.query_params.get("download") == "1",
+            filename=f"{number}.pdf",
+        )
+        response["ETag"] = etag
+        response["Cache-Control"] = "private, no-cache"
+        return response
+
+
+class EstimatePDFView(_DocumentPDFView):
+    kind = "estimate"
+
+
+class OrderPDFView(_DocumentPDFView):
+    kind = "order"
+
+
+# ── 一括出力（ReportJob "pdf_batch" 専用。URL には出さない） ─────────
+
+MAX_BATCH_DOCUMENTS = 5000
+
+DATE_FIELDS = {
+    "estimate": "estimate_date",
+    "order": "order_date",
+}
+
+
+class PDFBatchJobView(APIView):
+    """
+    run_report_worker から呼ばれ、複数の見積書・注文書 PDF を ZIP にして返す。
+    params:
+      doc     : "estimate" / "order"
+      ids     : カンマ区切りの ID（指定時は month より優先）
+      month   : YYYY-MM（見積日・受注日）
+      shop_id : 店舗
+    描画はプロセスプールで行い、作成済みの PDF はキャッシュを使う。
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        kind = request.query_params.get("doc", "estimate")
+        if kind not in DATE_FIELDS:
+            raise ValidationError("doc は estimate / order のどちらかです")
+
+        ids = request.query_params.get("ids")
+        month = request.query_params.get("month")
+        shop_id = request.query_params.get("shop_id")
+
+        def _filter(qs):
+            if ids:
+                try:
+                    qs = qs.filter(pk__in=[int(x) for x in ids.split(",") if x.strip()])
+                except ValueError:
+                    raise ValidationError("ids はカンマ区切りの数値で指定してください")
+            elif month:
+                try:
+                    year, m = (int(x) for x in month.split("-"))
+                except ValueError:
+                    raise ValidationError("month は YYYY-MM で指定してください")
+                qs = qs.filter(**{
+                    f"{DATE_FIELDS[kind]}__year": year,
+                    f"{DATE_FIELDS[kind]}__month": m,
+                })
+            else:
+                raise ValidationError("ids か month を指定してください")
+            if shop_id and shop_id != "all":
+                qs = qs.filter(shop_id=shop_id)
+            return qs
+
+        # 件数の確認は COUNT だけで行い、上限を超える指定では書類を読み込まない
+        count = pdf_service.count_documents(kind, _filter)
+        if not count:
+            raise ValidationError("対象の書類がありません")
+        if count > MAX_BATCH_DOCUMENTS:
+            raise ValidationError(f"一度に出力できるのは {MAX_BATCH_DOCUMENTS} 件までです（{count} 件）")
+
+        items = pdf_service.documents(kind, _filter)
+
+        rendered = pdf_service.render_batch(items)
+
+        tmp = tempfile.TemporaryFile()
+        pdf_service.write_zip(rendered, tmp)
+        tmp.seek(0)
+
+        label = month or "selected"
+        return FileResponse(
+            tmp,
+            content_type="application/zip",
+            as_attachment=True,
+            filename=f"{kind}_{label}.zip",
+        )
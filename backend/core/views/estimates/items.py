@@ -4,6 +4,7 @@ from django.shortcuts import get_object_or_404
 from decimal import Decimal
 
 from core.models.estimates import Estimate, EstimateItem
+from core.models.daily_sales_rollup import DailySalesRollup
 from core.serializers.estimate_items import EstimateItemSerializer
 
 
@@ -67,6 +68,7 @@ class EstimateItemListCreateAPIView(generics.ListCreateAPIView):
             tax_total=tax_total,
             grand_total=grand_total,
         )
+        DailySalesRollup.refresh_estimates([estimate_id])
 
 
 # ==================================================
@@ -116,3 +118,4 @@ class EstimateItemRetrieveUpdateDestroyAPIView(
             tax_total=tax_total,
             grand_total=grand_total,
         )
+        DailySalesRollup.refresh_estimates([estimate_id])
@@ -1,7 +1,4 @@
-from datetime import date
 from django.db import transaction, IntegrityError
-from django.db.models import Max, IntegerField
-from django.db.models.functions import Cast, Substr
 from django.shortcuts import get_object_or_404
 from rest_framework import generics, permissions, serializers
 from rest_framework.views import APIView
@@ -11,30 +8,29 @@ import jaconv
 
 from core.models import Estimate, EstimateItem, Product
 from core.models.base import Shop
+from core.models.document_sequence import DocumentSequence
+from core.pagination import EstimateDatePagination
 from core.serializers.estimates import (
     EstimateSerializer,
     EstimateDetailSerializer,
     EstimateItemSerializer,
 )
 from core.services.audit import write_audit_log
+from core.services.document_lists import compact_page, parse_expand
+from core.services.document_relations import prefetch_document_relations
+from core.services.sparse_fields import SparseFieldsMixin
 
 
 # ==================================================
 # 見積一覧・作成
 # ==================================================
-class EstimateListCreateAPIView(generics.ListCreateAPIView):
+class EstimateListCreateAPIView(SparseFieldsMixin, generics.ListCreateAPIView):
     serializer_class = EstimateSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        qs = Estimate.objects.select_related(
-            "party",
-            "shop",
-            "created_by",
-        ).prefetch_related(
-            "items",
-            "items__product"
-        )
+        # select_related / prefetch_related は SparseFieldsMixin が返す項目から組み立てる
+        qs = Estimate.objects.all()
 
         # 店舗
         shop_id = self.request.query_params.get("shop_id")
@@ -81,6 +77,16 @@ class EstimateListCreateAPIView(generics.ListCreateAPIView):
 
         return qs.order_by("-created_at")
 
+    def list(self, request, *args, **kwargs):
+        # ?limit= を付けたときは一覧用の軽量表現（見積日順のキーセットページング・?expand=）
+        if request.query_params.get("limit"):
+            rows, paginator = compact_page(
+                self.get_queryset(), request, EstimateDatePagination,
+                parse_expand(request), self.get_sparse_spec(),
+            )
+            return paginator.get_paginated_response(rows)
+        return super().list(request, *args, **kwargs)
+
     def perform_create(self, serializer):
         user = self.request.user
         staff = getattr(user, "staff", None)
@@ -99,11 +105,12 @@ class EstimateListCreateAPIView(generics.ListCreateAPIView):
 
         # 見積番号自動採番
         estimate_no = serializer.validated_data.get("estimate_no")
-        if not estimate_no or Estimate.objects.filter(estimate_no=estimate_no).exists():
-            estimate_no = self._generate_next_estimate_no()
 
         try:
             with transaction.atomic():
+                if not estimate_no or Estimate.objects.filter(estimate_no=estimate_no).exists():
+                    estimate_no = self._generate_next_estimate_no()
+
                 estimate = serializer.save(
                     created_by=user,
                     shop=shop,
@@ -124,45 +131,24 @@ class EstimateListCreateAPIView(generics.ListCreateAPIView):
             pass
 
     def _generate_next_estimate_no(self):
-        year_prefix = date.today().strftime("%y")  # 2026 -> 26
-
-        last_number = (
-            Estimate.objects
-            .filter(estimate_no__startswith=year_prefix)
-            .annotate(
-                number_part=Cast(
-                    Substr("estimate_no", 3, 5),
-                    IntegerField(),
-                )
-            )
-            .aggregate(max_number=Max("number_part"))
-            .get("max_number")
-        )
-
-        next_number = (last_number or 0) + 1
-        return f"{year_prefix}{next_number:05d}"
+        """採番テーブルで次の見積番号を確定する（作成と同じトランザクション内で呼ぶ）"""
+        return DocumentSequence.next_no("estimate")
 
 
 # ==================================================
 # 見積取得・更新・削除
 # ==================================================
-class EstimateRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
+class EstimateRetrieveUpdateDestroyAPIView(SparseFieldsMixin, generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
-    queryset = (
-        Estimate.objects
-        .select_related(
+    # GET は SparseFieldsMixin が返す項目から組み立て直す（この queryset は更新・削除用）
+    queryset = prefetch_document_relations(
+        Estimate.objects.select_related(
             "party",
-            "shop",
-            "created_by",
             "party__customer_class",
             "party__region",
             "party__gender",
         )
-        .prefetch_related(
-            "items",
-            "items__category",
-        )
     )
 
     def get_serializer_class(self):
@@ -228,24 +214,8 @@ class EstimateNextNoAPIView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        year_prefix = date.today().strftime("%y")
-
-        last_number = (
-            Estimate.objects
-            .filter(estimate_no__startswith=year_prefix)
-            .annotate(
-                number_part=Cast(
-                    Substr("estimate_no", 3, 5),
-                    IntegerField(),
-                )
-            )
-            .aggregate(max_number=Max("number_part"))
-            .get("max_number")
-        )
-
-        next_number = (last_number or 0) + 1
-
-        return Response({"next_estimate_no": f"{year_prefix}{next_number:05d}"})
+        # 表示用の見込み番号（確定は作成時。ロックしない）
+        return Response({"next_estimate_no": DocumentSequence.peek_no("estimate")})
 
 
 # ==================================================
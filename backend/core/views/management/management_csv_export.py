@@ -1,16 +1,14 @@
-import csv
-import io
 from decimal import Decimal
-from urllib.parse import quote
 
-from django.db.models import Sum
-from django.http import HttpResponse
+from django.db.models import Prefetch
 from django.utils import timezone
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
 
 from core.models import Order
-from core.models.order_delivery_payment import PaymentManagement
+from core.models.order_delivery_payment import PaymentManagement, PaymentRecord
+from core.services.payment_totals import annotate_payment_totals
+from core.utils.csv_export import streaming_csv_response
 
 
 SALE_TYPE_LABEL = {
@@ -31,16 +29,30 @@ METHOD_LABEL = {
 TAX_RATE = Decimal("1.10")
 
 
+PAYMENT_STATUS_LABEL = {
+    "paid":    "入金済",
+    "pending": "未入金",
+    "partial": "一部入金",
+}
+
+CSV_CHUNK_SIZE = 500
+
+
 class ManagementCSVExportView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
+        # 入金合計・入金状況はサブクエリで付与し、records は種別ラベル用に
+        # method だけをチャンク単位で prefetch する
         qs = (
-            Order.objects
-            .select_related("shop", "payment_management")
+            annotate_payment_totals(Order.objects.all())
+            .select_related("payment_management")
             .prefetch_related(
                 "items__category",
-                "payment_management__records",
+                Prefetch(
+                    "payment_management__records",
+                    queryset=PaymentRecord.objects.only("id", "payment_management_id", "method"),
+                ),
             )
             .order_by("order_date", "order_no")
         )
@@ -66,11 +78,8 @@ class ManagementCSVExportView(APIView):
         if date_to:
             qs = qs.filter(order_date__lte=date_to)
 
-        # ── CSV 生成 ──
-        output = io.StringIO()
-        writer = csv.writer(output)
-
-        writer.writerow([
+        # ── CSV 生成（ストリーミング） ──
+        header = [
             "伝票番号",
             "受注日",
             "顧客名",
@@ -80,30 +89,23 @@ class ManagementCSVExportView(APIView):
             "非課税",
             "入金状況",
             "入金種別",
-        ])
+        ]
 
-        for order in qs:
+        today    = timezone.localdate().strftime("%Y%m%d")
+        filename = f"delivery_payment_{today}.csv"
+        return streaming_csv_response(filename, header, self._rows(qs))
+
+    @staticmethod
+    def _rows(qs):
+        for order in qs.iterator(chunk_size=CSV_CHUNK_SIZE):
             # 入金情報
             try:
-                pm = order.payment_management
-                records = list(pm.records.all())
-                paid_total = sum(r.amount for r in records)
-                methods = "/".join(
-                    METHOD_LABEL.get(r.method, r.method) for r in records
-                ) if records else ""
+                records = order.payment_management.records.all()
+                methods = "/".join(METHOD_LABEL.get(r.method, r.method) for r in records)
             except PaymentManagement.DoesNotExist:
-                paid_total = Decimal("0")
                 methods = ""
 
-            grand_total = order.grand_total or Decimal("0")
-            if grand_total <= 0:
-                payment_status = "入金済"
-            elif paid_total <= 0:
-                payment_status = "未入金"
-            elif paid_total < grand_total:
-                payment_status = "一部入金"
-            else:
-                payment_status = "入金済"
+            payment_status = PAYMENT_STATUS_LABEL[order.payment_status]
 
             for item in order.items.all():
                 # 区分（item の sale_type）
@@ -119,7 +121,7 @@ class ManagementCSVExportView(APIView):
                 non_taxable    = "非課税" if item.tax_type == "non_taxable" else ""
                 category_name  = item.category.name if item.category else ""
 
-                writer.writerow([
+                yield [
                     order.order_no,
                     str(order.order_date) if order.order_date else "",
                     order.party_name or "",
@@ -129,14 +131,4 @@ class ManagementCSVExportView(APIView):
                     non_taxable,
                     payment_status,
                     methods,
-                ])
-
-        today    = timezone.localdate().strftime("%Y%m%d")
-        filename = f"delivery_payment_{today}.csv"
-        csv_data = output.getvalue().encode("cp932", errors="replace")
-
-        response = HttpResponse(csv_data, content_type="text/csv; charset=cp932")
-        response["Content-Disposition"] = (
-            f"attachment; filename*=UTF-8''{quote(filename)}"
-        )
-        return response
+                ]
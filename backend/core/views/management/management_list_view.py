@@ -2,26 +2,42 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 
-from django.db.models import Sum
-
 from core.models import Order
-from core.models.order_delivery_payment import PaymentManagement
+from core.pagination import DateKeysetPagination
+from core.services.payment_totals import annotate_payment_totals
+
+
+# Order.delivery_status の値（not_delivered/partial/delivered）を
+# フロントエンドの表示値（pending/partial/completed）にマッピング
+DELIVERY_STATUS_MAP = {
+    "not_delivered": "pending",
+    "partial":       "partial",
+    "delivered":     "completed",
+}
+DELIVERY_STATUS_FILTER = {v: k for k, v in DELIVERY_STATUS_MAP.items()}
+
+
+class ManagementOrderListPagination(DateKeysetPagination):
+    date_field = "order_date"
 
 
 class ManagementOrderListAPIView(APIView):
+    """
+    入金・納品管理一覧。
+    入金額はサブクエリで集計するので、件数に関係なく1クエリで返す。
+
+    - ?payment_status=pending,partial   入金状況で絞り込み
+    - ?delivery_status=pending,partial  納品状況で絞り込み
+    - ?limit=100&cursor=...             キーセットページング（未指定なら全件）
+    """
     permission_classes = [IsAuthenticated]
+    pagination_class = ManagementOrderListPagination
 
     def get(self, request):
-        qs = (
-            Order.objects.select_related(
-                "shop",
-                "payment_management",
-            )
-            .prefetch_related(
-                "payment_management__records",
-            )
+        qs = annotate_payment_totals(
+            Order.objects
+            .select_related("shop")
             .exclude(status="cancelled")
-            .order_by("-order_date")
         )
 
         # =====================================================
@@ -55,61 +71,46 @@ class ManagementOrderListAPIView(APIView):
         if date_to:
             qs = qs.filter(order_date__lte=date_to)
 
-        # Order.delivery_status の値（not_delivered/partial/delivered）を
-        # フロントエンドの表示値（pending/partial/completed）にマッピング
-        DELIVERY_STATUS_MAP = {
-            "not_delivered": "pending",
-            "partial":       "partial",
-            "delivered":     "completed",
-        }
-
-        results = []
-
-        for order in qs:
-            # --- 納品状況 ---
-            # Order.delivery_status は Delivery.update_status() が常に正しく更新するので
-            # そのまま使う（一覧側での再計算は不要・誤りの原因になる）
-            delivery_status = DELIVERY_STATUS_MAP.get(
-                order.delivery_status or "not_delivered", "pending"
-            )
+        # =====================================================
+        # 入金・納品状況フィルタ（表示値で指定、カンマ区切り可）
+        # =====================================================
+        payment_status = request.GET.get("payment_status")
+        if payment_status:
+            qs = qs.filter(payment_status__in=payment_status.split(","))
+
+        delivery_status = request.GET.get("delivery_status")
+        if delivery_status:
+            qs = qs.filter(delivery_status__in=[
+                DELIVERY_STATUS_FILTER.get(v, v) for v in delivery_status.split(",")
+            ])
+
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(qs, request, view=self)
+        if page is not None:
+            return paginator.get_paginated_response([self._row(o) for o in page])
+
+        qs = qs.order_by("-order_date")
+        return Response([self._row(o) for o in qs])
+
+    @staticmethod
+    def _row(order):
+        # Order.delivery_status は Delivery.update_status() が常に正しく更新するので
+        # そのまま使う（一覧側での再計算は不要・誤りの原因になる）
+        delivery_status = DELIVERY_STATUS_MAP.get(
+            order.delivery_status or "not_delivered", "pending"
+        )
 
-            # --- 入金状況 ---
-            try:
-                pm = order.payment_management
-                paid_amount = pm.records.aggregate(total=Sum("amount"))["total"] or 0
-            except PaymentManagement.DoesNotExist:
-                paid_amount = 0
-
-            grand_total = order.grand_total or 0
-            unpaid = grand_total - paid_amount
-            if unpaid < 0:
-                unpaid = 0
-
-            if grand_total <= 0:
-                # 受注金額が0円の場合は入金不要とみなす
-                payment_status = "paid"
-            elif paid_amount <= 0:
-                payment_status = "pending"
-            elif paid_amount < grand_total:
-                payment_status = "partial"
-            else:
-                payment_status = "paid"
-
-            results.append(
-                {
-                    "order_id": order.id,
-                    "order_no": order.order_no,
-                    "order_date": order.order_date,
-                    "sales_date": order.sales_date,
-                    "customer_name": order.party_name,
-                    "delivery_status": delivery_status,
-                    "payment_status": payment_status,
-                    "grand_total": grand_total,
-                    "paid_total": paid_amount,
-                    "unpaid_total": unpaid,
-                    "shop_id": order.shop_id,
-                    "shop_name": order.shop.name if order.shop else None,
-                }
-            )
-
-        return Response(results)
\ No newline at end of file
+        return {
+            "order_id": order.id,
+            "order_no": order.order_no,
+            "order_date": order.order_date,
+            "sales_date": order.sales_date,
+            "customer_name": order.party_name,
+            "delivery_status": delivery_status,
+            "payment_status": order.payment_status,
+            "grand_total": order.grand_total or 0,
+            "paid_total": order.paid_total,
+            "unpaid_total": order.unpaid_total,
+            "shop_id": order.shop_id,
+            "shop_name": order.shop.name if order.shop else None,
+        }
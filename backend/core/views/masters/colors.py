@@ -1,12 +1,15 @@
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.response import Response
 from core.models import Color
 from core.serializers.masters import ColorSerializer
+from core.services.master_cache import cached_master_response
 
 class ColorListView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        qs = Color.objects.order_by("id")
-        return Response(ColorSerializer(qs, many=True).data)
\ No newline at end of file
+        return cached_master_response(
+            request,
+            "colors",
+            lambda: ColorSerializer(Color.objects.order_by("id"), many=True).data,
+        )
\ No newline at end of file
@@ -1,12 +1,15 @@
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.response import Response
 from core.models import CustomerClass
 from core.serializers.masters import CustomerClassSerializer
+from core.services.master_cache import cached_master_response
 
 class CustomerClassListView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        qs = CustomerClass.objects.order_by("id")
-        return Response(CustomerClassSerializer(qs, many=True).data)
\ No newline at end of file
+        return cached_master_response(
+            request,
+            "customer_classes",
+            lambda: CustomerClassSerializer(CustomerClass.objects.order_by("id"), many=True).data,
+        )
\ No newline at end of file
@@ -1,14 +1,22 @@
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.response import Response
 from core.models import Manufacturer, Category
 from core.serializers.masters import ManufacturerSerializer
+from core.services.master_cache import cached_master_response
 
 
 class ManufacturerListView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
+        # ?category= はカテゴリのメーカーグループで絞るのでカテゴリ変更でも無効化
+        return cached_master_response(
+            request,
+            ("manufacturers", "categories"),
+            lambda: self._build(request),
+        )
+
+    def _build(self, request):
         qs = Manufacturer.objects.filter(is_active=True)
 
         category_id = request.query_params.get("category")
@@ -31,6 +39,4 @@ class ManufacturerListView(APIView):
 
         qs = qs.order_by("name")
 
-        return Response(
-            ManufacturerSerializer(qs, many=True).data
-        )
\ No newline at end of file
+        return ManufacturerSerializer(qs, many=True).data
@@ -2,12 +2,14 @@
 from rest_framework import generics, permissions
 from core.models.payment_company import PaymentCompany
 from core.serializers.payment_company import PaymentCompanySerializer
+from core.services.master_cache import MasterCacheMixin
 
 
-class PaymentCompanyListCreateAPIView(generics.ListCreateAPIView):
+class PaymentCompanyListCreateAPIView(MasterCacheMixin, generics.ListCreateAPIView):
     serializer_class = PaymentCompanySerializer
     permission_classes = [permissions.IsAuthenticated]
     pagination_class = None
+    master_cache_groups = ("payment_companies",)
 
     def get_queryset(self):
         qs = PaymentCompany.objects.all()
@@ -3,13 +3,15 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from core.models import Shop
 from core.serializers.masters import ShopSerializer
+from core.services.master_cache import MasterCacheMixin
 
 
-class ShopListCreateView(generics.ListCreateAPIView):
+class ShopListCreateView(MasterCacheMixin, generics.ListCreateAPIView):
     queryset = Shop.objects.order_by("id")
     serializer_class = ShopSerializer
     permission_classes = [permissions.IsAuthenticated]
     pagination_class = None
+    master_cache_groups = ("shops",)
 
 
 class ShopRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
@@ -6,21 +6,15 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from django.contrib.auth import get_user_model
-from django.http import HttpResponse
 
 from core.models.base import ROLE_CHOICES, GLOBAL_ROLES
 from core.models import Shop
+from core.permissions import is_manager
 from core.serializers.masters import StaffSerializer
+from core.utils.csv_export import streaming_csv_response
 
 User = get_user_model()
 
-# 管理操作を許可するロール
-MANAGER_ROLES = {"executive", "manager", "store_manager", "admin"}
-
-
-def _is_manager(user):
-    return user.is_superuser or getattr(user, "role", "") in MANAGER_ROLES
-
 
 class StaffListView(APIView):
     """
@@ -38,7 +32,7 @@ class StaffListView(APIView):
         return Response(serializer.data)
 
     def post(self, request):
-        if not _is_manager(request.user):
+        if not is_manager(request.user):
             return Response(
                 {"detail": "スタッフの追加は管理者のみ可能です。"},
                 status=status.HTTP_403_FORBIDDEN,
@@ -68,7 +62,7 @@ class StaffDetailView(APIView):
         return Response(StaffSerializer(obj).data)
 
     def patch(self, request, pk):
-        if not _is_manager(request.user):
+        if not is_manager(request.user):
             return Response({"detail": "権限がありません。"}, status=status.HTTP_403_FORBIDDEN)
         obj = self._get_object(pk)
         if not obj:
@@ -79,7 +73,7 @@ class StaffDetailView(APIView):
         return Response(StaffSerializer(staff).data)
 
     def delete(self, request, pk):
-        if not _is_manager(request.user):
+        if not is_manager(request.user):
             return Response({"detail": "権限がありません。"}, status=status.HTTP_403_FORBIDDEN)
         obj = self._get_object(pk)
         if not obj:
@@ -99,7 +93,7 @@ class StaffCSVExportView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        if not _is_manager(request.user):
+        if not is_manager(request.user):
             return Response({"detail": "権限がありません。"}, status=status.HTTP_403_FORBIDDEN)
 
         qs = (
@@ -110,27 +104,22 @@ class StaffCSVExportView(APIView):
 
         role_map = dict(ROLE_CHOICES)
 
-        output = io.StringIO()
-        writer = csv.writer(output)
-        writer.writerow(["id", "display_name", "login_id", "shop_code", "shop_name", "role", "role_display"])
-
-        for u in qs:
-            writer.writerow([
-                u.id,
-                u.display_name or "",
-                u.login_id,
-                u.shop.code if u.shop else "",
-                u.shop.name if u.shop else "",
-                u.role,
-                role_map.get(u.role, u.role),
-            ])
-
-        response = HttpResponse(
-            "﻿" + output.getvalue(),  # BOM付きUTF-8（Excelで開けるように）
-            content_type="text/csv; charset=utf-8",
-        )
-        response["Content-Disposition"] = 'attachment; filename="staffs.csv"'
-        return response
+        header = ["id", "display_name", "login_id", "shop_code", "shop_name", "role", "role_display"]
+
+        def rows():
+            for u in qs.iterator(chunk_size=1000):
+                yield [
+                    u.id,
+                    u.display_name or "",
+                    u.login_id,
+                    u.shop.code if u.shop else "",
+                    u.shop.name if u.shop else "",
+                    u.role,
+                    role_map.get(u.role, u.role),
+                ]
+
+        # インポート（utf-8-sig で読む）と揃えて BOM付きUTF-8（Excelで開けるように）
+        return streaming_csv_response("staffs.csv", header, rows(), encoding="utf-8", bom=True)
 
 
 class StaffCSVImportView(APIView):
@@ -141,7 +130,7 @@ class StaffCSVImportView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
-        if not _is_manager(request.user):
+        if not is_manager(request.user):
             return Response({"detail": "権限がありません。"}, status=status.HTTP_403_FORBIDDEN)
 
         csv_file = request.FILES.get("file")
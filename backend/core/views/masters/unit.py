@@ -3,9 +3,11 @@
 from rest_framework import generics
 from core.models.unit import Unit
 from core.serializers.unit import UnitSerializer
+from core.services.master_cache import MasterCacheMixin
 
 
-class UnitListAPIView(generics.ListAPIView):
+class UnitListAPIView(MasterCacheMixin, generics.ListAPIView):
     queryset = Unit.objects.all().order_by("id")
     serializer_class = UnitSerializer
-    pagination_class = None
\ No newline at end of file
+    pagination_class = None
+    master_cache_groups = ("units",)
\ No newline at end of file
@@ -3,7 +3,7 @@ from django.db.models import Sum
 from django.db import transaction
 from decimal import Decimal
 
-from core.models import Order, OrderItem
+from core.models import Order, OrderItem, DailySalesRollup
 from core.serializers.orders import OrderItemSerializer
 
 
@@ -73,6 +73,7 @@ class OrderItemListCreateAPIView(generics.ListCreateAPIView):
             tax_total=tax_target * tax_rate,
             grand_total=subtotal + (tax_target * tax_rate),
         )
+        DailySalesRollup.refresh_orders([order_id])
 
 class OrderItemRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
     """
@@ -111,3 +112,4 @@ class OrderItemRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIVie
             tax_total=tax_target * tax_rate,
             grand_total=grand_total + (tax_target * tax_rate),
         )
+        DailySalesRollup.refresh_orders([order_id])
@@ -1,9 +1,7 @@
 # core/views/orders/views.py
-from datetime import date
 from django.db import transaction
 from django.contrib.contenttypes.models import ContentType
-from django.db.models import Q, Max, IntegerField
-from django.db.models.functions import Cast, Substr
+from django.db.models import Q
 from django.utils import timezone
 from rest_framework import generics, permissions, serializers
 from rest_framework.response import Response
@@ -15,57 +13,43 @@ from django.db.models import Q
 import jaconv
 
 from core.models import (
-    Order, OrderItem,
+    Order,
     Estimate, EstimateItem,
     EstimateParty,
-    Customer,
     Payment,
     Schedule,
     Settlement,
 )
 from core.models.base import Shop
+from core.models.document_sequence import DocumentSequence
+from core.pagination import OrderDatePagination
 from core.serializers.order_detail import OrderDetailSerializer
 from core.serializers.orders import OrderSerializer
+from core.services import estimate_conversion
 from core.services.audit import write_audit_log
+from core.services.document_lists import compact_page, parse_expand
+from core.services.document_relations import prefetch_document_relations
+from core.services.sparse_fields import SparseFieldsMixin
 
 
 # ====================================================
 # 共通：次の受注番号を生成
 # ====================================================
 def generate_next_order_no(shop):
-    year_prefix = date.today().strftime("%y")  # 2026 -> 26
-
-    last_number = (
-        Order.objects
-        .filter(order_no__startswith=year_prefix)
-        .annotate(
-            number_part=Cast(
-                Substr("order_no", 3, 5),
-                IntegerField(),
-            )
-        )
-        .aggregate(max_number=Max("number_part"))
-        .get("max_number")
-    )
-
-    next_number = (last_number or 0) + 1
-    return f"{year_prefix}{next_number:05d}"
+    """採番テーブルで次の受注番号を確定する（作成と同じトランザクション内で呼ぶ）"""
+    return DocumentSequence.next_no("order")
 
 
 # ======================================
 # 受注一覧 ＋ 作成
 # ======================================
-class OrderListCreateAPIView(generics.ListCreateAPIView):
+class OrderListCreateAPIView(SparseFieldsMixin, generics.ListCreateAPIView):
     serializer_class = OrderSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-
-        qs = (
-            Order.objects.all()
-            .select_related("customer", "shop", "created_by")
-            .prefetch_related("items", "items__product")
-        )
+        # select_related / prefetch_related は SparseFieldsMixin が返す項目から組み立てる
+        qs = Order.objects.all()
 
         # -------------------------
         # 店舗
@@ -129,6 +113,16 @@ class OrderListCreateAPIView(generics.ListCreateAPIView):
 
         return qs.order_by("-created_at")
 
+    def list(self, request, *args, **kwargs):
+        # ?limit= を付けたときは一覧用の軽量表現（受注日順のキーセットページング・?expand=）
+        if request.query_params.get("limit"):
+            rows, paginator = compact_page(
+                self.get_queryset(), request, OrderDatePagination,
+                parse_expand(request), self.get_sparse_spec(),
+            )
+            return paginator.get_paginated_response(rows)
+        return super().list(request, *args, **kwargs)
+
     def perform_create(self, serializer):
 
         user = self.request.user
@@ -147,16 +141,16 @@ class OrderListCreateAPIView(generics.ListCreateAPIView):
 
         order_no = serializer.validated_data.get("order_no")
 
-        if not order_no or Order.objects.filter(order_no=order_no).exists():
-            order_no = generate_next_order_no(shop)
-
         with transaction.atomic():
+            if not order_no or Order.objects.filter(order_no=order_no).exists():
+                order_no = generate_next_order_no(shop)
+
+            # 合計は serializer.create が明細から計算して同時に保存する
             order = serializer.save(
                 created_by=user,
                 shop=shop,
                 order_no=order_no,
             )
-            serializer._recalculate_order(order)
 
         try:
             write_audit_log(
@@ -173,20 +167,23 @@ class OrderListCreateAPIView(generics.ListCreateAPIView):
 # 受注単体
 # ======================================
 
-class OrderRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Order.objects.all().select_related(
-        "customer",
-        "customer__customer_class",
-        "customer__region",
-        "customer__gender",
-        "shop",
-        "created_by",
-    ).prefetch_related(
-        "items",
-        "items__deliveryitem_set",
-        "deliveries",
-        "order_vehicles",
-        "payment_management__records",
+class OrderRetrieveUpdateDestroyAPIView(SparseFieldsMixin, generics.RetrieveUpdateDestroyAPIView):
+    # GET は SparseFieldsMixin が返す項目から組み立て直す（この queryset は更新・削除用）
+    queryset = prefetch_document_relations(
+        Order.objects.all().select_related(
+            "customer",
+            "customer__customer_class",
+            "customer__region",
+            "customer__gender",
+            "customer__staff",
+            "customer__first_shop",
+            "customer__last_shop",
+            "estimate",
+        ).prefetch_related(
+            "items__deliveryitem_set",
+            "deliveries",
+            "payment_management__records",
+        )
     )
     permission_classes = [permissions.IsAuthenticated]
 
@@ -276,6 +273,19 @@ class OrderRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
 # ======================================
 # 見積 → 受注作成（完成版）
 # ======================================
+def _candidates_data(candidates):
+    return [
+        {
+            "id": c.id,
+            "name": c.name,
+            "phone": c.phone,
+            "email": c.email,
+            "address": c.address,
+        }
+        for c in candidates
+    ]
+
+
 class OrderFromEstimateAPIView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
@@ -287,190 +297,33 @@ class OrderFromEstimateAPIView(APIView):
         if not estimate_id:
             return Response({"detail": "estimate_id が必要です"}, status=400)
 
-        # 1. 見積ロード
-        try:
-            estimate = (
-                Estimate.objects
-                .select_related("party", "shop")
-                .prefetch_related("items")
-                .get(id=estimate_id)
-            )
-        except Estimate.DoesNotExist:
+        # 1. 見積ロード（明細・車両・スケジュール・支払いまで一括）
+        estimate = estimate_conversion.load_estimates([estimate_id], lock=True).get(int(estimate_id))
+        if estimate is None:
             return Response({"detail": "見積が存在しません"}, status=404)
+        if estimate.status == "ordered":
+            return Response({"detail": "この見積はすでに受注済みです"}, status=409)
 
-        party = estimate.party
-        if not party:
-            return Response({"detail": "見積に顧客情報がありません"}, status=400)
-
-        user = request.user
-        shop = getattr(user.staff, "shop", None)
-
-        # ===============================
         # 2. 顧客決定
-        # ===============================
-        if party.source_customer:
-            # 見積作成時に紐づいていた顧客
-            customer = party.source_customer
-
-        elif selected_customer_id:
-            # フロントで選択された既存顧客
-            try:
-                customer = Customer.objects.get(id=selected_customer_id)
-            except Customer.DoesNotExist:
-                return Response({"detail": "選択された顧客が存在しません"}, status=404)
-
-        else:
-            # 自動マッチング
-            similar = Customer.objects.filter(
-                Q(name=party.name) &
-                (Q(phone=party.phone) | Q(email=party.email))
-            )
-
-            if similar.exists():
-                return Response({
-                    "need_customer_select": True,
-                    "candidates": [
-                        {
-                            "id": c.id,
-                            "name": c.name,
-                            "phone": c.phone,
-                            "email": c.email,
-                            "address": c.address,
-                        }
-                        for c in similar
-                    ]
-                })
-
-            # 新規顧客として登録
-            customer = Customer.objects.create(
-                name=party.name,
-                kana=party.kana,
-                phone=party.phone,
-                email=party.email,
-                mobile_phone=party.mobile_phone,
-                company=party.company,
-                company_phone=party.company_phone,
-                birthdate=party.birthdate,
-                postal_code=party.postal_code,
-                address=party.address,
-                customer_class=party.customer_class,
-                staff=party.staff,           # 見積パーティのstaffを引き継ぐ
-                gender=party.gender,
-                region=party.region,
-                first_shop=party.first_shop or estimate.shop,
-                last_shop=party.last_shop or estimate.shop,
-            )
-
-            party.source_customer = customer
-            party.save(update_fields=["source_customer"])
-
-        # ===============================
-        # 3. 受注作成
-        # ===============================
-        order = Order.objects.create(
-            order_no=generate_next_order_no(shop),
-            shop=shop,
-            estimate=estimate,
-            customer=customer,
-
-            vehicle_mode=estimate.vehicle_mode,
-
-            party_name=customer.name,
-            party_kana=customer.kana,
-            phone=customer.phone,
-            email=customer.email,
-            postal_code=customer.postal_code,
-            address=customer.address,
-
-            status="ordered",
-            order_date=timezone.now().date(),
-
-            # 見積金額をコピー
-            subtotal=estimate.subtotal,
-            discount_total=estimate.discount_total,
-            tax_total=estimate.tax_total,
-            grand_total=estimate.grand_total,
-
-            created_by=user,
-        )
-
-        # ===============================
-        # 4. 明細コピー
-        # ===============================
-        for item in estimate.items.all():
-            OrderItem.objects.create(
-                order=order,
-                item_type=item.item_type,
-                product=item.product,
-                category=item.category,
-                name=item.name,
-                quantity=item.quantity,
-                unit_price=item.unit_price,
-                tax_type=item.tax_type,
-                discount=item.discount,
-                subtotal=item.subtotal,
-                staff=item.staff,
-                sale_type=item.sale_type,
-                labor_cost=item.labor_cost,
-                manufacturer=item.manufacturer,
-            )
-        
-        # ===============================
-        # 5. スケジュールコピー
-        # ===============================
-        estimate_schedules = Schedule.objects.filter(
-            estimate_id=estimate.id,
-        )
-        if not Schedule.objects.filter(order=order).exists():
-            for s in estimate_schedules:
-                Schedule.objects.create(
-                    schedule_type="delivery",
-                    order=order,
-                    customer=order.customer,
-                    shop=order.shop,
-                    staff=order.created_by,
-
-                    title=s.title,
-                    start_at=s.start_at,
-                    end_at=s.end_at,
-
-                    delivery_method=s.delivery_method,
-                    delivery_shop=s.delivery_shop,
-                    description=s.description,
-                )
-
-        # ===============================
-        # 6. 支払いコピー（Estimate → Order）
-        # ===============================
-
-        estimate_ct = ContentType.objects.get_for_model(Estimate)
-        order_ct = ContentType.objects.get_for_model(Order)
-
-        estimate_payments = Payment.objects.filter(
-            content_type=estimate_ct,
-            object_id=estimate.id
-        )
+        try:
+            customer = estimate_conversion.resolve_customer(estimate, selected_customer_id)
+        except estimate_conversion.ConversionError as e:
+            return Response({"detail": e.detail}, status=e.status)
+        except estimate_conversion.CustomerSelectionRequired as e:
+            return Response({
+                "need_customer_select": True,
+                "candidates": _candidates_data(e.candidates),
+            })
 
-        for p in estimate_payments:
-            Payment.objects.create(
-                content_type=order_ct,
-                object_id=order.id,
-                credit_company=p.credit_company,
-                credit_first_payment=p.credit_first_payment,
-                credit_second_payment=p.credit_second_payment,
-                credit_bonus_payment=p.credit_bonus_payment,
-                credit_installments=p.credit_installments,
-                credit_start_month=p.credit_start_month,
+        # 3. 受注作成（明細・車両・スケジュール・支払い・精算・保険のコピー、見積ステータス更新）
+        try:
+            [order] = estimate_conversion.convert_estimates(
+                [(estimate, customer)], request.user, shop=request.user.shop
             )
-
-
-        # ===============================
-        # 7. 見積ステータス更新
-        # ===============================
-        estimate.status = "ordered"
-        estimate.save(update_fields=["status"])
-
-        create_customer_vehicle_from_order(order)
+        except estimate_conversion.ConversionError as e:
+            # 顧客を新規作成していれば一緒に巻き戻す
+            transaction.set_rollback(True)
+            return Response({"detail": e.detail}, status=e.status)
 
         try:
             write_audit_log(
@@ -486,6 +339,86 @@ class OrderFromEstimateAPIView(APIView):
         serializer = OrderDetailSerializer(order, context={"request": request})
         return Response(serializer.data, status=201)
 
+
+# ======================================
+# 見積 → 受注作成（複数の発行済み見積をまとめて）
+# ======================================
+class OrderFromEstimatesBatchAPIView(APIView):
+    """
+    POST { "estimate_ids": [...] }
+    発行済み（issued）で顧客が決まる見積だけを受注にする。
+    似た顧客がいて選択が必要な見積・受注済みの見積などは skipped に理由付きで返す。
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    MAX_ESTIMATES = 200
+
+    @transaction.atomic
+    def post(self, request):
+        estimate_ids = request.data.get("estimate_ids")
+        if not isinstance(estimate_ids, list) or not estimate_ids:
+            return Response({"detail": "estimate_ids が必要です"}, status=400)
+        try:
+            estimate_ids = list(dict.fromkeys(int(i) for i in estimate_ids))
+        except (TypeError, ValueError):
+            return Response({"detail": "estimate_ids は数値のリストで指定してください"}, status=400)
+        if len(estimate_ids) > self.MAX_ESTIMATES:
+            return Response(
+                {"detail": f"一度に受注にできる見積は {self.MAX_ESTIMATES} 件までです"}, status=400
+            )
+
+        estimates = estimate_conversion.load_estimates(estimate_ids, lock=True)
+
+        pairs = []
+        skipped = []
+        for estimate_id in estimate_ids:
+            estimate = estimates.get(estimate_id)
+            if estimate is None:
+                skipped.append({"estimate_id": estimate_id, "reason": "not_found"})
+                continue
+            if estimate.status != "issued":
+                skipped.append({"estimate_id": estimate_id, "reason": f"status_{estimate.status}"})
+                continue
+            try:
+                customer = estimate_conversion.resolve_customer(estimate)
+            except estimate_conversion.ConversionError as e:
+                skipped.append({"estimate_id": estimate_id, "reason": "no_party", "detail": e.detail})
+                continue
+            except estimate_conversion.CustomerSelectionRequired as e:
+                skipped.append({
+                    "estimate_id": estimate_id,
+                    "reason": "need_customer_select",
+                    "candidates": _candidates_data(e.candidates),
+                })
+                continue
+            pairs.append((estimate, customer))
+
+        try:
+            orders = estimate_conversion.convert_estimates(pairs, request.user, shop=request.user.shop)
+        except estimate_conversion.ConversionError as e:
+            transaction.set_rollback(True)
+            return Response({"detail": e.detail}, status=e.status)
+
+        for (estimate, _), order in zip(pairs, orders):
+            try:
+                write_audit_log(
+                    request=request,
+                    action="order.from_estimate",
+                    target_type="order",
+                    target_id=order.id,
+                    summary=f"見積 #{estimate.estimate_no} から受注 #{order.order_no} を作成しました",
+                )
+            except Exception:
+                pass
+
+        return Response({
+            "created": [
+                {"estimate_id": estimate.id, "order_id": order.id, "order_no": order.order_no}
+                for (estimate, _), order in zip(pairs, orders)
+            ],
+            "skipped": skipped,
+        }, status=201 if orders else 200)
+
 # ======================================
 # 見積 → 受注作成（候補返すやつ）
 # ======================================
@@ -716,7 +649,7 @@ class OrderStatusUpdateAPIView(APIView):
         update_fields = ["status"]
 
         if new_status == "ordered" and not order.order_date:
-            order.order_date = date.today()
+            order.order_date = timezone.localdate()
             update_fields.append("order_date")
 
         order.save(update_fields=update_fields)
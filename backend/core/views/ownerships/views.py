@@ -10,14 +10,16 @@ from core.serializers.ownerships import (
     CustomerVehicleCreateSerializer,
     CustomerVehicleWriteSerializer,
 )
+from core.services.sparse_fields import SparseFieldsMixin
 
-class CustomerVehicleListCreateAPIView(generics.ListCreateAPIView):
+class CustomerVehicleListCreateAPIView(SparseFieldsMixin, generics.ListCreateAPIView):
     """
     GET: 顧客の所有車両一覧
       - ?status=current|past|all を将来入れたいならここで filter
     POST: 所有車両の登録
       - 現状は「車両新規作成＋所有関係登録」
       - 今後「vehicle_id 指定（既存Vehicle紐付け）」も対応させる
+    GET は ?fields= / ?omit= / ?expand= で返す項目を選べる（SparseFieldsMixin）
     """
     permission_classes = [IsAuthenticated]
 
@@ -26,16 +28,8 @@ class CustomerVehicleListCreateAPIView(generics.ListCreateAPIView):
 
     def get_queryset(self):
         customer = self.get_customer()
-        qs = CustomerVehicle.objects.filter(customer=customer).select_related(
-            "vehicle",
-            "vehicle__manufacturer",
-            "vehicle__category",
-            "vehicle__color",
-        ).prefetch_related(
-            "vehicle__registrations",
-            "vehicle__insurances",
-            "vehicle__warranties",
-        )
+        # GET の select_related / prefetch_related は SparseFieldsMixin が返す項目から組み立てる
+        qs = CustomerVehicle.objects.filter(customer=customer)
         return qs.order_by("-owned_to", "-owned_from", "-id")
 
     def get_serializer_class(self):
@@ -49,7 +43,7 @@ class CustomerVehicleListCreateAPIView(generics.ListCreateAPIView):
         return Response(CustomerVehicleSerializer(ownership).data, status=status.HTTP_201_CREATED)
 
 
-class CustomerVehicleRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
+class CustomerVehicleRetrieveUpdateDestroyAPIView(SparseFieldsMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     GET: 所有関係詳細（Vehicle含む）
     PATCH/PUT: owned_from / owned_to 更新（手放しもここで対応可能）
@@ -0,0 +1,86 @@
+"""
+帳票ジョブAPI（重い帳票・分析・CSV をワーカーで実行）
+- POST /report-jobs/                 : 登録（同一パラメータの待機中/実行中ジョブがあればそれを返す）
+- GET  /report-jobs/<id>/            : 状態確認
+- GET  /report-jobs/<id>/download/   : 結果取得（JSON / CSV）
+状態確認・結果取得は依頼者本人のみ（管理者ロールは全件）。
+"""
+from django.shortcuts import get_object_or_404
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.models import ReportJob
+from core.permissions import is_manager
+from core.services.report_jobs import submit_job
+from core.utils.file_response import send_file
+
+
+def _get_job(request, pk):
+    """依頼者本人のジョブ（管理者は全件）。他人のジョブは 404"""
+    qs = ReportJob.objects.all()
+    if not is_manager(request.user):
+        qs = qs.filter(requested_by=request.user)
+    return get_object_or_404(qs, pk=pk)
+
+
+def _job_data(job):
+    return {
+        "id":           job.id,
+        "kind":         job.kind,
+        "params":       job.params,
+        "status":       job.status,
+        "error":        job.error,
+        "created_at":   job.created_at,
+        "started_at":   job.started_at,
+        "finished_at":  job.finished_at,
+        "download_url": f"/api/report-jobs/{job.id}/download/" if job.status == "done" else None,
+    }
+
+
+class ReportJobCreateAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        kind = request.data.get("kind")
+        params = request.data.get("params") or {}
+
+        if kind not in dict(ReportJob.KIND_CHOICES):
+            return Response({"detail": "kind が不正です"}, status=400)
+        if not isinstance(params, dict):
+            return Response({"detail": "params はオブジェクトで指定してください"}, status=400)
+
+        job, created = submit_job(kind, params, request.user)
+        return Response(
+            _job_data(job),
+            status=status.HTTP_202_ACCEPTED if created else status.HTTP_200_OK,
+        )
+
+
+class ReportJobDetailAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        job = _get_job(request, pk)
+        return Response(_job_data(job))
+
+
+class ReportJobDownloadAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        job = _get_job(request, pk)
+
+        if job.status != "done":
+            return Response({"detail": "まだ完了していません", "status": job.status}, status=409)
+
+        if job.result_file:
+            return send_file(
+                job.result_file.path,
+                as_attachment=True,
+                filename=job.result_filename or None,
+                content_type=job.result_content_type or "text/csv",
+            )
+
+        return Response(job.result)
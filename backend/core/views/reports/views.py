@@ -6,33 +6,15 @@
 from datetime import datetime, date
 from decimal import Decimal
 
-from django.db.models import Sum, F, Value, DecimalField, OuterRef, Subquery
-from django.db.models.functions import Coalesce
+from django.db.models import F
 from django.contrib.contenttypes.models import ContentType
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.exceptions import ValidationError
 
-from core.models import Order, PaymentRecord, Payment
-
-
-# ─────────────────────────────────────────────
-# 入金済み合計をサブクエリで取得（N+1回避）
-# ─────────────────────────────────────────────
-def _paid_subquery():
-    return Coalesce(
-        Subquery(
-            PaymentRecord.objects.filter(
-                payment_management__order_id=OuterRef("pk")
-            ).values("payment_management__order_id")
-             .annotate(s=Sum("amount"))
-             .values("s")[:1],
-            output_field=DecimalField(max_digits=12, decimal_places=2),
-        ),
-        Value(Decimal("0")),
-        output_field=DecimalField(max_digits=12, decimal_places=2),
-    )
+from core.models import Order, Payment
+from core.services.payment_totals import paid_total_subquery
 
 
 def _parse_dates(request):
@@ -97,7 +79,7 @@ class ReportAPIView(APIView):
             Order.objects
             .filter(delivery_status="delivered")
             .select_related("shop", "created_by")
-            .annotate(paid_amount=_paid_subquery())
+            .annotate(paid_amount=paid_total_subquery())
             .filter(paid_amount__lt=F("grand_total"))
         )
         qs = _apply_shop_filter(qs, request, shop_id)
@@ -0,0 +1,33 @@
+"""
+リクエスト計測の集計API（管理者ロールのみ）
+- GET /admin/request-metrics/?hours=24&limit=20&sort=p95
+    endpoints : URL 名ごとの件数・応答時間 p50/p95/p99・SQL件数・SQL時間
+    n_plus_one: 1リクエスト内で繰り返された SQL（N+1 の疑い）の多い順
+  sort: p95 / p99 / count / queries / sql_time
+"""
+from datetime import timedelta
+
+from django.utils import timezone
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.permissions import IsManager
+from core.services.request_metrics import store, summarize
+
+
+class RequestMetricsAPIView(APIView):
+    # is_staff は従業員取込で全員に付くので使わない
+    permission_classes = [IsManager]
+
+    def get(self, request):
+        try:
+            hours = float(request.query_params.get("hours", 24))
+            limit = int(request.query_params.get("limit", 20))
+        except ValueError:
+            return Response({"detail": "hours / limit は数値で指定してください"}, status=400)
+
+        # このプロセスの未書き出し分も含めて返す
+        store.flush()
+
+        since = timezone.now() - timedelta(hours=hours)
+        return Response(summarize(since, limit=limit, sort=request.query_params.get("sort", "p95")))
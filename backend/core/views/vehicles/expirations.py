@@ -0,0 +1,60 @@
+# core/views/vehicles/expirations.py
+import calendar
+from datetime import date, timedelta
+
+from rest_framework import permissions
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.pagination import ExpirationDatePagination
+from core.services.vehicle_expirations import upcoming_expirations
+
+# 期間を指定しないときの日数（今日から）
+DEFAULT_WINDOW_DAYS = 31
+
+
+def _window(params):
+    """?month=YYYY-MM か ?from=&to=（省略時は今日から DEFAULT_WINDOW_DAYS 日）"""
+    month = params.get("month")
+    try:
+        if month:
+            year, m = (int(x) for x in month.split("-"))
+            return date(year, m, 1), date(year, m, calendar.monthrange(year, m)[1])
+        date_from = date.fromisoformat(params["from"]) if params.get("from") else date.today()
+        date_to = (
+            date.fromisoformat(params["to"]) if params.get("to")
+            else date_from + timedelta(days=DEFAULT_WINDOW_DAYS)
+        )
+    except (TypeError, ValueError):
+        raise ValidationError("期間は month (YYYY-MM) か from / to (YYYY-MM-DD) で指定してください")
+    return date_from, date_to
+
+
+class VehicleExpirationListAPIView(APIView):
+    """
+    GET /api/vehicles/expirations/?kind=inspection|insurance&month=YYYY-MM&shop_id=1
+    満了が近い車検・保険（現在の所有者付き）を満了日の近い順に返す。
+    ?from=&to= で期間、?insurance_type=mandatory|optional で保険の種類を指定できる。
+    ?limit= を指定するとキーセットページング（?cursor=）。
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ExpirationDatePagination
+
+    def get(self, request):
+        params = request.query_params
+        date_from, date_to = _window(params)
+        shop_id = params.get("shop_id")
+        rows = upcoming_expirations(
+            params.get("kind", "inspection"),
+            date_from,
+            date_to,
+            shop_id=None if shop_id in (None, "", "all") else shop_id,
+            insurance_type=params.get("insurance_type") or None,
+        )
+
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(rows, request)
+        if page is not None:
+            return paginator.get_paginated_response(page)
+        return Response(list(rows.order_by(*paginator.get_ordering())))
@@ -27,6 +27,7 @@ from core.serializers.vehicles import (
     VehicleWriteSerializer,
     VehicleDetailSerializer,
 )
+from core.services.sparse_fields import SparseFieldsMixin
 
 
 # 顧客ごとの車両一覧・登録
@@ -47,12 +48,7 @@ class CustomerVehicleListCreateAPIView(generics.ListCreateAPIView):
                 "vehicle__manufacturer",
                 "vehicle__category",
                 "vehicle__color",
-            )
-            .prefetch_related(
-                Prefetch(
-                    "vehicle__registrations",
-                    queryset=VehicleRegistration.objects.order_by("-created_at")[:1],
-                )
+                "vehicle__current_registration",
             )
             .order_by("-owned_to", "-owned_from", "-id")
         )
@@ -91,7 +87,7 @@ class CustomerVehicleDestroyAPIView(generics.DestroyAPIView):
 
 
 # 単体車両詳細
-class VehicleDetailAPIView(generics.RetrieveAPIView):
+class VehicleDetailAPIView(SparseFieldsMixin, generics.RetrieveAPIView):
     queryset = Vehicle.objects.all()
     serializer_class = VehicleDetailSerializer
 
@@ -101,54 +97,30 @@ class VehicleUpdateAPIView(generics.UpdateAPIView):
     serializer_class = VehicleWriteSerializer
 
 # 顧客の現所有＋過去所有車両一覧
-class CustomerVehicleAllListAPIView(generics.GenericAPIView):
+class CustomerVehicleAllListAPIView(SparseFieldsMixin, generics.GenericAPIView):
+    """
+    ?fields= / ?omit= / ?expand= で返す項目を選べる。関連の読み込みは返す項目だけ
+    （既定では memos / owners を返さない。必要なら ?expand=memos,owners）
+    """
     serializer_class = VehicleDetailSerializer
 
     def get(self, request, *args, **kwargs):
         customer_id = self.kwargs["customer_id"]
+        vehicles = self.filter_queryset(Vehicle.objects.order_by("id"))
 
-        related_prefetch = [
-            Prefetch("vehicle__registrations", queryset=VehicleRegistration.objects.all()),
-            Prefetch("vehicle__insurances", queryset=VehicleInsurance.objects.all()),
-            Prefetch("vehicle__warranties", queryset=VehicleWarranty.objects.all()),
-            Prefetch("vehicle__memos", queryset=VehicleMemo.objects.all()),
-            "vehicle__customer_vehicles", 
-        ]
-
-        # 現在所有（owned_to が NULL）
-        current_vehicles = (
-            CustomerVehicle.objects.filter(customer_id=customer_id, owned_to__isnull=True)
-            .select_related(
-                "vehicle",
-                "vehicle__manufacturer",
-                "vehicle__category",
-                "vehicle__color",
-            )
-            .prefetch_related(*related_prefetch)
+        # 現在所有（owned_to が NULL）／過去所有（owned_to に日付あり）
+        current_vehicles = vehicles.filter(
+            customer_vehicles__customer_id=customer_id, customer_vehicles__owned_to__isnull=True
         )
-
-        # 過去所有（owned_to に日付あり）
-        past_vehicles = (
-            CustomerVehicle.objects.filter(customer_id=customer_id, owned_to__isnull=False)
-            .select_related(
-                "vehicle",
-                "vehicle__manufacturer",
-                "vehicle__category",
-                "vehicle__color",
-            )
-            .prefetch_related(*related_prefetch)
+        past_vehicles = vehicles.filter(
+            customer_vehicles__customer_id=customer_id, customer_vehicles__owned_to__isnull=False
         )
 
-        # 各 Vehicle をシリアライザで展開
-        current_data = VehicleDetailSerializer(
-            [cv.vehicle for cv in current_vehicles], many=True
-        ).data
-        past_data = VehicleDetailSerializer(
-            [cv.vehicle for cv in past_vehicles], many=True
-        ).data
-
         return Response(
-            {"current": current_data, "past": past_data},
+            {
+                "current": self.get_serializer(current_vehicles, many=True).data,
+                "past": self.get_serializer(past_vehicles, many=True).data,
+            },
             status=status.HTTP_200_OK,
         )
 
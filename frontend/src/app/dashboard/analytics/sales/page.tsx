@@ -25,9 +25,27 @@ import JaDatePicker from "@/components/common/JaDatePicker";
 // 型・定数
 // ========================
 type DailyData = { date: string; estimate: number; order: number; sales: number };
-type FullList  = { estimates: any[]; orders: any[]; sales: any[] };
+type ListKind  = "estimates" | "orders" | "sales";
+type ListSummary = {
+  count: number; total: number | string;
+  ordered_count?: number; ordered_total?: number | string;
+};
+// 一覧は1ページ目だけ受け取り、件数・合計は summary（期間全体）を使う
+type FullList  = {
+  estimates: any[]; orders: any[]; sales: any[];
+  summary: Record<ListKind, ListSummary>;
+  next_cursors: Record<ListKind, string | null>;
+};
 type AggUnit   = "day" | "week" | "month";
 
+const LIST_PAGE_SIZE = 100;
+const EMPTY_SUMMARY: ListSummary = { count: 0, total: 0 };
+const EMPTY_LIST: FullList = {
+  estimates: [], orders: [], sales: [],
+  summary: { estimates: EMPTY_SUMMARY, orders: EMPTY_SUMMARY, sales: EMPTY_SUMMARY },
+  next_cursors: { estimates: null, orders: null, sales: null },
+};
+
 const fmt = (n: number) => "¥" + Math.round(n).toLocaleString("ja-JP");
 const pct = (curr: number, prev: number): number | null =>
   prev === 0 ? null : ((curr - prev) / prev) * 100;
@@ -227,9 +245,9 @@ function OrderTable({ rows, onRowClick, dateKey, noKey }: {
           <TableRow key={r.id} hover sx={{ cursor: "pointer" }} onClick={() => onRowClick(r.id)}>
             <TableCell>{r[noKey] ?? "-"}</TableCell>
             <TableCell>{r[dateKey] ?? r.created_at?.slice(0, 10) ?? "-"}</TableCell>
-            <TableCell>{r.party_name ?? r.party?.name ?? "-"}</TableCell>
+            <TableCell>{r.customer_name ?? "-"}</TableCell>
             <TableCell align="right">{fmt(Number(r.grand_total))}</TableCell>
-            <TableCell>{r.created_by?.display_name ?? "-"}</TableCell>
+            <TableCell>{r.staff_name ?? "-"}</TableCell>
           </TableRow>
         ))}
       </TableBody>
@@ -262,9 +280,9 @@ function EstimateTable({ rows, onRowClick }: {
           <TableRow key={r.id} hover sx={{ cursor: "pointer" }} onClick={() => onRowClick(r.id)}>
             <TableCell>{r.estimate_no ?? "-"}</TableCell>
             <TableCell>{r.estimate_date ?? r.created_at?.slice(0, 10) ?? "-"}</TableCell>
-            <TableCell>{r.party?.name ?? "-"}</TableCell>
+            <TableCell>{r.customer_name ?? "-"}</TableCell>
             <TableCell align="right">{fmt(Number(r.grand_total))}</TableCell>
-            <TableCell>{r.created_by?.display_name ?? "-"}</TableCell>
+            <TableCell>{r.staff_name ?? "-"}</TableCell>
           </TableRow>
         ))}
       </TableBody>
@@ -299,7 +317,9 @@ export default function SalesAnalyticsPage() {
   // ── データ ──
   const [data,     setData]     = useState<DailyData[]>([]);
   const [prevData, setPrevData] = useState<DailyData[]>([]);
-  const [fullList, setFullList] = useState<FullList>({ estimates: [], orders: [], sales: [] });
+  const [fullList, setFullList] = useState<FullList>(EMPTY_LIST);
+  const [listParams, setListParams] = useState<Record<string, any>>({});
+  const [loadingMore, setLoadingMore] = useState<ListKind | null>(null);
   const [loading,  setLoading]  = useState(false);
   const [tab,      setTab]      = useState(0); // 0=受注, 1=見積, 2=売上
 
@@ -337,7 +357,7 @@ export default function SalesAnalyticsPage() {
     setPeriodMode(val);
     setData([]);
     setPrevData([]);
-    setFullList({ estimates: [], orders: [], sales: [] });
+    setFullList(EMPTY_LIST);
     if (val === "month") fetchAll(monthStart, monthEnd);
   };
 
@@ -352,12 +372,13 @@ export default function SalesAnalyticsPage() {
       const [dailyRes, prevDailyRes, listRes] = await Promise.all([
         apiClient.get("/analytics/sales-daily/", { params }),
         apiClient.get("/analytics/sales-daily/", { params: prevParams }),
-        apiClient.get("/analytics/sales-list/",  { params }),
+        apiClient.get("/analytics/sales-list/",  { params: { ...params, limit: LIST_PAGE_SIZE } }),
       ]);
 
       setData(dailyRes.data);
       setPrevData(prevDailyRes.data);
       setFullList(listRes.data);
+      setListParams(params);
     } catch (e) {
       console.error(e);
     } finally {
@@ -365,6 +386,27 @@ export default function SalesAnalyticsPage() {
     }
   };
 
+  // 一覧の続き（種類ごとにキーセットページング）
+  const loadMore = async (kind: ListKind) => {
+    const cursor = fullList.next_cursors[kind];
+    if (!cursor) return;
+    setLoadingMore(kind);
+    try {
+      const res = await apiClient.get("/analytics/sales-list/", {
+        params: { ...listParams, kind, cursor, limit: LIST_PAGE_SIZE },
+      });
+      setFullList((prev) => ({
+        ...prev,
+        [kind]: [...prev[kind], ...res.data.results],
+        next_cursors: { ...prev.next_cursors, [kind]: res.data.next_cursor },
+      }));
+    } catch (e) {
+      console.error(e);
+    } finally {
+      setLoadingMore(null);
+    }
+  };
+
   // 集計
   const chartData = aggregateData(data, aggUnit);
 
@@ -376,14 +418,16 @@ export default function SalesAnalyticsPage() {
   const prevEstimateTotal = prevData.reduce((s, d) => s + d.estimate, 0);
   const prevSalesTotal    = prevData.reduce((s, d) => s + d.sales,    0);
 
-  const orderCount    = fullList.orders.length;
-  const estimateCount = fullList.estimates.length;
-  const salesCount    = (fullList.sales || []).length;
+  const orderCount    = fullList.summary.orders.count;
+  const estimateCount = fullList.summary.estimates.count;
+  const salesCount    = fullList.summary.sales.count;
 
   // 見積→受注 転換率の分子：同期間の見積のうちステータスが「受注済」のもの
-  const orderedEstimates      = (fullList.estimates as any[]).filter((e) => e.status === "ordered");
-  const orderedEstimateCount  = orderedEstimates.length;
-  const orderedEstimateTotal  = orderedEstimates.reduce((s: number, e: any) => s + Number(e.grand_total || 0), 0);
+  const orderedEstimateCount  = fullList.summary.estimates.ordered_count ?? 0;
+  const orderedEstimateTotal  = Number(fullList.summary.estimates.ordered_total || 0);
+
+  // 表示中のタブの一覧（タブ順：見積・受注・売上）
+  const tabKind: ListKind = (["estimates", "orders", "sales"] as const)[tab];
 
   // 直接受注数（見積を経由せずに作成された受注の概算）
   const directOrderCount = Math.max(0, orderCount - orderedEstimateCount);
@@ -613,11 +657,25 @@ export default function SalesAnalyticsPage() {
         )}
         {tab === 2 && (
           <OrderTable
-            rows={fullList.sales || []}
+            rows={fullList.sales}
             onRowClick={(id) => router.push(`/dashboard/orders/${id}`)}
             dateKey="sales_date" noKey="order_no"
           />
         )}
+
+        {fullList.next_cursors[tabKind] && (
+          <Box sx={{ textAlign: "center", mt: 2 }}>
+            <Button
+              variant="outlined" size="small"
+              disabled={loadingMore === tabKind}
+              onClick={() => loadMore(tabKind)}
+            >
+              {loadingMore === tabKind
+                ? "読み込み中..."
+                : `さらに表示（${fullList[tabKind].length} / ${fullList.summary[tabKind].count}件）`}
+            </Button>
+          </Box>
+        )}
       </Paper>
     </Box>
   );
@@ -33,6 +33,10 @@ type Thread = {
   sender_name?: string;
   receiver_name?: string;
   updated_at?: string;
+  last_message_at?: string | null;
+  last_message_preview?: string;
+  message_count?: number;
+  pending_count?: number;
   messages?: any[];
 };
 
@@ -136,9 +140,9 @@ export default function DashboardPage() {
                             {t.sender_name} → {t.receiver_name}
                             {t.customer && `　顧客：${t.customer.name}`}
                           </Typography>
-                          {t.messages?.[0]?.content && (
+                          {t.last_message_preview && (
                             <Typography variant="caption" color="text.disabled" noWrap display="block">
-                              {t.messages[0].content}
+                              {t.last_message_preview}
                             </Typography>
                           )}
                         </Box>
@@ -14,6 +14,10 @@ type Thread = {
   sender_name?: string;
   receiver_name?: string;
   updated_at?: string;
+  last_message_at?: string | null;
+  last_message_preview?: string;
+  message_count?: number;
+  pending_count?: number;
   messages?: any[];
 };
 
@@ -40,8 +44,8 @@ export default function BusinessCommunicationCard({
   const [dialogOpen, setDialogOpen] = useState(false);
 
   const isPending = item.status === "pending";
-  const latestMessage = item.messages?.[item.messages.length - 1]?.content ?? "";
-  const messageCount  = item.messages?.length ?? 0;
+  const latestMessage = item.last_message_preview ?? "";
+  const messageCount  = item.message_count ?? 0;
 
   return (
     <>
@@ -23,6 +23,10 @@ export type BusinessCommunicationThread = {
   sender_name?: string;
   receiver_name?: string;
   updated_at?: string;
+  last_message_at?: string | null;
+  last_message_preview?: string;
+  message_count?: number;
+  pending_count?: number;
   messages?: BusinessCommunicationMessage[];
 };
 
@@ -14,7 +14,15 @@ import apiClient from "@/lib/apiClient";
 import { compressImage } from "@/lib/compressImage";
 import ImageLightbox from "@/components/common/ImageLightbox";
 
-type CustomerImage = { id: number; image: string; width?: number; height?: number; bytes?: number };
+type CustomerImage = {
+  id: number;
+  image: string;
+  thumbnail?: string | null;   // 一覧用（サーバーで作成されるまでは null）
+  preview?: string | null;     // 拡大表示用
+  width?: number;
+  height?: number;
+  bytes?: number;
+};
 
 /** 相対パス（/media/...）の場合、APIのベースURLホストを補完する */
 const resolveImageUrl = (url: string): string => {
@@ -176,7 +184,7 @@ export default function CustomerImages({ customerId }: { customerId: number }) {
               }}
             >
               <img
-                src={resolveImageUrl(img.image)}
+                src={resolveImageUrl(img.thumbnail || img.image)}
                 alt=""
                 style={{ width: "100%", height: "100%", objectFit: "cover", display: "block" }}
                 loading="lazy"
@@ -214,7 +222,7 @@ export default function CustomerImages({ customerId }: { customerId: number }) {
       {/* ── ライトボックス ── */}
       <ImageLightbox
         images={images.map(img => ({
-          src:  resolveImageUrl(img.image),
+          src:  resolveImageUrl(img.preview || img.image),
           name: img.image.split("/").pop(),
         }))}
         index={lightbox}
@@ -12,7 +12,12 @@ import apiClient from "@/lib/apiClient";
 import { compressImage } from "@/lib/compressImage";
 import ImageLightbox from "@/components/common/ImageLightbox";
 
-type VehicleImage = { id: number; image: string };
+type VehicleImage = {
+  id: number;
+  image: string;
+  thumbnail?: string | null;   // 一覧用（サーバーで作成されるまでは null）
+  preview?: string | null;     // 拡大表示用
+};
 type Props = { vehicleId: number };
 
 /** 相対パス（/media/...）の場合、APIのベースURLホストを補完する */
@@ -164,7 +169,7 @@ export default function VehicleImages({ vehicleId }: Props) {
               }}
             >
               <img
-                src={resolveImageUrl(img.image)}
+                src={resolveImageUrl(img.thumbnail || img.image)}
                 style={{ width: "100%", height: "100%", objectFit: "cover", display: "block" }}
                 loading="lazy"
               />
@@ -200,7 +205,7 @@ export default function VehicleImages({ vehicleId }: Props) {
       {/* ── ライトボックス ── */}
       <ImageLightbox
         images={images.map(img => ({
-          src:  resolveImageUrl(img.image),
+          src:  resolveImageUrl(img.preview || img.image),
           name: img.image.split("/").pop(),
         }))}
         index={lightbox}